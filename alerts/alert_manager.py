@@ -1,23 +1,208 @@
 # alerts/alert_manager.py
 
+import asyncio
 import json
-from typing import List
+import os
+import time
+from collections import deque
+from typing import Dict
 from fastapi import WebSocket
+from alerts.pubsub import AlertFilter, alert_topic, create_pubsub
+from utils.metrics import stage_seconds, alert_delivery_lag_seconds
+
+# Per-client fan-out settings
+ALERT_QUEUE_SIZE = int(os.environ.get("ALERT_QUEUE_SIZE", "256"))
+# What happens when a client's queue is full: "drop_oldest" or "disconnect"
+ALERT_OVERFLOW_POLICY = os.environ.get("ALERT_OVERFLOW_POLICY", "drop_oldest")
+# Clients that opt in (/ws/alerts?batch=1) get up to this many queued alerts
+# as one JSON array frame; everyone else gets one JSON object per frame
+ALERT_SEND_BATCH = int(os.environ.get("ALERT_SEND_BATCH", "32"))
+# A client that cannot take a frame within this time is disconnected
+ALERT_SEND_TIMEOUT_SECONDS = float(os.environ.get("ALERT_SEND_TIMEOUT_SECONDS", "10"))
+
+OVERFLOW_POLICIES = ("drop_oldest", "disconnect")
+
+_broadcast_timer = stage_seconds.labels("alerts.broadcast")
+_delivery_lag = alert_delivery_lag_seconds.labels()
+
+class ClientChannel:
+    """
+    The send side of one websocket: a bounded queue of serialized messages and
+    the writer task that drains it. With `batch_size` 1 every message is its
+    own frame; larger sizes send what has piled up as JSON arrays.
+    """
+    def __init__(self, websocket: WebSocket, max_queue=ALERT_QUEUE_SIZE, batch_size=1,
+                 alert_filter=None):
+        self.websocket = websocket
+        self.filter = alert_filter or AlertFilter()
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.queue = deque()
+        self._ready = asyncio.Event()
+        self.task = None
+        self.sent = 0
+        self.frames = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def push(self, message_str: str, enqueued_at: float, policy=ALERT_OVERFLOW_POLICY) -> bool:
+        """
+        Queues one serialized message without waiting.
+
+        Returns:
+            bool: False if the queue was full and the policy is "disconnect".
+        """
+        if len(self.queue) >= self.max_queue:
+            if policy == "disconnect":
+                return False
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append((message_str, enqueued_at))
+        self._ready.set()
+        return True
+
+    async def run(self, on_error):
+        """
+        Sends queued messages until cancelled, coalescing whatever has piled up
+        (up to `batch_size`) into a single frame.
+        """
+        try:
+            while True:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                count = min(len(self.queue), self.batch_size)
+                batch = [self.queue.popleft() for _ in range(count)]
+                if count == 1:
+                    frame = batch[0][0]
+                else:
+                    # Messages are already JSON, so the array is built without re-serializing.
+                    frame = "[" + ",".join(message_str for message_str, _ in batch) + "]"
+                await asyncio.wait_for(self.websocket.send_text(frame), ALERT_SEND_TIMEOUT_SECONDS)
+                lag = time.perf_counter() - batch[0][1]
+                _delivery_lag.observe(lag)
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self.sent += count
+                self.frames += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Dropping alert subscriber after failed send: {e!r}")
+            on_error(self.websocket)
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self.queue),
+            "sent": self.sent,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "batch_size": self.batch_size,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "filter": self.filter.describe(),
+        }
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List = []
+    """
+    Fans alerts out to the connected websockets that subscribed to them.
 
-    async def connect(self, websocket: WebSocket):
+    `broadcast` publishes an alert with its topic (see alerts/pubsub.py); the
+    pub/sub transport hands it to `deliver` in this and, with a broker, every
+    other worker process. `deliver` picks the clients whose filter matches,
+    serializes the message once if any do, and appends it to each client's
+    bounded queue; a writer task per client does the actual sends. A slow or
+    dead client therefore only delays itself, never the analysis request that
+    produced the alert. Clients connected with `batch` receive queued alerts
+    in arrays of up to `batch_size`.
+    """
+    def __init__(self, max_queue=ALERT_QUEUE_SIZE, overflow_policy=ALERT_OVERFLOW_POLICY, batch_size=ALERT_SEND_BATCH,
+                 pubsub=None):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}, got '{overflow_policy}'")
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.batch_size = batch_size
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self.broadcasts = 0
+        self.delivered = 0
+        self.overflow_disconnects = 0
+        self.pubsub = pubsub or create_pubsub()
+        self.pubsub.subscribe(self.deliver)
+
+    @property
+    def active_connections(self) -> list:
+        return list(self.channels)
+
+    async def start(self):
+        await self.pubsub.start()
+
+    async def close(self):
+        await self.pubsub.close()
+
+    async def connect(self, websocket: WebSocket, alert_filter=None, batch=False):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        channel = ClientChannel(websocket, max_queue=self.max_queue, batch_size=self.batch_size if batch else 1,
+                                alert_filter=alert_filter)
+        channel.task = asyncio.create_task(channel.run(self.disconnect))
+        self.channels[websocket] = channel
+
+    def set_filter(self, websocket: WebSocket, alert_filter):
+        if websocket in self.channels:
+            self.channels[websocket].filter = alert_filter
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        channel = self.channels.pop(websocket, None)
+        if channel is not None and channel.task is not asyncio.current_task():
+            channel.task.cancel()
+
+    async def _close_slow_client(self, websocket: WebSocket):
+        try:
+            # 1008: policy violation (the client fell too far behind)
+            await asyncio.wait_for(websocket.close(code=1008), ALERT_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
 
     async def broadcast(self, message: dict):
-        """Broadcasts a message to all connected clients."""
-        message_str = json.dumps(message)
-        for connection in self.active_connections:
-            await connection.send_text(message_str)
\ No newline at end of file
+        """Broadcasts a message to all subscribed clients, in every worker process."""
+        self.broadcasts += 1
+        with _broadcast_timer.time():
+            await self.pubsub.publish(alert_topic(message), message)
+
+    def deliver(self, topic: dict, message=None, message_str=None):
+        """
+        Queues an alert for the local clients whose filter matches `topic`.
+        Either the message dict or its JSON string is given.
+        """
+        # Snapshot: disconnects may happen while we push.
+        matching = [(websocket, channel) for websocket, channel in list(self.channels.items())
+                    if channel.filter.matches(topic)]
+        if not matching:
+            return
+        if message_str is None:
+            message_str = json.dumps(message)
+        enqueued_at = time.perf_counter()
+        self.delivered += 1
+        for websocket, channel in matching:
+            if not channel.push(message_str, enqueued_at, self.overflow_policy):
+                self.overflow_disconnects += 1
+                self.disconnect(websocket)
+                asyncio.create_task(self._close_slow_client(websocket))
+
+    def stats(self) -> dict:
+        clients = [channel.stats() for channel in self.channels.values()]
+        return {
+            "clients": len(clients),
+            "broadcasts": self.broadcasts,
+            "delivered": self.delivered,
+            "pubsub": self.pubsub.stats(),
+            "overflow_policy": self.overflow_policy,
+            "overflow_disconnects": self.overflow_disconnects,
+            "dropped": sum(client["dropped"] for client in clients),
+            "queued": sum(client["queued"] for client in clients),
+            "max_lag_ms": max((client["max_lag_ms"] for client in clients), default=0.0),
+            "laggiest": sorted(clients, key=lambda client: client["queued"], reverse=True)[:10],
+        }
\ No newline at end of file
@@ -0,0 +1,346 @@
+# alerts/pubsub.py
+
+"""
+Alert topics, subscription filters and the pub/sub transports behind
+ConnectionManager.
+
+Every alert is published with a topic: its channel (text, audio, video...),
+its risk level and the session it belongs to. Websocket clients subscribe
+with an AlertFilter over those three fields.
+
+Transports:
+    memory  in-process only (a single uvicorn worker)
+    unix    a local broker on a Unix socket, so alerts published by any worker
+            process reach subscribers connected to any other. The first process
+            to take the lock file runs the broker; if it exits, another takes over.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+
+ALERT_PUBSUB = os.environ.get("ALERT_PUBSUB", "memory")
+ALERT_BROKER_SOCKET = os.environ.get("ALERT_BROKER_SOCKET", "/tmp/scam-detection-alerts.sock")
+# Peers whose unsent backlog grows past this are dropped by the broker
+ALERT_BROKER_MAX_BUFFER = int(os.environ.get("ALERT_BROKER_MAX_BUFFER", str(16 * 1024 * 1024)))
+ALERT_BROKER_MAX_MESSAGE = 4 * 1024 * 1024
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+# Lowest 0-100 risk score of each level, highest first
+RISK_THRESHOLDS = (("CRITICAL", 80), ("HIGH", 50), ("MEDIUM", 25))
+
+# Alert type -> channel, for messages that do not carry a "channel" field
+ALERT_CHANNELS = {
+    "text_analysis": "text",
+    "audio_analysis": "audio",
+    "audio_partial": "audio",
+    "video_frame_analysis": "video",
+    "session_verdict": "session",
+}
+
+def risk_level_for(risk_score: float) -> str:
+    """
+    The risk level of a 0-100 risk score.
+    """
+    for level, threshold in RISK_THRESHOLDS:
+        if risk_score >= threshold:
+            return level
+    return "LOW"
+
+def _risk_from_confidence(flagged, confidence):
+    if not flagged:
+        return "LOW"
+    return "HIGH" if confidence >= 0.8 else "MEDIUM"
+
+def risk_level_of(message: dict) -> str:
+    """
+    The risk level of an alert: its own "risk_level" if it has one, otherwise
+    derived from the model verdicts it carries.
+    """
+    if message.get("risk_level") in RISK_LEVELS:
+        return message["risk_level"]
+    levels = ["LOW"]
+    alert_type = message.get("type")
+    if alert_type == "text_analysis":
+        result = message.get("result") or {}
+        levels.append(_risk_from_confidence(result.get("is_scam"), result.get("confidence", 0)))
+    elif alert_type in ("audio_analysis", "audio_partial"):
+        text_result = message.get("text_analysis") or {}
+        spoof_result = message.get("spoof_analysis") or {}
+        levels.append(_risk_from_confidence(text_result.get("is_scam"), text_result.get("confidence", 0)))
+        levels.append(_risk_from_confidence(spoof_result.get("is_spoof"), spoof_result.get("confidence", 0)))
+        if text_result.get("is_scam") and spoof_result.get("is_spoof"):
+            # A scam script read by a cloned voice
+            levels.append("CRITICAL")
+    elif alert_type == "video_frame_analysis":
+        result = message.get("result") or {}
+        if result.get("face_detected"):
+            levels.append(_risk_from_confidence(not result.get("is_real"), result.get("confidence", 0)))
+    return max(levels, key=RISK_LEVELS.index)
+
+def alert_topic(message: dict) -> dict:
+    """
+    The routing fields of an alert.
+    """
+    return {
+        "channel": message.get("channel") or ALERT_CHANNELS.get(message.get("type"), "other"),
+        "risk_level": risk_level_of(message),
+        "session": message.get("session_id"),
+    }
+
+def _as_set(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    return {str(item).strip() for item in value if str(item).strip()} or None
+
+class AlertFilter:
+    """
+    Which alerts a client wants. Each field left as None matches everything.
+    """
+    def __init__(self, channels=None, risk_levels=None, min_risk=None, sessions=None):
+        """
+        Args:
+            channels (iterable or str): Channels to receive, e.g. {"text", "audio"} or "text,audio".
+            risk_levels (iterable or str): Exact risk levels to receive.
+            min_risk (str): Lowest risk level to receive.
+            sessions (iterable or str): Session ids to receive.
+        """
+        self.channels = _as_set(channels)
+        self.risk_levels = {level.upper() for level in _as_set(risk_levels) or ()} or None
+        self.min_risk = min_risk.upper() if min_risk else None
+        self.sessions = _as_set(sessions)
+        for level in (self.risk_levels or set()) | ({self.min_risk} if self.min_risk else set()):
+            if level not in RISK_LEVELS:
+                raise ValueError(f"Unknown risk level '{level}', expected one of {RISK_LEVELS}")
+
+    @classmethod
+    def from_params(cls, params) -> "AlertFilter":
+        """
+        Builds a filter from query parameters or a subscribe message:
+        `channel`, `risk`, `min_risk` and `session`, each comma-separated.
+        """
+        return cls(
+            channels=params.get("channel"),
+            risk_levels=params.get("risk"),
+            min_risk=params.get("min_risk"),
+            sessions=params.get("session")
+        )
+
+    def matches(self, topic: dict) -> bool:
+        if self.channels is not None and topic["channel"] not in self.channels:
+            return False
+        if self.risk_levels is not None and topic["risk_level"] not in self.risk_levels:
+            return False
+        if self.min_risk is not None and RISK_LEVELS.index(topic["risk_level"]) < RISK_LEVELS.index(self.min_risk):
+            return False
+        if self.sessions is not None and topic["session"] not in self.sessions:
+            return False
+        return True
+
+    def describe(self) -> dict:
+        return {
+            "channel": sorted(self.channels) if self.channels else None,
+            "risk": sorted(self.risk_levels) if self.risk_levels else None,
+            "min_risk": self.min_risk,
+            "session": sorted(self.sessions) if self.sessions else None,
+        }
+
+# --- Transports ---
+
+class InMemoryPubSub:
+    """
+    Delivers published alerts to the subscribers of this process only.
+
+    Subscribers are called as `callback(topic, message=..., message_str=...)`;
+    here only the dict is passed, so nothing is serialized unless a client
+    matches.
+    """
+    def __init__(self):
+        self._subscribers = []
+        self.published = 0
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _deliver(self, topic, message=None, message_str=None):
+        for callback in self._subscribers:
+            callback(topic, message=message, message_str=message_str)
+
+    async def start(self):
+        pass
+
+    async def publish(self, topic: dict, message: dict):
+        self.published += 1
+        self._deliver(topic, message=message)
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"transport": "memory", "published": self.published}
+
+
+class UnixSocketPubSub(InMemoryPubSub):
+    """
+    Relays alerts between the worker processes on one host.
+
+    Each process delivers its own alerts locally and writes them to the broker
+    as one line: the topic JSON, a tab, and the message JSON. The broker copies
+    each line to every other process, which routes it on the topic alone and
+    hands the message string to its clients without re-serializing it.
+    Alerts published while no broker is reachable are only delivered locally.
+    """
+    def __init__(self, path=ALERT_BROKER_SOCKET):
+        super().__init__()
+        self.path = path
+        self._lock_file = None
+        self._server = None
+        self._peers = set()
+        self._peer_tasks = set()
+        self._writer = None
+        self._task = None
+        self.received = 0
+        self.relayed = 0
+        self.dropped_peers = 0
+
+    @property
+    def is_broker(self) -> bool:
+        return self._server is not None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    def _try_become_broker(self) -> bool:
+        if self._lock_file is None:
+            self._lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    async def _start_broker(self):
+        # We hold the lock, so any socket file left behind belongs to a dead broker.
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve_peer, self.path, limit=ALERT_BROKER_MAX_MESSAGE)
+        print(f"Alert broker listening on {self.path} (pid {os.getpid()}).")
+
+    async def _serve_peer(self, reader, writer):
+        self._peers.add(writer)
+        self._peer_tasks.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in list(self._peers):
+                    if peer is writer:
+                        continue
+                    if peer.transport.get_write_buffer_size() > ALERT_BROKER_MAX_BUFFER:
+                        self._peers.discard(peer)
+                        self.dropped_peers += 1
+                        peer.close()
+                        continue
+                    peer.write(line)
+                self.relayed += 1
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            self._peer_tasks.discard(asyncio.current_task())
+            writer.close()
+
+    async def _maintain(self):
+        """
+        Keeps a connection to the broker, taking over as broker when none is running.
+        """
+        while True:
+            if self._server is None and self._try_become_broker():
+                try:
+                    await self._start_broker()
+                except OSError as e:
+                    print(f"Could not start alert broker on {self.path}: {e!r}")
+                    await asyncio.sleep(1)
+                    continue
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=ALERT_BROKER_MAX_MESSAGE)
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.sleep(0.2)
+                continue
+            self._writer = writer
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    topic_json, _, message_str = line.decode("utf-8").rstrip("\n").partition("\t")
+                    self.received += 1
+                    self._deliver(json.loads(topic_json), message_str=message_str)
+            except (ConnectionError, ValueError) as e:
+                print(f"Alert broker connection lost: {e!r}")
+            finally:
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(0.1)
+
+    async def publish(self, topic: dict, message: dict):
+        self.published += 1
+        if self._writer is None:
+            self._deliver(topic, message=message)
+            return
+        # The wire needs the JSON anyway, so serialize once and reuse it locally.
+        message_str = json.dumps(message)
+        self._deliver(topic, message_str=message_str)
+        self._writer.write(json.dumps(topic).encode("utf-8") + b"\t" + message_str.encode("utf-8") + b"\n")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._server is not None:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            if self._peer_tasks:
+                # Let the peer handlers see EOF and finish rather than being cancelled.
+                await asyncio.wait(list(self._peer_tasks), timeout=1)
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self._lock_file is not None:
+            # Closing the file releases the lock for the next broker.
+            self._lock_file.close()
+            self._lock_file = None
+
+    def stats(self) -> dict:
+        return {
+            "transport": "unix",
+            "path": self.path,
+            "broker": self.is_broker,
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "peers": len(self._peers),
+            "relayed": self.relayed,
+            "dropped_peers": self.dropped_peers,
+        }
+
+PUBSUB_TRANSPORTS = {"memory": InMemoryPubSub, "unix": UnixSocketPubSub}
+
+def create_pubsub(transport=ALERT_PUBSUB):
+    if transport not in PUBSUB_TRANSPORTS:
+        raise ValueError(f"Unknown alert pub/sub transport '{transport}', expected one of {sorted(PUBSUB_TRANSPORTS)}")
+    return PUBSUB_TRANSPORTS[transport]()
\ No newline at end of file
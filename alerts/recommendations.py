@@ -1,36 +1,241 @@
-class RecommendationEngine:
-    """
-    Provides actionable recommendations based on detected fraud signals.
+import json
+import os
+import threading
+import time
+from utils.phrase_matcher import PhraseMatcher
 
-    This engine uses a simple rule-based mapping to link specific findings
-    from the detection models to concrete, easy-to-understand advice for the user.
-    The goal is to empower the user to take immediate, appropriate action to
-    protect themselves.
-    """
-    def __init__(self):
-        # A mapping from keywords found in model findings to recommendations.
-        self.recommendation_map = {
-            'scam': [
+# An advice catalog file (JSON, see `load_catalog`), e.g. a localized one.
+# Without one the built-in English catalog is used.
+RECOMMENDATION_CATALOG_PATH = os.environ.get("RECOMMENDATION_CATALOG_PATH") or None
+RECOMMENDATION_CATALOG_CHECK_SECONDS = float(os.environ.get("RECOMMENDATION_CATALOG_CHECK_SECONDS", "30"))
+# Memoized finding texts and renderings per compiled catalog
+RECOMMENDATION_CACHE_SIZE = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", "4096"))
+
+# Each rule applies to findings carrying one of its `codes` (see
+# pipeline/detection_pipeline.py score_signals) and to findings whose
+# "model finding" text contains one of its `keywords`. Localized catalogs
+# can rely on codes alone.
+BUILTIN_CATALOG = {
+    "default": "Always be cautious with unsolicited communications.",
+    "fallback": "Review the detected signals carefully and proceed with caution.",
+    "rules": [
+        {
+            "id": "scam",
+            "keywords": ["scam"],
+            "codes": ["text_classifier.scam"],
+            "advice": [
                 "Do not respond to suspicious messages.",
                 "Report the scam to relevant authorities."
-            ],
-            'phishing': [
+            ]
+        },
+        {
+            "id": "phishing",
+            "keywords": ["phishing"],
+            "codes": ["reputation.brand_impersonation", "reputation.shortened_link", "reputation.ip_link",
+                      "reputation.lookalike_link", "reputation.impersonation_with_link"],
+            "advice": [
                 "Do not click on suspicious links.",
                 "Verify the sender's identity before sharing personal information."
-            ],
-            'disposable email': [
+            ]
+        },
+        {
+            "id": "disposable_email",
+            "keywords": ["disposable email"],
+            "codes": ["reputation.disposable_email"],
+            "advice": [
                 "Be cautious when dealing with users using disposable email addresses.",
                 "Request a permanent email address for further communication."
-            ],
-            'high-risk keywords': [
+            ]
+        },
+        {
+            "id": "high_risk_keywords",
+            "keywords": ["high-risk keywords"],
+            "codes": ["sentiment.high_risk_keywords", "sentiment.threatening_tone"],
+            "advice": [
                 "Review the message for high-risk keywords and proceed with caution.",
                 "Avoid sharing sensitive information."
-            ],
-            'deepfake': [
+            ]
+        },
+        {
+            "id": "deepfake",
+            "keywords": ["deepfake"],
+            "codes": ["video.deepfake"],
+            "advice": [
                 "Verify the authenticity of audio or video messages.",
                 "Do not trust media content without proper validation."
             ]
         }
+    ]
+}
+
+def load_catalog(path):
+    """
+    Reads an advice catalog:
+
+        {"default": "...", "fallback": "...",
+         "advice": {"<advice id>": "<text>", ...},
+         "rules": [{"id": ..., "codes": [...], "keywords": [...], "advice": [...]}]}
+
+    `default` is returned when there are no findings and `fallback` when no
+    rule applies. A rule's advice entries are ids from "advice" (so large
+    catalogs can share texts between rules) or literal texts.
+
+    Raises:
+        ValueError: If the file is not a valid catalog.
+    """
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    if not isinstance(catalog, dict) or not isinstance(catalog.get("rules"), list):
+        raise ValueError(f"{path} is not an advice catalog: expected an object with a 'rules' list")
+    for key in ("default", "fallback"):
+        catalog.setdefault(key, BUILTIN_CATALOG[key])
+    return catalog
+
+
+class CompiledCatalog:
+    """
+    A catalog compiled for lookups: every distinct advice text gets a bit, in
+    sorted text order, and every finding code and keyword maps to the bitset
+    of its advice. A set of findings is then the OR of its bitsets, and its
+    rendering (set bits in ascending order) comes out already sorted and
+    deduplicated. Renderings are memoized per bitset.
+    """
+    def __init__(self, catalog: dict, cache_size=RECOMMENDATION_CACHE_SIZE):
+        texts = catalog.get("advice", {})
+        rules = [(rule, [texts.get(advice, advice) for advice in rule.get("advice", [])])
+                 for rule in catalog["rules"]]
+        self.advice = tuple(sorted({advice for _, advice_texts in rules for advice in advice_texts}))
+        bit_of = {advice: 1 << index for index, advice in enumerate(self.advice)}
+
+        self.code_bits = {}
+        keyword_bits = {}
+        for rule, advice_texts in rules:
+            bits = 0
+            for advice in advice_texts:
+                bits |= bit_of[advice]
+            for code in rule.get("codes", []):
+                self.code_bits[code] = self.code_bits.get(code, 0) | bits
+            for keyword in rule.get("keywords", []):
+                keyword = keyword.strip().lower()
+                keyword_bits[keyword] = keyword_bits.get(keyword, 0) | bits
+        self.keyword_bits = keyword_bits
+        # All keywords compiled into one matcher, scanned once per distinct finding text.
+        self.keyword_matcher = PhraseMatcher([(keyword, keyword) for keyword in keyword_bits])
+        self.default = catalog["default"]
+        self.fallback = catalog["fallback"]
+        self.rules = len(rules)
+        self.cache_size = cache_size
+        self._text_bits = {}
+        self._renderings = {}
+
+    def finding_bits(self, finding: dict) -> int:
+        """
+        The advice bitset of one finding: its code's rules plus the rules whose
+        keywords appear in its text (values such as a domain or flagged words
+        can name a keyword too). Text results are memoized.
+        """
+        text = finding['model'] + ' ' + finding['finding']
+        bits = self._text_bits.get(text)
+        if bits is None:
+            bits = 0
+            for keyword in self.keyword_matcher.payloads_in(text):
+                bits |= self.keyword_bits[keyword]
+            if len(self._text_bits) >= self.cache_size:
+                self._text_bits.clear()
+            self._text_bits[text] = bits
+        return bits | self.code_bits.get(finding.get("code"), 0)
+
+    def render(self, bits: int) -> tuple:
+        rendering = self._renderings.get(bits)
+        if rendering is None:
+            advice = self.advice
+            rendering = []
+            remaining = bits
+            while remaining:
+                lowest = remaining & -remaining
+                rendering.append(advice[lowest.bit_length() - 1])
+                remaining ^= lowest
+            rendering = tuple(rendering)
+            if len(self._renderings) >= self.cache_size:
+                self._renderings.clear()
+            self._renderings[bits] = rendering
+        return rendering
+
+
+class RecommendationEngine:
+    """
+    Provides actionable recommendations based on detected fraud signals.
+
+    This engine uses a rule-based mapping to link specific findings from the
+    detection models to concrete, easy-to-understand advice for the user.
+    The goal is to empower the user to take immediate, appropriate action to
+    protect themselves.
+
+    The rules come from an advice catalog, compiled once (see CompiledCatalog)
+    so the cost of a call does not grow with the size of the catalog. A
+    catalog loaded from a file is checked for changes at most every
+    `check_interval` seconds and swapped in without a restart.
+    """
+    def __init__(self, catalog_path=RECOMMENDATION_CATALOG_PATH, check_interval=RECOMMENDATION_CATALOG_CHECK_SECONDS):
+        """
+        Args:
+            catalog_path (str): An advice catalog file (see `load_catalog`); None uses BUILTIN_CATALOG.
+            check_interval (float): Seconds between checks of the file for changes. 0 checks on every call.
+        """
+        self.catalog_path = catalog_path
+        self.check_interval = float(check_interval)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self.reloads = 0
+        if catalog_path:
+            self.reload(force=True)
+        else:
+            self._compiled = CompiledCatalog(BUILTIN_CATALOG)
+
+    @property
+    def recommendation_map(self) -> dict:
+        """
+        Keyword -> advice texts of the current catalog.
+        """
+        compiled = self._compiled
+        return {keyword: list(compiled.render(bits)) for keyword, bits in compiled.keyword_bits.items()}
+
+    def reload(self, force=False) -> bool:
+        """
+        Recompiles the catalog file if it changed since the last load (or always, with `force`).
+        An invalid file raises and leaves the current catalog in place.
+
+        Returns:
+            bool: True if the catalog was reloaded.
+        """
+        if not self.catalog_path:
+            return False
+        with self._lock:
+            self._checked_at = time.monotonic()
+            mtime = os.stat(self.catalog_path).st_mtime_ns
+            if not force and mtime == self._mtime:
+                return False
+            started = time.perf_counter()
+            compiled = CompiledCatalog(load_catalog(self.catalog_path))
+            self._compiled = compiled
+            self._mtime = mtime
+            self.reloads += 1
+        print(f"Loaded {compiled.rules} recommendation rules ({len(compiled.advice)} advice texts) from "
+              f"{self.catalog_path} in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        return True
+
+    def refresh(self) -> bool:
+        """
+        `reload()`, at most once per `check_interval`. Cheap enough to call per request.
+        """
+        if not self.catalog_path or time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        try:
+            return self.reload()
+        except (OSError, ValueError) as e:
+            print(f"Could not reload recommendation catalog {self.catalog_path}: {e!r}")
+            return False
 
     def get_recommendations(self, findings):
         """
@@ -42,20 +247,28 @@ class RecommendationEngine:
         Returns:
             list: A list of unique, relevant recommendation strings.
         """
-        recos = set()
-        
+        self.refresh()
+        compiled = self._compiled
+
         if not findings:
-            recos.add("Always be cautious with unsolicited communications.")
-            return list(recos)
+            return [compiled.default]
 
+        bits = 0
         for finding in findings:
-            finding_text = (finding['model'] + ' ' + finding['finding']).lower()
-            for keyword, reco_list in self.recommendation_map.items():
-                if keyword in finding_text:
-                    for reco in reco_list:
-                        recos.add(reco)
-        
-        if not recos:
-            recos.add("Review the detected signals carefully and proceed with caution.")
-
-        return sorted(list(recos))
\ No newline at end of file
+            bits |= compiled.finding_bits(finding)
+
+        if not bits:
+            return [compiled.fallback]
+
+        return list(compiled.render(bits))
+
+    def stats(self) -> dict:
+        compiled = self._compiled
+        return {
+            "catalog_path": self.catalog_path,
+            "rules": compiled.rules,
+            "advice": len(compiled.advice),
+            "codes": len(compiled.code_bits),
+            "keywords": len(compiled.keyword_bits),
+            "reloads": self.reloads,
+        }
\ No newline at end of file
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+
+# This file marks the 'benchmarks' directory as a Python package.
\ No newline at end of file
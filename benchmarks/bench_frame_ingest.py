@@ -0,0 +1,99 @@
+# benchmarks/bench_frame_ingest.py
+
+"""
+Measures the cost of turning a websocket frame payload into a detector-ready
+BGR frame: wall time, bytes allocated and allocation count per frame.
+
+The baseline is the decode step of the current `process_video_frame`
+(`np.frombuffer` + `cv2.imdecode(IMREAD_COLOR)` on a JPEG). It is compared with
+the FrameDecoder paths: reduced-size JPEG decoding and raw frames behind the
+8-byte header, both wrapped without copies (BGR) and converted into a reused
+buffer (RGB/RGBA).
+
+Usage:
+    python -m benchmarks.bench_frame_ingest [--width 640 --height 480 --frames 300]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from models.video_deepfake_detector import FrameDecoder, decode_frame, pack_raw_frame
+
+def synthetic_frame(width, height, seed=0):
+    """A smooth gradient with noise, so JPEG sizes resemble webcam frames."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = (x + y) / 2
+    frame = np.stack([base, np.flipud(base), np.fliplr(base)], axis=-1)
+    frame += rng.normal(0, 8, frame.shape).astype(np.float32)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+def measure(decode, payload, frames):
+    """Wall time per frame and peak traced memory over `frames` decodes."""
+    decode(payload)  # warm up buffers and OpenCV
+    started = time.perf_counter()
+    for _ in range(frames):
+        decode(payload)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in range(frames):
+        decode(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms_per_frame": elapsed / frames * 1000, "peak_kib": peak / 1024}
+
+def allocations_per_frame(decode, payload, frames):
+    """Counts the traced allocations still alive right after each decode (i.e. the output and its buffers)."""
+    counts = 0
+    tracemalloc.start(1)
+    for _ in range(frames):
+        tracemalloc.clear_traces()
+        frame = decode(payload)
+        counts += len(tracemalloc.take_snapshot().traces)
+        del frame
+    tracemalloc.stop()
+    return counts / frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality of the test payload.")
+    args = parser.parse_args()
+
+    frame = synthetic_frame(args.width, args.height)
+    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+    assert ok
+    jpeg = jpeg.tobytes()
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    rgba = cv2.cvtColor(frame, cv2.COLOR_BGR2RGBA)
+    half = cv2.resize(frame, (args.width // 2, args.height // 2), interpolation=cv2.INTER_AREA)
+
+    cases = [
+        ("current: imdecode IMREAD_COLOR", decode_frame, jpeg),
+        ("jpeg, reduced 1/2", FrameDecoder(jpeg_reduce=2).decode, jpeg),
+        ("jpeg, reduced 1/4", FrameDecoder(jpeg_reduce=4).decode, jpeg),
+        ("raw bgr (zero-copy view)", FrameDecoder().decode, pack_raw_frame(frame, "bgr")),
+        ("raw bgr, client-downscaled 1/2", FrameDecoder().decode, pack_raw_frame(half, "bgr")),
+        ("raw rgb (reused buffer)", FrameDecoder().decode, pack_raw_frame(rgb, "rgb")),
+        ("raw rgba (reused buffer)", FrameDecoder().decode, pack_raw_frame(rgba, "rgba")),
+    ]
+
+    print(f"{args.width}x{args.height} frames, JPEG payload {len(jpeg) / 1024:.1f} KiB, {args.frames} frames per case")
+    print(f"  {'path':<34} {'ms/frame':>9} {'peak KiB':>10} {'allocs/frame':>13} {'output':>12}")
+    for name, decode, payload in cases:
+        result = measure(decode, payload, args.frames)
+        allocs = allocations_per_frame(decode, payload, min(args.frames, 50))
+        shape = decode(payload).shape
+        print(f"  {name:<34} {result['ms_per_frame']:9.3f} {result['peak_kib']:10.1f} {allocs:13.1f} "
+              f"{shape[1]:>5}x{shape[0]:<6}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
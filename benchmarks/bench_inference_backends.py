@@ -0,0 +1,90 @@
+# benchmarks/bench_inference_backends.py
+
+"""
+Latency and throughput of the inference backends in models/inference_backend.py.
+
+For each backend the classifier is built once, then measured on:
+  - single-item latency (p50/p95 over one call per text, batch size 1)
+  - batched throughput (items/s at --batch-size)
+Load time, including any ONNX export on first use, is reported separately.
+
+Text uses rows of data/text/scam_dataset.csv; audio uses synthetic 4 s clips
+at 16 kHz, since there is no audio corpus in the repo.
+
+Usage:
+    python -m benchmarks.bench_inference_backends [--task text --backends pytorch,onnx,onnx-int8 --threads 4]
+"""
+
+import argparse
+import statistics
+import time
+
+from models.inference_backend import BACKENDS, build_pipeline, load_texts
+
+def text_inputs(path, count):
+    return load_texts(path, limit=count)
+
+def audio_inputs(count, seconds=4.0, sampling_rate=16000):
+    import numpy as np
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sampling_rate), dtype=np.float32) / sampling_rate
+    clips = []
+    for i in range(count):
+        tone = np.sin(2 * np.pi * (120 + 10 * i) * t) * 0.3
+        clips.append({"raw": (tone + rng.normal(0, 0.05, t.shape)).astype(np.float32), "sampling_rate": sampling_rate})
+    return clips
+
+def bench_backend(task, model_path, backend, inputs, batch_size, threads):
+    started = time.perf_counter()
+    classifier = build_pipeline(task, model_path, backend=backend, threads=threads)
+    load_seconds = time.perf_counter() - started
+    kwargs = {"truncation": True} if task == "text-classification" else {}
+
+    classifier(inputs[:batch_size], batch_size=batch_size, **kwargs)  # warm up
+
+    latencies = []
+    for item in inputs[:min(len(inputs), 200)]:
+        started = time.perf_counter()
+        classifier(item, **kwargs)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    started = time.perf_counter()
+    classifier(inputs, batch_size=batch_size, **kwargs)
+    batch_seconds = time.perf_counter() - started
+    return {
+        "load_s": load_seconds,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "items_per_s": len(inputs) / batch_seconds,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--task", choices=["text", "audio"], default="text")
+    parser.add_argument("--model-path", default=None, help="Defaults to the saved model for --task.")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--csv", default="data/text/scam_dataset.csv")
+    parser.add_argument("--count", type=int, default=1000, help="Texts (or audio clips / 10) to score.")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.task == "text":
+        task = "text-classification"
+        model_path = args.model_path or "./models/saved_models/scam_text_classifier"
+        inputs = text_inputs(args.csv, args.count)
+    else:
+        task = "audio-classification"
+        model_path = args.model_path or "./models/saved_models/spoof_audio_classifier"
+        inputs = audio_inputs(max(1, args.count // 10))
+
+    print(f"{task} on {model_path}: {len(inputs)} inputs, batch size {args.batch_size}, threads {args.threads or 'default'}")
+    print(f"  {'backend':<14} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'items/s':>9}")
+    for backend in args.backends.split(","):
+        result = bench_backend(task, model_path, backend, inputs, args.batch_size, args.threads)
+        print(f"  {backend:<14} {result['load_s']:8.2f} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} "
+              f"{result['items_per_s']:9.1f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+# benchmarks/bench_phrase_matcher.py
+
+"""
+Compares the shared Aho–Corasick PhraseMatcher against the scans it replaced:
+the `phrase in text.lower()` loop over trigger phrases, the keyword alternation
+regex, and the nested keyword loop in the recommendation engine. A second run
+grows the phrase list to tens of thousands of entries to show how each
+approach scales.
+
+Usage:
+    python -m benchmarks.bench_phrase_matcher [--csv data/text/scam_dataset.csv]
+"""
+
+import argparse
+import csv
+import random
+import re
+import string
+import time
+
+from utils.phrase_matcher import PhraseMatcher
+
+TRIGGER_PHRASES = [
+    "digital arrest", "verify your identity", "account suspended",
+    "legal action", "immediate payment", "urgent", "click this link"
+]
+SCAM_KEYWORDS = [
+    'urgent', 'immediate', 'action required', 'verify', 'account suspended',
+    'security alert', 'winner', 'prize', 'claim', 'free', 'reward', 'refund',
+    'confidential', 'ssn', 'password', 'bank account', 'credit card', 'irs',
+    'tax refund', 'w-2', 'invoice', 'overdue'
+]
+RECOMMENDATION_KEYWORDS = ['scam', 'phishing', 'disposable email', 'high-risk keywords', 'deepfake']
+
+def load_texts(path, column="text"):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [row[column] for row in csv.DictReader(f) if row.get(column)]
+
+def time_it(fn, texts, repeat=3):
+    """Best-of-`repeat` wall time for running `fn` over every text."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def synthetic_phrases(count, seed=7):
+    rng = random.Random(seed)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    phrases = set()
+    while len(phrases) < count:
+        phrases.add(" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))))
+    return sorted(phrases)
+
+def report(name, seconds, count, baseline=None):
+    per_text_us = seconds / count * 1e6
+    speedup = f"  x{baseline / seconds:.1f}" if baseline else ""
+    print(f"  {name:<34} {seconds * 1000:9.1f} ms  {per_text_us:8.2f} us/text{speedup}")
+
+def bench_builtin(texts):
+    print(f"Built-in phrase lists over {len(texts)} texts")
+
+    trigger_matcher = PhraseMatcher(TRIGGER_PHRASES)
+    baseline = time_it(lambda text: [p for p in TRIGGER_PHRASES if p in text.lower()], texts)
+    report("trigger phrases: `in` loop", baseline, len(texts))
+    report("trigger phrases: PhraseMatcher", time_it(trigger_matcher.findall, texts), len(texts), baseline)
+
+    keyword_pattern = re.compile(r'\b(' + '|'.join(SCAM_KEYWORDS) + r')\b', re.IGNORECASE)
+    keyword_matcher = PhraseMatcher(SCAM_KEYWORDS, whole_words=True)
+    baseline = time_it(lambda text: set(keyword_pattern.findall(text.lower())), texts)
+    report("scam keywords: alternation regex", baseline, len(texts))
+    report("scam keywords: PhraseMatcher", time_it(lambda text: keyword_matcher.findall(text, overlapping=False), texts),
+           len(texts), baseline)
+
+    findings = [f"TextClassifier {text[:60]}" for text in texts]
+    reco_matcher = PhraseMatcher(RECOMMENDATION_KEYWORDS)
+    baseline = time_it(lambda text: [k for k in RECOMMENDATION_KEYWORDS if k in text.lower()], findings)
+    report("recommendations: nested loop", baseline, len(findings))
+    report("recommendations: PhraseMatcher", time_it(reco_matcher.payloads_in, findings), len(findings), baseline)
+
+def bench_scaling(texts, sizes):
+    print(f"\nScaling with lexicon size over {len(texts)} texts")
+    for size in sizes:
+        phrases = synthetic_phrases(size) + SCAM_KEYWORDS
+        started = time.perf_counter()
+        matcher = PhraseMatcher(phrases, whole_words=True)
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        pattern = re.compile(r'\b(' + '|'.join(map(re.escape, phrases)) + r')\b', re.IGNORECASE)
+        compile_time = time.perf_counter() - started
+        print(f" {len(phrases)} phrases (automaton build {build * 1000:.0f} ms, regex compile {compile_time * 1000:.0f} ms)")
+        baseline = time_it(lambda text: [p for p in phrases if p in text.lower()], texts, repeat=1)
+        report("`in` loop", baseline, len(texts))
+        report("alternation regex", time_it(lambda text: pattern.findall(text.lower()), texts, repeat=1), len(texts), baseline)
+        report("PhraseMatcher", time_it(matcher.findall, texts, repeat=1), len(texts), baseline)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="data/text/scam_dataset.csv")
+    parser.add_argument("--column", default="text")
+    parser.add_argument("--sizes", default="100,1000,10000,30000", help="Comma-separated lexicon sizes.")
+    parser.add_argument("--scaling-texts", type=int, default=500, help="Texts used for the scaling run.")
+    args = parser.parse_args()
+
+    texts = load_texts(args.csv, args.column)
+    bench_builtin(texts)
+    bench_scaling(texts[:args.scaling_texts], [int(size) for size in args.sizes.split(",")])
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+# benchmarks/bench_sentiment_batch.py
+
+"""
+Compares SentimentAnalyzer.analyze (TextBlob + keyword scan per text) with
+SentimentAnalyzer.analyze_batch (lexicon tables + one keyword scan per batch),
+and checks that polarity/subjectivity agree.
+
+Two workloads:
+  - the 5.5k-row CSV corpora under data/text/
+  - a synthetic corpus (1M rows by default) of messages recombined from the
+    corpus vocabulary. The per-item path is only timed on a sample of it and
+    extrapolated, since running TextBlob on every row takes minutes.
+
+Usage:
+    python -m benchmarks.bench_sentiment_batch [--synthetic-rows 1000000 --batch-size 4096]
+"""
+
+import argparse
+import csv
+import random
+import time
+
+import numpy as np
+
+from models.sentiment_analysis import SentimentAnalyzer
+
+CORPORA = [
+    ("data/text/scam_dataset.csv", "text", "utf-8"),
+    ("data/text/spam.csv", "v2", "latin-1"),
+    ("data/text/email.csv", "Message", "utf-8"),
+]
+
+def load_texts(path, column, encoding):
+    with open(path, newline="", encoding=encoding, errors="replace") as f:
+        return [row[column] or "" for row in csv.DictReader(f)]
+
+def synthetic_texts(seed_texts, rows, seed=0):
+    """Messages of 5-40 tokens drawn from the seed corpus, keeping its punctuation and casing."""
+    rng = random.Random(seed)
+    vocabulary = [token for text in seed_texts for token in text.split()]
+    return [" ".join(rng.choices(vocabulary, k=rng.randint(5, 40))) for _ in range(rows)]
+
+def run_per_item(analyzer, texts):
+    started = time.perf_counter()
+    results = [analyzer.analyze(text, use_cache=False) for text in texts]
+    return results, time.perf_counter() - started
+
+def run_batched(analyzer, texts, batch_size):
+    started = time.perf_counter()
+    polarity, subjectivity = [], []
+    for offset in range(0, len(texts), batch_size):
+        columns = analyzer.analyze_batch(texts[offset:offset + batch_size], as_columns=True)
+        polarity.append(columns["polarity"])
+        subjectivity.append(columns["subjectivity"])
+    return np.concatenate(polarity), np.concatenate(subjectivity), time.perf_counter() - started
+
+def max_differences(results, polarity, subjectivity):
+    reference_polarity = np.array([result["polarity"] for result in results])
+    reference_subjectivity = np.array([result["subjectivity"] for result in results])
+    return (float(np.abs(reference_polarity - polarity).max(initial=0.0)),
+            float(np.abs(reference_subjectivity - subjectivity).max(initial=0.0)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic-rows", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=20_000, help="Synthetic rows timed on the per-item path.")
+    parser.add_argument("--batch-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    analyzer = SentimentAnalyzer(cache=None)
+    analyzer.lexicon  # load outside the timings
+    print(f"  {'corpus':<28} {'rows':>9} {'per-item s':>11} {'batch s':>9} {'speedup':>8} {'max dpol':>9} {'max dsubj':>9}")
+
+    corpus_texts = []
+    for path, column, encoding in CORPORA:
+        texts = load_texts(path, column, encoding)
+        corpus_texts += texts
+        results, per_item_seconds = run_per_item(analyzer, texts)
+        polarity, subjectivity, batch_seconds = run_batched(analyzer, texts, args.batch_size)
+        dpol, dsubj = max_differences(results, polarity, subjectivity)
+        print(f"  {path:<28} {len(texts):>9} {per_item_seconds:11.2f} {batch_seconds:9.2f} "
+              f"{per_item_seconds / batch_seconds:7.1f}x {dpol:9.1e} {dsubj:9.1e}")
+
+    texts = synthetic_texts(corpus_texts, args.synthetic_rows)
+    sample = texts[:args.sample]
+    results, sample_seconds = run_per_item(analyzer, sample)
+    per_item_seconds = sample_seconds * len(texts) / len(sample)
+    polarity, subjectivity, batch_seconds = run_batched(analyzer, texts, args.batch_size)
+    dpol, dsubj = max_differences(results, polarity[:len(sample)], subjectivity[:len(sample)])
+    print(f"  {'synthetic (per-item est.)':<28} {len(texts):>9} {per_item_seconds:11.2f} {batch_seconds:9.2f} "
+          f"{per_item_seconds / batch_seconds:7.1f}x {dpol:9.1e} {dsubj:9.1e}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
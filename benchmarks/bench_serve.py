@@ -0,0 +1,219 @@
+# benchmarks/bench_serve.py
+
+"""
+Memory and throughput of the pre-fork serving mode (ui/serve.py).
+
+For each worker count in --workers, a server is started twice: with the
+models preloaded in the supervisor and shared by the forked workers, and with
+--no-preload (every worker loads its own copy, as `uvicorn --workers` does).
+Each run drives POST /analyze/text (use_cache=false) from `--concurrency`
+clients for `--duration` seconds and then reads /proc/<pid>/smaps_rollup of
+the supervisor and every worker:
+
+    RSS      resident pages of one worker, shared ones included
+    private  pages only that worker has (what each extra worker really costs)
+    PSS      shared pages split between the processes mapping them; summed
+             over all processes it is the server's real memory use
+
+By default the text model is a stub owning `--weights-mb` of float32 weights
+and doing one matrix-vector product over them per text, so the numbers show
+the serving mode rather than transformers; pass --real to serve the models
+configured in pipeline/detection_pipeline.py instead. Linux only (/proc).
+
+Usage:
+    python -m benchmarks.bench_serve --workers 1 2 4 --duration 15
+    python -m benchmarks.bench_serve --workers 1 4 --real --save benchmarks/baselines/serve.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.harness import add_baseline_arguments, finish
+
+SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+                "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+class StubWeightsPipeline:
+    """
+    Stands in for the transformers pipeline: `weights_mb` of float32 weights,
+    written once at load (so the pages are really resident) and read in full
+    for every text, like a forward pass.
+    """
+    def __init__(self, weights_mb):
+        import numpy as np
+        side = int((weights_mb * 2**20 / 4) ** 0.5)
+        self.weights = np.random.default_rng(0).standard_normal((side, side), dtype=np.float32)
+
+    def __call__(self, texts, truncation=True, **kwargs):
+        import numpy as np
+        single = isinstance(texts, str)
+        batch = [texts] if single else texts
+        predictions = []
+        for text in batch:
+            features = np.zeros(self.weights.shape[0], dtype=np.float32)
+            features[[hash(word) % len(features) for word in text.lower().split()]] = 1.0
+            logit = float((self.weights @ features).mean())
+            predictions.append({"label": "spam" if "call" in text.lower() or logit > 1.0 else "ham", "score": 0.91})
+        return predictions
+
+
+def stub_text_model(weights_mb):
+    from models.text_classifier import TextClassifier
+
+    class StubWeightsClassifier(TextClassifier):
+        def _load_pipeline(self):
+            self.classifier = StubWeightsPipeline(weights_mb)
+
+    # No model at this path, so the pipeline is built on first use
+    return StubWeightsClassifier(model_path="./benchmarks/.stub-text-model", cache=None)
+
+def run_server(args):
+    """
+    The server side: `ui.serve.serve` with the stub model installed before the fork.
+    """
+    from ui.serve import serve
+
+    def install_stub(app_module):
+        if args.real:
+            return
+        # Loaded by serve() before the fork, or by each worker's warm-up with --no-preload
+        app_module.registry.register("text", stub_text_model(args.weights_mb))
+
+    serve(workers=args.workers[0], host="127.0.0.1", port=args.port, threads=args.threads,
+          preload=not args.no_preload, log_level="warning", before_fork=install_stub)
+
+# --- Client side ---
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def worker_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+def memory_of(pid) -> dict:
+    """
+    Rss/Pss/shared/private of one process in MB, from /proc/<pid>/smaps_rollup.
+    """
+    usage = dict.fromkeys(set(SMAPS_FIELDS.values()), 0.0)
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in SMAPS_FIELDS:
+                usage[SMAPS_FIELDS[name]] += int(value.split()[0]) / 1024
+    return usage
+
+def wait_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/ready", timeout=2) as response:
+                if json.load(response).get("ready"):
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.25)
+    return False
+
+def measure(args, workers, preload) -> dict:
+    from benchmarks import load_test
+    import httpx
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "benchmarks.bench_serve", "--serve", "--workers", str(workers),
+               "--port", str(port), "--weights-mb", str(args.weights_mb)]
+    command += ["--threads", str(args.threads)] if args.threads else []
+    command += [] if preload else ["--no-preload"]
+    command += ["--real"] if args.real else []
+    env = dict(os.environ, DETECTION_MODALITIES=os.environ.get("DETECTION_MODALITIES", "text"),
+               DETECTION_WARMUP="1", CAMPAIGN_INDEX="0")
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL if not args.verbose else None)
+    try:
+        if not wait_ready(url, args.startup_timeout):
+            return {"skipped": f"server not ready after {args.startup_timeout}s"}
+        # /ready answers from any one worker; give the others time to warm up
+        # and make sure every worker has been forked.
+        deadline = time.monotonic() + args.startup_timeout
+        while len(worker_pids(server.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.25)
+        time.sleep(3.0)
+
+        async def drive():
+            limits = httpx.Limits(max_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(base_url=url, timeout=60.0, limits=limits) as http:
+                return await load_test.text_scenario(args, http)
+
+        summary = asyncio.run(drive())
+        pids = worker_pids(server.pid)
+        per_worker = [memory_of(pid) for pid in pids]
+        supervisor = memory_of(server.pid)
+        summary.update({
+            "workers": len(pids),
+            "worker_rss_mb": round(max(usage["rss"] for usage in per_worker), 1),
+            "worker_private_mb": round(max(usage["private"] for usage in per_worker), 1),
+            "worker_shared_mb": round(min(usage["shared"] for usage in per_worker), 1),
+            "total_pss_mb": round(supervisor["pss"] + sum(usage["pss"] for usage in per_worker), 1),
+        })
+        return summary
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def print_memory(results):
+    print(f"  {'case':<40} {'workers':>8} {'RSS/worker':>11} {'private/wkr':>12} {'shared/wkr':>11} {'total PSS':>10}")
+    for name, summary in results.items():
+        if "skipped" in summary:
+            continue
+        print(f"  {name:<40} {summary['workers']:>8} {summary['worker_rss_mb']:>9.0f}MB "
+              f"{summary['worker_private_mb']:>10.0f}MB {summary['worker_shared_mb']:>9.0f}MB {summary['total_pss_mb']:>8.0f}MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4], help="Worker counts to measure.")
+    parser.add_argument("--threads", type=int, default=None, help="Threads per worker (default: cores // workers).")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per run.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--weights-mb", type=int, default=256, help="Size of the stub model's weights.")
+    parser.add_argument("--real", action="store_true", help="Serve the real models instead of the stub.")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--verbose", action="store_true", help="Show the servers' output.")
+    # Internal: run one server (used by the benchmark itself)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--no-preload", action="store_true", help=argparse.SUPPRESS)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    if args.serve:
+        run_server(args)
+        return 0
+
+    args.no_cache = True
+    print(f"{os.cpu_count()} CPUs; {'real models' if args.real else f'stub model with {args.weights_mb} MB of weights'}.")
+    results = {}
+    for workers in args.workers:
+        for preload in (True, False):
+            name = f"serve[workers={workers},{'preload' if preload else 'no-preload'}]"
+            print(f"Running {name} for {args.duration}s...")
+            results[name] = measure(args, workers, preload)
+    print_memory(results)
+    return finish(args, results, kind="serve")
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,243 @@
+# benchmarks/bench_suite.py
+
+"""
+Micro-benchmarks for every model path, runnable offline.
+
+The transformer classifier and the deepfake detector are replaced by stub
+models with a fixed cost, so what is measured is the code around them
+(trigger-phrase scanning, result building, caching, frame decoding, the
+registry) plus the analyzers that need no model download (TextBlob sentiment,
+email/phone validation, recommendations). Cases whose dependencies are
+missing are reported as skipped.
+
+Usage:
+    python -m benchmarks.bench_suite [--iterations 2000] [--only sentiment]
+    python -m benchmarks.bench_suite --save benchmarks/baselines/micro.json
+    python -m benchmarks.bench_suite --compare benchmarks/baselines/micro.json --threshold 0.15
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import add_baseline_arguments, finish, summarize
+
+# Tail percentiles of sub-millisecond calls mostly measure the machine's noise,
+# so micro-benchmarks are compared on their median and throughput only.
+MICRO_METRICS = {"p50_ms": True, "throughput_per_s": False}
+
+CORPUS = "data/text/scam_dataset.csv"
+
+class StubTextPipeline:
+    """
+    Stands in for the transformers text-classification pipeline.
+    """
+    def __call__(self, texts, truncation=True, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else texts
+        predictions = [{"label": "spam" if "call" in text.lower() else "ham", "score": 0.91} for text in batch]
+        return predictions if not single else predictions[:1]
+
+class StubVideoDetector:
+    """
+    Stands in for VideoDeepfakeDetector: one liveness verdict per frame.
+    """
+    def analyze_frame(self, frame):
+        return {"face_detected": True, "is_real": bool(frame[0, 0, 0] % 2), "confidence": 0.9,
+                "explanation": "Liveness check passed."}
+
+def load_texts(path=CORPUS, limit=2000):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [row["text"] for row in itertools.islice(csv.DictReader(f), limit) if row.get("text")]
+
+def run_case(fn, inputs, iterations, warmup=20, items_per_call=1, repeat=3):
+    """
+    Calls `fn` on `inputs` (cycled) `iterations` times and summarizes per-call
+    latency; the fastest of `repeat` runs (by median) is kept.
+    """
+    runs = [_run_once(fn, inputs, iterations, warmup, items_per_call) for _ in range(repeat)]
+    return min(runs, key=lambda summary: summary["p50_ms"])
+
+def _run_once(fn, inputs, iterations, warmup, items_per_call):
+    cycle = itertools.cycle(inputs)
+    for _ in range(min(warmup, iterations)):
+        fn(next(cycle))
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        item = next(cycle)
+        call_started = time.perf_counter()
+        try:
+            fn(item)
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started, errors, items_per_call)
+
+# --- Cases: each returns {case name: (fn, inputs, items_per_call)} ---
+
+def text_classifier_cases(texts):
+    from models.text_classifier import TextClassifier
+    classifier = TextClassifier(model_path="./benchmarks/stub-model", cache=None)
+    classifier.classifier = StubTextPipeline()
+    batches = [texts[i:i + 16] for i in range(0, len(texts) - 15, 16)]
+    return {
+        "text_classifier.predict": (classifier.predict, texts, 1),
+        "text_classifier.predict_batch[16]": (classifier.predict_batch, batches, 16),
+    }
+
+def sentiment_cases(texts):
+    from models.sentiment_analysis import SentimentAnalyzer
+    analyzer = SentimentAnalyzer(cache=None)
+    analyzer.lexicon  # built outside the timings
+    batches = [texts[i:i + 256] for i in range(0, len(texts) - 255, 256)]
+    return {
+        "sentiment.analyze": (analyzer.analyze, texts, 1),
+        "sentiment.analyze_batch[256]": (analyzer.analyze_batch, batches, 256),
+    }
+
+def reputation_cases(texts):
+    from models.reputation_analyzer import ReputationAnalyzer
+    analyzer = ReputationAnalyzer(disposable_domains_path="", cache_size=0)
+    cached = ReputationAnalyzer(disposable_domains_path="")
+    emails = ["support@paypal-security.net", "john.doe@gmail.com", "x@mailinator.com", "not-an-email",
+              "billing@mx.yopmail.com", "anita.sharma@example.in"]
+    phones = ["202-456-1111", "+91 98765 43210", "12345", "+44 20 7946 0958"]
+    log = [emails[i % len(emails)] for i in range(1000)]
+    return {
+        "reputation.analyze_email": (analyzer.analyze_email, emails, 1),
+        "reputation.analyze_email[cached]": (cached.analyze_email, emails, 1),
+        "reputation.analyze_phone_number": (analyzer.analyze_phone_number, phones, 1),
+        "reputation.analyze_links": (analyzer.analyze_links, texts, 1),
+        "reputation.screen_senders[1000]": (analyzer.screen_senders, [log], 1000),
+    }
+
+def large_catalog(path, rules=5000):
+    """
+    Writes a synthetic advice catalog with `rules` coded rules sharing a pool of advice texts.
+    """
+    advice = {f"a{i}": f"Advice text number {i} for this kind of signal." for i in range(rules // 2)}
+    catalog = {"advice": advice, "rules": [
+        {"id": f"rule{i}", "codes": [f"synthetic.code{i}"], "keywords": [f"signal{i} marker"],
+         "advice": [f"a{i % len(advice)}", f"a{(i * 7) % len(advice)}"]}
+        for i in range(rules)
+    ]}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f)
+
+def recommendation_cases(texts):
+    from alerts.recommendations import RecommendationEngine
+    engine = RecommendationEngine()
+    findings = [
+        [{"model": "text_classifier", "finding": "Text classified as a scam (confidence 0.97)"}],
+        [{"model": "sentiment", "finding": "Message contains high-risk keywords: winner, prize"},
+         {"model": "reputation", "finding": "Shortened link hides its destination, common in phishing"}],
+        [],
+    ]
+    path = os.path.join(tempfile.mkdtemp(), "catalog.json")
+    large_catalog(path)
+    large = RecommendationEngine(catalog_path=path)
+    large_findings = [
+        [{"model": "synthetic", "code": f"synthetic.code{(i * 31 + j) % 5000}", "finding": f"signal{i} marker seen"}
+         for j in range(4)]
+        for i in range(200)
+    ]
+    return {
+        "recommendations.get_recommendations": (engine.get_recommendations, findings, 1),
+        "recommendations.get_recommendations[5000 rules]": (large.get_recommendations, large_findings, 1),
+    }
+
+def video_cases(texts):
+    import cv2
+    import numpy as np
+    from pipeline.detection_pipeline import process_video_frame, registry
+    registry.register("video", StubVideoDetector())
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(8):
+        frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+        ok, jpeg = cv2.imencode(".jpg", cv2.GaussianBlur(frame, (9, 9), 0))
+        frames.append(jpeg.tobytes())
+    return {"process_video_frame[640x480 jpeg]": (process_video_frame, frames, 1)}
+
+def campaign_cases(texts):
+    from pipeline.campaign_index import CampaignIndex, minhash_signature
+    index = CampaignIndex()
+    result = {"is_scam": True, "confidence": 0.95, "explanation": {"model_label": "spam"}}
+    for text in texts:
+        match = index.lookup(text)
+        if match is not None:
+            index.record(match, text, result)
+    return {
+        "campaigns.minhash_signature": (minhash_signature, texts, 1),
+        f"campaigns.lookup[{len(texts)} texts indexed]": (index.lookup, texts, 1),
+    }
+
+def cascade_cases(texts):
+    from models.fast_text_scorer import FastTextScorer
+    from pipeline.text_cascade import TextCascade
+    scorer = FastTextScorer.load_or_train()
+    cascade = TextCascade(lambda: scorer, audit_rate=0)
+    return {
+        "cascade.route": (cascade.route, texts, 1),
+    }
+
+def metrics_cases(texts):
+    from utils.metrics import MetricsRegistry
+    registry = MetricsRegistry()
+    stage = registry.histogram("bench_stage_seconds", "Benchmark stage.", ["stage"]).labels("bench")
+    counter = registry.counter("bench_total", "Benchmark counter.", ["outcome"]).labels("ok")
+    for i in range(1000):
+        stage.observe(i / 1e5)
+
+    def timed_span(_):
+        with stage.time():
+            pass
+
+    return {
+        "metrics.span": (timed_span, [None], 1),
+        "metrics.counter_inc": (lambda _: counter.inc(), [None], 1),
+        "metrics.render": (lambda _: registry.render(), [None], 1),
+    }
+
+CASE_GROUPS = {
+    "text_classifier": text_classifier_cases,
+    "sentiment": sentiment_cases,
+    "reputation": reputation_cases,
+    "recommendations": recommendation_cases,
+    "video": video_cases,
+    "campaigns": campaign_cases,
+    "cascade": cascade_cases,
+    "metrics": metrics_cases,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per case (batch cases run a tenth).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept.")
+    parser.add_argument("--only", nargs="*", choices=sorted(CASE_GROUPS), help="Case groups to run.")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    texts = load_texts()
+    results = {}
+    for group in args.only or CASE_GROUPS:
+        try:
+            cases = CASE_GROUPS[group](texts)
+        except ImportError as e:
+            results[group] = {"skipped": str(e)}
+            continue
+        for name, (fn, inputs, items_per_call) in cases.items():
+            iterations = args.iterations if items_per_call == 1 else max(10, args.iterations // 10)
+            results[name] = run_case(fn, inputs, iterations, items_per_call=items_per_call, repeat=args.repeat)
+    return finish(args, results, kind="micro", metrics=MICRO_METRICS)
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,133 @@
+# benchmarks/harness.py
+
+"""
+Shared helpers for benchmarks/bench_suite.py and benchmarks/load_test.py:
+latency summaries, JSON baselines, and the comparison that flags regressions.
+
+A baseline file looks like:
+
+    {"kind": "micro", "created_at": ..., "python": ..., "platform": ...,
+     "results": {"<case>": {"count": ..., "p50_ms": ..., "p95_ms": ...,
+                            "p99_ms": ..., "throughput_per_s": ..., ...}}}
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+# Metrics compared against a baseline, and whether a larger value is worse
+COMPARED_METRICS = {"p50_ms": True, "p95_ms": True, "p99_ms": True, "throughput_per_s": False}
+# Latency changes smaller than this are noise whatever their relative size
+MIN_DELTA_MS = 0.01
+
+def percentile(sorted_values, q):
+    """
+    Linear-interpolated percentile (q in 0-100) of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize(latencies, elapsed, errors=0, items_per_call=1) -> dict:
+    """
+    Args:
+        latencies (list): Per-call latencies in seconds.
+        elapsed (float): Wall time of the whole run in seconds.
+        errors (int): Calls that failed (not included in `latencies`).
+        items_per_call (int): Items processed by each call, for batch APIs.
+
+    Returns:
+        dict: Count, errors, mean/p50/p95/p99/max latency in ms and items per second.
+    """
+    ordered = sorted(latencies)
+    to_ms = 1000.0
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "mean_ms": round(sum(ordered) / len(ordered) * to_ms, 4) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * to_ms, 4),
+        "p95_ms": round(percentile(ordered, 95) * to_ms, 4),
+        "p99_ms": round(percentile(ordered, 99) * to_ms, 4),
+        "max_ms": round(ordered[-1] * to_ms, 4) if ordered else 0.0,
+        "throughput_per_s": round(len(ordered) * items_per_call / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+def print_results(results: dict):
+    print(f"  {'case':<40} {'count':>8} {'err':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'items/s':>12}")
+    for name, summary in results.items():
+        if "skipped" in summary:
+            print(f"  {name:<40} skipped: {summary['skipped']}")
+            continue
+        print(f"  {name:<40} {summary['count']:>8} {summary['errors']:>5} {summary['p50_ms']:10.3f} "
+              f"{summary['p95_ms']:10.3f} {summary['p99_ms']:10.3f} {summary['throughput_per_s']:12,.1f}")
+
+def save_baseline(results: dict, path: str, kind: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    baseline = {
+        "kind": kind,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Saved baseline to {path}.")
+
+def compare(results: dict, baseline: dict, threshold: float, metrics=COMPARED_METRICS) -> list:
+    """
+    Lists the metrics that got worse than the baseline by more than `threshold`
+    (a fraction, e.g. 0.1 for 10%). Cases missing on either side are ignored.
+
+    Returns:
+        list: (case, metric, baseline value, current value, relative change) tuples.
+    """
+    regressions = []
+    for name, summary in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "skipped" in summary or "skipped" in before:
+            continue
+        for metric, higher_is_worse in metrics.items():
+            old, new = before.get(metric), summary.get(metric)
+            if not old or new is None:
+                continue
+            if metric.endswith("_ms") and abs(new - old) < MIN_DELTA_MS:
+                continue
+            change = (new - old) / old
+            if (change if higher_is_worse else -change) > threshold:
+                regressions.append((name, metric, old, new, change))
+    return regressions
+
+def add_baseline_arguments(parser):
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline.")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative slowdown that counts as a regression (default 0.15 = 15%%).")
+
+def finish(args, results: dict, kind: str, metrics=COMPARED_METRICS) -> int:
+    """
+    Prints, saves and compares results as the command line asked.
+
+    Returns:
+        int: Process exit code; 1 if any regression was found.
+    """
+    print_results(results)
+    if args.save:
+        save_baseline(results, args.save, kind)
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, metrics)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}.")
+        return 0
+    print(f"Regressions beyond {args.threshold:.0%} against {args.compare}:")
+    for name, metric, old, new, change in regressions:
+        print(f"  {name:<40} {metric:<18} {old:>12.3f} -> {new:>12.3f} ({change:+.0%})")
+    return 1
\ No newline at end of file
@@ -0,0 +1,243 @@
+# benchmarks/load_test.py
+
+"""
+Load generator for a running server (uvicorn ui.app:app).
+
+Scenarios (run any subset with --scenarios):
+    text    POST /analyze/text with corpus messages from `--concurrency` clients
+    audio   POST /analyze/audio with a synthetic WAV clip
+    video   /ws/video streams at `--fps`; latency is from the newest frame
+            sent to the verdict received. Only frames with a face produce a
+            verdict, so pass a real face with --frame-jpeg.
+    alerts  `--subscribers` /ws/alerts clients; alerts are triggered through
+            /analyze/text and latency is from the request to each delivery.
+
+Each scenario runs for `--duration` seconds and reports p50/p95/p99 latency
+and throughput; results can be saved and compared like bench_suite.py.
+
+Usage:
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --duration 20 --concurrency 16
+    python -m benchmarks.load_test --scenarios text alerts --save benchmarks/baselines/load.json
+    python -m benchmarks.load_test --compare benchmarks/baselines/load.json --threshold 0.2
+
+Needs httpx and websockets (see requirements.txt).
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import json
+import struct
+import sys
+import time
+import uuid
+import wave
+
+import httpx
+import numpy as np
+import websockets
+
+from benchmarks.harness import add_baseline_arguments, finish, summarize
+
+CORPUS = "data/text/scam_dataset.csv"
+RAW_FRAME_MAGIC = b"RF"
+
+def load_texts(path=CORPUS, limit=5000):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [row["text"] for row in itertools.islice(csv.DictReader(f), limit) if row.get("text")]
+
+def synthetic_wav(seconds=6.0, sample_rate=16000) -> bytes:
+    """A speech-band tone with noise, as 16-bit mono PCM."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    signal += np.random.default_rng(0).normal(0, 0.02, t.shape)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+def synthetic_raw_frame(width=640, height=480) -> bytes:
+    """A raw BGR frame message (same layout as models.video_deepfake_detector.pack_raw_frame)."""
+    pixels = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return struct.pack("<2sHHBB", RAW_FRAME_MAGIC, width, height, 1, 0) + pixels.tobytes()
+
+def ws_url(url, path):
+    return url.replace("http://", "ws://").replace("https://", "wss://").rstrip("/") + path
+
+async def run_clients(client, concurrency, duration):
+    """
+    Runs `client(deadline, latencies)` on `concurrency` tasks until `deadline`;
+    each task appends latencies and returns its error count.
+    """
+    latencies = []
+    started = time.perf_counter()
+    deadline = started + duration
+    errors = await asyncio.gather(*(client(deadline, latencies) for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, sum(errors))
+
+# --- Scenarios ---
+
+async def text_scenario(args, http):
+    texts = itertools.cycle(load_texts())
+
+    async def client(deadline, latencies):
+        errors = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await http.post("/analyze/text", json={"text": next(texts), "use_cache": not args.no_cache})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors += 1
+        return errors
+
+    return await run_clients(client, args.concurrency, args.duration)
+
+async def audio_scenario(args, http):
+    clip = synthetic_wav(args.audio_seconds)
+
+    async def client(deadline, latencies):
+        errors = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await http.post("/analyze/audio", files={"file": ("load.wav", clip, "audio/wav")})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors += 1
+        return errors
+
+    return await run_clients(client, max(1, args.concurrency // 4), args.duration)
+
+async def video_scenario(args, http):
+    if args.frame_jpeg:
+        with open(args.frame_jpeg, "rb") as f:
+            frame = f.read()
+    else:
+        frame = synthetic_raw_frame()
+    sent = []
+
+    async def client(deadline, latencies):
+        errors = 0
+        last_sent = [0.0]
+        try:
+            async with websockets.connect(ws_url(args.url, "/ws/video"), max_size=None) as socket:
+                await socket.recv()  # {"type": "session", ...}
+
+                async def send_frames():
+                    interval = 1.0 / args.fps
+                    while time.perf_counter() < deadline:
+                        last_sent[0] = time.perf_counter()
+                        await socket.send(frame)
+                        sent.append(1)
+                        await asyncio.sleep(interval)
+
+                sender = asyncio.create_task(send_frames())
+                while time.perf_counter() < deadline:
+                    try:
+                        message = await asyncio.wait_for(socket.recv(), max(0.01, deadline - time.perf_counter()))
+                    except asyncio.TimeoutError:
+                        break
+                    payload = json.loads(message)
+                    for alert in payload if isinstance(payload, list) else [payload]:
+                        if alert.get("type") == "video_frame_analysis":
+                            latencies.append(time.perf_counter() - last_sent[0])
+                sender.cancel()
+        except (OSError, websockets.WebSocketException):
+            errors += 1
+        return errors
+
+    summary = await run_clients(client, max(1, args.concurrency // 4), args.duration)
+    summary["frames_sent"] = len(sent)
+    return summary
+
+async def alerts_scenario(args, http):
+    texts = itertools.cycle(load_texts())
+    pending = {}  # nonce -> request start time
+    connected = asyncio.Event()
+    ready = []
+
+    async def subscriber(deadline, latencies):
+        errors = 0
+        try:
+            async with websockets.connect(ws_url(args.url, "/ws/alerts?channel=text&batch=1"), max_size=None) as socket:
+                ready.append(1)
+                if len(ready) == args.subscribers:
+                    connected.set()
+                while time.perf_counter() < deadline + 2:
+                    try:
+                        message = await asyncio.wait_for(socket.recv(), 1.0)
+                    except asyncio.TimeoutError:
+                        continue
+                    received_at = time.perf_counter()
+                    payload = json.loads(message)
+                    for alert in payload if isinstance(payload, list) else [payload]:
+                        # The publisher ends each text with a unique token.
+                        nonce = (alert.get("content") or "").rpartition(" ")[2]
+                        if nonce in pending:
+                            latencies.append(received_at - pending[nonce])
+        except (OSError, websockets.WebSocketException):
+            errors += 1
+        return errors
+
+    async def publisher(deadline):
+        await asyncio.wait_for(connected.wait(), 10)
+        while time.perf_counter() < deadline:
+            nonce = uuid.uuid4().hex
+            pending[nonce] = time.perf_counter()
+            try:
+                await http.post("/analyze/text", json={"text": f"{next(texts)} {nonce}", "use_cache": False})
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(1.0 / args.alert_rate)
+
+    latencies = []
+    started = time.perf_counter()
+    deadline = started + args.duration
+    results = await asyncio.gather(publisher(deadline),
+                                   *(subscriber(deadline, latencies) for _ in range(args.subscribers)))
+    summary = summarize(latencies, time.perf_counter() - started, sum(results[1:]))
+    summary["alerts_published"] = len(pending)
+    return summary
+
+SCENARIOS = {"text": text_scenario, "audio": audio_scenario, "video": video_scenario, "alerts": alerts_scenario}
+
+async def run(args):
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as http:
+        for name in args.scenarios:
+            print(f"Running '{name}' for {args.duration}s...")
+            try:
+                results[name] = await SCENARIOS[name](args, http)
+            except Exception as e:
+                results[name] = {"skipped": repr(e)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per scenario.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent HTTP clients (a quarter for audio/video).")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--no-cache", action="store_true", help="Send use_cache=false with text requests.")
+    parser.add_argument("--audio-seconds", type=float, default=6.0)
+    parser.add_argument("--fps", type=float, default=15.0, help="Frames per second per video stream.")
+    parser.add_argument("--frame-jpeg", help="A JPEG with a face to stream instead of a synthetic raw frame.")
+    parser.add_argument("--subscribers", type=int, default=50, help="/ws/alerts clients in the alerts scenario.")
+    parser.add_argument("--alert-rate", type=float, default=20.0, help="Alerts triggered per second.")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    return finish(args, results, kind="load")
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,23 +1,61 @@
 # models/audio_processor.py
 
-from transformers import pipeline
+from models.inference_backend import INFERENCE_BACKEND, build_pipeline
+import io
 import os
 import asyncio
 
+def iter_audio_windows(audio_bytes: bytes, window_seconds=4.0, hop_seconds=2.0, target_sr=16000):
+    """
+    Decodes an in-memory audio upload into overlapping mono windows.
+
+    The file is read block by block, so only one window of decoded samples is
+    held at a time no matter how long the call is.
+
+    Args:
+        audio_bytes (bytes): The encoded audio (WAV, FLAC, OGG, MP3...).
+        window_seconds (float): Length of each analysis window.
+        hop_seconds (float): Step between window starts; windows overlap when it
+            is shorter than `window_seconds`.
+        target_sr (int): Sampling rate the windows are resampled to.
+
+    Yields:
+        tuple: (start time in seconds, float32 samples at `target_sr`).
+    """
+    import soundfile as sf
+    import librosa
+
+    with sf.SoundFile(io.BytesIO(audio_bytes)) as f:
+        sr = f.samplerate
+        window = max(1, int(window_seconds * sr))
+        hop = max(1, min(window, int(hop_seconds * sr)))
+        overlap = window - hop
+        start = 0
+        for block in f.blocks(blocksize=window, overlap=overlap, dtype="float32", always_2d=True):
+            if start > 0 and len(block) <= overlap:
+                # Only the tail already covered by the previous window is left.
+                break
+            samples = block.mean(axis=1)
+            if sr != target_sr:
+                samples = librosa.resample(samples, orig_sr=sr, target_sr=target_sr)
+            yield start / sr, samples
+            start += hop
+
 class AudioProcessor:
-    def __init__(self, model_path="./models/saved_models/spoof_audio_classifier"):
+    def __init__(self, model_path="./models/saved_models/spoof_audio_classifier", backend=INFERENCE_BACKEND):
         """
         Initializes the audio processor.
-        
+
         Args:
             model_path (str): Path to the saved fine-tuned audio model.
+            backend (str): Inference backend, see models/inference_backend.py.
         """
         self.model_path = model_path
         if not os.path.exists(self.model_path):
             print(f"Warning: Audio model not found at {self.model_path}. Using placeholder logic.")
             self.classifier = None
         else:
-            self.classifier = pipeline("audio-classification", model=self.model_path)
+            self.classifier = build_pipeline("audio-classification", self.model_path, backend=backend)
 
     async def transcribe_audio(self, audio_bytes: bytes) -> str:
         """
@@ -31,6 +69,18 @@ class AudioProcessor:
         # For the demo, we return a fixed string.
         return "URGENT: Your bank account has been suspended due to suspicious activity. You are under digital arrest."
 
+    def _format_prediction(self, prediction: dict) -> dict:
+        is_spoof = True if prediction['label'].lower() == 'spoof' else False
+
+        return {
+            "is_spoof": is_spoof,
+            "confidence": round(prediction['score'], 2),
+            "explanation": {
+                "model_label": prediction['label'],
+                "indicators": ["spectral_artifacts_detected"] if is_spoof else []
+            }
+        }
+
     def predict_spoof(self, audio_path: str) -> dict:
         """
         Analyzes an audio file to detect if it's spoofed or a deepfake.
@@ -48,15 +98,22 @@ class AudioProcessor:
                 "confidence": 0.85,
                 "explanation": "Placeholder: No trained audio model found."
             }
-            
-        prediction = self.classifier(audio_path)
-        is_spoof = True if prediction['label'].lower() == 'spoof' else False
 
-        return {
-            "is_spoof": is_spoof,
-            "confidence": round(prediction['score'], 2),
-            "explanation": {
-                "model_label": prediction['label'],
-                "indicators": ["spectral_artifacts_detected"] if is_spoof else
-            }
-        }
\ No newline at end of file
+        prediction = self.classifier(audio_path)[0]
+        return self._format_prediction(prediction)
+
+    def predict_spoof_window(self, samples, sampling_rate: int) -> dict:
+        """
+        Analyzes one window of decoded samples for spoofing.
+
+        Args:
+            samples (np.ndarray): Mono float32 samples.
+            sampling_rate (int): Sampling rate of `samples`.
+
+        Returns:
+            dict: A dictionary containing the prediction, shaped like `predict_spoof`.
+        """
+        if self.classifier is None:
+            return self.predict_spoof(None)
+        prediction = self.classifier({"raw": samples, "sampling_rate": sampling_rate})[0]
+        return self._format_prediction(prediction)
\ No newline at end of file
@@ -0,0 +1,280 @@
+# models/fast_text_scorer.py
+
+"""
+Cheap first-pass scam scorer for the text cascade (pipeline/text_cascade.py).
+
+Each text becomes a set of hashed word 1-2-grams and character 3-5-grams
+(CRC32 into a fixed number of buckets, so there is no vocabulary to keep)
+plus the number of SentimentAnalyzer scam keywords it contains; a logistic
+regression over those features gives the probability that the text is a
+scam. Scoring is a sum of looked-up weights, about a tenth of a millisecond
+per text with no per-call overhead, so single texts can be scored inline.
+scikit-learn is only needed to train.
+
+The weights are saved as .npz together with the fingerprint of the training
+file and the feature settings; `load_or_train` retrains when either changed.
+
+Usage:
+    python -m models.fast_text_scorer train [--data data/text/scam_dataset.csv] [--holdout 0.2]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
+
+FAST_SCORER_PATH = os.environ.get("FAST_SCORER_PATH", "./models/saved_models/fast_text_scorer.npz")
+FAST_SCORER_DATA = os.environ.get("FAST_SCORER_DATA", "data/text/scam_dataset.csv")
+
+# Feature settings; part of the saved model's fingerprint. Word and character
+# n-grams each get HASH_BUCKETS weights, then one weight for keyword hits.
+HASH_BUCKETS = 2 ** 18
+WORD_NGRAMS = (1, 2)
+CHAR_NGRAMS = (3, 5)
+# Keyword hits are counted up to this many
+MAX_KEYWORD_HITS = 3
+REGULARIZATION_C = 10.0
+FORMAT_VERSION = 1
+
+_WORDS = re.compile(r"(?u)\b\w\w+\b")
+_BUCKET_MASK = HASH_BUCKETS - 1
+_KEYWORD_FEATURE = 2 * HASH_BUCKETS
+
+def _feature_settings() -> dict:
+    return {"version": FORMAT_VERSION, "hash_buckets": HASH_BUCKETS, "word_ngrams": list(WORD_NGRAMS),
+            "char_ngrams": list(CHAR_NGRAMS), "max_keyword_hits": MAX_KEYWORD_HITS}
+
+def _source(csv_path) -> dict:
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def hashed_ngrams(text) -> tuple:
+    """
+    The distinct word and character n-gram buckets of `text`.
+
+    Returns:
+        tuple: (word buckets, character buckets) as int64 arrays; character
+        buckets are offset by HASH_BUCKETS.
+    """
+    crc32 = zlib.crc32
+    text = text.lower()
+    words = _WORDS.findall(text)
+    word_buckets = set()
+    for n in range(WORD_NGRAMS[0], WORD_NGRAMS[1] + 1):
+        word_buckets.update(crc32(" ".join(words[i:i + n]).encode()) & _BUCKET_MASK
+                            for i in range(len(words) - n + 1))
+    char_buckets = set()
+    for word in text.split():
+        # Padded like scikit-learn's "char_wb" analyzer, so n-grams mark word edges
+        padded = f" {word} "
+        for n in range(CHAR_NGRAMS[0], CHAR_NGRAMS[1] + 1):
+            char_buckets.update(crc32(padded[i:i + n].encode()) & _BUCKET_MASK
+                                for i in range(max(1, len(padded) - n + 1)))
+    return (np.fromiter(word_buckets, dtype=np.int64, count=len(word_buckets)),
+            np.fromiter(char_buckets, dtype=np.int64, count=len(char_buckets)) + HASH_BUCKETS)
+
+def load_labelled_texts(csv_path) -> tuple:
+    """
+    Reads the labelled rows of a corpus in any of pipeline/bulk_score.py's CSV_FORMATS.
+
+    Returns:
+        tuple: (texts, labels) with labels 1 for scam/spam and 0 for legit/ham.
+    """
+    from pipeline.bulk_score import iter_csv_chunks, detect_format
+    from pipeline.token_dataset import LABEL_IDS
+    texts, labels = [], []
+    for chunk in iter_csv_chunks(csv_path, detect_format(csv_path), chunk_size=4096):
+        for record in chunk:
+            label = LABEL_IDS.get((record.get("label") or "").strip().lower())
+            if label is not None and record.get("text"):
+                texts.append(record["text"])
+                labels.append(label)
+    return texts, np.array(labels, dtype=np.int8)
+
+
+class FastTextScorer:
+    """
+    Hashed n-gram + keyword logistic regression.
+
+    Each n-gram block is a binary vector scaled to unit length, so a block
+    adds the sum of its buckets' weights over the square root of their count.
+    """
+    def __init__(self, keyword_matcher=None):
+        """
+        Args:
+            keyword_matcher (PhraseMatcher): Scam keyword matcher; defaults to
+                SentimentAnalyzer's, so both analyzers flag the same words.
+        """
+        if keyword_matcher is None:
+            from models.sentiment_analysis import SentimentAnalyzer
+            keyword_matcher = SentimentAnalyzer(cache=None).keyword_matcher
+        self.keyword_matcher = keyword_matcher
+        self.coef = None
+        self.intercept = 0.0
+        self.meta = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return self.coef is not None
+
+    @property
+    def fingerprint(self) -> str:
+        settings = dict(_feature_settings(), keywords=self.keyword_matcher.fingerprint)
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+    def keyword_hits(self, texts) -> list:
+        """
+        The distinct scam keywords found in each text.
+        """
+        return [list(dict.fromkeys(match.payload for match in matches))
+                for matches in self.keyword_matcher.findall_batch(texts, overlapping=False)]
+
+    def features(self, texts, keyword_hits=None):
+        """
+        Sparse feature matrix, one row per text (used for training).
+        """
+        from scipy import sparse
+        texts = [text or "" for text in texts]
+        if keyword_hits is None:
+            keyword_hits = self.keyword_hits(texts)
+        indices, values, indptr = [], [], [0]
+        for text, found in zip(texts, keyword_hits):
+            row = 0
+            for buckets in hashed_ngrams(text):
+                if len(buckets):
+                    indices.append(buckets)
+                    values.append(np.full(len(buckets), 1 / np.sqrt(len(buckets))))
+                    row += len(buckets)
+            indices.append(np.array([_KEYWORD_FEATURE]))
+            values.append(np.array([min(len(found), MAX_KEYWORD_HITS) / MAX_KEYWORD_HITS]))
+            indptr.append(indptr[-1] + row + 1)
+        return sparse.csr_matrix((np.concatenate(values), np.concatenate(indices), np.array(indptr)),
+                                 shape=(len(texts), _KEYWORD_FEATURE + 1))
+
+    def fit(self, texts, labels):
+        """
+        Trains on `texts` with 0/1 `labels` (1 = scam). Needs scikit-learn.
+        """
+        from sklearn.linear_model import LogisticRegression
+        model = LogisticRegression(C=REGULARIZATION_C, max_iter=2000)
+        model.fit(self.features(texts), np.asarray(labels))
+        self.coef = model.coef_.ravel().astype(np.float32)
+        self.intercept = float(model.intercept_[0])
+        return self
+
+    def logit(self, text, keyword_hits=None) -> float:
+        """
+        The scam logit of one text, read straight from the weights.
+        """
+        if keyword_hits is None:
+            keyword_hits = self.keyword_hits([text])[0]
+        hits = min(len(keyword_hits), MAX_KEYWORD_HITS) / MAX_KEYWORD_HITS
+        logit = self.intercept + float(self.coef[_KEYWORD_FEATURE]) * hits
+        for buckets in hashed_ngrams(text or ""):
+            if len(buckets):
+                logit += float(self.coef[buckets].sum()) / np.sqrt(len(buckets))
+        return logit
+
+    def scam_probability(self, texts, keyword_hits=None) -> np.ndarray:
+        """
+        Probability that each text is a scam, as a float array.
+        """
+        if not self.is_trained:
+            raise RuntimeError("FastTextScorer is not trained.")
+        if keyword_hits is None:
+            keyword_hits = self.keyword_hits(texts)
+        logits = np.array([self.logit(text, found) for text, found in zip(texts, keyword_hits)], dtype=np.float64)
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = dict(self.meta, fingerprint=self.fingerprint)
+        temporary = path + ".tmp.npz"
+        np.savez(temporary, coef=self.coef, intercept=np.array([self.intercept]), meta=np.array(json.dumps(meta)))
+        os.replace(temporary, path)
+
+    def load(self, path) -> bool:
+        """
+        Reads saved weights; False (and nothing loaded) if they were trained
+        with other feature settings or keywords.
+        """
+        with np.load(path) as saved:
+            meta = json.loads(str(saved["meta"]))
+            if meta.get("fingerprint") != self.fingerprint:
+                return False
+            self.coef = saved["coef"]
+            self.intercept = float(saved["intercept"][0])
+        self.meta = meta
+        return True
+
+    @classmethod
+    def load_or_train(cls, path=FAST_SCORER_PATH, csv_path=FAST_SCORER_DATA, keyword_matcher=None):
+        """
+        Loads the scorer saved at `path`, training and saving it first if it
+        is missing or out of date with `csv_path`.
+        """
+        scorer = cls(keyword_matcher)
+        if os.path.exists(path) and scorer.load(path) and scorer.meta.get("source") == _source(csv_path):
+            return scorer
+        started = time.perf_counter()
+        texts, labels = load_labelled_texts(csv_path)
+        scorer.fit(texts, labels)
+        scorer.meta = {"source": _source(csv_path), "rows": len(texts), "scam_rows": int(labels.sum())}
+        scorer.save(path)
+        print(f"Trained the fast text scorer on {len(texts)} rows of {csv_path} "
+              f"in {time.perf_counter() - started:.1f}s; saved to {path}.")
+        return scorer
+
+def holdout_report(texts, labels, holdout=0.2, thresholds=((0.02, 0.99),), seed=0) -> dict:
+    """
+    Trains on part of a corpus and reports, on the rest, how many texts each
+    (legit_below, scam_above) threshold pair answers without escalating and
+    how many of those answers are wrong.
+    """
+    order = np.random.default_rng(seed).permutation(len(texts))
+    split = int(len(texts) * (1 - holdout))
+    train, test = order[:split], order[split:]
+    scorer = FastTextScorer().fit([texts[i] for i in train], labels[train])
+    test_texts, test_labels = [texts[i] for i in test], labels[test]
+    started = time.perf_counter()
+    probabilities = scorer.scam_probability(test_texts)
+    per_text_ms = (time.perf_counter() - started) / max(len(test), 1) * 1000
+    report = {"train_rows": len(train), "test_rows": len(test), "ms_per_text": round(per_text_ms, 4),
+              "thresholds": []}
+    for legit_below, scam_above in thresholds:
+        legit = probabilities < legit_below
+        scam = probabilities > scam_above
+        report["thresholds"].append({
+            "legit_below": legit_below, "scam_above": scam_above,
+            "answered_fast": round(float((legit | scam).mean()), 4),
+            "missed_scams": int((legit & (test_labels == 1)).sum()),
+            "false_alarms": int((scam & (test_labels == 0)).sum()),
+        })
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="Train and save the scorer, reporting held-out accuracy first.")
+    train.add_argument("--data", default=FAST_SCORER_DATA, help="Labelled CSV corpus.")
+    train.add_argument("--output", default=FAST_SCORER_PATH)
+    train.add_argument("--holdout", type=float, default=0.2, help="Fraction held out for the report (0 skips it).")
+    args = parser.parse_args(argv)
+
+    texts, labels = load_labelled_texts(args.data)
+    if args.holdout > 0:
+        thresholds = [(legit_below, scam_above) for legit_below in (0.01, 0.02, 0.05) for scam_above in (0.95, 0.99)]
+        print(json.dumps(holdout_report(texts, labels, args.holdout, thresholds), indent=2))
+    if os.path.exists(args.output):
+        os.remove(args.output)
+    FastTextScorer.load_or_train(args.output, args.data)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
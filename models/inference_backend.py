@@ -0,0 +1,220 @@
+# models/inference_backend.py
+
+"""
+Pluggable CPU inference backends for the transformers classifiers.
+
+Every backend returns a regular `transformers` pipeline, so the classifiers'
+prediction and result-formatting code is the same whichever one is used:
+
+    pytorch       eager PyTorch (the original behaviour)
+    pytorch-int8  PyTorch with dynamic int8 quantization of the Linear layers
+    onnx          ONNX Runtime on an exported copy of the model
+    onnx-int8     ONNX Runtime on a dynamically int8-quantized export
+
+The backend is picked with INFERENCE_BACKEND and the thread count with
+INFERENCE_THREADS (0 keeps the library default). ONNX exports are written under
+ONNX_EXPORT_ROOT and reused; missing ones are exported on first load.
+
+Usage:
+    python -m models.inference_backend export --model-path ./models/saved_models/scam_text_classifier [--int8]
+    python -m models.inference_backend parity --backend onnx-int8 [--csv data/text/scam_dataset.csv --limit 1000]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "pytorch")
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", "0"))
+ONNX_EXPORT_ROOT = os.environ.get("ONNX_EXPORT_ROOT", "./models/saved_models/onnx")
+
+BACKENDS = ("pytorch", "pytorch-int8", "onnx", "onnx-int8")
+
+# task -> (transformers auto model class, optimum ORT model class, preprocessor argument)
+TASKS = {
+    "text-classification": ("AutoModelForSequenceClassification", "ORTModelForSequenceClassification", "tokenizer"),
+    "audio-classification": ("AutoModelForAudioClassification", "ORTModelForAudioClassification", "feature_extractor"),
+}
+
+QUANTIZED_ONNX_FILE = "model_quantized.onnx"
+# Dynamic int8 quantization of onnx-int8 exports (an AutoQuantizationConfig preset and its arguments)
+QUANTIZATION_SETTINGS = {"preset": "avx2", "is_static": False, "per_channel": False}
+
+def _load_preprocessor(task, model_path):
+    if TASKS[task][2] == "tokenizer":
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_path)
+    from transformers import AutoFeatureExtractor
+    return AutoFeatureExtractor.from_pretrained(model_path)
+
+def onnx_export_dir(model_path: str, quantize=False, task="text-classification") -> str:
+    """
+    Where the ONNX export of `model_path` lives (a local directory or hub model name).
+
+    The directory is named after the model and keyed on a hash of its absolute
+    path (or hub name), the task and the quantization settings, so models that
+    share a directory name never share an export.
+    """
+    name = os.path.basename(os.path.normpath(model_path))
+    source = os.path.abspath(model_path) if os.path.exists(model_path) else model_path
+    key = {"model": source, "task": task, "quantization": QUANTIZATION_SETTINGS if quantize else None}
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(ONNX_EXPORT_ROOT, f"{name}-{digest}" + ("-int8" if quantize else ""))
+
+def export_onnx(model_path: str, task="text-classification", quantize=False) -> str:
+    """
+    Exports a saved model to ONNX, optionally with dynamic int8 quantization.
+
+    Args:
+        model_path (str): A `save_pretrained` directory or hub model name.
+        task (str): A key of TASKS.
+        quantize (bool): Also quantize the weights of the exported graph to int8.
+
+    Returns:
+        str: The directory holding the export, its config and its preprocessor.
+    """
+    try:
+        import optimum.onnxruntime as ort_models
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError as e:
+        raise RuntimeError("The ONNX backends need the 'optimum[onnxruntime]' package.") from e
+
+    ort_class = getattr(ort_models, TASKS[task][1])
+    output_dir = onnx_export_dir(model_path, task=task)
+    if not os.path.exists(os.path.join(output_dir, "model.onnx")):
+        print(f"Exporting {model_path} to ONNX in {output_dir}...")
+        model = ort_class.from_pretrained(model_path, export=True)
+        model.save_pretrained(output_dir)
+        _load_preprocessor(task, model_path).save_pretrained(output_dir)
+    if not quantize:
+        return output_dir
+
+    quantized_dir = onnx_export_dir(model_path, quantize=True, task=task)
+    if not os.path.exists(os.path.join(quantized_dir, QUANTIZED_ONNX_FILE)):
+        print(f"Quantizing {output_dir} to int8 in {quantized_dir}...")
+        quantizer = ORTQuantizer.from_pretrained(output_dir)
+        # Dynamic quantization: weights are int8 ahead of time, activations are
+        # quantized per batch, so no calibration data is needed.
+        settings = dict(QUANTIZATION_SETTINGS)
+        config = getattr(AutoQuantizationConfig, settings.pop("preset"))(**settings)
+        quantizer.quantize(save_dir=quantized_dir, quantization_config=config)
+        _load_preprocessor(task, output_dir).save_pretrained(quantized_dir)
+    return quantized_dir
+
+def build_pipeline(task: str, model_path: str, backend=INFERENCE_BACKEND, threads=INFERENCE_THREADS):
+    """
+    Creates a classification pipeline for `model_path` on the given backend.
+
+    Args:
+        task (str): "text-classification" or "audio-classification".
+        model_path (str): A `save_pretrained` directory or hub model name.
+        backend (str): One of BACKENDS.
+        threads (int): Intra-op threads for inference; 0 keeps the library default.
+
+    Returns:
+        transformers.Pipeline: Called exactly like `transformers.pipeline(task, model=model_path)`.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    preprocessor_arg = TASKS[task][2]
+
+    if backend.startswith("pytorch"):
+        import torch
+        from transformers import pipeline
+        if threads:
+            torch.set_num_threads(threads)
+        if backend == "pytorch":
+            return pipeline(task, model=model_path)
+        import transformers
+        model = getattr(transformers, TASKS[task][0]).from_pretrained(model_path)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline(task, model=model, **{preprocessor_arg: _load_preprocessor(task, model_path)})
+
+    # Exported first: export_onnx explains a missing optimum[onnxruntime] install.
+    quantize = backend == "onnx-int8"
+    export_dir = export_onnx(model_path, task=task, quantize=quantize)
+    import onnxruntime
+    import optimum.onnxruntime as ort_models
+    from optimum.pipelines import pipeline
+    session_options = onnxruntime.SessionOptions()
+    if threads:
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+    model = getattr(ort_models, TASKS[task][1]).from_pretrained(
+        export_dir,
+        file_name=QUANTIZED_ONNX_FILE if quantize else "model.onnx",
+        provider="CPUExecutionProvider",
+        session_options=session_options
+    )
+    return pipeline(task, model=model, accelerator="ort", **{preprocessor_arg: _load_preprocessor(task, export_dir)})
+
+# --- Parity check ---
+
+def load_texts(path, limit=None):
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        texts = [row["text"] for row in csv.DictReader(f) if row.get("text")]
+    return texts[:limit] if limit else texts
+
+def check_parity(model_path, backend, texts, batch_size=32, threads=INFERENCE_THREADS):
+    """
+    Runs `texts` through the pytorch backend and `backend` and compares them.
+
+    Returns:
+        dict: Label agreement, score differences and wall time of both runs.
+    """
+    runs = {}
+    for name in ("pytorch", backend):
+        classifier = build_pipeline("text-classification", model_path, backend=name, threads=threads)
+        started = time.perf_counter()
+        runs[name] = (classifier(texts, batch_size=batch_size, truncation=True), time.perf_counter() - started)
+
+    (reference, reference_seconds), (candidate, candidate_seconds) = runs["pytorch"], runs[backend]
+    mismatches = [i for i, (a, b) in enumerate(zip(reference, candidate)) if a["label"] != b["label"]]
+    score_diffs = sorted(abs(a["score"] - b["score"]) for a, b in zip(reference, candidate))
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "label_agreement": 1 - len(mismatches) / len(texts),
+        "mismatched_rows": mismatches[:20],
+        "max_score_diff": score_diffs[-1],
+        "p99_score_diff": score_diffs[int(0.99 * (len(score_diffs) - 1))],
+        "mean_score_diff": sum(score_diffs) / len(score_diffs),
+        "pytorch_seconds": round(reference_seconds, 2),
+        f"{backend}_seconds": round(candidate_seconds, 2),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Export a saved model to ONNX.")
+    export.add_argument("--model-path", default="./models/saved_models/scam_text_classifier")
+    export.add_argument("--task", choices=sorted(TASKS), default="text-classification")
+    export.add_argument("--int8", action="store_true", help="Also write a dynamically quantized copy.")
+
+    parity = commands.add_parser("parity", help="Compare a backend with PyTorch on a CSV corpus.")
+    parity.add_argument("--model-path", default="./models/saved_models/scam_text_classifier")
+    parity.add_argument("--backend", choices=BACKENDS[1:], default="onnx")
+    parity.add_argument("--csv", default="data/text/scam_dataset.csv")
+    parity.add_argument("--limit", type=int, default=None, help="Only use the first N rows.")
+    parity.add_argument("--batch-size", type=int, default=32)
+    parity.add_argument("--min-agreement", type=float, default=0.99,
+                        help="Exit with status 1 when label agreement is below this.")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        print(f"Export written to {export_onnx(args.model_path, task=args.task, quantize=args.int8)}")
+        return
+
+    report = check_parity(args.model_path, args.backend, load_texts(args.csv, args.limit), batch_size=args.batch_size)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    if report["label_agreement"] < args.min_agreement:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,5 +1,47 @@
+import ipaddress
+import os
+import re
+from functools import lru_cache
 import phonenumbers
 from email_validator import validate_email, EmailNotValidError
+from utils.domain_index import DomainSuffixIndex, normalize_domain
+
+# A disposable-domain list file, one domain per line (e.g. the
+# disposable-email-domains blocklist). Without one, a few well-known providers are used.
+DISPOSABLE_DOMAINS_PATH = os.environ.get("DISPOSABLE_DOMAINS_PATH", "")
+# How often (seconds) the list file is checked for changes
+DISPOSABLE_DOMAINS_CHECK_SECONDS = float(os.environ.get("DISPOSABLE_DOMAINS_CHECK_SECONDS", "60"))
+# Parsed/validated addresses and numbers remembered per analyzer
+REPUTATION_CACHE_SIZE = int(os.environ.get("REPUTATION_CACHE_SIZE", "100000"))
+
+DEFAULT_DISPOSABLE_DOMAINS = ('mailinator.com', 'temp-mail.org', '10minutemail.com', 'yopmail.com')
+
+# Link shorteners hide the real destination of a link
+URL_SHORTENERS = ('bit.ly', 'tinyurl.com', 'goo.gl', 't.co', 'is.gd', 'ow.ly', 'cutt.ly', 'rb.gy', 'shorturl.at', 't.ly')
+
+# Brands commonly impersonated in phishing, and the domains they really send from
+IMPERSONATED_BRANDS = {
+    'paypal': ('paypal.com',),
+    'amazon': ('amazon.com', 'amazon.in'),
+    'apple': ('apple.com', 'icloud.com'),
+    'microsoft': ('microsoft.com', 'outlook.com', 'live.com'),
+    'google': ('google.com', 'gmail.com'),
+    'netflix': ('netflix.com',),
+    'sbi': ('sbi.co.in', 'onlinesbi.sbi'),
+    'hdfc': ('hdfcbank.com',),
+    'icici': ('icicibank.com',),
+}
+
+# http(s) links and bare www. links
+_URL = re.compile(r"(?:https?://|www\.)[^\s<>\"']+", re.IGNORECASE)
+_LABEL_WORDS = re.compile(r"[a-z0-9]+")
+
+NUMBER_TYPES = {
+    phonenumbers.PhoneNumberType.MOBILE: "MOBILE",
+    phonenumbers.PhoneNumberType.FIXED_LINE: "FIXED_LINE",
+    phonenumbers.PhoneNumberType.VOIP: "VOIP",
+    phonenumbers.PhoneNumberType.TOLL_FREE: "TOLL_FREE",
+}
 
 class ReputationAnalyzer:
     """
@@ -11,16 +53,61 @@ class ReputationAnalyzer:
     2. Phone Number Analysis: Validates phone number format and attempts to identify
        the carrier and number type (e.g., mobile vs. VoIP), as spoofed or temporary
        numbers are common in fraud.[16, 17]
+
+    Parsing and validation results are memoized in bounded LRU caches, and the
+    batch methods validate each distinct input once, so screening a mailing log
+    costs roughly one validation per distinct sender. Disposable domains are
+    matched against a DomainSuffixIndex, so subdomains of a listed provider
+    count too, and the list can be reloaded without restarting.
     """
-    def __init__(self):
+    def __init__(self, disposable_domains_path=DISPOSABLE_DOMAINS_PATH, cache_size=REPUTATION_CACHE_SIZE):
         """
         Initializes the analyzer with a list of known disposable email providers.
+
+        Args:
+            disposable_domains_path (str): A domain list file. Empty uses DEFAULT_DISPOSABLE_DOMAINS.
+            cache_size (int): Entries kept in each of the email and phone number caches.
         """
-        self.disposable_domains = {
-            'mailinator.com', 'temp-mail.org', '10minutemail.com', 'yopmail.com'
-        }
+        self.disposable_domains = DomainSuffixIndex(
+            DEFAULT_DISPOSABLE_DOMAINS,
+            path=disposable_domains_path or None,
+            check_interval=DISPOSABLE_DOMAINS_CHECK_SECONDS
+        )
+        # Only the (immutable) validation results are cached; the disposable
+        # lookup runs on every call so a reloaded list applies immediately.
+        self._validate_email = lru_cache(maxsize=cache_size)(self._validate_email_uncached)
+        self._parse_phone_number = lru_cache(maxsize=cache_size)(self._parse_phone_number_uncached)
+        self.url_shorteners = DomainSuffixIndex(URL_SHORTENERS)
+        self.brand_domains = {brand: DomainSuffixIndex(domains) for brand, domains in IMPERSONATED_BRANDS.items()}
         print("Reputation analyzer initialized.")
 
+    def reload_disposable_domains(self, force=True) -> bool:
+        """
+        Re-reads the disposable-domain list file. Returns True if it was reloaded.
+        """
+        return self.disposable_domains.reload(force=force)
+
+    @staticmethod
+    def _validate_email_uncached(email_address):
+        try:
+            # Use email-validator to check syntax and deliverability (MX records)
+            validation = validate_email(email_address, check_deliverability=False) # Set to False for speed in PoC
+            return True, validation.domain, validation.ascii_domain, None
+        except EmailNotValidError as e:
+            return False, None, None, str(e)
+
+    @staticmethod
+    def _parse_phone_number_uncached(phone_number_str, country_code):
+        try:
+            # The phonenumbers library can parse, format, and validate numbers.
+            parsed_number = phonenumbers.parse(phone_number_str, country_code)
+            if phonenumbers.is_valid_number(parsed_number):
+                # Get number type (MOBILE, FIXED_LINE, VOIP, etc.)
+                return True, NUMBER_TYPES.get(phonenumbers.number_type(parsed_number), "UNKNOWN"), None
+            return False, "UNKNOWN", "Invalid phone number format or non-existent number."
+        except phonenumbers.phonenumberutil.NumberParseException as e:
+            return False, "UNKNOWN", str(e)
+
     def analyze_email(self, email_address):
         """
         Analyzes an email address for validity and reputation.
@@ -42,18 +129,104 @@ class ReputationAnalyzer:
             findings["error"] = "Email address is empty."
             return findings
 
-        try:
-            # Use email-validator to check syntax and deliverability (MX records)
-            validation = validate_email(email_address, check_deliverability=False) # Set to False for speed in PoC
+        is_valid, domain, ascii_domain, error = self._validate_email(email_address)
+        if is_valid:
             findings["is_valid_syntax"] = True
-            findings["domain"] = validation.domain
-            
-            if validation.domain in self.disposable_domains:
+            findings["domain"] = domain
+            self.disposable_domains.refresh()
+            if self.disposable_domains.match(ascii_domain.lower()) is not None:
                 findings["is_disposable"] = True
-                
-        except EmailNotValidError as e:
-            findings["error"] = str(e)
-            
+        else:
+            findings["error"] = error
+
+        return findings
+
+    def analyze_emails(self, email_addresses) -> list:
+        """
+        Batch version of `analyze_email`: each distinct address is analyzed once.
+
+        Args:
+            email_addresses (list): The email addresses to analyze.
+
+        Returns:
+            list: One findings dict per input address, in input order.
+        """
+        findings = {address: self.analyze_email(address) for address in dict.fromkeys(email_addresses)}
+        return [dict(findings[address]) for address in email_addresses]
+
+    def screen_senders(self, email_addresses) -> list:
+        """
+        Flags addresses whose domain is (a subdomain of) a disposable provider,
+        without validating the rest of the address. Meant for bulk screening of
+        mailing logs; use `analyze_emails` when syntax checks are needed too.
+
+        Args:
+            email_addresses (iterable): The sender addresses.
+
+        Returns:
+            list: Per address, True if disposable, False if not, or None for an
+                  entry with no "@domain" part, which cannot be screened. Check
+                  `flag is None` before treating a flag as a bool.
+        """
+        self.disposable_domains.refresh()
+        match = self.disposable_domains.match
+        flags_by_domain = {}
+        flags = []
+        for address in email_addresses:
+            at = address.rfind("@") if address else -1
+            domain = address[at + 1:] if at >= 0 else ""
+            if not domain:
+                flags.append(None)
+                continue
+            flag = flags_by_domain.get(domain)
+            if flag is None:
+                normalized = normalize_domain(domain)
+                flag = flags_by_domain[domain] = bool(normalized) and match(normalized) is not None
+            flags.append(flag)
+        return flags
+
+    def impersonated_brand(self, domain):
+        """
+        Returns the brand a domain pretends to belong to (e.g. 'paypal' for
+        "paypal-security.net"), or None. A brand's own domains never match.
+        """
+        if not domain:
+            return None
+        domain = normalize_domain(domain)
+        words = set(_LABEL_WORDS.findall(domain))
+        for brand, official in self.brand_domains.items():
+            if brand in words and official.match(domain) is None:
+                return brand
+        return None
+
+    def analyze_links(self, text):
+        """
+        Finds the links in a message and flags the ones that hide their
+        destination (link shorteners, raw IP addresses) or imitate a brand.
+
+        Args:
+            text (str): The message text.
+
+        Returns:
+            dict: The links found, and the shortened, IP-address and
+                  brand-impersonating ones among them.
+        """
+        findings = {"urls": [], "shortened": [], "ip_hosts": [], "impersonating": []}
+        for url in _URL.findall(text or ""):
+            url = url.rstrip(".,;:!?)")
+            host = re.sub(r"^(?:https?://)?", "", url, flags=re.IGNORECASE).split("/")[0].split("?")[0]
+            host = normalize_domain(host.rpartition("@")[2].split(":")[0])
+            findings["urls"].append(url)
+            try:
+                ipaddress.ip_address(host)
+                findings["ip_hosts"].append(url)
+                continue
+            except ValueError:
+                pass
+            if self.url_shorteners.match(host) is not None:
+                findings["shortened"].append(url)
+            elif self.impersonated_brand(host):
+                findings["impersonating"].append(url)
         return findings
 
     def analyze_phone_number(self, phone_number_str, country_code="US"):
@@ -77,31 +250,36 @@ class ReputationAnalyzer:
             findings["error"] = "Phone number is empty."
             return findings
 
-        try:
-            # The phonenumbers library can parse, format, and validate numbers.
-            parsed_number = phonenumbers.parse(phone_number_str, country_code)
-            
-            if phonenumbers.is_valid_number(parsed_number):
-                findings["is_valid"] = True
-                
-                # Get number type (MOBILE, FIXED_LINE, VOIP, etc.)
-                num_type = phonenumbers.number_type(parsed_number)
-                type_map = {
-                    phonenumbers.PhoneNumberType.MOBILE: "MOBILE",
-                    phonenumbers.PhoneNumberType.FIXED_LINE: "FIXED_LINE",
-                    phonenumbers.PhoneNumberType.VOIP: "VOIP",
-                    phonenumbers.PhoneNumberType.TOLL_FREE: "TOLL_FREE",
-                }
-                findings["number_type"] = type_map.get(num_type, "UNKNOWN")
-                
-            else:
-                findings["error"] = "Invalid phone number format or non-existent number."
+        is_valid, number_type, error = self._parse_phone_number(phone_number_str, country_code)
+        findings["is_valid"] = is_valid
+        findings["number_type"] = number_type
+        findings["error"] = error
 
-        except phonenumbers.phonenumberutil.NumberParseException as e:
-            findings["error"] = str(e)
-            
         return findings
 
+    def analyze_phone_numbers(self, phone_numbers, country_code="US") -> list:
+        """
+        Batch version of `analyze_phone_number`: each distinct number is parsed once.
+
+        Args:
+            phone_numbers (list): The phone numbers as strings.
+            country_code (str): The default country code to assume if not provided.
+
+        Returns:
+            list: One findings dict per input number, in input order.
+        """
+        findings = {number: self.analyze_phone_number(number, country_code) for number in dict.fromkeys(phone_numbers)}
+        return [dict(findings[number]) for number in phone_numbers]
+
+    def stats(self) -> dict:
+        email_cache = self._validate_email.cache_info()
+        phone_cache = self._parse_phone_number.cache_info()
+        return {
+            "disposable_domains": self.disposable_domains.stats(),
+            "email_cache": {"hits": email_cache.hits, "misses": email_cache.misses, "size": email_cache.currsize},
+            "phone_cache": {"hits": phone_cache.hits, "misses": phone_cache.misses, "size": phone_cache.currsize},
+        }
+
 # Example usage:
 if __name__ == '__main__':
     analyzer = ReputationAnalyzer()
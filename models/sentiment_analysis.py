@@ -1,5 +1,7 @@
 from textblob import TextBlob
-import re
+from utils.result_cache import shared_cache
+from utils.phrase_matcher import PhraseMatcher, load_lexicon, spans
+import numpy as np
 
 class SentimentAnalyzer:
     """
@@ -12,10 +14,15 @@ class SentimentAnalyzer:
     2. Keyword Spotting: Scans for specific words and phrases commonly used in scams
        to create a sense of urgency, fear, or authority (e.g., "urgent", "verify", "suspended").
     """
-    def __init__(self):
+    def __init__(self, cache=shared_cache, lexicon_path=None):
         """
         Initializes the sentiment analyzer with a predefined list of scam keywords.
+
+        Args:
+            cache (ResultCache): Cache for repeated texts. Pass None to disable.
+            lexicon_path (str): Optional lexicon file of extra scam keywords.
         """
+        self.cache = cache
         # This list can be expanded based on common scam tactics.
         self.scam_keywords = [
             'urgent', 'immediate', 'action required', 'verify', 'account suspended',
@@ -23,40 +30,115 @@ class SentimentAnalyzer:
             'confidential', 'ssn', 'password', 'bank account', 'credit card', 'irs',
             'tax refund', 'w-2', 'invoice', 'overdue'
         ]
-        # Regex pattern to find any of the keywords, case-insensitive.
-        self.keyword_pattern = re.compile(r'\b(' + '|'.join(self.scam_keywords) + r')\b', re.IGNORECASE)
+        if lexicon_path:
+            self.scam_keywords += [phrase for phrase, _ in load_lexicon(lexicon_path)]
+        # Whole-word, case-insensitive matcher over all keywords, compiled once.
+        self.keyword_matcher = PhraseMatcher(self.scam_keywords, whole_words=True)
+        self.cache_namespace = f"sentiment:textblob:{self.keyword_matcher.fingerprint}"
+        # Built on the first analyze_batch call (it reads the TextBlob lexicon).
+        self._lexicon = None
         print("Sentiment analyzer initialized.")
 
-    def analyze(self, text):
+    @property
+    def lexicon(self):
+        if self._lexicon is None:
+            from models.sentiment_lexicon import SentimentLexicon
+            self._lexicon = SentimentLexicon()
+        return self._lexicon
+
+    def analyze(self, text, use_cache=True):
         """
         Performs sentiment analysis and keyword spotting on the given text.
 
         Args:
             text (str): The input text to analyze.
+            use_cache (bool): Set to False to skip the shared result cache.
 
         Returns:
             dict: A dictionary containing sentiment scores (polarity, subjectivity)
                   and a list of any flagged keywords found.
         """
         if not text:
-            return {"polarity": 0.0, "subjectivity": 0.0, "flagged_keywords":}
+            return {"polarity": 0.0, "subjectivity": 0.0, "flagged_keywords": []}
+        if self.cache is None or not use_cache:
+            return self._analyze_uncached(text)
+        result = self.cache.get(self.cache_namespace, text)
+        if result is None:
+            result = self._analyze_uncached(text)
+            self.cache.set(self.cache_namespace, text, result)
+        elif "keyword_spans" in result:
+            # The cache is keyed on the whitespace-normalized text, so the
+            # stored offsets may belong to a differently spaced copy of it.
+            keyword_matches = self.keyword_matcher.findall(text, overlapping=False)
+            result["flagged_keywords"] = list(dict.fromkeys(match.payload for match in keyword_matches))
+            result["keyword_spans"] = spans(keyword_matches)
+        return result
 
+    def _analyze_uncached(self, text):
         try:
             # Perform sentiment analysis using TextBlob.
             blob = TextBlob(text)
             sentiment = blob.sentiment
             
-            # Spot keywords using the pre-compiled regex pattern.
-            found_keywords = self.keyword_pattern.findall(text.lower())
+            # Spot keywords in a single pass over the text.
+            keyword_matches = self.keyword_matcher.findall(text, overlapping=False)
             
             return {
                 "polarity": sentiment.polarity,
                 "subjectivity": sentiment.subjectivity,
-                "flagged_keywords": list(set(found_keywords)) # Return unique keywords
+                "flagged_keywords": list(dict.fromkeys(match.payload for match in keyword_matches)), # Return unique keywords
+                "keyword_spans": spans(keyword_matches)
             }
         except Exception as e:
             print(f"Error during sentiment analysis: {e}")
-            return {"polarity": 0.0, "subjectivity": 0.0, "flagged_keywords":, "error": str(e)}
+            return {"polarity": 0.0, "subjectivity": 0.0, "flagged_keywords": [], "error": str(e)}
+
+    def analyze_batch(self, texts, as_columns=False):
+        """
+        Performs sentiment analysis and keyword spotting on many texts at once.
+
+        Polarity and subjectivity come from SentimentLexicon, which gives the
+        same scores as TextBlob (to float rounding) from lexicon lookup tables.
+        Texts without any candidate keyword word are skipped by the keyword
+        scan. The result cache is not used; this is meant for offline scoring.
+
+        Args:
+            texts (list): The input texts.
+            as_columns (bool): Return columns instead of one dict per text.
+
+        Returns:
+            list or dict: One dict per text, shaped like `analyze`, or with
+            `as_columns` a dict of "polarity" and "subjectivity" (float arrays),
+            "keyword_count" (int array) and "flagged_keywords" (list of lists).
+        """
+        texts = [text or "" for text in texts]
+        if not texts:
+            return {"polarity": np.zeros(0), "subjectivity": np.zeros(0), "keyword_count": np.zeros(0, dtype=np.int64),
+                    "flagged_keywords": []} if as_columns else []
+        polarity, subjectivity = self.lexicon.score(texts)
+        keyword_matches = self.keyword_matcher.findall_batch(texts, overlapping=False)
+        flagged_keywords = [list(dict.fromkeys(match.payload for match in matches)) for matches in keyword_matches]
+
+        if as_columns:
+            return {
+                "polarity": polarity,
+                "subjectivity": subjectivity,
+                "keyword_count": np.fromiter(map(len, flagged_keywords), dtype=np.int64, count=len(texts)),
+                "flagged_keywords": flagged_keywords
+            }
+        results = []
+        for text, p, s, keywords, matches in zip(texts, polarity.tolist(), subjectivity.tolist(),
+                                                 flagged_keywords, keyword_matches):
+            if not text:
+                results.append({"polarity": 0.0, "subjectivity": 0.0, "flagged_keywords": []})
+                continue
+            results.append({
+                "polarity": p,
+                "subjectivity": s,
+                "flagged_keywords": keywords,
+                "keyword_spans": spans(matches)
+            })
+        return results
 
 # Example usage:
 if __name__ == '__main__':
@@ -0,0 +1,226 @@
+# models/sentiment_lexicon.py
+
+"""
+Table-driven batch scoring with TextBlob's default (pattern) sentiment lexicon.
+
+`TextBlob(text).sentiment` tokenizes every document with pattern's regex
+tokenizer and walks the tokens through dictionary lookups. For a batch, most
+of that work repeats: the same whitespace-separated chunks ("URGENT", "call",
+"now!") occur over and over. SentimentLexicon therefore
+
+  1. tokenizes each distinct chunk once and caches it as lexicon ids,
+  2. keeps the lexicon as arrays indexed by id (polarity, subjectivity, flags),
+  3. scores documents made of plain lexicon words with vectorized sums, and
+  4. runs pattern's modifier/negation/exclamation rules, token by token, only
+     for the documents that contain such tokens.
+
+Scores match TextBlob's to float rounding (differences below 1e-9), because
+the same lexicon, tokenizer and rules are used. Words that are not in the
+lexicon are mapped to a few shared ids by the properties the rules look at.
+"""
+
+import re
+from itertools import chain
+
+import numpy as np
+
+# Whitespace-separated chunks, as pattern's tokenizer sees them
+_CHUNK = re.compile(r"\S+")
+
+# Distinct chunks remembered between batches
+CHUNK_CACHE_SIZE = 200_000
+
+class SentimentLexicon:
+    """
+    Batch polarity/subjectivity scorer equivalent to `TextBlob(text).sentiment`.
+    """
+    def __init__(self):
+        from textblob.en import sentiment
+        from textblob._text import EMOTICONS, PUNCTUATION, RE_EMOTICONS, RE_SARCASM
+
+        # lazydict: the XML lexicon is read on first access
+        len(sentiment)
+        self._tokenizer = sentiment.tokenizer
+        self._negations = set(sentiment.negations)
+        self._punctuation = PUNCTUATION
+        self._emoticons = [(polarity, {e.lower() for e in faces}) for (_, polarity), faces in EMOTICONS.items()]
+
+        # Cross-chunk joins done by the tokenizer: ": )" -> ":)" and "( ! )" -> "(!)".
+        faces = [face for group in EMOTICONS.values() for face in group] + ["(!)"]
+        self._joins = (RE_EMOTICONS, RE_SARCASM)
+        self._join_left = {face[i] for face in faces for i in range(len(face) - 1)}
+        self._join_right = {face[i:j] for face in faces for i in range(1, len(face)) for j in range(i + 1, len(face) + 1)}
+
+        # Per-id attributes. Known words come first, one id each.
+        self._ids = {}
+        self._attrs = []
+        for word, entries in dict.items(sentiment):
+            polarity, subjectivity, intensity = entries[None]
+            self._ids[word] = len(self._attrs)
+            self._attrs.append((
+                True, polarity, subjectivity, intensity,
+                any(pos in entries for pos in sentiment.modifiers),   # may modify the next word
+                sentiment.modifier(word),                              # ends with "ly"
+                word in self._negations,
+                len(word.strip("'")) > 1,
+                len(word) > 2,
+                None,
+            ))
+        self._unknown_ids = {}
+        self._chunks = {}
+        self._arrays_size = 0
+
+    # --- Tokens ---
+
+    def _emoticon_polarity(self, word):
+        if word.isalpha() is False and len(word) <= 5 and word not in self._punctuation:
+            for polarity, faces in self._emoticons:
+                if word in faces:
+                    return polarity
+        return None
+
+    def _token_id(self, token):
+        word = token.lower()
+        token_id = self._ids.get(word)
+        if token_id is not None:
+            return token_id
+        # Unknown words only matter through these properties.
+        key = (
+            word in self._negations,
+            len(word.strip("'")) > 1,
+            len(word) > 2,
+            "(!)" if word == "(!)" else ("!" if word == "!" else self._emoticon_polarity(word)),
+        )
+        token_id = self._unknown_ids.get(key)
+        if token_id is None:
+            token_id = self._unknown_ids[key] = len(self._attrs)
+            self._attrs.append((False, 0.0, 0.0, 1.0, False, False, key[0], key[1], key[2], key[3]))
+        return token_id
+
+    def _chunk(self, chunk):
+        cached = self._chunks.get(chunk)
+        if cached is None:
+            tokens = " ".join(self._tokenizer(chunk)).split()
+            cached = (
+                [self._token_id(token) for token in tokens],
+                tokens[0] if tokens else "",
+                tokens[-1][-1] if tokens else "",
+                " ".join(tokens),
+            )
+            if len(self._chunks) >= CHUNK_CACHE_SIZE:
+                self._chunks.clear()
+            self._chunks[chunk] = cached
+        return cached
+
+    def token_ids(self, text: str) -> list:
+        """
+        Lexicon ids of the tokens pattern's tokenizer produces for `text`.
+        """
+        ids = []
+        previous_last = ""
+        chunks = self._chunks
+        parts = [chunks.get(chunk) or self._chunk(chunk) for chunk in _CHUNK.findall(text)]
+        for chunk_ids, first, last, _ in parts:
+            if previous_last in self._join_left and first in self._join_right and self._joins_across(parts):
+                # An emoticon or "(!)" split by whitespace; let the tokenizer rejoin it.
+                return [self._token_id(token) for token in " ".join(self._tokenizer(text)).split()]
+            ids.extend(chunk_ids)
+            previous_last = last
+        return ids
+
+    def _joins_across(self, parts):
+        # Faces the tokenizer would rejoin are the matches that still contain a space.
+        joined = " ".join(part[3] for part in parts)
+        emoticons, sarcasm = self._joins
+        return (any(" " in match.group(0) for match in sarcasm.finditer(joined))
+                or any(" " in match.group(1) for match in emoticons.finditer(joined)))
+
+    # --- Scoring ---
+
+    def _arrays(self):
+        if self._arrays_size != len(self._attrs):
+            attrs = self._attrs
+            self._known = np.array([a[0] for a in attrs], dtype=bool)
+            self._polarity = np.array([a[1] for a in attrs], dtype=np.float64)
+            self._subjectivity = np.array([a[2] for a in attrs], dtype=np.float64)
+            # Tokens that need the sequential rules: modifiers, negations, "!", "(!)", emoticons
+            self._special = np.array([(a[0] and a[4]) or a[6] or a[9] is not None for a in attrs], dtype=bool)
+            self._arrays_size = len(attrs)
+
+    def _assess(self, ids):
+        """
+        pattern's Sentiment.assessments() over lexicon ids. Returns (polarity, subjectivity).
+        """
+        attrs = self._attrs
+        assessments = []  # [polarity, subjectivity, intensity, negated]
+        modifier = None   # attrs of the preceding modifier word
+        negated = False
+        for token_id in ids:
+            known, p, s, i, is_modifier, ends_ly, is_negation, long1, long2, special = attrs[token_id]
+            if known:
+                if modifier is None:
+                    assessments.append([p, s, i, False])
+                else:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(p * last[2], +1.0))
+                    last[1] = max(-1.0, min(s * last[2], +1.0))
+                    last[2] = i
+                if negated:
+                    assessments[-1][2] = 1.0 / assessments[-1][2]
+                    assessments[-1][3] = True
+                modifier = attrs[token_id] if is_modifier else None
+                negated = is_negation
+            else:
+                if is_negation:
+                    negated = True
+                elif negated and long1:
+                    negated = False
+                if negated and modifier is not None and modifier[5]:
+                    assessments[-1][3] = True
+                    negated = False
+                elif modifier is not None and long2:
+                    modifier = None
+                if special == "!" and assessments:
+                    assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, +1.0))
+                elif special == "(!)":
+                    assessments.append([0.0, 1.0, 1.0, False])
+                elif special is not None and special not in ("!", "(!)"):
+                    assessments.append([special, 1.0, 1.0, False])
+        if not assessments:
+            return 0.0, 0.0
+        polarity = subjectivity = 0
+        for p, s, _, was_negated in assessments:
+            polarity += p * -0.5 if was_negated else p
+            subjectivity += s
+        return polarity / float(len(assessments)), subjectivity / float(len(assessments))
+
+    def score(self, texts):
+        """
+        Scores a batch of texts.
+
+        Args:
+            texts (list): The input texts.
+
+        Returns:
+            tuple: (polarity, subjectivity) float64 arrays, one value per text.
+        """
+        doc_ids = [self.token_ids(text) if text else [] for text in texts]
+        self._arrays()
+        count = len(doc_ids)
+        lengths = np.fromiter(map(len, doc_ids), dtype=np.int64, count=count)
+        flat = np.fromiter(chain.from_iterable(doc_ids), dtype=np.int64, count=int(lengths.sum()))
+        doc_of_token = np.repeat(np.arange(count), lengths)
+
+        needs_rules = np.zeros(count, dtype=bool)
+        needs_rules[doc_of_token[self._special[flat]]] = True
+
+        # Documents of plain lexicon words: the mean of their words' scores.
+        plain = self._known[flat] & ~needs_rules[doc_of_token]
+        plain_docs = doc_of_token[plain]
+        words = np.maximum(np.bincount(plain_docs, minlength=count), 1)
+        polarity = np.bincount(plain_docs, weights=self._polarity[flat[plain]], minlength=count) / words
+        subjectivity = np.bincount(plain_docs, weights=self._subjectivity[flat[plain]], minlength=count) / words
+
+        for index in np.flatnonzero(needs_rules):
+            polarity[index], subjectivity[index] = self._assess(doc_ids[index])
+        return polarity, subjectivity
\ No newline at end of file
@@ -1,59 +1,356 @@
 # models/text_classifier.py
 
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+from utils.result_cache import shared_cache
+from utils.phrase_matcher import PhraseMatcher, load_lexicon, spans
+from models.inference_backend import INFERENCE_BACKEND, build_pipeline
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import collections
 import os
+import threading
+import time
+
+# Used when no fine-tuned model is saved at the model path
+FALLBACK_MODEL_NAME = "distilbert-base-uncased"
 
 class TextClassifier:
-    def __init__(self, model_path="./models/saved_models/scam_text_classifier"):
+    def __init__(self, model_path="./models/saved_models/scam_text_classifier", cache=shared_cache,
+                 lexicon_path=None, backend=INFERENCE_BACKEND):
         """
         Initializes the text classifier.
-        
+
         Args:
             model_path (str): Path to the saved fine-tuned model.
+            cache (ResultCache): Cache for repeated texts. Pass None to disable.
+            lexicon_path (str): Optional lexicon file of extra trigger phrases.
+            backend (str): Inference backend, see models/inference_backend.py.
         """
         self.model_path = model_path
+        self.cache = cache
+        self.backend = backend
         if not os.path.exists(self.model_path):
             print(f"Warning: Model not found at {self.model_path}. Using default model.")
             # Fallback to a pre-trained model if no fine-tuned one is found
-            self.model_name = "distilbert-base-uncased"
+            self.model_name = FALLBACK_MODEL_NAME
             self.classifier = None
         else:
             self.model_name = self.model_path
-            self.classifier = pipeline("text-classification", model=self.model_path)
+            self._load_pipeline()
+
+        # Simple Explainability: phrases reported back as triggers
+        self.trigger_phrases = [
+            "digital arrest", "verify your identity", "account suspended",
+            "legal action", "immediate payment", "urgent", "click this link"
+        ]
+        if lexicon_path:
+            self.trigger_phrases += [phrase for phrase, _ in load_lexicon(lexicon_path)]
+        # Compiled once; each text is then scanned in a single pass
+        self.trigger_matcher = PhraseMatcher(self.trigger_phrases)
+
+    def _load_pipeline(self):
+        # transformers/torch are only imported once a model is actually needed
+        self.classifier = build_pipeline("text-classification", self.model_name, backend=self.backend)
+
+    def _ensure_loaded(self):
+        if self.classifier is None:
+            # Lazy load the pipeline if it wasn't loaded in __init__
+            self._load_pipeline()
+
+    def _build_result(self, text: str, prediction: dict) -> dict:
+        """
+        Turns a raw pipeline prediction into the result dict returned to callers.
+        """
+        is_scam = True if prediction['label'].lower() == 'spam' else False
+        result = {
+            "is_scam": is_scam,
+            "confidence": round(prediction['score'], 2),
+            "explanation": {"model_label": prediction['label']}
+        }
+        return self._match_triggers(text, result)
+
+    def _match_triggers(self, text: str, result: dict) -> dict:
+        """
+        Sets the trigger phrases and their offsets in `text` on `result`.
+
+        Cached results go through this again: the cache is keyed on the
+        whitespace-normalized text, so the stored offsets may belong to a
+        differently spaced copy of it.
+        """
+        trigger_matches = self.trigger_matcher.findall(text)
+        result["explanation"]["trigger_phrases"] = list(dict.fromkeys(match.payload for match in trigger_matches))
+        result["explanation"]["trigger_spans"] = spans(trigger_matches)
+        return result
 
-    def predict(self, text: str) -> dict:
+    def load(self):
+        """
+        Loads the pipeline without running it, e.g. in the supervisor of
+        ui/serve.py before the workers are forked.
+        """
+        self._ensure_loaded()
+
+    def warm_up(self):
+        """
+        Loads the pipeline and runs one short prediction so the first request
+        does not pay for weight loading or graph initialization.
+        """
+        self._ensure_loaded()
+        self.classifier("warm up", truncation=True)
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"text_classifier:{self.backend}:{self.model_name}:{self.trigger_matcher.fingerprint}"
+
+    def cached_result(self, text: str):
+        """
+        Returns the cached result for `text` without running the model, or None.
+        """
+        if self.cache is None:
+            return None
+        result = self.cache.get(self.cache_namespace, text)
+        return None if result is None else self._match_triggers(text, result)
+
+    def result_from_prediction(self, text: str, prediction: dict) -> dict:
+        """
+        Builds the result for `text` from a known {"label", "score"} prediction
+        (e.g. its campaign's, see pipeline/campaign_index.py) without running
+        the model; trigger phrases are still matched in `text` itself.
+        """
+        return self._build_result(text, prediction)
+
+    @property
+    def tokenizer(self):
+        """
+        The pipeline's tokenizer (loads the model).
+        """
+        self._ensure_loaded()
+        return self.classifier.tokenizer
+
+    def predict_token_batch(self, input_ids, attention_mask) -> list:
+        """
+        Classifies already tokenized texts, e.g. batches of a pre-tokenized
+        dataset (see pipeline/token_dataset.py), skipping the tokenizer.
+
+        Args:
+            input_ids (numpy.ndarray): int64 token ids, batch x length, padded.
+            attention_mask (numpy.ndarray): int64 mask of the same shape.
+
+        Returns:
+            list: One {"label", "score"} prediction per row, as the pipeline returns them.
+        """
+        import torch
+        self._ensure_loaded()
+        model = self.classifier.model
+        with torch.inference_mode():
+            # from_numpy shares the arrays' memory with the tensors
+            logits = model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask)).logits
+        scores, label_ids = torch.softmax(logits.float(), dim=-1).max(dim=-1)
+        id2label = model.config.id2label
+        return [{"label": id2label[label_id], "score": score} for label_id, score in zip(label_ids.tolist(), scores.tolist())]
+
+    def _predict_uncached(self, text: str) -> dict:
+        self._ensure_loaded()
+        prediction = self.classifier(text, truncation=True)[0]
+        return self._build_result(text, prediction)
+
+    def predict(self, text: str, use_cache=True) -> dict:
         """
         Analyzes a text string and predicts if it's a scam.
 
         Args:
             text (str): The input text (SMS, email, etc.).
+            use_cache (bool): Set to False to skip the shared result cache.
 
         Returns:
             dict: A dictionary containing the prediction and explanation.
         """
-        if self.classifier is None:
-            # Lazy load the pipeline if it wasn't loaded in __init__
-            self.classifier = pipeline("text-classification", model=self.model_name)
-            
-        prediction = self.classifier(text)
-        is_scam = True if prediction['label'].lower() == 'spam' else False
-        
-        # Simple Explainability: Identify trigger phrases
-        trigger_phrases = [
-            "digital arrest", "verify your identity", "account suspended",
-            "legal action", "immediate payment", "urgent", "click this link"
-        ]
-        found_triggers = [phrase for phrase in trigger_phrases if phrase in text.lower()]
+        if self.cache is None or not use_cache:
+            return self._predict_uncached(text)
+        result = self.cached_result(text)
+        if result is None:
+            result = self._predict_uncached(text)
+            self.cache.set(self.cache_namespace, text, result)
+        return result
 
-        return {
-            "is_scam": is_scam,
-            "confidence": round(prediction['score'], 2),
-            "explanation": {
-                "model_label": prediction['label'],
-                "trigger_phrases": found_triggers
+    def predict_batch(self, texts, use_cache=True, read_cache=True) -> list:
+        """
+        Analyzes several texts with a single padded forward pass.
+
+        Texts already in the cache are answered from it, and repeated texts in
+        the batch are only run through the model once.
+
+        Args:
+            texts (list): The input texts.
+            use_cache (bool or list): Cache opt-out for the whole batch, or one flag per text.
+            read_cache (bool): Set to False when the caller already looked the texts up,
+                so only fresh results are written back.
+
+        Returns:
+            list: One result dict per text, in input order, shaped like `predict`.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        if isinstance(use_cache, bool):
+            use_cache = [use_cache] * len(texts)
+        caching = [flag and self.cache is not None for flag in use_cache]
+
+        results = [None] * len(texts)
+        to_run = {}
+        for index, text in enumerate(texts):
+            if caching[index] and read_cache:
+                results[index] = self.cached_result(text)
+            if results[index] is None:
+                to_run.setdefault(text, []).append(index)
+
+        if to_run:
+            self._ensure_loaded()
+            unique_texts = list(to_run)
+            # The pipeline pads every batch to its longest member, so a batch made of
+            # similar lengths wastes less compute.
+            predictions = self.classifier(unique_texts, batch_size=len(unique_texts), truncation=True)
+            for text, prediction in zip(unique_texts, predictions):
+                indices = to_run[text]
+                for index in indices:
+                    results[index] = self._build_result(text, prediction)
+                if any(caching[index] for index in indices):
+                    self.cache.set(self.cache_namespace, text, results[indices[0]])
+        return results
+
+
+class BatchStats:
+    """
+    Per-batch size and latency counters for a `MicroBatcher`.
+    """
+    def __init__(self, recent=256):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.size_histogram = collections.Counter()
+        self.recent = collections.deque(maxlen=recent)
+
+    def record(self, size, latency, failed=False):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.errors += 1 if failed else 0
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.size_histogram[size] += 1
+            self.recent.append((size, latency))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            batches = self.batches or 1
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+                "avg_batch_size": round(self.items / batches, 2),
+                "avg_batch_latency_ms": round(self.total_latency / batches * 1000, 2),
+                "max_batch_latency_ms": round(self.max_latency * 1000, 2),
+                "batch_size_histogram": dict(sorted(self.size_histogram.items())),
+                "recent_batches": [
+                    {"size": size, "latency_ms": round(latency * 1000, 2)} for size, latency in self.recent
+                ],
             }
-        }
 
-# Note: The training script from the initial report can be adapted and placed here
-# as a separate function, e.g., `def train_and_save_model():...`
+
+class MicroBatcher:
+    """
+    Gathers concurrent single-item requests into batches for a batch function.
+
+    Callers `await submit(item)` from the event loop. Items are collected until
+    either `max_batch_size` items are waiting or `max_wait_ms` has passed since
+    the first one arrived, then the whole batch is handed to `batch_fn` on a
+    worker thread so the event loop stays free. Each caller's future is resolved
+    with the matching entry of the returned list; if `batch_fn` raises, or
+    returns a list of the wrong length, every caller in the batch gets the error.
+    """
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5.0, executor=None):
+        """
+        Args:
+            batch_fn (callable): Takes a list of items, returns a list of results in the same order.
+            max_batch_size (int): Largest batch handed to `batch_fn`.
+            max_wait_ms (float): Longest time the first item of a batch waits for company.
+            executor (Executor): Where `batch_fn` runs. Defaults to one dedicated thread.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batcher")
+        self.stats = BatchStats()
+        self._pending = collections.deque()
+        self._wakeup = None
+        self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        """
+        Queues one item and waits for its result.
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self._wakeup.set()
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Give concurrent callers a short window to join this batch.
+            deadline = loop.time() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = []
+            while self._pending and len(batch) < self.max_batch_size:
+                item, future = self._pending.popleft()
+                if not future.cancelled():
+                    batch.append((item, future))
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = list(await loop.run_in_executor(self.executor, self.batch_fn, [item for item, _ in batch]))
+                if len(results) != len(batch):
+                    # Results cannot be matched to callers; fail the batch rather than leave futures pending.
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                self.stats.record(len(batch), time.perf_counter() - started, failed=True)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats.record(len(batch), time.perf_counter() - started)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+# Training and evaluation run on pre-tokenized corpora, see
+# pipeline/token_dataset.py (`train_and_save_model`, `evaluate`).
 # This keeps the inference class clean and focused.
\ No newline at end of file
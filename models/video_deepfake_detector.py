@@ -1,8 +1,101 @@
 # models/video_deepfake_detector.py
 
-from deepface import DeepFace
+from collections import deque
 import cv2
 import numpy as np
+import struct
+
+def decode_frame(frame_bytes: bytes) -> np.ndarray:
+    """
+    Decodes encoded image bytes (e.g. a JPEG from the browser) into a BGR frame.
+    """
+    nparr = np.frombuffer(frame_bytes, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+# Raw frame header: magic, width, height, pixel format, reserved (8 bytes, little-endian)
+RAW_FRAME_HEADER = struct.Struct("<2sHHBB")
+RAW_FRAME_MAGIC = b"RF"
+RAW_FORMATS = {
+    # code: (name, channels, conversion to BGR or None if already usable)
+    0: ("gray", 1, cv2.COLOR_GRAY2BGR),
+    1: ("bgr", 3, None),
+    2: ("rgb", 3, cv2.COLOR_RGB2BGR),
+    3: ("rgba", 4, cv2.COLOR_RGBA2BGR),
+    4: ("bgra", 4, cv2.COLOR_BGRA2BGR),
+}
+# JPEG scale-down factor -> OpenCV flag that decodes straight to the smaller size
+JPEG_REDUCE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def pack_raw_frame(frame: np.ndarray, pixel_format="bgr") -> bytes:
+    """
+    Builds a raw frame message (header + pixels), e.g. for clients and benchmarks.
+    """
+    code = next(code for code, (name, _, _) in RAW_FORMATS.items() if name == pixel_format)
+    height, width = frame.shape[:2]
+    return RAW_FRAME_HEADER.pack(RAW_FRAME_MAGIC, width, height, code, 0) + np.ascontiguousarray(frame).tobytes()
+
+class FrameDecoder:
+    """
+    Turns websocket frame payloads into BGR frames with as few copies as possible.
+
+    Two payload kinds are accepted:
+    1. Raw frames: an 8-byte header (`RAW_FRAME_HEADER`) followed by the pixels.
+       BGR pixels are wrapped as a read-only NumPy view of the payload with no
+       copy at all; other pixel formats are converted into a buffer that is
+       allocated once and reused for every frame of the same size.
+    2. Encoded images (JPEG/PNG): decoded by OpenCV, optionally straight to
+       1/2, 1/4 or 1/8 size when the detector does not need full resolution.
+
+    One decoder is meant to be kept per connection.
+    """
+    def __init__(self, jpeg_reduce=1):
+        """
+        Args:
+            jpeg_reduce (int): Scale-down factor for encoded images (1, 2, 4 or 8).
+        """
+        if jpeg_reduce not in JPEG_REDUCE_FLAGS:
+            raise ValueError(f"jpeg_reduce must be one of {sorted(JPEG_REDUCE_FLAGS)}, got {jpeg_reduce}")
+        self.jpeg_reduce = jpeg_reduce
+        self._jpeg_flag = JPEG_REDUCE_FLAGS[jpeg_reduce]
+        self._buffer = None
+
+    def _output_buffer(self, height, width):
+        if self._buffer is None or self._buffer.shape[:2] != (height, width):
+            self._buffer = np.empty((height, width, 3), dtype=np.uint8)
+        return self._buffer
+
+    def decode(self, payload) -> np.ndarray:
+        """
+        Args:
+            payload (bytes-like): One websocket binary message.
+
+        Returns:
+            np.ndarray: A BGR frame, or None if the payload could not be decoded.
+            The frame may be a view of `payload` or a reused buffer, so it is only
+            valid until the next call.
+        """
+        if len(payload) >= RAW_FRAME_HEADER.size and bytes(payload[:2]) == RAW_FRAME_MAGIC:
+            return self._decode_raw(payload)
+        return cv2.imdecode(np.frombuffer(payload, np.uint8), self._jpeg_flag)
+
+    def _decode_raw(self, payload):
+        _, width, height, code, _ = RAW_FRAME_HEADER.unpack_from(payload)
+        if code not in RAW_FORMATS:
+            raise ValueError(f"Unknown raw pixel format {code}")
+        _, channels, conversion = RAW_FORMATS[code]
+        size = width * height * channels
+        if len(payload) - RAW_FRAME_HEADER.size < size:
+            raise ValueError(f"Raw frame is truncated: expected {size} pixel bytes")
+        pixels = np.frombuffer(payload, np.uint8, count=size, offset=RAW_FRAME_HEADER.size)
+        pixels = pixels.reshape((height, width, channels) if channels > 1 else (height, width))
+        if conversion is None:
+            return pixels
+        return cv2.cvtColor(pixels, conversion, dst=self._output_buffer(height, width))
 
 class VideoDeepfakeDetector:
     def __init__(self):
@@ -11,13 +104,49 @@ class VideoDeepfakeDetector:
         The models for deepface will be downloaded on first use.
         """
         print("Initializing VideoDeepfakeDetector...")
-        # Pre-load a model to avoid delay on the first frame
+        # Imported here so that importing this module does not start TensorFlow
+        from deepface import DeepFace
+        self._deepface = DeepFace
+
+    def warm_up(self):
+        """
+        Runs one extraction on a blank image so the detector and anti-spoofing
+        weights are loaded before the first real frame arrives.
+        """
         try:
-            _ = DeepFace.extract_faces("models/init.py", enforce_detection=False)
+            _ = self._deepface.extract_faces(np.zeros((64, 64, 3), dtype=np.uint8),
+                                             enforce_detection=False, anti_spoofing=True)
             print("DeepFace models loaded.")
         except Exception as e:
             print(f"Could not pre-load DeepFace models: {e}")
 
+    def detect_face(self, frame: np.ndarray):
+        """
+        Runs face extraction with anti-spoofing and returns the first face, or None.
+        """
+        try:
+            # The core of the detection using deepface's anti-spoofing feature
+            face_objs = self._deepface.extract_faces(
+                img_path=frame,
+                detector_backend='opencv',
+                enforce_detection=True, # We only care about frames with faces
+                anti_spoofing=True
+            )
+        except Exception:
+            # This exception is often raised if no face is detected
+            return None
+        # For simplicity, we'll return the result for the first detected face
+        return face_objs[0] if face_objs else None
+
+    @staticmethod
+    def format_verdict(is_real, confidence) -> dict:
+        return {
+            "face_detected": True,
+            "is_real": is_real,
+            "confidence": round(confidence, 2),
+            "explanation": "Liveness check passed." if is_real else "Liveness check failed (potential spoof)."
+        }
+
     def analyze_frame(self, frame: np.ndarray) -> dict:
         """
         Analyzes a single video frame for deepfake/spoofing indicators.
@@ -28,30 +157,129 @@ class VideoDeepfakeDetector:
         Returns:
             dict: Analysis result for the frame.
         """
-        try:
-            # The core of the detection using deepface's anti-spoofing feature
-            face_objs = DeepFace.extract_faces(
-                img_path=frame,
-                detector_backend='opencv',
-                enforce_detection=True, # We only care about frames with faces
-                anti_spoofing=True
-            )
+        face = self.detect_face(frame)
+        if face is None:
+            return {"face_detected": False}
+        return self.format_verdict(face.get('is_real', False), face.get('confidence', 0))
 
-            # For simplicity, we'll return the result for the first detected face
-            if face_objs:
-                face = face_objs
-                is_real = face.get('is_real', False)
-                confidence = face.get('confidence', 0)
-                
-                return {
-                    "face_detected": True,
-                    "is_real": is_real,
-                    "confidence": round(confidence, 2),
-                    "explanation": "Liveness check passed." if is_real else "Liveness check failed (potential spoof)."
-                }
 
-        except Exception:
-            # This exception is often raised if no face is detected
-            pass
+class VideoStreamSession:
+    """
+    Streaming analysis of consecutive frames from one camera.
+
+    Webcam frames barely change from one to the next, so per-frame liveness
+    checks waste CPU and produce a flickering verdict. A session:
+    1. Skips frames that are near-duplicates of the last analyzed one, using the
+       mean absolute difference of small grayscale thumbnails. A still scene is
+       re-checked every `refresh_every` frames so it keeps producing verdicts.
+    2. Analyzes only every `sample_every`-th remaining frame.
+    3. Crops around the last known face box before running detection and
+       liveness, falling back to the full frame when the face has moved away.
+    4. Smooths the per-frame results over `window` analyzed faces and emits
+       one verdict per window.
+    """
+    def __init__(self, detector: VideoDeepfakeDetector, sample_every=3, window=5,
+                 diff_threshold=3.0, refresh_every=30, crop_margin=0.3, thumbnail_size=32):
+        """
+        Args:
+            detector (VideoDeepfakeDetector): Runs the actual face/liveness checks.
+            sample_every (int): Analyze one in this many changed frames.
+            window (int): Analyzed faces smoothed into each verdict.
+            diff_threshold (float): Mean thumbnail pixel difference (0-255) below
+                which a frame counts as a near-duplicate.
+            refresh_every (int): Analyze at least once in this many frames, even if nothing changed.
+            crop_margin (float): Extra space around the last face box, as a fraction of its size.
+            thumbnail_size (int): Side of the grayscale thumbnail used for the difference check.
+        """
+        self.detector = detector
+        self.sample_every = max(1, int(sample_every))
+        self.window = max(1, int(window))
+        self.diff_threshold = float(diff_threshold)
+        self.refresh_every = max(1, int(refresh_every))
+        self.crop_margin = float(crop_margin)
+        self.thumbnail_size = int(thumbnail_size)
+        self._last_thumbnail = None
+        self._last_box = None
+        self._since_sample = 0
+        self._since_analysis = 0
+        self._observations = deque(maxlen=self.window)
+        self._since_verdict = 0
+        self.counters = {
+            "frames": 0, "duplicates_skipped": 0, "sampling_skipped": 0,
+            "analyzed": 0, "crop_hits": 0, "no_face": 0, "verdicts": 0
+        }
+
+    def _thumbnail(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        size = (self.thumbnail_size, self.thumbnail_size)
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _crop_box(self, frame):
+        x, y, w, h = self._last_box
+        margin_x, margin_y = int(w * self.crop_margin), int(h * self.crop_margin)
+        height, width = frame.shape[:2]
+        left, top = max(0, x - margin_x), max(0, y - margin_y)
+        right, bottom = min(width, x + w + margin_x), min(height, y + h + margin_y)
+        return left, top, right, bottom
+
+    def _locate_face(self, frame):
+        if self._last_box is not None:
+            left, top, right, bottom = self._crop_box(frame)
+            # Slicing gives a view, so the crop costs no copy.
+            face = self.detector.detect_face(frame[top:bottom, left:right])
+            if face is not None:
+                self.counters["crop_hits"] += 1
+                return face, (left, top)
+        return self.detector.detect_face(frame), (0, 0)
+
+    def process(self, frame: np.ndarray):
+        """
+        Feeds one frame into the session.
+
+        Returns:
+            dict or None: A smoothed verdict once `window` faces have been analyzed
+            since the previous one; None otherwise.
+        """
+        self.counters["frames"] += 1
+        self._since_analysis += 1
+        thumbnail = self._thumbnail(frame)
+        refresh_due = self._last_thumbnail is None or self._since_analysis >= self.refresh_every
+        if not refresh_due:
+            difference = float(np.abs(thumbnail - self._last_thumbnail).mean())
+            if difference < self.diff_threshold:
+                self.counters["duplicates_skipped"] += 1
+                return None
+            self._since_sample += 1
+            if self._since_sample < self.sample_every:
+                self.counters["sampling_skipped"] += 1
+                return None
+        self._since_sample = 0
+        self._since_analysis = 0
+        self._last_thumbnail = thumbnail
+
+        self.counters["analyzed"] += 1
+        face, (offset_x, offset_y) = self._locate_face(frame)
+        if face is None:
+            self.counters["no_face"] += 1
+            self._last_box = None
+            return None
+
+        area = face.get('facial_area') or {}
+        if area:
+            self._last_box = (area['x'] + offset_x, area['y'] + offset_y, area['w'], area['h'])
+        self._observations.append((bool(face.get('is_real', False)), float(face.get('confidence', 0))))
+        self._since_verdict += 1
+        if self._since_verdict < self.window:
+            return None
 
-        return {"face_detected": False}
\ No newline at end of file
+        self._since_verdict = 0
+        self.counters["verdicts"] += 1
+        real_ratio = sum(is_real for is_real, _ in self._observations) / len(self._observations)
+        confidence = sum(conf for _, conf in self._observations) / len(self._observations)
+        verdict = self.detector.format_verdict(real_ratio >= 0.5, confidence)
+        verdict["window"] = {
+            "faces": len(self._observations),
+            "real_ratio": round(real_ratio, 2),
+            "frames_seen": self.counters["frames"]
+        }
+        return verdict
\ No newline at end of file
@@ -0,0 +1,241 @@
+# pipeline/admission.py
+
+"""
+Admission control and request coalescing for the analysis endpoints.
+
+Each endpoint gets an AdmissionController: at most `max_concurrency` requests
+run at once, up to `max_queue` more wait in FIFO order for at most
+`queue_timeout` seconds, and anything beyond that is turned away at once with
+a Retry-After estimate instead of piling up in the event loop. Under a spike
+the service therefore answers a bounded number of requests at its normal
+latency and rejects the rest quickly, rather than timing everybody out.
+
+SingleFlight shares one computation between identical requests that arrive
+while it is still running (the same campaign text sent to many numbers).
+"""
+
+import asyncio
+import collections
+import math
+import os
+import time
+from utils.metrics import metrics
+
+def _limits(name, concurrency, queue, timeout):
+    prefix = f"ADMISSION_{name.upper()}_"
+    return {
+        "max_concurrency": int(os.environ.get(prefix + "CONCURRENCY", str(concurrency))),
+        "max_queue": int(os.environ.get(prefix + "QUEUE", str(queue))),
+        "queue_timeout": float(os.environ.get(prefix + "QUEUE_TIMEOUT_SECONDS", str(timeout))),
+    }
+
+# Per-endpoint limits, e.g. ADMISSION_AUDIO_CONCURRENCY=2, ADMISSION_TEXT_QUEUE=512
+ADMISSION_LIMITS = {
+    "text": _limits("text", 64, 256, 2.0),
+    "audio": _limits("audio", 4, 16, 10.0),
+    "message": _limits("message", 32, 128, 2.0),
+}
+
+# Weight of the newest request in the running service-time average behind Retry-After
+SERVICE_TIME_ALPHA = 0.1
+
+_wait_seconds = metrics.histogram(
+    "detection_admission_wait_seconds", "Time requests spent queued for admission.", ["endpoint"])
+_service_seconds = metrics.histogram(
+    "detection_admission_service_seconds", "Time admitted requests spent running.", ["endpoint"])
+_rejected = metrics.counter(
+    "detection_admission_rejected_total", "Requests turned away by admission control.", ["endpoint", "reason"])
+_coalesced = metrics.counter(
+    "detection_coalesced_requests_total", "Requests answered by an identical in-flight computation.", ["flight"])
+
+
+class OverloadedError(RuntimeError):
+    """
+    Raised when a request is not admitted. `status_code` is 429 when the queue
+    was already full and 503 when the request waited its whole queue timeout.
+    """
+    def __init__(self, endpoint, reason, retry_after):
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = 429 if reason == "queue_full" else 503
+        super().__init__(f"The {endpoint} endpoint is overloaded ({reason.replace('_', ' ')}); "
+                         f"retry in {retry_after}s")
+
+
+class AdmissionController:
+    """
+    A concurrency limit with a bounded, time-limited FIFO queue in front of it.
+    Must be used from one event loop.
+    """
+    def __init__(self, name, max_concurrency=64, max_queue=256, queue_timeout=2.0):
+        """
+        Args:
+            name (str): Endpoint name, used in errors and metrics.
+            max_concurrency (int): Requests allowed to run at once.
+            max_queue (int): Requests allowed to wait for a slot; 0 rejects as soon as all slots are busy.
+            queue_timeout (float): Seconds a request may wait before it is rejected.
+        """
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = float(queue_timeout)
+        self.active = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+        self.avg_service_seconds = 0.0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._waiters = collections.deque()
+        self._wait_timer = _wait_seconds.labels(name)
+        self._service_timer = _service_seconds.labels(name)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """
+        Seconds until the queue ahead of a new request should have drained,
+        going by the recent average service time; at least 1.
+        """
+        backlog = self.active + len(self._waiters)
+        return max(1, math.ceil(self.avg_service_seconds * backlog / self.max_concurrency))
+
+    def _reject(self, reason):
+        self.rejected[reason] += 1
+        _rejected.labels(self.name, reason).inc()
+        raise OverloadedError(self.name, reason, self.retry_after())
+
+    def check(self):
+        """
+        Rejects now if a request would not even be queued. Lets a caller skip
+        reading a large body that would be turned away anyway.
+        """
+        if self.active >= self.max_concurrency and len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+
+    async def _acquire(self):
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        self.check()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away; pass it on.
+                self._release()
+            else:
+                self._discard(waiter)
+            raise
+
+    def _discard(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self):
+        self.active -= 1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot goes straight to the oldest waiter.
+                self.active += 1
+                waiter.set_result(None)
+                return
+
+    async def run(self, fn):
+        """
+        Awaits `fn()` once admitted.
+
+        Returns:
+            tuple: (fn's result, {"queue_ms": ..., "service_ms": ...})
+
+        Raises:
+            OverloadedError: If the queue is full or the wait times out.
+        """
+        queued_at = time.perf_counter()
+        await self._acquire()
+        started = time.perf_counter()
+        wait = started - queued_at
+        self.admitted += 1
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self._wait_timer.observe(wait)
+        try:
+            result = await fn()
+        finally:
+            service = time.perf_counter() - started
+            self._release()
+            self._service_timer.observe(service)
+            self.avg_service_seconds += SERVICE_TIME_ALPHA * (service - self.avg_service_seconds)
+        return result, {"queue_ms": round(wait * 1000, 2), "service_ms": round(service * 1000, 2)}
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "avg_queue_ms": round(self.total_wait_seconds / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "max_queue_ms": round(self.max_wait_seconds * 1000, 2),
+            "avg_service_ms": round(self.avg_service_seconds * 1000, 2),
+        }
+
+
+class SingleFlight:
+    """
+    Runs one computation per key at a time; callers asking for a key that is
+    already in flight wait for that computation instead of starting their own.
+
+    The computation runs as its own task, so it completes for the remaining
+    callers even if the caller that started it goes away. Keys are forgotten
+    as soon as the computation finishes; this is not a cache.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.leaders = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._coalesced_counter = _coalesced.labels(name)
+
+    def __len__(self):
+        return len(self._flights)
+
+    def _finished(self, key, task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure is not logged as lost
+
+    async def run(self, key, fn):
+        """
+        Returns:
+            tuple: (result of `fn()`, shared) where `shared` is True when the
+                   result came from another caller's computation; the result
+                   object is then the same one that caller got.
+        """
+        task = self._flights.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+            self._coalesced_counter.inc()
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda finished: self._finished(key, finished))
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._flights), "leaders": self.leaders, "coalesced": self.coalesced}
\ No newline at end of file
@@ -0,0 +1,311 @@
+# pipeline/bulk_score.py
+
+"""
+Offline bulk scoring of CSV corpora without going through the HTTP API.
+
+The input is streamed in fixed-size chunks, each chunk is scored in a worker
+process (TextClassifier and SentimentAnalyzer batch APIs), and results
+are written in input order to JSONL or Parquet. Only a bounded number of
+chunks is ever in flight, so memory does not depend on the input size. After
+every written chunk a checkpoint is saved next to the output; re-running the
+same command with --resume continues where a crashed job stopped.
+
+With --pretokenized, the classifier reads token ids from the corpus's
+memory-mapped copy (see pipeline/token_dataset.py, built on first use)
+instead of tokenizing every text again, in length-bucketed batches.
+
+Usage:
+    python -m pipeline.bulk_score data/text/scam_dataset.csv --output results.jsonl
+    python -m pipeline.bulk_score data/text/scam_dataset.csv --output results.jsonl --pretokenized
+    python -m pipeline.bulk_score data/text/spam.csv --output results_parquet --output-format parquet --resume
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Column mappings for the corpus layouts we receive. `columns` maps our field
+# names to CSV header names; the header is used to auto-detect the format.
+CSV_FORMATS = {
+    "category_message": {
+        "columns": {"label": "Category", "text": "Message"},
+        "encoding": "utf-8",
+    },
+    "v1_v2": {
+        "columns": {"label": "v1", "text": "v2"},
+        "encoding": "latin-1",
+    },
+    "scam_dataset": {
+        "columns": {"id": "id", "channel": "channel", "text": "text", "label": "label"},
+        "encoding": "utf-8",
+    },
+}
+
+def detect_format(path) -> str:
+    """
+    Picks the CSV format whose columns all appear in the file's header.
+    """
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8", errors="replace").strip().lstrip("\ufeff")
+    fields = set(next(csv.reader([header])))
+    for name, spec in CSV_FORMATS.items():
+        if set(spec["columns"].values()) <= fields:
+            return name
+    raise ValueError(f"Unrecognized CSV header in {path}: {sorted(fields)}")
+
+def iter_csv_chunks(path, csv_format, chunk_size=256, skip_rows=0):
+    """
+    Streams a CSV file as lists of normalized records.
+
+    Args:
+        path (str): The CSV file.
+        csv_format (str): A key of CSV_FORMATS.
+        chunk_size (int): Records per yielded chunk.
+        skip_rows (int): Data rows to skip first (used when resuming).
+
+    Yields:
+        list: Dicts with `row` (0-based data row number) and the mapped fields.
+    """
+    spec = CSV_FORMATS[csv_format]
+    columns = spec["columns"]
+    with open(path, newline="", encoding=spec["encoding"], errors="replace") as f:
+        reader = csv.DictReader(f)
+        chunk = []
+        for row_number, row in enumerate(reader):
+            if row_number < skip_rows:
+                continue
+            record = {"row": row_number}
+            for field, column in columns.items():
+                record[field] = row.get(column)
+            record.setdefault("id", row_number)
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+# --- Worker process side ---
+
+_text_classifier = None
+_sentiment_analyzer = None
+_token_dataset = None
+
+# Rows per forward pass when classifying from a token dataset
+PRETOKENIZED_BATCH_SIZE = 32
+
+def _init_worker(model_path, token_dataset_path=None):
+    """
+    Loads the models once per worker process. Imports live here so the parent
+    process never pays for torch.
+    """
+    global _text_classifier, _sentiment_analyzer, _token_dataset
+    from models.text_classifier import TextClassifier
+    from models.sentiment_analysis import SentimentAnalyzer
+    # Bulk corpora are read once, so a result cache would only cost memory.
+    _text_classifier = TextClassifier(model_path=model_path, cache=None)
+    _sentiment_analyzer = SentimentAnalyzer(cache=None)
+    if token_dataset_path:
+        from pipeline.token_dataset import TokenDataset
+        # Memory-mapped, so every worker shares the same pages
+        _token_dataset = TokenDataset(token_dataset_path)
+
+def _classify_pretokenized(records, texts):
+    predictions = {}
+    rows = [record["row"] for record in records]
+    for batch in _token_dataset.iter_batches(PRETOKENIZED_BATCH_SIZE, rows=rows):
+        batch_predictions = _text_classifier.predict_token_batch(batch["input_ids"], batch["attention_mask"])
+        predictions.update(zip(batch["rows"].tolist(), batch_predictions))
+    return [_text_classifier.result_from_prediction(text, predictions[row]) for row, text in zip(rows, texts)]
+
+def _score_chunk(records):
+    texts = [record["text"] or "" for record in records]
+    if _token_dataset is not None:
+        classifications = _classify_pretokenized(records, texts)
+    else:
+        classifications = _text_classifier.predict_batch(texts, use_cache=False)
+    sentiments = _sentiment_analyzer.analyze_batch(texts)
+    results = []
+    for record, classification, sentiment in zip(records, classifications, sentiments):
+        results.append({
+            "row": record["row"],
+            "id": record["id"],
+            "channel": record.get("channel"),
+            "label": record.get("label"),
+            "is_scam": classification["is_scam"],
+            "confidence": classification["confidence"],
+            "model_label": classification["explanation"]["model_label"],
+            "trigger_phrases": classification["explanation"]["trigger_phrases"],
+            "polarity": sentiment["polarity"],
+            "subjectivity": sentiment["subjectivity"],
+            "flagged_keywords": sentiment["flagged_keywords"],
+        })
+    return results
+
+# --- Output and checkpointing ---
+
+class JsonlWriter:
+    """
+    Appends results to a JSONL file. `position` is the byte size after the
+    last fully written chunk; resuming truncates anything written after it.
+    """
+    def __init__(self, path, resume_position=0):
+        self.path = path
+        mode = "r+b" if resume_position and os.path.exists(path) else "wb"
+        self._file = open(path, mode)
+        if mode == "r+b":
+            self._file.truncate(resume_position)
+            self._file.seek(resume_position)
+
+    def write_chunk(self, chunk_index, results):
+        for result in results:
+            self._file.write(json.dumps(result).encode("utf-8") + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @property
+    def position(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """
+    Writes one Parquet part file per chunk into a directory, so a crash can
+    only ever leave behind a complete part or none at all.
+    """
+    def __init__(self, path, resume_position=0):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output needs the 'pyarrow' package.") from e
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.position = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write_chunk(self, chunk_index, results):
+        table = self._pa.Table.from_pylist(results)
+        part = os.path.join(self.path, f"part-{chunk_index:06d}.parquet")
+        self._pq.write_table(table, part + ".tmp")
+        os.replace(part + ".tmp", part)
+
+    def close(self):
+        pass
+
+OUTPUT_WRITERS = {"jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+# --- Driver ---
+
+def run_job(input_path, output_path, output_format="jsonl", csv_format=None, chunk_size=256,
+            workers=None, resume=False, model_path="./models/saved_models/scam_text_classifier",
+            pretokenized=False):
+    """
+    Scores every row of `input_path` and streams the results to `output_path`.
+    With `pretokenized`, the classifier reads the corpus's token dataset.
+
+    Returns:
+        dict: The final checkpoint state (rows and chunks done, elapsed time).
+    """
+    csv_format = csv_format or detect_format(input_path)
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = output_path.rstrip("/") + ".checkpoint.json"
+
+    state = {
+        "input": os.path.abspath(input_path),
+        "format": csv_format,
+        "chunk_size": chunk_size,
+        "rows_done": 0,
+        "chunks_done": 0,
+        "output_position": 0,
+        "elapsed_seconds": 0.0,
+    }
+    if resume:
+        previous = load_checkpoint(checkpoint_path)
+        if previous:
+            if previous["input"] != state["input"] or previous["format"] != csv_format:
+                raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different job.")
+            state = previous
+            print(f"Resuming after {state['rows_done']} rows ({state['chunks_done']} chunks).")
+
+    token_dataset_path = None
+    if pretokenized:
+        from pipeline.token_dataset import ensure_dataset
+        token_dataset_path = ensure_dataset(input_path, model_path, csv_format=csv_format).path
+
+    writer = OUTPUT_WRITERS[output_format](output_path, resume_position=state["output_position"])
+    chunks = iter_csv_chunks(input_path, csv_format, chunk_size=chunk_size, skip_rows=state["rows_done"])
+    # At most two chunks per worker are queued or running at any time.
+    max_in_flight = workers * 2
+    started = time.perf_counter() - state["elapsed_seconds"]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, token_dataset_path)) as pool:
+            in_flight = deque()
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        in_flight.append((len(chunk), pool.submit(_score_chunk, chunk)))
+                if not in_flight:
+                    break
+                # Write strictly in input order so the checkpoint is a simple row count.
+                size, future = in_flight.popleft()
+                writer.write_chunk(state["chunks_done"], future.result())
+                state["rows_done"] += size
+                state["chunks_done"] += 1
+                state["output_position"] = writer.position
+                state["elapsed_seconds"] = time.perf_counter() - started
+                save_checkpoint(checkpoint_path, state)
+                print(f"Scored {state['rows_done']} rows "
+                      f"({state['rows_done'] / max(state['elapsed_seconds'], 1e-9):.1f} rows/s)", file=sys.stderr)
+    finally:
+        writer.close()
+    return state
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV file to score.")
+    parser.add_argument("--output", required=True, help="JSONL file, or directory for Parquet parts.")
+    parser.add_argument("--output-format", choices=sorted(OUTPUT_WRITERS), default="jsonl")
+    parser.add_argument("--format", choices=sorted(CSV_FORMATS), help="CSV layout; detected from the header by default.")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--model-path", default="./models/saved_models/scam_text_classifier")
+    parser.add_argument("--resume", action="store_true", help="Continue from the output's checkpoint.")
+    parser.add_argument("--pretokenized", action="store_true",
+                        help="Classify from the corpus's memory-mapped token dataset (built on first use).")
+    args = parser.parse_args(argv)
+
+    state = run_job(args.input, args.output, output_format=args.output_format, csv_format=args.format,
+                    chunk_size=args.chunk_size, workers=args.workers, resume=args.resume,
+                    model_path=args.model_path, pretokenized=args.pretokenized)
+    print(f"Done: {state['rows_done']} rows in {state['elapsed_seconds']:.1f}s -> {args.output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
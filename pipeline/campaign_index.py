@@ -0,0 +1,453 @@
+# pipeline/campaign_index.py
+
+"""
+Clusters incoming texts into campaigns of near-duplicates.
+
+Scam texts go out as templates that differ only in the victim's name, an
+amount, a reference number or a link, so the exact-text result cache misses
+almost all of them. Each text is reduced to a MinHash signature of its
+character 5-grams (after folding digits, links and addresses into fixed
+tokens), and a banded LSH table finds campaigns whose representative has a
+similar signature, in tens of microseconds per text.
+
+A campaign remembers its representative's signature, its classifier verdict
+once one is confident, and per-minute message counts for velocity. Texts that
+are close enough to a representative confidently labelled as a scam reuse its
+verdict instead of waiting for the model; legitimate verdicts are never
+reused, since the folded-out link is exactly what a phishing copy changes.
+Campaigns expire after CAMPAIGN_WINDOW_SECONDS without a new message, and
+the least recently active ones are evicted past CAMPAIGN_MAX_CAMPAIGNS, so
+memory stays bounded. With CAMPAIGN_SNAPSHOT_PATH set, the index is written
+to disk on shutdown and read back on startup.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict, deque
+
+import numpy as np
+
+CAMPAIGN_INDEX = os.environ.get("CAMPAIGN_INDEX", "1") == "1"
+CAMPAIGN_WINDOW_SECONDS = float(os.environ.get("CAMPAIGN_WINDOW_SECONDS", "86400"))
+CAMPAIGN_MAX_CAMPAIGNS = int(os.environ.get("CAMPAIGN_MAX_CAMPAIGNS", "20000"))
+# Estimated Jaccard similarity of 5-gram sets needed to join a campaign, and
+# to reuse its verdict
+CAMPAIGN_SIMILARITY = float(os.environ.get("CAMPAIGN_SIMILARITY", "0.5"))
+CAMPAIGN_REUSE_SIMILARITY = float(os.environ.get("CAMPAIGN_REUSE_SIMILARITY", "0.7"))
+# Classifier confidence a verdict needs before other members may reuse it
+CAMPAIGN_REUSE_CONFIDENCE = float(os.environ.get("CAMPAIGN_REUSE_CONFIDENCE", "0.9"))
+# Texts with fewer words ("ok see you") are too generic to cluster
+CAMPAIGN_MIN_WORDS = int(os.environ.get("CAMPAIGN_MIN_WORDS", "5"))
+# Empty disables snapshots
+CAMPAIGN_SNAPSHOT_PATH = os.environ.get("CAMPAIGN_SNAPSHOT_PATH", "")
+
+# MinHash permutations and rows per LSH band: 21 bands of 3 rows find ~94% of
+# pairs at similarity 0.5 and ~99.5% at 0.6. Snapshots are only restored with
+# the same settings.
+NUM_PERM = 63
+BAND_ROWS = 3
+SHINGLE_SIZE = 5
+# Longer texts are clustered on their beginning
+MAX_SHINGLE_CHARS = 2000
+# Per-minute counts kept per campaign for velocity
+VELOCITY_MINUTES = 60
+REPRESENTATIVE_CHARS = 200
+
+# Multiply-shift hash functions h(x) = (a * x + b) >> 32 mod 2**64, a odd
+_SEED = 20240611
+_random = np.random.RandomState(_SEED)
+_PERM_A = (_random.randint(0, 2 ** 63, size=(NUM_PERM, 1), dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_PERM_B = _random.randint(0, 2 ** 63, size=(NUM_PERM, 1), dtype=np.uint64)
+_POWERS = [np.uint64(257 ** power) for power in range(SHINGLE_SIZE - 1, -1, -1)]
+
+_URL = re.compile(r"(?:https?://|www\.)\S+|\S+\.(?:com|net|org|in|co|io|ly|me|info|xyz)\b\S*", re.IGNORECASE)
+_EMAIL = re.compile(r"\S+@\S+\.\w+")
+_DIGITS = re.compile(r"\d+")
+
+# Rough per-campaign memory, for stats
+_CAMPAIGN_BYTES = 2048
+
+def normalize_for_shingles(text: str) -> str:
+    """
+    Folds the parts a campaign varies per recipient into fixed tokens: links,
+    email addresses and digit runs. Case and spacing are folded too.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _EMAIL.sub(" @ ", text)
+    text = _URL.sub(" / ", text)
+    text = _DIGITS.sub("0", text)
+    return " ".join(text.split())
+
+def minhash_signature(text: str):
+    """
+    MinHash signature (NUM_PERM uint32 values) of the character 5-grams of a
+    normalized text, or None for texts shorter than CAMPAIGN_MIN_WORDS words.
+    """
+    normalized = normalize_for_shingles(text)
+    if normalized.count(" ") + 1 < CAMPAIGN_MIN_WORDS:
+        return None
+    data = np.frombuffer(normalized[:MAX_SHINGLE_CHARS].encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    count = len(data) - SHINGLE_SIZE + 1
+    if count < 1:
+        return None
+    # Every 5-byte window as a base-257 number, all at once
+    shingles = data[:count] * _POWERS[0]
+    for offset in range(1, SHINGLE_SIZE):
+        shingles += data[offset:offset + count] * _POWERS[offset]
+    shingles = np.unique(shingles)
+    # The shift is monotonic, so it is applied after taking the minimum.
+    return ((_PERM_A * shingles + _PERM_B).min(axis=1) >> np.uint64(32)).astype(np.uint32)
+
+def band_keys(signature) -> list:
+    return [(band, signature[start:start + BAND_ROWS].tobytes())
+            for band, start in enumerate(range(0, NUM_PERM, BAND_ROWS))]
+
+def similarity(signature, other) -> float:
+    """
+    Estimated Jaccard similarity of the 5-gram sets behind two signatures.
+    """
+    return float(np.count_nonzero(signature == other)) / NUM_PERM
+
+def _verdict_of(result):
+    explanation = result.get("explanation") or {}
+    if "model_label" not in explanation:
+        return None
+    return {"label": explanation["model_label"], "score": float(result.get("confidence", 0.0)),
+            "is_scam": bool(result.get("is_scam"))}
+
+
+class Campaign:
+    """
+    One cluster of near-duplicate texts.
+    """
+    __slots__ = ("campaign_id", "representative", "signature", "keys", "created_at", "updated_at", "size",
+                 "verdict", "reused", "minutes")
+
+    def __init__(self, campaign_id, representative, signature, now):
+        self.campaign_id = campaign_id
+        self.representative = representative[:REPRESENTATIVE_CHARS]
+        self.signature = signature
+        self.keys = band_keys(signature)
+        self.created_at = now
+        self.updated_at = now
+        self.size = 0
+        self.verdict = None             # {"label", "score", "is_scam"} once confident
+        self.reused = 0                 # members answered with the verdict
+        self.minutes = deque(maxlen=VELOCITY_MINUTES)   # [minute, messages]
+
+    def add(self, now):
+        self.size += 1
+        self.updated_at = now
+        minute = int(now // 60)
+        if self.minutes and self.minutes[-1][0] == minute:
+            self.minutes[-1][1] += 1
+        else:
+            self.minutes.append([minute, 1])
+
+    def velocity(self, now) -> dict:
+        """
+        Messages in the last minute and the last VELOCITY_MINUTES, and the
+        average rate per minute over the part of that window the campaign has existed.
+        """
+        minute = int(now // 60)
+        recent = sum(count for at, count in self.minutes if at > minute - VELOCITY_MINUTES)
+        last_minute = sum(count for at, count in self.minutes if at == minute)
+        active_minutes = min(VELOCITY_MINUTES, max(1, minute - int(self.created_at // 60) + 1))
+        return {
+            "last_minute": last_minute,
+            "last_hour": recent,
+            "per_minute": round(recent / active_minutes, 2),
+        }
+
+    def summary(self, now, history=False) -> dict:
+        summary = {
+            "campaign_id": self.campaign_id,
+            "size": self.size,
+            "representative": self.representative,
+            "first_seen": self.created_at,
+            "last_seen": self.updated_at,
+            "velocity": self.velocity(now),
+            "verdict": dict(self.verdict) if self.verdict else None,
+            "verdicts_reused": self.reused,
+        }
+        if history:
+            summary["per_minute_history"] = [{"minute": at * 60, "messages": count} for at, count in self.minutes]
+        return summary
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__ if name != "keys"}
+        data["signature"] = self.signature.tolist()
+        data["minutes"] = [list(entry) for entry in self.minutes]
+        return data
+
+    @classmethod
+    def from_dict(cls, data) -> "Campaign":
+        campaign = cls(data["campaign_id"], data["representative"], np.array(data["signature"], dtype=np.uint32),
+                       data["created_at"])
+        for name in ("updated_at", "size", "verdict", "reused"):
+            setattr(campaign, name, data[name])
+        campaign.minutes = deque(data.get("minutes", []), maxlen=VELOCITY_MINUTES)
+        return campaign
+
+
+class CampaignMatch:
+    """
+    The outcome of `CampaignIndex.lookup` for one text, to be passed back to `record`.
+    """
+    __slots__ = ("signature", "campaign", "similarity")
+
+    def __init__(self, signature, campaign, similarity):
+        self.signature = signature
+        self.campaign = campaign
+        self.similarity = similarity
+
+
+class CampaignIndex:
+    """
+    Thread-safe, bounded LSH index of campaign id -> Campaign.
+
+        match = index.lookup(text)
+        prediction = index.reusable_prediction(match)   # skip the model if not None
+        ...
+        index.record(match, text, result, reused=prediction is not None)
+    """
+    def __init__(self, window_seconds=CAMPAIGN_WINDOW_SECONDS, max_campaigns=CAMPAIGN_MAX_CAMPAIGNS,
+                 threshold=CAMPAIGN_SIMILARITY, reuse_similarity=CAMPAIGN_REUSE_SIMILARITY,
+                 reuse_confidence=CAMPAIGN_REUSE_CONFIDENCE, snapshot_path=CAMPAIGN_SNAPSHOT_PATH):
+        """
+        Args:
+            window_seconds (float): Silence after which a campaign is dropped. 0 disables expiry.
+            max_campaigns (int): Most campaigns kept; the least recently active go first.
+            threshold (float): Similarity needed to join a campaign.
+            reuse_similarity (float): Similarity needed to reuse a campaign's verdict.
+            reuse_confidence (float): Confidence a verdict needs to be reused.
+            snapshot_path (str): Where `snapshot`/`restore` write and read. Empty disables them.
+        """
+        self.window_seconds = float(window_seconds)
+        self.max_campaigns = max(1, int(max_campaigns))
+        self.threshold = float(threshold)
+        self.reuse_similarity = float(reuse_similarity)
+        self.reuse_confidence = float(reuse_confidence)
+        self.snapshot_path = snapshot_path
+        self._campaigns = OrderedDict()
+        self._buckets = {}              # (band, band bytes) -> campaign id
+        self._lock = threading.Lock()
+        self.observed = 0
+        self.matched = 0
+        self.reused = 0
+        self.verdict_conflicts = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._campaigns)
+
+    def _is_expired(self, campaign, now):
+        return self.window_seconds > 0 and now - campaign.updated_at > self.window_seconds
+
+    def _drop(self, campaign_id):
+        campaign = self._campaigns.pop(campaign_id)
+        for key in campaign.keys:
+            if self._buckets.get(key) == campaign_id:
+                del self._buckets[key]
+
+    def _evict(self, now):
+        # Least recently active first: expired ones, then until the bound holds.
+        while self._campaigns:
+            campaign_id, campaign = next(iter(self._campaigns.items()))
+            if self._is_expired(campaign, now):
+                self._drop(campaign_id)
+                self.expirations += 1
+            elif len(self._campaigns) > self.max_campaigns:
+                self._drop(campaign_id)
+                self.evictions += 1
+            else:
+                break
+
+    def _insert(self, campaign):
+        self._campaigns[campaign.campaign_id] = campaign
+        for key in campaign.keys:
+            self._buckets[key] = campaign.campaign_id
+
+    def _best(self, signature, now):
+        best, best_similarity = None, 0.0
+        seen = set()
+        for key in band_keys(signature):
+            campaign_id = self._buckets.get(key)
+            if campaign_id is None or campaign_id in seen:
+                continue
+            seen.add(campaign_id)
+            campaign = self._campaigns[campaign_id]
+            if self._is_expired(campaign, now):
+                continue
+            score = similarity(signature, campaign.signature)
+            if score > best_similarity:
+                best, best_similarity = campaign, score
+        if best_similarity < self.threshold:
+            return None, best_similarity
+        return best, best_similarity
+
+    def lookup(self, text: str):
+        """
+        Finds the campaign a text belongs to, without recording it.
+
+        Returns:
+            CampaignMatch: With `campaign` None if no campaign is similar enough,
+                           or None if the text is too short to cluster.
+        """
+        signature = minhash_signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            campaign, score = self._best(signature, time.time())
+        return CampaignMatch(signature, campaign, score)
+
+    def reusable_prediction(self, match):
+        """
+        Returns the matched campaign's classifier prediction ({"label", "score"})
+        if this text is close enough to reuse it, or None.
+
+        Only scam verdicts are reused. Links are folded out of the signature,
+        so a copy of a legitimate template with a malicious link swapped in
+        looks identical; sending the benign template first must not get the
+        copy past the model.
+        """
+        if match is None or match.campaign is None or match.similarity < self.reuse_similarity:
+            return None
+        verdict = match.campaign.verdict
+        if verdict is None or not verdict.get("is_scam"):
+            return None
+        return {"label": verdict["label"], "score": verdict["score"]}
+
+    def record(self, match, text: str, result: dict, reused=False) -> dict:
+        """
+        Adds a classified text to its campaign, starting a new one if none matched.
+
+        A confident model verdict on a campaign's representative (or a member
+        close enough to reuse it) becomes the campaign verdict; a member close
+        enough whose model verdict disagrees withdraws it.
+
+        Returns:
+            dict: The campaign summary, with this text's `similarity` and `verdict_reused`.
+        """
+        now = time.time()
+        with self._lock:
+            campaign, score = match.campaign, match.similarity
+            if campaign is None or campaign.campaign_id not in self._campaigns:
+                # Texts of a new campaign classified concurrently all missed in lookup.
+                campaign, score = self._best(match.signature, now)
+            if campaign is None:
+                campaign = Campaign(uuid.uuid4().hex[:12], text, match.signature, now)
+                score = 1.0
+                self._insert(campaign)
+            else:
+                self.matched += 1
+                self._campaigns.move_to_end(campaign.campaign_id)
+            campaign.add(now)
+            self.observed += 1
+            if reused:
+                campaign.reused += 1
+                self.reused += 1
+            elif score >= self.reuse_similarity:
+                verdict = _verdict_of(result)
+                if verdict is not None:
+                    if campaign.verdict is None:
+                        if verdict["score"] >= self.reuse_confidence:
+                            campaign.verdict = verdict
+                    elif verdict["label"] != campaign.verdict["label"]:
+                        campaign.verdict = None
+                        self.verdict_conflicts += 1
+            summary = campaign.summary(now)
+            self._evict(now)
+        summary["similarity"] = round(score, 3)
+        summary["verdict_reused"] = reused
+        return summary
+
+    def campaign(self, campaign_id: str):
+        """
+        Returns a campaign's summary with its per-minute history, or None if it is unknown or expired.
+        """
+        now = time.time()
+        with self._lock:
+            campaign = self._campaigns.get(campaign_id)
+            if campaign is None or self._is_expired(campaign, now):
+                return None
+            return campaign.summary(now, history=True)
+
+    def top(self, limit=20, min_size=2) -> list:
+        """
+        The busiest live campaigns: by messages in the last hour, then by size.
+        """
+        now = time.time()
+        with self._lock:
+            summaries = [campaign.summary(now) for campaign in self._campaigns.values()
+                         if campaign.size >= min_size and not self._is_expired(campaign, now)]
+        summaries.sort(key=lambda summary: (summary["velocity"]["last_hour"], summary["size"]), reverse=True)
+        return summaries[:limit]
+
+    def snapshot(self, path=None) -> int:
+        """
+        Writes the live campaigns to `path` (default: `snapshot_path`) as JSON,
+        replacing the file atomically. Returns the number of campaigns written.
+        """
+        path = path or self.snapshot_path
+        if not path:
+            return 0
+        now = time.time()
+        with self._lock:
+            campaigns = [campaign.to_dict() for campaign in self._campaigns.values()
+                         if not self._is_expired(campaign, now)]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"saved_at": now, "num_perm": NUM_PERM, "band_rows": BAND_ROWS, "seed": _SEED,
+                       "campaigns": campaigns}, f)
+        os.replace(path + ".tmp", path)
+        print(f"Saved {len(campaigns)} campaigns to {path}.")
+        return len(campaigns)
+
+    def restore(self, path=None) -> int:
+        """
+        Loads campaigns written by `snapshot`, skipping those that have expired
+        since. Returns the number of campaigns restored.
+        """
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if (data.get("num_perm"), data.get("band_rows"), data.get("seed")) != (NUM_PERM, BAND_ROWS, _SEED):
+            # Signatures from other hash settings cannot be compared with new ones.
+            print(f"Ignoring campaign snapshot {path}: it was written with different MinHash settings.")
+            return 0
+        now = time.time()
+        with self._lock:
+            for item in sorted(data.get("campaigns", []), key=lambda item: item["updated_at"]):
+                campaign = Campaign.from_dict(item)
+                if self._is_expired(campaign, now):
+                    continue
+                if campaign.campaign_id in self._campaigns:
+                    self._drop(campaign.campaign_id)
+                self._insert(campaign)
+            self._evict(now)
+            restored = len(self._campaigns)
+        print(f"Restored {restored} campaigns from {path}.")
+        return restored
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "campaigns": len(self._campaigns),
+                "buckets": len(self._buckets),
+                "approx_memory_mb": round(len(self._campaigns) * _CAMPAIGN_BYTES / (1024 * 1024), 2),
+                "observed": self.observed,
+                "matched": self.matched,
+                "verdicts_reused": self.reused,
+                "verdict_conflicts": self.verdict_conflicts,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
\ No newline at end of file
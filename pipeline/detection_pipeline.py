@@ -1,64 +1,657 @@
 # pipeline/detection_pipeline.py
 
-from models.text_classifier import TextClassifier
-from models.audio_processor import AudioProcessor
-from models.video_deepfake_detector import VideoDeepfakeDetector
-import numpy as np
-import cv2
+from models.text_classifier import MicroBatcher
+from models.audio_processor import iter_audio_windows
+from pipeline.model_registry import ModelRegistry, DETECTION_MODALITIES
+from pipeline.session_store import SessionStore
+from pipeline.admission import SingleFlight, ADMISSION_LIMITS
+from pipeline.campaign_index import CampaignIndex, CAMPAIGN_INDEX
+from pipeline.text_cascade import TextCascade, TEXT_CASCADE
+from alerts.pubsub import risk_level_for
+from utils.metrics import stage_seconds, analyzer_seconds, text_batch_size
+from utils.blob_store import BlobStore, AUDIO_BLOB_STORE, blob_digest
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import copy
+import os
+import time
 
-# Initialize all our models once when the application starts
-text_classifier = TextClassifier()
-audio_processor = AudioProcessor()
-video_detector = VideoDeepfakeDetector()
+# Micro-batching knobs for the text classifier
+TEXT_BATCH_MAX_SIZE = int(os.environ.get("TEXT_BATCH_MAX_SIZE", "16"))
+TEXT_BATCH_MAX_WAIT_MS = float(os.environ.get("TEXT_BATCH_MAX_WAIT_MS", "5"))
 
-async def process_text_input(text: str) -> dict:
+# Streaming audio analysis windows
+AUDIO_WINDOW_SECONDS = float(os.environ.get("AUDIO_WINDOW_SECONDS", "4"))
+AUDIO_HOP_SECONDS = float(os.environ.get("AUDIO_HOP_SECONDS", "2"))
+AUDIO_SAMPLE_RATE = 16000
+# Threads decoding and classifying audio windows; by default one per upload
+# the audio endpoint admits at a time
+AUDIO_WORKERS = int(os.environ.get("AUDIO_WORKERS", str(ADMISSION_LIMITS["audio"]["max_concurrency"])))
+
+# Multi-channel pipeline: per-analyzer deadline and the threads that run the
+# synchronous analyzers (sentiment, reputation)
+PIPELINE_TIMEOUT_MS = float(os.environ.get("PIPELINE_TIMEOUT_MS", "500"))
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "8"))
+
+# Models are built on first use (or by registry.warm_up()), and heavy
+# libraries are only imported then, so a text-only worker never loads
+# deepface/TensorFlow.
+def _build_text_classifier():
+    from models.text_classifier import TextClassifier
+    return TextClassifier(lexicon_path=os.environ.get("TRIGGER_LEXICON_PATH"))
+
+def _build_audio_processor():
+    from models.audio_processor import AudioProcessor
+    return AudioProcessor()
+
+def _build_video_detector():
+    from models.video_deepfake_detector import VideoDeepfakeDetector
+    return VideoDeepfakeDetector()
+
+registry = ModelRegistry(
+    {"text": _build_text_classifier, "audio": _build_audio_processor, "video": _build_video_detector},
+    modalities=DETECTION_MODALITIES
+)
+
+# Running per-session aggregates; see pipeline/session_store.py
+session_store = SessionStore()
+
+# Stage timers, looked up once so the hot paths only observe
+_text_classify_timer = stage_seconds.labels("text.classify")
+_text_inference_timer = stage_seconds.labels("text.batch_inference")
+_text_campaign_timer = stage_seconds.labels("text.campaign_lookup")
+_text_cascade_timer = stage_seconds.labels("text.cascade_fast")
+_audio_transcribe_timer = stage_seconds.labels("audio.transcribe")
+_audio_decode_timer = stage_seconds.labels("audio.window_decode")
+_audio_spoof_timer = stage_seconds.labels("audio.spoof_model")
+_audio_total_timer = stage_seconds.labels("audio.total")
+_video_decode_timer = stage_seconds.labels("video.decode")
+_video_inference_timer = stage_seconds.labels("video.inference")
+_pipeline_total_timer = stage_seconds.labels("pipeline.total")
+
+_REGISTRY_NAMES = {"text_classifier": "text", "audio_processor": "audio", "video_detector": "video"}
+
+def __getattr__(name):
+    # Keeps `from pipeline.detection_pipeline import text_classifier` working
+    # while loading the model lazily.
+    if name in _REGISTRY_NAMES:
+        return registry.get(_REGISTRY_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Concurrent text requests share padded forward passes on a worker thread
+def _classify_text_batch(items):
+    texts = [text for text, _ in items]
+    use_cache = [flag for _, flag in items]
+    text_batch_size.observe(len(texts))
+    # classify_text has already looked these texts up in the cache
+    with _text_inference_timer.time():
+        return registry.get("text").predict_batch(texts, use_cache=use_cache, read_cache=False)
+
+text_batcher = MicroBatcher(
+    _classify_text_batch,
+    max_batch_size=TEXT_BATCH_MAX_SIZE,
+    max_wait_ms=TEXT_BATCH_MAX_WAIT_MS
+)
+
+# Confident texts are answered without the transformer; see pipeline/text_cascade.py
+text_cascade = TextCascade() if TEXT_CASCADE else None
+
+# Identical texts in flight at the same time share one batch slot
+text_flights = SingleFlight("text_classifier")
+
+# Near-duplicate texts grouped into campaigns; see pipeline/campaign_index.py
+campaign_index = CampaignIndex() if CAMPAIGN_INDEX else None
+
+def get_text_batching_stats() -> dict:
+    """
+    Returns the per-batch size and latency counters of the text batcher.
+    """
+    stats = text_batcher.stats.snapshot()
+    stats["queue_depth"] = text_batcher.queue_depth
+    stats["max_batch_size"] = text_batcher.max_batch_size
+    stats["max_wait_ms"] = text_batcher.max_wait * 1000
+    stats["coalescing"] = text_flights.stats()
+    return stats
+
+async def classify_text(text: str, use_cache=True) -> dict:
+    """
+    Classifies one text, answering repeats from the result cache without
+    waiting for a batch slot. Texts the cascade's first stage is confident
+    about are answered without the transformer. A text that is already being
+    classified for another caller is not queued again; both get the one result.
+    """
+    with _text_classify_timer.time():
+        text_classifier = await registry.aget("text")
+        if use_cache:
+            cached = text_classifier.cached_result(text)
+            if cached is not None:
+                return cached
+        decision = None
+        if text_cascade is not None and await text_cascade.aload() is not None:
+            with _text_cascade_timer.time():
+                decision = text_cascade.route(text)
+            if decision.label is not None:
+                return text_cascade.fast_result(text_classifier, text, decision)
+        started = time.perf_counter()
+        result, shared = await text_flights.run((text, use_cache), lambda: text_batcher.submit((text, use_cache)))
+        # Callers own their result, as with cache hits.
+        result = copy.deepcopy(result) if shared else result
+        if decision is not None:
+            text_cascade.record_transformer(decision, result, time.perf_counter() - started)
+        return result
+
+async def process_text_input(text: str, use_cache=True, session_id=None) -> dict:
     """
     Orchestrates the analysis of a text input.
+
+    With a `session_id`, the result is also folded into that session and the
+    updated session verdict is returned under "session".
+
+    The text is also added to its campaign of near-duplicates, returned under
+    "campaign". A text close enough to a campaign with a confident verdict
+    reuses that verdict instead of waiting for the model (unless `use_cache`
+    is False).
     """
-    result = text_classifier.predict(text)
-    return {
+    match = None
+    if campaign_index is not None:
+        with _text_campaign_timer.time():
+            match = campaign_index.lookup(text)
+    prediction = campaign_index.reusable_prediction(match) if use_cache and match is not None else None
+    if prediction is not None:
+        text_classifier = await registry.aget("text")
+        result = text_classifier.result_from_prediction(text, prediction)
+    else:
+        result = await classify_text(text, use_cache)
+    analysis = {
         "type": "text_analysis",
         "content": text,
         "result": result
     }
+    if match is not None:
+        analysis["campaign"] = campaign_index.record(match, text, result, reused=prediction is not None)
+    if session_id:
+        analysis["session_id"] = session_id
+        analysis["session"] = session_store.observe(session_id, analysis)
+    return analysis
+
+# Audio windows are decoded and classified on these threads. Each upload pulls
+# its windows one at a time, so concurrent uploads proceed side by side.
+audio_executor = ThreadPoolExecutor(max_workers=max(1, AUDIO_WORKERS), thread_name_prefix="audio-windows")
+
+# Uploaded clips are kept once per content, with their transcript and spoof
+# windows, so a replayed clip is not analyzed again (see utils/blob_store.py).
+# One thread does all store I/O, in submission order.
+audio_blobs = BlobStore() if AUDIO_BLOB_STORE else None
+blob_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-blobs")
+
+TRANSCRIPTION_RESULT_KIND = "transcription"
+
+def _spoof_result_kind(audio_processor) -> str:
+    # Memoized windows are only valid for the same model and windowing.
+    model = os.path.basename(str(getattr(audio_processor, "model_path", "")))
+    return f"spoof_windows:{model}:{AUDIO_WINDOW_SECONDS}:{AUDIO_HOP_SECONDS}"
+
+def _recall_audio(digest, spoof_kind) -> dict:
+    memo = {}
+    try:
+        for name, kind in (("transcription", TRANSCRIPTION_RESULT_KIND), ("spoof_windows", spoof_kind)):
+            value = audio_blobs.get_result(digest, kind)
+            if value is not None:
+                memo[name] = value
+    except Exception as e:
+        print(f"Could not read memoized audio results for {digest}: {e!r}")
+    return memo
 
-async def process_audio_input(audio_bytes: bytes, filename: str) -> dict:
+def _store_audio(audio_bytes, digest):
+    try:
+        audio_blobs.put(audio_bytes, digest)
+    except Exception as e:
+        print(f"Could not store audio blob {digest}: {e!r}")
+
+def _remember_audio(digest, results: dict):
+    try:
+        for kind, value in results.items():
+            audio_blobs.set_result(digest, kind, value)
+    except Exception as e:
+        print(f"Could not memoize audio results for {digest}: {e!r}")
+
+class SpoofSummary:
     """
-    Orchestrates the analysis of an audio input.
+    Running spoof verdict over the windows of one call, in constant memory.
     """
-    # For the demo, save the audio file temporarily to be processed
-    temp_audio_path = f"data/audio/{filename}"
-    with open(temp_audio_path, "wb") as f:
-        f.write(audio_bytes)
+    def __init__(self):
+        self.windows = 0
+        self.spoofed = 0
+        self.spoof_confidence = 0.0
+        self.genuine_confidence = 0.0
+        self.max_spoof_confidence = 0.0
+        self.first_spoof_at = None
+        self.error = None
 
-    # 1. Transcribe the audio to get the text content
-    transcribed_text = await audio_processor.transcribe_audio(audio_bytes)
-    
-    # 2. Analyze the transcribed text for scams
-    text_analysis_result = text_classifier.predict(transcribed_text)
-    
-    # 3. Analyze the audio file for spoofing
-    spoof_analysis_result = audio_processor.predict_spoof(temp_audio_path)
+    def add(self, window: dict):
+        result = window["spoof_analysis"]
+        self.windows += 1
+        if result["is_spoof"]:
+            self.spoofed += 1
+            self.spoof_confidence += result["confidence"]
+            self.max_spoof_confidence = max(self.max_spoof_confidence, result["confidence"])
+            if self.first_spoof_at is None:
+                self.first_spoof_at = window["start_seconds"]
+        else:
+            self.genuine_confidence += result["confidence"]
+
+    def result(self) -> dict:
+        # Majority vote over windows; confidence is the mean of the winning side.
+        is_spoof = self.windows > 0 and self.spoofed * 2 >= self.windows
+        if is_spoof:
+            confidence = self.spoof_confidence / self.spoofed
+        elif self.windows:
+            confidence = self.genuine_confidence / (self.windows - self.spoofed)
+        else:
+            confidence = 0.0
+        explanation = {
+            "windows": self.windows,
+            "spoofed_windows": self.spoofed,
+            "first_spoof_at_seconds": self.first_spoof_at,
+            "max_spoof_confidence": round(self.max_spoof_confidence, 2),
+            "indicators": ["spectral_artifacts_detected"] if is_spoof else []
+        }
+        if self.error:
+            explanation["error"] = self.error
+        return {"is_spoof": is_spoof, "confidence": round(confidence, 2), "explanation": explanation}
 
+def _next_spoof_window(windows):
+    # Windows are decoded lazily, so pulling the next one is the decode time.
+    with _audio_decode_timer.time():
+        item = next(windows, None)
+    if item is None:
+        return None
+    start, samples = item
+    with _audio_spoof_timer.time():
+        spoof_analysis = registry.get("audio").predict_spoof_window(samples, AUDIO_SAMPLE_RATE)
     return {
+        "start_seconds": round(start, 2),
+        "duration_seconds": round(len(samples) / AUDIO_SAMPLE_RATE, 2),
+        "spoof_analysis": spoof_analysis
+    }
+
+async def analyze_audio_windows(audio_bytes: bytes):
+    """
+    Decodes the upload in memory and yields a spoof verdict per overlapping window
+    as soon as it is ready.
+    """
+    loop = asyncio.get_running_loop()
+    windows = iter_audio_windows(audio_bytes, AUDIO_WINDOW_SECONDS, AUDIO_HOP_SECONDS, AUDIO_SAMPLE_RATE)
+    try:
+        while True:
+            window = await loop.run_in_executor(audio_executor, _next_spoof_window, windows)
+            if window is None:
+                return
+            yield window
+    finally:
+        windows.close()
+
+async def process_audio_input(audio_bytes: bytes, filename: str, on_partial=None, session_id=None,
+                              digest=None) -> dict:
+    """
+    Orchestrates the analysis of an audio input.
+
+    Transcription and per-window spoof detection run concurrently. If
+    `on_partial` is given it is awaited with a partial verdict after every
+    window and once the transcript has been classified, so alerts can go out
+    while a long call is still being analyzed.
+
+    The upload is kept in `audio_blobs` under its SHA-256 `digest` (computed
+    if not given), written in the background. A clip that was analyzed before
+    reuses its memoized transcript and spoof windows; the transcript is still
+    classified, so the scam verdict follows the current text model.
+
+    With a `session_id`, every window and the transcript verdict are folded
+    into that session as they arrive; partials and the final result carry the
+    session verdict under "session".
+    """
+    started = time.perf_counter()
+    audio_processor = await registry.aget("audio")
+    loop = asyncio.get_running_loop()
+
+    memo = {}
+    spoof_kind = _spoof_result_kind(audio_processor)
+    if audio_blobs is not None:
+        digest = digest or blob_digest(audio_bytes)
+        memo = await loop.run_in_executor(blob_executor, _recall_audio, digest, spoof_kind)
+        if not memo:
+            # Not awaited: the analysis does not need the file on disk.
+            loop.run_in_executor(blob_executor, _store_audio, audio_bytes, digest)
+
+    session = None
+
+    def observe(message):
+        nonlocal session
+        if session_id:
+            session = session_store.observe(session_id, message)
+
+    async def emit(partial):
+        if session is not None:
+            partial["session"] = session
+        if on_partial is not None:
+            await on_partial(dict(partial, type="audio_partial", filename=filename))
+
+    async def transcribe_and_classify():
+        # 1. Transcribe the audio to get the text content
+        transcribed_text = memo.get("transcription")
+        if transcribed_text is None:
+            with _audio_transcribe_timer.time():
+                transcribed_text = await audio_processor.transcribe_audio(audio_bytes)
+        # 2. Analyze the transcribed text for scams
+        text_analysis_result = await classify_text(transcribed_text)
+        observe({"type": "text_analysis", "channel": "audio", "result": text_analysis_result})
+        await emit({"transcribed_text": transcribed_text, "text_analysis": text_analysis_result})
+        return transcribed_text, text_analysis_result
+
+    transcription = asyncio.create_task(transcribe_and_classify())
+
+    async def memoized_windows():
+        for window in memo["spoof_windows"]:
+            yield window
+
+    # 3. Analyze the audio for spoofing, window by window
+    spoof_summary = SpoofSummary()
+    windows = []
+    window_iter = memoized_windows() if "spoof_windows" in memo else analyze_audio_windows(audio_bytes)
+    try:
+        while True:
+            # Only decoding is guarded: a failing `on_partial` is not a decode error.
+            try:
+                window = await anext(window_iter)
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                # Undecodable or unsupported container; the transcript can still be scored.
+                spoof_summary.error = f"Could not decode audio: {e}"
+                break
+            windows.append(window)
+            spoof_summary.add(window)
+            observe({"type": "audio_window", "window": window})
+            await emit({"window": window, "spoof_analysis": spoof_summary.result()})
+    except BaseException:
+        transcription.cancel()
+        raise
+    finally:
+        await window_iter.aclose()
+
+    transcribed_text, text_analysis_result = await transcription
+
+    if audio_blobs is not None:
+        fresh = {}
+        if "transcription" not in memo:
+            fresh[TRANSCRIPTION_RESULT_KIND] = transcribed_text
+        if "spoof_windows" not in memo and spoof_summary.error is None:
+            fresh[spoof_kind] = windows
+        if fresh:
+            loop.run_in_executor(blob_executor, _remember_audio, digest, fresh)
+
+    analysis = {
         "type": "audio_analysis",
         "filename": filename,
         "transcribed_text": transcribed_text,
         "text_analysis": text_analysis_result,
-        "spoof_analysis": spoof_analysis_result
+        "spoof_analysis": spoof_summary.result()
     }
+    if audio_blobs is not None:
+        analysis["blob"] = {"digest": digest, "memoized": sorted(memo)}
+    if session_id:
+        analysis["session_id"] = session_id
+        # Windows and transcript are already in the session; only report it.
+        analysis["session"] = session_store.verdict(session_id) or session
+    _audio_total_timer.observe(time.perf_counter() - started)
+    return analysis
 
-def process_video_frame(frame_bytes: bytes) -> dict:
+def process_video_frame(frame_bytes: bytes, session_id=None) -> dict:
     """
-    Orchestrates the analysis of a single video frame.
+    Orchestrates the analysis of a single video frame, folding the verdict
+    into `session_id`'s session if given.
     """
+    from models.video_deepfake_detector import decode_frame
     # Decode the image bytes into an OpenCV frame
-    nparr = np.frombuffer(frame_bytes, np.uint8)
-    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    
-    result = video_detector.analyze_frame(frame)
+    with _video_decode_timer.time():
+        frame = decode_frame(frame_bytes)
+
+    with _video_inference_timer.time():
+        result = registry.get("video").analyze_frame(frame)
     
-    return {
+    analysis = {
         "type": "video_frame_analysis",
         "result": result
-    }
\ No newline at end of file
+    }
+    if session_id:
+        analysis["session_id"] = session_id
+        analysis["session"] = session_store.observe(session_id, analysis)
+    return analysis
+
+# --- Multi-channel pipeline ---
+
+PIPELINE_CHANNELS = ("sms", "email", "call", "video")
+
+ANALYZERS = ("text_classifier", "sentiment", "reputation")
+
+# The synchronous analyzers run here so a slow one never blocks the event loop.
+analyzer_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline-analyzers")
+
+def channel_inputs(payload: dict, channel: str) -> dict:
+    """
+    Picks the text and sender fields each channel carries.
+
+    sms:   text, sender (phone number)
+    email: subject, body, sender_email
+    call:  transcript, caller_number
+    video: transcript, caller_number, video_result (VideoDeepfakeDetector.analyze_frame output)
+    """
+    if channel not in PIPELINE_CHANNELS:
+        raise ValueError(f"Unknown channel '{channel}', expected one of {PIPELINE_CHANNELS}")
+    if channel == "email":
+        text = "\n".join(part for part in (payload.get("subject"), payload.get("body") or payload.get("text")) if part)
+    elif channel == "sms":
+        text = payload.get("text") or ""
+    else:
+        text = payload.get("transcript") or payload.get("text") or ""
+    return {
+        "text": text,
+        "sender_email": payload.get("sender_email") if channel == "email" else None,
+        "phone_number": payload.get("phone_number") or payload.get("sender") or payload.get("caller_number"),
+        "country_code": payload.get("country_code", "IN"),
+        "video_result": payload.get("video_result") if channel == "video" else None,
+    }
+
+def _finding(model, code, finding, score):
+    # `code` identifies the kind of finding for RecommendationEngine; `finding` is for people.
+    return {"model": model, "code": code, "finding": finding, "score": int(score)}
+
+def score_signals(signals: dict) -> list:
+    """
+    Turns analyzer outputs into scored findings. Analyzers missing from
+    `signals` (timed out or failed) simply contribute nothing.
+    """
+    findings = []
+    classification = signals.get("text_classifier")
+    if classification and classification.get("is_scam"):
+        confidence = classification.get("confidence", 0.0)
+        findings.append(_finding("text_classifier", "text_classifier.scam",
+                                 f"Text classified as a scam (confidence {confidence:.2f})", round(60 * confidence)))
+
+    sentiment = signals.get("sentiment")
+    if sentiment:
+        keywords = sentiment.get("flagged_keywords", [])
+        # A single keyword ("invoice", "free") is common in genuine mail; several together are not.
+        if len(keywords) >= 2:
+            findings.append(_finding("sentiment", "sentiment.high_risk_keywords",
+                                     f"Message contains high-risk keywords: {', '.join(keywords)}",
+                                     min(40, 10 * len(keywords))))
+            if sentiment.get("polarity", 0.0) <= -0.5:
+                findings.append(_finding("sentiment", "sentiment.threatening_tone",
+                                         "Threatening tone alongside high-risk keywords", 10))
+
+    reputation = signals.get("reputation") or {}
+    email = reputation.get("email")
+    if email:
+        if not email["is_valid_syntax"]:
+            findings.append(_finding("reputation", "reputation.invalid_email", "Sender email address is invalid", 15))
+        elif email["is_disposable"]:
+            findings.append(_finding("reputation", "reputation.disposable_email",
+                                     f"Sender uses a disposable email domain ({email['domain']})", 30))
+        if email.get("impersonated_brand"):
+            findings.append(_finding("reputation", "reputation.brand_impersonation",
+                                     f"Sender domain imitates {email['impersonated_brand']} (possible phishing)", 20))
+    links = reputation.get("links")
+    if links:
+        if links["shortened"]:
+            findings.append(_finding("reputation", "reputation.shortened_link",
+                                     "Shortened link hides its destination, common in phishing", 25))
+        if links["ip_hosts"]:
+            findings.append(_finding("reputation", "reputation.ip_link",
+                                     "Link points to a raw IP address, common in phishing", 25))
+        if links["impersonating"]:
+            findings.append(_finding("reputation", "reputation.lookalike_link",
+                                     "Link imitates a well-known brand (possible phishing)", 25))
+        # A lookalike sender pointing at a link whose destination is hidden or
+        # spoofed is the classic phishing shape, worth at least HIGH on its own.
+        if email and email.get("impersonated_brand") and (links["shortened"] or links["ip_hosts"]
+                                                          or links["impersonating"]):
+            findings.append(_finding("reputation", "reputation.impersonation_with_link",
+                                     "Lookalike sender with a hidden or spoofed link (likely phishing)", 15))
+    phone = reputation.get("phone")
+    if phone:
+        if not phone["is_valid"]:
+            findings.append(_finding("reputation", "reputation.invalid_phone",
+                                     "Sender phone number is invalid or spoofed", 10))
+        elif phone["number_type"] == "VOIP":
+            findings.append(_finding("reputation", "reputation.voip_phone", "Sender uses a VOIP number", 15))
+
+    video = signals.get("video")
+    if video and video.get("face_detected") and not video.get("is_real"):
+        findings.append(_finding("video_detector", "video.deepfake", "Video shows signs of a deepfake",
+                                 round(60 * video.get("confidence", 0.0))))
+    return findings
+
+
+class DetectionPipeline:
+    """
+    Runs every analyzer that applies to a channel concurrently and combines
+    their signals into one risk score.
+
+    Each analyzer gets its own deadline. One that misses it (or fails) is
+    reported in `analyzers` and left out of the score, so a request takes at
+    most about the longest deadline however slow a model is, and the answer
+    is marked `partial`. Timed-out analyzer threads finish in the background;
+    the text classifier keeps sharing batches through `text_batcher`.
+    """
+    def __init__(self, timeouts=None, preload=True):
+        """
+        Args:
+            timeouts (dict): Per-analyzer deadline in seconds, keyed by name in ANALYZERS.
+                Missing names use PIPELINE_TIMEOUT_MS.
+            preload (bool): Load the text classifier now rather than on the first run,
+                so the first requests are not answered without it.
+        """
+        from models.sentiment_analysis import SentimentAnalyzer
+        from models.reputation_analyzer import ReputationAnalyzer
+        from alerts.recommendations import RecommendationEngine
+
+        self.timeouts = {name: PIPELINE_TIMEOUT_MS / 1000 for name in ANALYZERS}
+        self.timeouts.update(timeouts or {})
+        self.sentiment_analyzer = SentimentAnalyzer()
+        self.reputation_analyzer = ReputationAnalyzer()
+        self.recommendation_engine = RecommendationEngine()
+        if preload and registry.is_enabled("text"):
+            try:
+                registry.warm_up(["text"])
+            except Exception as e:
+                # Runs still answer from the other analyzers and report the classifier as failed.
+                print(f"Text classifier unavailable, continuing without it: {e!r}")
+        print("Detection pipeline initialized.")
+
+    def _check_reputation(self, inputs):
+        reputation = {"links": self.reputation_analyzer.analyze_links(inputs["text"])}
+        if inputs["sender_email"]:
+            email = self.reputation_analyzer.analyze_email(inputs["sender_email"])
+            email["impersonated_brand"] = self.reputation_analyzer.impersonated_brand(email["domain"])
+            reputation["email"] = email
+        if inputs["phone_number"]:
+            reputation["phone"] = self.reputation_analyzer.analyze_phone_number(inputs["phone_number"],
+                                                                                inputs["country_code"])
+        return reputation
+
+    def _analyzer_calls(self, inputs):
+        loop = asyncio.get_running_loop()
+        calls = {}
+        if inputs["text"]:
+            calls["text_classifier"] = lambda: classify_text(inputs["text"])
+            calls["sentiment"] = lambda: loop.run_in_executor(analyzer_executor, self.sentiment_analyzer.analyze,
+                                                              inputs["text"])
+        calls["reputation"] = lambda: loop.run_in_executor(analyzer_executor, self._check_reputation, inputs)
+        return calls
+
+    async def _run_analyzer(self, name, call):
+        started = time.perf_counter()
+        status = {"status": "ok"}
+        result = None
+        try:
+            result = await asyncio.wait_for(call(), self.timeouts[name])
+        except asyncio.TimeoutError:
+            status = {"status": "timeout"}
+        except Exception as e:
+            status = {"status": "error", "error": str(e)}
+        elapsed = time.perf_counter() - started
+        analyzer_seconds.labels(name, status["status"]).observe(elapsed)
+        status["elapsed_ms"] = round(elapsed * 1000, 2)
+        return name, result, status
+
+    async def arun(self, payload: dict, channel: str, session_id=None) -> dict:
+        """
+        Analyzes one message, call or video session.
+
+        Args:
+            payload (dict): The channel's fields (see `channel_inputs`).
+            channel (str): One of PIPELINE_CHANNELS.
+            session_id (str): Optional sender or conversation id; the result is
+                folded into that session and its verdict returned under "session".
+
+        Returns:
+            dict: `risk_score` (0-100), `risk_level`, scored `findings`,
+                  `recommendations`, the raw `signals`, and per-analyzer status.
+        """
+        started = time.perf_counter()
+        inputs = channel_inputs(payload, channel)
+        runs = await asyncio.gather(*(self._run_analyzer(name, call)
+                                      for name, call in self._analyzer_calls(inputs).items()))
+
+        signals = {name: result for name, result, status in runs if status["status"] == "ok"}
+        if inputs["video_result"]:
+            signals["video"] = inputs["video_result"]
+        findings = score_signals(signals)
+        risk_score = min(100, sum(finding["score"] for finding in findings))
+        result = {
+            "channel": channel,
+            "risk_score": risk_score,
+            "risk_level": risk_level_for(risk_score),
+            "findings": findings,
+            "recommendations": self.recommendation_engine.get_recommendations(findings),
+            "signals": signals,
+            "analyzers": {name: status for name, _, status in runs},
+            "partial": any(status["status"] != "ok" for _, _, status in runs),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        if session_id:
+            result["session_id"] = session_id
+            result["session"] = session_store.observe(session_id, dict(result, type="message_analysis"))
+        _pipeline_total_timer.observe(time.perf_counter() - started)
+        return result
+
+    def run(self, payload: dict, channel: str, session_id=None) -> dict:
+        """
+        Synchronous `arun`, for scripts and tests. Inside an event loop, await `arun` instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.arun(payload, channel, session_id))
+        raise RuntimeError("DetectionPipeline.run() was called from a running event loop; await arun() instead.")
\ No newline at end of file
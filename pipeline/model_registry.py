@@ -0,0 +1,121 @@
+# pipeline/model_registry.py
+
+import asyncio
+import os
+import threading
+import time
+
+# Reference point for time-to-ready, taken when the pipeline package is first imported.
+_PROCESS_STARTED = time.perf_counter()
+
+# Which modalities this worker serves, e.g. DETECTION_MODALITIES=text for a text-only worker.
+DETECTION_MODALITIES = [
+    name.strip() for name in os.environ.get("DETECTION_MODALITIES", "text,audio,video").split(",") if name.strip()
+]
+
+class ModalityNotServedError(RuntimeError):
+    """Raised when a worker is asked for a modality it is not configured to serve."""
+
+
+class ModelRegistry:
+    """
+    Creates each modality's model on first use instead of at import time.
+
+    Factories are plain callables, so heavy imports (torch, transformers,
+    deepface, TensorFlow) happen only inside them. A model is built at most
+    once even when several threads ask for it at the same time, and the time
+    each one took to load is recorded.
+    """
+    def __init__(self, factories: dict, modalities=None):
+        """
+        Args:
+            factories (dict): Modality name -> zero-argument callable building its model.
+            modalities (list): Modalities this process serves. Defaults to all of them.
+        """
+        unknown = set(modalities or ()) - set(factories)
+        if unknown:
+            raise ValueError(f"Unknown modalities: {sorted(unknown)}")
+        self._factories = dict(factories)
+        self.modalities = list(modalities) if modalities else list(factories)
+        self._instances = {}
+        self._locks = {name: threading.Lock() for name in factories}
+        self.load_seconds = {}
+        self.ready_after_seconds = {}
+
+    def is_enabled(self, name: str) -> bool:
+        return name in self.modalities
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def get(self, name: str):
+        """
+        Returns the model for `name`, building it on the first call.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if not self.is_enabled(name):
+            raise ModalityNotServedError(f"This worker does not serve the '{name}' modality.")
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                print(f"Loading '{name}' model...")
+                started = time.perf_counter()
+                instance = self._factories[name]()
+                self.load_seconds[name] = round(time.perf_counter() - started, 3)
+                self.ready_after_seconds[name] = round(time.perf_counter() - _PROCESS_STARTED, 3)
+                self._instances[name] = instance
+                print(f"'{name}' model ready in {self.load_seconds[name]}s.")
+        return instance
+
+    def register(self, name: str, instance):
+        """
+        Installs an already built model for `name` instead of calling its
+        factory, e.g. a stub model in benchmarks.
+        """
+        if name not in self._factories:
+            raise ValueError(f"Unknown modality: {name}")
+        with self._locks[name]:
+            self._instances[name] = instance
+            self.ready_after_seconds[name] = round(time.perf_counter() - _PROCESS_STARTED, 3)
+
+    async def aget(self, name: str):
+        """
+        Like `get`, but builds a missing model on a worker thread so the first
+        request does not block the event loop while weights load.
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        if not self.is_enabled(name):
+            raise ModalityNotServedError(f"This worker does not serve the '{name}' modality.")
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, name)
+
+    def warm_up(self, names=None):
+        """
+        Loads the given modalities (default: all served ones) ahead of traffic,
+        running each model's own `warm_up()` if it has one.
+        """
+        for name in self.modalities if names is None else names:
+            instance = self.get(name)
+            warm_up = getattr(instance, "warm_up", None)
+            if callable(warm_up):
+                warm_up()
+
+    def metrics(self, names=None) -> dict:
+        """
+        Load state and timings; `ready` is true once every name in `names`
+        (default: all served modalities) is loaded.
+        """
+        names = [name for name in (self.modalities if names is None else names) if self.is_enabled(name)]
+        loaded = [name for name in names if self.is_loaded(name)]
+        ready = len(loaded) == len(names)
+        return {
+            "modalities": self.modalities,
+            "loaded": loaded,
+            "ready": ready,
+            "load_seconds": dict(self.load_seconds),
+            "ready_after_seconds": dict(self.ready_after_seconds),
+            "time_to_ready_seconds": max(self.ready_after_seconds.values()) if ready and loaded else None,
+        }
\ No newline at end of file
@@ -0,0 +1,382 @@
+# pipeline/session_store.py
+
+"""
+Session-level scoring across the messages, calls and video of one conversation.
+
+A digital-arrest scam rarely fits in one message: a "courier" SMS, a call from
+a "police officer", then a video call with a fake uniform. Each endpoint scores
+its own item; the SessionStore keeps running aggregates per session (a sender
+or conversation id) so the conversation as a whole gets a verdict.
+
+Every observation updates the aggregates in O(1) (EWMA of the classifier's
+scam probability, counters, a short window of recent risk levels), so history
+is never re-scored. Sessions expire after SESSION_TTL_SECONDS of silence and
+the least recently updated ones are evicted when the store exceeds its session
+count or its (estimated) memory budget. The store is written to
+SESSION_SNAPSHOT_PATH (data/sessions/sessions.json by default) on shutdown and
+read back on startup; set it to an empty string to keep sessions in memory only.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+
+from alerts.pubsub import RISK_LEVELS, risk_level_for
+
+SESSION_TTL_SECONDS = float(os.environ.get("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", "10000"))
+SESSION_MAX_MEMORY_MB = float(os.environ.get("SESSION_MAX_MEMORY_MB", "64"))
+# Empty disables snapshots
+SESSION_SNAPSHOT_PATH = os.environ.get("SESSION_SNAPSHOT_PATH", "data/sessions/sessions.json")
+# Weight of the newest item in the rolling classifier score
+SESSION_SCORE_ALPHA = float(os.environ.get("SESSION_SCORE_ALPHA", "0.3"))
+
+# Distinct keywords and reputation flags remembered per session
+MAX_KEYWORDS = 64
+MAX_FLAGS = 16
+# Recent per-item risk levels kept for escalation patterns
+RISK_HISTORY = 16
+
+# Rough per-session memory, for the memory cap
+_BASE_BYTES = 2048
+_ENTRY_BYTES = 160
+
+def _level_index(level):
+    return RISK_LEVELS.index(level)
+
+
+class SessionState:
+    """
+    Running aggregates of one session.
+    """
+    __slots__ = (
+        "session_id", "created_at", "updated_at", "items", "channels", "keywords", "flags",
+        "scam_score", "max_scam_score", "scam_items", "spoof_windows", "spoofed_windows",
+        "frames", "fake_frames", "risk_history", "peak_level", "escalations", "channel_peaks",
+        "reported_level",
+    )
+
+    def __init__(self, session_id, now=None):
+        now = time.time() if now is None else now
+        self.session_id = session_id
+        self.created_at = now
+        self.updated_at = now
+        self.items = 0
+        self.channels = Counter()
+        self.keywords = Counter()
+        self.flags = []
+        self.scam_score = None          # EWMA of the classifier's scam probability
+        self.max_scam_score = 0.0
+        self.scam_items = 0
+        self.spoof_windows = 0
+        self.spoofed_windows = 0
+        self.frames = 0
+        self.fake_frames = 0
+        self.risk_history = deque(maxlen=RISK_HISTORY)
+        self.peak_level = "LOW"
+        self.escalations = 0
+        self.channel_peaks = {}         # channel -> highest item risk level
+        self.reported_level = None      # level of the previous verdict
+
+    # --- Updates ---
+
+    def add_classification(self, result, alpha=SESSION_SCORE_ALPHA):
+        confidence = float(result.get("confidence", 0.0))
+        probability = confidence if result.get("is_scam") else 1.0 - confidence
+        self.scam_score = probability if self.scam_score is None else alpha * probability + (1 - alpha) * self.scam_score
+        self.max_scam_score = max(self.max_scam_score, probability)
+        if result.get("is_scam"):
+            self.scam_items += 1
+        self.add_keywords((result.get("explanation") or {}).get("trigger_phrases") or [])
+
+    def add_keywords(self, keywords):
+        for keyword in keywords:
+            if keyword in self.keywords or len(self.keywords) < MAX_KEYWORDS:
+                self.keywords[keyword] += 1
+
+    def add_flag(self, flag):
+        if flag not in self.flags and len(self.flags) < MAX_FLAGS:
+            self.flags.append(flag)
+
+    def add_item(self, channel, level, now):
+        self.items += 1
+        self.updated_at = now
+        self.channels[channel] += 1
+        self.risk_history.append(level)
+        if _level_index(level) > _level_index(self.peak_level):
+            self.peak_level = level
+            self.escalations += 1
+        if _level_index(level) >= _level_index(self.channel_peaks.get(channel, "LOW")):
+            self.channel_peaks[channel] = level
+
+    # --- Verdict ---
+
+    def patterns(self) -> list:
+        """
+        Escalation patterns seen so far.
+        """
+        patterns = []
+        if self.escalations >= 2:
+            patterns.append("escalating")
+        if sum(_level_index(level) >= _level_index("HIGH") for level in self.channel_peaks.values()) >= 2:
+            # e.g. a scam SMS followed by a scam call
+            patterns.append("cross_channel")
+        recent = list(self.risk_history)[-3:]
+        if len(recent) == 3 and all(_level_index(level) >= _level_index("HIGH") for level in recent):
+            patterns.append("sustained_high_risk")
+        return patterns
+
+    def verdict(self) -> dict:
+        score = 0.0
+        if self.scam_score is not None:
+            score += 50 * self.scam_score
+        score += min(20, 4 * len(self.keywords))
+        score += min(20, 10 * len(self.flags))
+        if self.spoof_windows:
+            score += 30 * self.spoofed_windows / self.spoof_windows
+        if self.frames:
+            score += 30 * self.fake_frames / self.frames
+        patterns = self.patterns()
+        score += 10 * len(patterns)
+        risk_score = min(100, round(score))
+        # A session is never rated below its riskiest single item.
+        risk_level = max(risk_level_for(risk_score), self.peak_level, key=_level_index)
+        return {
+            "session_id": self.session_id,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "patterns": patterns,
+            "items": self.items,
+            "channels": dict(self.channels),
+            "rolling_scam_score": round(self.scam_score, 3) if self.scam_score is not None else None,
+            "max_scam_score": round(self.max_scam_score, 3),
+            "scam_items": self.scam_items,
+            "top_keywords": [keyword for keyword, _ in self.keywords.most_common(10)],
+            "reputation_flags": list(self.flags),
+            "spoofed_windows": self.spoofed_windows,
+            "spoof_windows": self.spoof_windows,
+            "fake_frames": self.fake_frames,
+            "frames": self.frames,
+            "peak_level": self.peak_level,
+            "duration_seconds": round(self.updated_at - self.created_at, 1),
+        }
+
+    def approx_bytes(self) -> int:
+        return _BASE_BYTES + _ENTRY_BYTES * (len(self.keywords) + len(self.flags) + len(self.channels))
+
+    # --- Snapshots ---
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["channels"] = dict(self.channels)
+        data["keywords"] = dict(self.keywords)
+        data["risk_history"] = list(self.risk_history)
+        return data
+
+    @classmethod
+    def from_dict(cls, data) -> "SessionState":
+        state = cls(data["session_id"], data["created_at"])
+        for name in cls.__slots__:
+            if name in data:
+                setattr(state, name, data[name])
+        state.channels = Counter(data.get("channels", {}))
+        state.keywords = Counter(data.get("keywords", {}))
+        state.risk_history = deque(data.get("risk_history", []), maxlen=RISK_HISTORY)
+        return state
+
+
+class SessionStore:
+    """
+    Thread-safe, bounded map of session id -> SessionState.
+
+    `observe` takes the same alert dicts the endpoints broadcast, so any
+    producer of alerts can feed it:
+
+        text_analysis         classifier result (rolling score, trigger phrases)
+        audio_window          one spoof window of a call
+        video_frame_analysis  one liveness verdict
+        message_analysis      a DetectionPipeline result (classifier, keywords, reputation)
+    """
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, max_sessions=SESSION_MAX_SESSIONS,
+                 max_memory_mb=SESSION_MAX_MEMORY_MB, snapshot_path=SESSION_SNAPSHOT_PATH):
+        """
+        Args:
+            ttl_seconds (float): Idle time after which a session is dropped. 0 disables expiry.
+            max_sessions (int): Most sessions kept; the least recently updated go first.
+            max_memory_mb (float): Estimated memory budget for all sessions.
+            snapshot_path (str): Where `snapshot`/`restore` write and read. Empty disables them.
+        """
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_sessions = max(1, int(max_sessions))
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.snapshot_path = snapshot_path
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.observed = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _is_expired(self, state, now):
+        return self.ttl_seconds > 0 and now - state.updated_at > self.ttl_seconds
+
+    def _drop(self, session_id):
+        state = self._sessions.pop(session_id)
+        self._bytes -= state.approx_bytes()
+
+    def _evict(self, now):
+        # Least recently updated first: expired ones, then until the bounds hold.
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if self._is_expired(state, now):
+                self._drop(session_id)
+                self.expirations += 1
+            elif len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+                self._drop(session_id)
+                self.evictions += 1
+            else:
+                break
+
+    def _apply(self, state, message, now):
+        alert_type = message.get("type")
+        channel = message.get("channel") or "text"
+        level = "LOW"
+        if alert_type == "text_analysis":
+            result = message.get("result") or {}
+            state.add_classification(result)
+            if result.get("is_scam"):
+                level = "HIGH" if result.get("confidence", 0) >= 0.8 else "MEDIUM"
+        elif alert_type == "audio_window":
+            channel = "audio"
+            spoof = message["window"]["spoof_analysis"]
+            state.spoof_windows += 1
+            if spoof.get("is_spoof"):
+                state.spoofed_windows += 1
+                level = "HIGH" if spoof.get("confidence", 0) >= 0.8 else "MEDIUM"
+        elif alert_type == "video_frame_analysis":
+            channel = "video"
+            result = message.get("result") or {}
+            if not result.get("face_detected"):
+                return None
+            state.frames += 1
+            if not result.get("is_real"):
+                state.fake_frames += 1
+                level = "HIGH" if result.get("confidence", 0) >= 0.8 else "MEDIUM"
+        elif alert_type == "message_analysis":
+            signals = message.get("signals") or {}
+            if signals.get("text_classifier"):
+                state.add_classification(signals["text_classifier"])
+            state.add_keywords((signals.get("sentiment") or {}).get("flagged_keywords") or [])
+            for finding in message.get("findings", []):
+                if finding.get("model") == "reputation":
+                    state.add_flag(finding["finding"])
+            level = message.get("risk_level", "LOW")
+        else:
+            return None
+        state.add_item(channel, level, now)
+        return state
+
+    def observe(self, session_id: str, message: dict) -> dict:
+        """
+        Folds one analysis result into its session.
+
+        Args:
+            session_id (str): Sender or conversation id.
+            message (dict): An alert dict (see the class docstring).
+
+        Returns:
+            dict: The session verdict, with `changed` set when its risk level
+                  differs from the previous verdict's, i.e. when it is worth pushing.
+        """
+        now = time.time()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None and self._is_expired(state, now):
+                self._drop(session_id)
+                self.expirations += 1
+                state = None
+            if state is None:
+                state = SessionState(session_id, now)
+            else:
+                self._bytes -= state.approx_bytes()
+                self._sessions.move_to_end(session_id)
+            self._sessions[session_id] = state
+            if self._apply(state, message, now) is None and state.items == 0:
+                # Nothing to record (e.g. a frame without a face) for a new session
+                del self._sessions[session_id]
+                return dict(state.verdict(), changed=False)
+            self._bytes += state.approx_bytes()
+            self.observed += 1
+            verdict = state.verdict()
+            verdict["changed"] = verdict["risk_level"] != state.reported_level
+            state.reported_level = verdict["risk_level"]
+            self._evict(now)
+        return verdict
+
+    def verdict(self, session_id: str):
+        """
+        Returns the current verdict of a session, or None if it is unknown or expired.
+        """
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or self._is_expired(state, time.time()):
+                return None
+            return state.verdict()
+
+    def snapshot(self, path=None) -> int:
+        """
+        Writes the live sessions to `path` (default: `snapshot_path`) as JSON,
+        replacing the file atomically. Returns the number of sessions written.
+        """
+        path = path or self.snapshot_path
+        if not path:
+            return 0
+        now = time.time()
+        with self._lock:
+            sessions = [state.to_dict() for state in self._sessions.values() if not self._is_expired(state, now)]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"saved_at": now, "sessions": sessions}, f)
+        os.replace(path + ".tmp", path)
+        print(f"Saved {len(sessions)} sessions to {path}.")
+        return len(sessions)
+
+    def restore(self, path=None) -> int:
+        """
+        Loads sessions written by `snapshot`, skipping those that have expired
+        since. Returns the number of sessions restored.
+        """
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        now = time.time()
+        with self._lock:
+            for item in sorted(data.get("sessions", []), key=lambda item: item["updated_at"]):
+                state = SessionState.from_dict(item)
+                if self._is_expired(state, now):
+                    continue
+                if state.session_id in self._sessions:
+                    self._drop(state.session_id)
+                self._sessions[state.session_id] = state
+                self._bytes += state.approx_bytes()
+            self._evict(now)
+            restored = len(self._sessions)
+        print(f"Restored {restored} sessions from {path}.")
+        return restored
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "approx_memory_mb": round(self._bytes / (1024 * 1024), 2),
+                "observed": self.observed,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
\ No newline at end of file
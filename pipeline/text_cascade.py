@@ -0,0 +1,219 @@
+# pipeline/text_cascade.py
+
+"""
+Two-stage text classification: a cheap scorer first, the transformer only
+for the texts it is unsure about.
+
+Every text that misses the result cache is scored by FastTextScorer
+(models/fast_text_scorer.py: hashed n-grams plus SentimentAnalyzer keyword
+hits) on the event loop, in a fraction of a millisecond. A scam probability
+below TEXT_CASCADE_LEGIT_BELOW is answered as legitimate and one above
+TEXT_CASCADE_SCAM_ABOVE as a scam right away; everything in between is
+escalated to the transformer's micro-batcher. Only escalated texts queue for
+the transformer, so with most traffic plainly legitimate its batches are
+shared by a fraction of the requests.
+
+A random TEXT_CASCADE_AUDIT_RATE of the texts the scorer could answer is
+escalated anyway, and answered by the transformer, to measure how often the
+two agree. Escalation rate, per-stage latency and agreement are in `stats()`
+(GET /stats) and /metrics. Set TEXT_CASCADE=0 to send every text to the
+transformer. If the scorer cannot be loaded or trained (e.g. scikit-learn is
+missing and no trained scorer is saved) the cascade reports itself
+unavailable and escalates everything.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+TEXT_CASCADE = os.environ.get("TEXT_CASCADE", "1") == "1"
+TEXT_CASCADE_LEGIT_BELOW = float(os.environ.get("TEXT_CASCADE_LEGIT_BELOW", "0.02"))
+TEXT_CASCADE_SCAM_ABOVE = float(os.environ.get("TEXT_CASCADE_SCAM_ABOVE", "0.99"))
+TEXT_CASCADE_AUDIT_RATE = float(os.environ.get("TEXT_CASCADE_AUDIT_RATE", "0.01"))
+
+def _load_scorer():
+    from models.fast_text_scorer import FastTextScorer
+    return FastTextScorer.load_or_train()
+
+
+@dataclass
+class CascadeDecision:
+    """
+    The first stage's view of one text. `label` is "spam" or "ham" when the
+    text can be answered without the transformer, else None.
+    """
+    scam_probability: float
+    keyword_hits: list = field(default_factory=list)
+    label: str = None
+    audit: bool = False
+
+    def explanation(self, stage) -> dict:
+        explanation = {"stage": stage, "scam_probability": round(self.scam_probability, 4),
+                       "keyword_hits": self.keyword_hits}
+        if stage == "transformer":
+            explanation["audit"] = self.audit
+        return explanation
+
+
+class TextCascade:
+    """
+    Answers confident texts with a fast scorer and escalates the rest.
+    """
+    def __init__(self, scorer_factory=_load_scorer, legit_below=TEXT_CASCADE_LEGIT_BELOW,
+                 scam_above=TEXT_CASCADE_SCAM_ABOVE, audit_rate=TEXT_CASCADE_AUDIT_RATE, seed=None):
+        """
+        Args:
+            scorer_factory (callable): Builds the first-stage scorer, which needs
+                `keyword_hits(texts)` and `scam_probability(texts, keyword_hits)`.
+            legit_below (float): Scam probability under which a text is answered as legitimate.
+            scam_above (float): Scam probability over which a text is answered as a scam.
+            audit_rate (float): Fraction of fast answers also checked by the transformer.
+            seed (int): Seed of the audit sampling, for tests.
+        """
+        self.scorer_factory = scorer_factory
+        self.legit_below = legit_below
+        self.scam_above = scam_above
+        self.audit_rate = audit_rate
+        self._random = random.Random(seed)
+        self._scorer = None
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.error = None
+        self.scored = 0
+        self.fast_legit = 0
+        self.fast_scam = 0
+        self.escalated = 0
+        self.audited = 0
+        self.audit_agreed = 0
+        self.escalated_agreed = 0
+        self.fast_seconds = 0.0
+        self.transformer_seconds = 0.0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._scorer is not None or self.error is not None
+
+    @property
+    def scorer(self):
+        """
+        The first-stage scorer, loaded (or trained) on first use; None if it
+        cannot be built.
+        """
+        if not self.is_loaded:
+            with self._load_lock:
+                if not self.is_loaded:
+                    try:
+                        self._scorer = self.scorer_factory()
+                    except Exception as e:
+                        self.error = repr(e)
+                        print(f"Text cascade unavailable, sending every text to the transformer: {e!r}")
+        return self._scorer
+
+    def warm_up(self):
+        self.scorer
+
+    async def aload(self):
+        """
+        Loads the scorer on a worker thread, so the first request does not
+        block the event loop (training takes a few seconds).
+        """
+        if not self.is_loaded:
+            await asyncio.get_running_loop().run_in_executor(None, self.warm_up)
+        return self._scorer
+
+    def decide(self, scam_probability):
+        """
+        "spam" or "ham" when the fast answer is confident enough, else None.
+        """
+        if scam_probability > self.scam_above:
+            return "spam"
+        if scam_probability < self.legit_below:
+            return "ham"
+        return None
+
+    def route(self, text):
+        """
+        Scores one text with the first stage.
+
+        Returns:
+            CascadeDecision: With a `label` if the text needs no transformer, or
+            None if the scorer is unavailable.
+        """
+        scorer = self.scorer
+        if scorer is None:
+            return None
+        started = time.perf_counter()
+        keyword_hits = scorer.keyword_hits([text])[0]
+        probability = float(scorer.scam_probability([text], [keyword_hits])[0])
+        decision = CascadeDecision(probability, keyword_hits, self.decide(probability))
+        if decision.label is not None and self.audit_rate > 0 and self._random.random() < self.audit_rate:
+            decision.label, decision.audit = None, True
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.scored += 1
+            self.fast_seconds += elapsed
+            if decision.label == "spam":
+                self.fast_scam += 1
+            elif decision.label == "ham":
+                self.fast_legit += 1
+            elif decision.audit:
+                self.audited += 1
+            else:
+                self.escalated += 1
+        return decision
+
+    def fast_result(self, text_classifier, text, decision) -> dict:
+        """
+        The result for a text the first stage answered, shaped like the classifier's.
+        """
+        probability = decision.scam_probability
+        score = probability if decision.label == "spam" else 1.0 - probability
+        result = text_classifier.result_from_prediction(text, {"label": decision.label, "score": score})
+        result["explanation"]["cascade"] = decision.explanation("fast")
+        return result
+
+    def record_transformer(self, decision, result, seconds=0.0) -> dict:
+        """
+        Notes whether the transformer agreed with the first stage on an
+        escalated text, and how long it took (`seconds`), and marks `result`
+        (which the caller owns) as its answer.
+        """
+        # Audited texts were past a threshold, so 0.5 gives their fast answer
+        agreed = bool(result.get("is_scam")) == (decision.scam_probability >= 0.5)
+        with self._lock:
+            self.transformer_seconds += seconds
+            if decision.audit:
+                self.audit_agreed += agreed
+            else:
+                self.escalated_agreed += agreed
+        result.setdefault("explanation", {})["cascade"] = decision.explanation("transformer")
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            scored = self.scored or 1
+            escalated = self.escalated + self.audited
+            return {
+                "available": self.error is None,
+                "error": self.error,
+                "legit_below": self.legit_below,
+                "scam_above": self.scam_above,
+                "audit_rate": self.audit_rate,
+                "scored": self.scored,
+                "answered_fast": {"legit": self.fast_legit, "scam": self.fast_scam},
+                "escalated": self.escalated,
+                "audited": self.audited,
+                "audit_agreed": self.audit_agreed,
+                # Audited texts reach the transformer too
+                "escalation_rate": round(escalated / scored, 4),
+                # How often the transformer matched the fast answer (audits) or
+                # the scorer's lean (uncertain texts, at 0.5)
+                "audit_agreement": round(self.audit_agreed / self.audited, 4) if self.audited else None,
+                "escalated_agreement": round(self.escalated_agreed / self.escalated, 4) if self.escalated else None,
+                "fast_ms_per_text": round(self.fast_seconds / scored * 1000, 4),
+                # Includes the wait for a batch slot
+                "transformer_ms_per_text": round(self.transformer_seconds / escalated * 1000, 4) if escalated else None,
+            }
\ No newline at end of file
@@ -0,0 +1,390 @@
+# pipeline/token_dataset.py
+
+"""
+Pre-tokenized, memory-mapped copies of the CSV corpora.
+
+Training, evaluation and bulk scoring otherwise parse the CSV and run the
+tokenizer over every text on every run. `build` does that once per corpus and
+tokenizer, streaming the CSV in chunks, and writes flat binary files next to a
+meta.json:
+
+    input_ids.bin   every row's token ids back to back (uint16, or int32 for large vocabularies)
+    offsets.bin     int64 start of each row in input_ids.bin, plus the end
+    labels.bin      int8 label per row: 1 scam/spam, 0 legit/ham, -1 unlabelled
+
+Row i of the dataset is data row i of the CSV. TokenDataset maps the files
+read-only, so opening one costs nothing and pages are shared between worker
+processes; batches of similar lengths are padded straight from the mapping.
+Memory depends on the batch and bucketing window sizes, not on the corpus.
+A dataset is rebuilt only when its CSV or the tokenizer changes.
+
+Usage:
+    python -m pipeline.token_dataset build data/text/scam_dataset.csv [--model-path ...] [--force]
+    python -m pipeline.token_dataset evaluate data/text/scam_dataset.csv [--model-path ...] [--batch-size 32]
+    python -m pipeline.token_dataset train data/text/scam_dataset.csv --output ./models/saved_models/scam_text_classifier
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from models.text_classifier import FALLBACK_MODEL_NAME
+from pipeline.bulk_score import detect_format, iter_csv_chunks
+
+TOKEN_DATASET_ROOT = os.environ.get("TOKEN_DATASET_ROOT", "data/tokenized")
+
+FORMAT_VERSION = 1
+# Used when the tokenizer reports no usable model_max_length
+DEFAULT_MAX_LENGTH = 512
+# CSV label values (lowercased) -> label id; the ids match the classifier's
+# "ham"/"spam" labels (see TextClassifier._build_result)
+LABEL_IDS = {"scam": 1, "spam": 1, "legit": 0, "ham": 0}
+ID2LABEL = {0: "ham", 1: "spam"}
+
+def load_tokenizer(model_path):
+    """
+    The tokenizer TextClassifier would use for `model_path`.
+    """
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_path if os.path.exists(model_path) else FALLBACK_MODEL_NAME)
+
+def _max_length(tokenizer, max_length=None) -> int:
+    return int(max_length or min(tokenizer.model_max_length, DEFAULT_MAX_LENGTH))
+
+def tokenizer_fingerprint(tokenizer, max_length) -> str:
+    """
+    Changes whenever the same text could tokenize differently.
+    """
+    described = [type(tokenizer).__name__, max_length, tokenizer.pad_token_id, sorted(tokenizer.get_vocab().items())]
+    return hashlib.sha256(json.dumps(described).encode("utf-8")).hexdigest()
+
+def _source(csv_path) -> dict:
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def dataset_dir(csv_path, model_path, root=TOKEN_DATASET_ROOT) -> str:
+    """
+    Where the dataset of `csv_path` tokenized for `model_path` lives.
+    """
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(root, f"{stem}-{hashlib.sha1(model_path.encode('utf-8')).hexdigest()[:10]}")
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_current(path, csv_path, fingerprint) -> bool:
+    """
+    True if `path` holds a dataset of the current `csv_path` built with the same tokenizer.
+    """
+    meta = read_meta(path)
+    return (meta is not None and meta.get("version") == FORMAT_VERSION and meta.get("source") == _source(csv_path)
+            and meta.get("tokenizer_fingerprint") == fingerprint)
+
+def build_dataset(csv_path, output_dir, tokenizer, csv_format=None, max_length=None, chunk_size=1024,
+                  model_path=None) -> dict:
+    """
+    Tokenizes every row of a CSV corpus into a dataset directory.
+
+    Rows are read and tokenized `chunk_size` at a time and appended to the
+    files, so memory does not grow with the corpus. The dataset is written
+    next to `output_dir` and moved into place when complete.
+
+    Args:
+        csv_path (str): A corpus in one of pipeline/bulk_score.py's CSV_FORMATS.
+        output_dir (str): The dataset directory; replaced if it exists.
+        tokenizer: A transformers tokenizer (fast ones tokenize a chunk in one call).
+        csv_format (str): A key of CSV_FORMATS; detected from the header by default.
+        max_length (int): Truncation length; defaults to the tokenizer's, at most 512.
+        chunk_size (int): Rows tokenized per call.
+        model_path (str): Recorded in meta.json.
+
+    Returns:
+        dict: The dataset's meta.json contents.
+    """
+    csv_format = csv_format or detect_format(csv_path)
+    max_length = _max_length(tokenizer, max_length)
+    dtype = np.dtype(np.uint16 if len(tokenizer) <= 1 << 16 else np.int32)
+    source = _source(csv_path)
+    building_dir = output_dir.rstrip("/\\") + ".building"
+    shutil.rmtree(building_dir, ignore_errors=True)
+    os.makedirs(building_dir)
+
+    started = time.perf_counter()
+    rows = tokens = 0
+    labelled = [0, 0]
+    with open(os.path.join(building_dir, "input_ids.bin"), "wb") as ids_file, \
+            open(os.path.join(building_dir, "offsets.bin"), "wb") as offsets_file, \
+            open(os.path.join(building_dir, "labels.bin"), "wb") as labels_file:
+        np.zeros(1, dtype=np.int64).tofile(offsets_file)
+        for chunk in iter_csv_chunks(csv_path, csv_format, chunk_size=chunk_size):
+            encoded = tokenizer([record["text"] or "" for record in chunk], truncation=True, max_length=max_length,
+                                return_attention_mask=False)["input_ids"]
+            lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+            chunk_tokens = int(lengths.sum())
+            np.fromiter(itertools.chain.from_iterable(encoded), dtype=dtype, count=chunk_tokens).tofile(ids_file)
+            (tokens + np.cumsum(lengths)).tofile(offsets_file)
+            labels = np.array([LABEL_IDS.get((record.get("label") or "").strip().lower(), -1) for record in chunk],
+                              dtype=np.int8)
+            labels.tofile(labels_file)
+            labelled[0] += int(np.count_nonzero(labels == 0))
+            labelled[1] += int(np.count_nonzero(labels == 1))
+            rows += len(chunk)
+            tokens += chunk_tokens
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "source": source,
+        "csv_format": csv_format,
+        "model_path": model_path,
+        "tokenizer": getattr(tokenizer, "name_or_path", type(tokenizer).__name__),
+        "tokenizer_fingerprint": tokenizer_fingerprint(tokenizer, max_length),
+        "max_length": max_length,
+        "pad_token_id": tokenizer.pad_token_id or 0,
+        "dtype": dtype.name,
+        "rows": rows,
+        "tokens": tokens,
+        "labels": {ID2LABEL[0]: labelled[0], ID2LABEL[1]: labelled[1]},
+        "built_at": time.time(),
+    }
+    with open(os.path.join(building_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(building_dir, output_dir)
+    print(f"Tokenized {rows} rows ({tokens} tokens) of {csv_path} into {output_dir} "
+          f"in {time.perf_counter() - started:.1f}s.")
+    return meta
+
+def ensure_dataset(csv_path, model_path, tokenizer=None, root=TOKEN_DATASET_ROOT, csv_format=None, max_length=None,
+                   force=False) -> "TokenDataset":
+    """
+    Opens the dataset of `csv_path` for `model_path`'s tokenizer, building it
+    first if it is missing or stale. Repeat runs skip tokenization entirely.
+    """
+    tokenizer = tokenizer or load_tokenizer(model_path)
+    path = dataset_dir(csv_path, model_path, root)
+    if force or not is_current(path, csv_path, tokenizer_fingerprint(tokenizer, _max_length(tokenizer, max_length))):
+        build_dataset(csv_path, path, tokenizer, csv_format=csv_format, max_length=max_length, model_path=model_path)
+    else:
+        print(f"Using the tokenized copy of {csv_path} in {path}.")
+    return TokenDataset(path)
+
+
+class TokenDataset:
+    """
+    Read-only view of a dataset written by `build_dataset`.
+    """
+    def __init__(self, path):
+        meta = read_meta(path)
+        if meta is None or meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a token dataset of format version {FORMAT_VERSION}")
+        self.path = path
+        self.meta = meta
+        self.pad_token_id = meta["pad_token_id"]
+        self.offsets = self._map("offsets.bin", np.int64, meta["rows"] + 1)
+        self.input_ids = self._map("input_ids.bin", meta["dtype"], meta["tokens"])
+        self.labels = self._map("labels.bin", np.int8, meta["rows"])
+
+    def _map(self, name, dtype, count):
+        if count == 0:
+            # numpy cannot map an empty file
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=(count,))
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def tokens(self, row: int):
+        """
+        The token ids of one row, as a view of the mapping.
+        """
+        return self.input_ids[self.offsets[row]:self.offsets[row + 1]]
+
+    def batch(self, rows) -> dict:
+        """
+        Pads the given rows into model inputs.
+
+        Returns:
+            dict: "rows", "input_ids" and "attention_mask" (int64, batch x longest row),
+                  and "labels" (int64, -1 where unlabelled).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        width = int(lengths.max()) if len(rows) else 0
+        input_ids = np.full((len(rows), width), self.pad_token_id, dtype=np.int64)
+        # The padded array is the only copy; torch.from_numpy hands it to the model as is.
+        for index, (start, length) in enumerate(zip(starts.tolist(), lengths.tolist())):
+            input_ids[index, :length] = self.input_ids[start:start + length]
+        attention_mask = (np.arange(width) < lengths[:, None]).astype(np.int64)
+        return {"rows": rows, "input_ids": input_ids, "attention_mask": attention_mask,
+                "labels": self.labels[rows].astype(np.int64)}
+
+    def iter_batches(self, batch_size=32, shuffle=False, seed=0, window_batches=64, rows=None):
+        """
+        Yields `batch`es of rows of similar length, so little of each batch is padding.
+
+        Rows are taken `batch_size * window_batches` at a time and sorted by
+        length within that window, which keeps memory bounded by the window.
+        With `shuffle`, the windows, the rows within them and the batch order
+        are shuffled (for training); otherwise windows go in row order.
+
+        Args:
+            batch_size (int): Rows per batch.
+            shuffle (bool): Shuffle for training.
+            seed (int): Shuffle seed, e.g. the epoch number.
+            window_batches (int): Batches' worth of rows sorted together.
+            rows (array-like): Only batch these rows (e.g. one bulk-scoring chunk).
+        """
+        window = batch_size * window_batches
+        total = len(self) if rows is None else len(rows)
+        rng = np.random.default_rng(seed)
+        starts = np.arange(0, total, window)
+        if shuffle:
+            rng.shuffle(starts)
+        for start in starts.tolist():
+            stop = min(start + window, total)
+            members = np.arange(start, stop) if rows is None else np.asarray(rows[start:stop], dtype=np.int64)
+            if shuffle:
+                members = rng.permutation(members)
+            lengths = self.offsets[members + 1] - self.offsets[members]
+            members = members[np.argsort(lengths, kind="stable")]
+            batches = [members[i:i + batch_size] for i in range(0, len(members), batch_size)]
+            order = rng.permutation(len(batches)) if shuffle else range(len(batches))
+            for index in order:
+                yield self.batch(batches[index])
+
+# --- Evaluation and training ---
+
+def evaluate(dataset, classifier, batch_size=32) -> dict:
+    """
+    Scores every labelled row with `classifier.predict_token_batch`.
+
+    Returns:
+        dict: Accuracy, precision, recall and F1 of the scam label, throughput,
+              and the share of batch positions that were real tokens.
+    """
+    tp = fp = tn = fn = unlabelled = 0
+    real_tokens = padded_tokens = 0
+    started = time.perf_counter()
+    for batch in dataset.iter_batches(batch_size):
+        predictions = classifier.predict_token_batch(batch["input_ids"], batch["attention_mask"])
+        for prediction, label in zip(predictions, batch["labels"].tolist()):
+            if label < 0:
+                unlabelled += 1
+                continue
+            predicted = prediction["label"].lower() == ID2LABEL[1]
+            if predicted:
+                tp, fp = (tp + 1, fp) if label == 1 else (tp, fp + 1)
+            else:
+                fn, tn = (fn + 1, tn) if label == 1 else (fn, tn + 1)
+        real_tokens += int(batch["attention_mask"].sum())
+        padded_tokens += batch["input_ids"].size
+    seconds = time.perf_counter() - started
+    labelled = tp + fp + tn + fn
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "rows": len(dataset),
+        "labelled": labelled,
+        "unlabelled": unlabelled,
+        "accuracy": round((tp + tn) / labelled, 4) if labelled else 0.0,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        "seconds": round(seconds, 2),
+        "rows_per_s": round(len(dataset) / seconds, 1) if seconds else 0.0,
+        "token_efficiency": round(real_tokens / padded_tokens, 4) if padded_tokens else 0.0,
+    }
+
+def train_and_save_model(dataset, model_path, output_dir, epochs=1, batch_size=16, learning_rate=2e-5, seed=0):
+    """
+    Fine-tunes `model_path` as a ham/spam classifier on a dataset tokenized
+    with its tokenizer, and saves model and tokenizer to `output_dir` for
+    TextClassifier. Unlabelled rows are skipped.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    model_name = model_path if os.path.exists(model_path) else FALLBACK_MODEL_NAME
+    torch.manual_seed(seed)
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_name, num_labels=len(ID2LABEL), id2label=ID2LABEL,
+        label2id={label: label_id for label_id, label in ID2LABEL.items()})
+    optimizer = torch.optim.AdamW(model.parameters(), lr=learning_rate)
+    model.train()
+    started = time.perf_counter()
+    for epoch in range(epochs):
+        steps, total_loss = 0, 0.0
+        for batch in dataset.iter_batches(batch_size, shuffle=True, seed=seed + epoch):
+            keep = batch["labels"] >= 0
+            if not keep.any():
+                continue
+            outputs = model(input_ids=torch.from_numpy(batch["input_ids"][keep]),
+                            attention_mask=torch.from_numpy(batch["attention_mask"][keep]),
+                            labels=torch.from_numpy(batch["labels"][keep]))
+            outputs.loss.backward()
+            optimizer.step()
+            optimizer.zero_grad()
+            steps += 1
+            total_loss += float(outputs.loss)
+            if steps % 50 == 0:
+                print(f"epoch {epoch + 1} step {steps}: loss {total_loss / steps:.4f}")
+        print(f"Epoch {epoch + 1}/{epochs} done: mean loss {total_loss / max(steps, 1):.4f} "
+              f"({time.perf_counter() - started:.0f}s)")
+    model.save_pretrained(output_dir)
+    load_tokenizer(model_path).save_pretrained(output_dir)
+    print(f"Saved the fine-tuned model to {output_dir}.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("build", "Tokenize CSV corpora (skipped when up to date)."),
+                            ("evaluate", "Evaluate the text classifier on tokenized corpora."),
+                            ("train", "Fine-tune a classifier on tokenized corpora.")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("csv", nargs="+", help="CSV corpora; see CSV_FORMATS in pipeline/bulk_score.py.")
+        command.add_argument("--model-path", default="./models/saved_models/scam_text_classifier")
+        command.add_argument("--root", default=TOKEN_DATASET_ROOT, help="Where tokenized datasets are kept.")
+        command.add_argument("--max-length", type=int, default=None)
+        command.add_argument("--force", action="store_true", help="Tokenize again even if up to date.")
+        if name != "build":
+            command.add_argument("--batch-size", type=int, default=32 if name == "evaluate" else 16)
+        if name == "train":
+            command.add_argument("--output", required=True, help="Directory for the fine-tuned model.")
+            command.add_argument("--epochs", type=int, default=1)
+            command.add_argument("--learning-rate", type=float, default=2e-5)
+    args = parser.parse_args(argv)
+    if args.command == "train" and len(args.csv) > 1:
+        parser.error("train takes one corpus")
+
+    classifier = None
+    tokenizer = None
+    if args.command == "evaluate":
+        from models.text_classifier import TextClassifier
+        classifier = TextClassifier(model_path=args.model_path, cache=None)
+        tokenizer = classifier.tokenizer
+    datasets = [ensure_dataset(path, args.model_path, tokenizer=tokenizer, root=args.root,
+                               max_length=args.max_length, force=args.force) for path in args.csv]
+
+    for path, dataset in zip(args.csv, datasets):
+        if args.command == "build":
+            print(f"{path}: {dataset.meta['rows']} rows, {dataset.meta['tokens']} tokens, labels {dataset.meta['labels']}")
+        elif args.command == "evaluate":
+            report = evaluate(dataset, classifier, batch_size=args.batch_size)
+            print(f"{path}: " + ", ".join(f"{key} {value}" for key, value in report.items()))
+    if args.command == "train":
+        train_and_save_model(datasets[0], args.model_path, args.output, epochs=args.epochs,
+                             batch_size=args.batch_size, learning_rate=args.learning_rate)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,305 @@
+# pipeline/video_workers.py
+
+"""
+Runs video frame analysis off the event loop.
+
+DeepFace face extraction with anti-spoofing takes long enough that running it
+inline on the event loop stalls every other websocket and HTTP request. Here
+each worker is a separate process owning its own VideoDeepfakeDetector, and
+each websocket connection is pinned to one worker. A connection keeps only
+its newest unprocessed frame: when the worker is busy, older frames are
+dropped rather than queued, so latency stays flat for fast clients.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.metrics import stage_seconds, video_frames
+
+VIDEO_WORKERS = int(os.environ.get("VIDEO_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# OpenCV threads per worker process; 0 keeps the library default (all cores)
+VIDEO_WORKER_THREADS = int(os.environ.get("VIDEO_WORKER_THREADS", "0"))
+
+# Streaming session mode (see VideoStreamSession); set VIDEO_STREAM_MODE=frame
+# to get one verdict per processed frame instead.
+VIDEO_STREAM_MODE = os.environ.get("VIDEO_STREAM_MODE", "session")
+VIDEO_SESSION_OPTIONS = {
+    "sample_every": int(os.environ.get("VIDEO_SAMPLE_EVERY", "3")),
+    "window": int(os.environ.get("VIDEO_VERDICT_WINDOW", "5")),
+    "diff_threshold": float(os.environ.get("VIDEO_DIFF_THRESHOLD", "3.0")),
+}
+
+# Scale-down factor for JPEG frames; 2 halves width and height at decode time.
+VIDEO_JPEG_REDUCE = int(os.environ.get("VIDEO_JPEG_REDUCE", "1"))
+
+# --- Worker process side ---
+
+_video_detector = None
+# stream id -> (FrameDecoder, VideoStreamSession or None), kept for the life of a connection
+_streams = {}
+
+def _init_worker():
+    global _video_detector
+    if VIDEO_WORKER_THREADS:
+        import cv2
+        cv2.setNumThreads(VIDEO_WORKER_THREADS)
+    from models.video_deepfake_detector import VideoDeepfakeDetector
+    _video_detector = VideoDeepfakeDetector()
+    _video_detector.warm_up()
+
+def _analyze_stream_frame(stream_id: str, payload: bytes, options: dict) -> dict:
+    from models.video_deepfake_detector import FrameDecoder, VideoStreamSession
+    state = _streams.get(stream_id)
+    if state is None:
+        decoder = FrameDecoder(jpeg_reduce=options["jpeg_reduce"])
+        session = None
+        if options["mode"] == "session":
+            session = VideoStreamSession(_video_detector, **options["session"])
+        state = _streams[stream_id] = (decoder, session)
+    decoder, session = state
+
+    started = time.perf_counter()
+    frame = decoder.decode(payload)
+    if frame is None:
+        raise ValueError("Could not decode video frame")
+    decoded = time.perf_counter()
+    if session is None:
+        result = _video_detector.analyze_frame(frame)
+    else:
+        result = session.process(frame)
+    return {
+        "type": "video_frame_analysis",
+        "result": result,
+        "service_ms": round((time.perf_counter() - started) * 1000, 2),
+        "decode_ms": round((decoded - started) * 1000, 2),
+        "session": dict(session.counters) if session is not None else {}
+    }
+
+def _close_stream(stream_id: str):
+    _streams.pop(stream_id, None)
+
+# --- Event loop side ---
+
+# Worker processes report their own timings with each result; they are
+# recorded here, in the process that serves /metrics.
+_frame_latency_timer = stage_seconds.labels("video.frame_latency")
+_worker_decode_timer = stage_seconds.labels("video.worker_decode")
+_worker_service_timer = stage_seconds.labels("video.worker_service")
+_frames_received = video_frames.labels("received")
+_frames_processed = video_frames.labels("processed")
+_frames_dropped = video_frames.labels("dropped")
+_frames_failed = video_frames.labels("error")
+
+class VideoWorkerPool:
+    """
+    A fixed set of single-process executors, one detector per process.
+
+    Connections are assigned to the least busy worker and stay there, which
+    bounds the work queued on any worker to one frame per connection. A
+    worker process that dies (e.g. killed for memory) is replaced by a fresh
+    one on the same index; the frame it was working on fails, and its
+    connections start over with new stream state.
+    """
+    def __init__(self, workers=VIDEO_WORKERS, initializer=_init_worker):
+        """
+        Args:
+            workers (int): Worker processes.
+            initializer (callable): Run in each worker process before its first task.
+        """
+        self.workers = max(1, int(workers))
+        self.initializer = initializer
+        self.restarts = 0
+        self._executors = None
+        self._connections = None
+        self._round_robin = itertools.count()
+
+    def _new_executor(self):
+        # "spawn" keeps workers from inheriting the parent's model/threads state.
+        context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=self.initializer)
+
+    def _start(self):
+        self._executors = [self._new_executor() for _ in range(self.workers)]
+        self._connections = [0] * self.workers
+
+    def _replace(self, worker: int, broken):
+        """
+        Swaps a broken executor for a new one, unless another caller already did.
+        """
+        if self._executors is None or self._executors[worker] is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executors[worker] = self._new_executor()
+        self.restarts += 1
+        print(f"Video worker {worker} died; started a new one.")
+
+    def acquire(self) -> int:
+        """
+        Returns the index of the worker a new connection should use.
+        """
+        if self._executors is None:
+            self._start()
+        fewest = min(self._connections)
+        candidates = [i for i, count in enumerate(self._connections) if count == fewest]
+        worker = candidates[next(self._round_robin) % len(candidates)]
+        self._connections[worker] += 1
+        return worker
+
+    def release(self, worker: int):
+        if self._connections is not None:
+            self._connections[worker] = max(0, self._connections[worker] - 1)
+
+    async def run(self, worker: int, fn, *args):
+        loop = asyncio.get_running_loop()
+        executor = self._executors[worker]
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._replace(worker, executor)
+            raise
+
+    def submit(self, worker: int, fn, *args):
+        """
+        Queues work on a worker without waiting for it.
+        """
+        if self._executors is not None:
+            try:
+                self._executors[worker].submit(fn, *args)
+            except BrokenProcessPool:
+                self._replace(worker, self._executors[worker])
+
+    @property
+    def connections(self) -> int:
+        return sum(self._connections) if self._connections is not None else 0
+
+    def shutdown(self):
+        if self._executors:
+            for executor in self._executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executors = None
+
+
+class VideoStream:
+    """
+    Per-connection frame slot and counters.
+
+    `submit` is called for every received frame and never blocks; `results`
+    works on the newest frame available whenever the worker becomes free. In
+    "frame" mode every processed frame yields a result; in "session" mode the
+    worker keeps a VideoStreamSession for this stream and only smoothed
+    verdicts are yielded. The worker also keeps this stream's FrameDecoder, so
+    its conversion buffers are reused from frame to frame.
+    """
+    def __init__(self, pool: VideoWorkerPool, mode=VIDEO_STREAM_MODE, session_options=None,
+                 jpeg_reduce=VIDEO_JPEG_REDUCE):
+        self.pool = pool
+        self.worker = pool.acquire()
+        self.options = {
+            "mode": mode,
+            "session": dict(VIDEO_SESSION_OPTIONS, **(session_options or {})),
+            "jpeg_reduce": jpeg_reduce,
+        }
+        self.stream_id = uuid.uuid4().hex
+        self.session_counters = {}
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+        self._frame = None
+        self._arrived_at = 0.0
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def submit(self, frame_bytes: bytes):
+        if self._frame is not None:
+            # The worker never saw the previous frame; the newer one replaces it.
+            self.dropped += 1
+            _frames_dropped.inc()
+        self._frame = frame_bytes
+        self._arrived_at = time.perf_counter()
+        self.received += 1
+        _frames_received.inc()
+        self._ready.set()
+
+    async def results(self):
+        while not self._closed:
+            if self._frame is None:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            frame_bytes, arrived_at = self._frame, self._arrived_at
+            self._frame = None
+            try:
+                result = await self.pool.run(self.worker, _analyze_stream_frame, self.stream_id, frame_bytes, self.options)
+            except Exception as e:
+                self.errors += 1
+                _frames_failed.inc()
+                print(f"Video frame analysis failed: {e}")
+                continue
+            latency = time.perf_counter() - arrived_at
+            self.processed += 1
+            _frames_processed.inc()
+            _frame_latency_timer.observe(latency)
+            _worker_decode_timer.observe(result.get("decode_ms", 0.0) / 1000)
+            _worker_service_timer.observe(result["service_ms"] / 1000)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.last_latency = latency
+            self.session_counters = result.pop("session", self.session_counters)
+            if result["result"] is None:
+                # Skipped or still filling the smoothing window
+                continue
+            result["stream_stats"] = self.stats()
+            yield result
+
+    def configure(self, jpeg_reduce=None, mode=None) -> dict:
+        """
+        Applies ingestion options negotiated by the client. The worker state of
+        the stream is reset, so the new decoder/session start fresh.
+
+        Returns:
+            dict: The options now in effect.
+        """
+        if jpeg_reduce is not None:
+            jpeg_reduce = int(jpeg_reduce)
+            if jpeg_reduce not in (1, 2, 4, 8):
+                raise ValueError("jpeg_reduce must be 1, 2, 4 or 8")
+            self.options["jpeg_reduce"] = jpeg_reduce
+        if mode is not None:
+            if mode not in ("frame", "session"):
+                raise ValueError("mode must be 'frame' or 'session'")
+            self.options["mode"] = mode
+        self.pool.submit(self.worker, _close_stream, self.stream_id)
+        self.stream_id = uuid.uuid4().hex
+        return {"mode": self.options["mode"], "jpeg_reduce": self.options["jpeg_reduce"]}
+
+    def stats(self) -> dict:
+        return {
+            "worker": self.worker,
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_latency_ms": round(self.last_latency * 1000, 2),
+            "avg_latency_ms": round(self.total_latency / self.processed * 1000, 2) if self.processed else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+            "session": self.session_counters,
+        }
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._ready.set()
+            self.pool.submit(self.worker, _close_stream, self.stream_id)
+            self.pool.release(self.worker)
+
+# Shared by all video websocket connections; processes start on first use.
+video_pool = VideoWorkerPool()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+from unittest import mock
+from pipeline.admission import AdmissionController, OverloadedError, SingleFlight
+
+class TestAdmissionController(unittest.TestCase):
+    """
+    Unit tests for the per-endpoint concurrency limit and bounded queue.
+    """
+
+    def test_requests_beyond_limits_are_rejected(self):
+        async def scenario():
+            controller = AdmissionController("text", max_concurrency=2, max_queue=1, queue_timeout=5)
+            release = asyncio.Event()
+
+            async def work():
+                await release.wait()
+                return "done"
+
+            running = [asyncio.create_task(controller.run(work)) for _ in range(3)]
+            await asyncio.sleep(0)
+            self.assertEqual((controller.active, controller.waiting), (2, 1))
+            with self.assertRaises(OverloadedError) as rejected:
+                await controller.run(work)
+            release.set()
+            results = await asyncio.gather(*running)
+            return controller, rejected.exception, results
+
+        controller, error, results = asyncio.run(scenario())
+        self.assertEqual(error.status_code, 429)
+        self.assertGreaterEqual(error.retry_after, 1)
+        self.assertEqual([result for result, _ in results], ["done"] * 3)
+        self.assertGreater(results[2][1]["queue_ms"], 0)
+        self.assertEqual(controller.stats()["rejected"], {"queue_full": 1, "queue_timeout": 0})
+        self.assertEqual((controller.active, controller.waiting), (0, 0))
+
+    def test_queued_request_times_out_with_503(self):
+        async def scenario():
+            controller = AdmissionController("audio", max_concurrency=1, max_queue=4, queue_timeout=0.01)
+            release = asyncio.Event()
+            running = asyncio.create_task(controller.run(release.wait))
+            await asyncio.sleep(0)
+            try:
+                await controller.run(release.wait)
+            except OverloadedError as e:
+                error = e
+            release.set()
+            await running
+            return controller, error
+
+        controller, error = asyncio.run(scenario())
+        self.assertEqual(error.status_code, 503)
+        self.assertEqual(controller.waiting, 0)
+        self.assertEqual(controller.active, 0)
+
+    def test_cancelled_waiter_does_not_leak_a_slot(self):
+        async def scenario():
+            controller = AdmissionController("text", max_concurrency=1, max_queue=4, queue_timeout=5)
+            release = asyncio.Event()
+            running = asyncio.create_task(controller.run(release.wait))
+            await asyncio.sleep(0)
+            waiting = asyncio.create_task(controller.run(release.wait))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            release.set()
+            await running
+            await asyncio.gather(waiting, return_exceptions=True)
+            result, _ = await controller.run(lambda: asyncio.sleep(0, "after"))
+            return controller, result
+
+        controller, result = asyncio.run(scenario())
+        self.assertEqual(result, "after")
+        self.assertEqual((controller.active, controller.waiting), (0, 0))
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Unit tests for coalescing identical in-flight requests.
+    """
+
+    def test_identical_keys_share_one_computation(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"is_scam": True}
+
+        async def scenario():
+            flights = SingleFlight("test")
+            results = await asyncio.gather(*(flights.run("same text", compute) for _ in range(5)),
+                                           flights.run("other text", compute))
+            return flights, results
+
+        flights, results = asyncio.run(scenario())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual([shared for _, shared in results], [False, True, True, True, True, False])
+        self.assertEqual(flights.stats(), {"in_flight": 0, "leaders": 2, "coalesced": 4})
+
+    def test_failure_reaches_every_caller_and_key_is_released(self):
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("model crashed")
+
+        async def scenario():
+            flights = SingleFlight("test")
+            results = await asyncio.gather(flights.run("k", fail), flights.run("k", fail), return_exceptions=True)
+            retried, shared = await flights.run("k", lambda: asyncio.sleep(0, "ok"))
+            return results, retried, shared
+
+        results, retried, shared = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual((retried, shared), ("ok", False))
+
+class TestEarlyAdmission(unittest.TestCase):
+    """
+    Audio uploads that could not queue are rejected before the upload is parsed.
+    """
+
+    def test_saturated_audio_endpoint_rejects_upload_unread(self):
+        from fastapi.testclient import TestClient
+        from ui import app as app_module
+        controller = AdmissionController("audio", max_concurrency=1, max_queue=0, queue_timeout=5)
+        controller.active = 1
+        with mock.patch.dict(app_module.admission, {"audio": controller}), \
+                mock.patch("starlette.formparsers.MultiPartParser.parse") as parse:
+            response = TestClient(app_module.app).post("/analyze/audio", files={"file": ("call.wav", b"RIFF", "audio/wav")})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(response.json()["reason"], "queue_full")
+        parse.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
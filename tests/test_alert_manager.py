@@ -0,0 +1,130 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+from alerts import alert_manager
+from alerts.alert_manager import ClientChannel, ConnectionManager
+from alerts.pubsub import InMemoryPubSub
+
+TOPIC = {"channel": "text", "risk_level": "HIGH", "session": None}
+
+class FakeWebSocket:
+    def __init__(self, hang=False):
+        self.frames = []
+        self.closed_with = None
+        self.hang = hang
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        if self.hang:
+            await asyncio.Event().wait()
+        self.frames.append(frame)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+class TestClientChannel(unittest.TestCase):
+    """
+    Unit tests for the per-client alert queue and writer.
+    """
+
+    def drain(self, channel, on_error=lambda websocket: None):
+        async def scenario():
+            task = asyncio.create_task(channel.run(on_error))
+            await asyncio.sleep(0.05)
+            task.cancel()
+        asyncio.run(scenario())
+
+    def fill(self, channel, count, policy="drop_oldest"):
+        return [channel.push(json.dumps({"n": n}), 0.0, policy) for n in range(count)]
+
+    def test_messages_are_sent_one_per_frame_by_default(self):
+        channel = ClientChannel(FakeWebSocket())
+        self.fill(channel, 3)
+        self.drain(channel)
+        self.assertEqual([json.loads(frame) for frame in channel.websocket.frames], [{"n": 0}, {"n": 1}, {"n": 2}])
+
+    def test_batching_clients_get_arrays(self):
+        channel = ClientChannel(FakeWebSocket(), batch_size=2)
+        self.fill(channel, 3)
+        self.drain(channel)
+        self.assertEqual([json.loads(frame) for frame in channel.websocket.frames], [[{"n": 0}, {"n": 1}], {"n": 2}])
+        self.assertEqual((channel.sent, channel.frames), (3, 2))
+
+    def test_full_queue_drops_the_oldest(self):
+        channel = ClientChannel(FakeWebSocket(), max_queue=2)
+        self.assertEqual(self.fill(channel, 3), [True, True, True])
+        self.assertEqual([message for message, _ in channel.queue], ['{"n": 1}', '{"n": 2}'])
+        self.assertEqual(channel.dropped, 1)
+
+    def test_full_queue_refuses_under_disconnect_policy(self):
+        channel = ClientChannel(FakeWebSocket(), max_queue=2)
+        self.assertEqual(self.fill(channel, 3, policy="disconnect"), [True, True, False])
+        self.assertEqual(channel.dropped, 0)
+
+    def test_stuck_client_is_dropped_after_the_send_timeout(self):
+        failed = []
+        channel = ClientChannel(FakeWebSocket(hang=True))
+        self.fill(channel, 1)
+        with mock.patch.object(alert_manager, "ALERT_SEND_TIMEOUT_SECONDS", 0.01):
+            self.drain(channel, failed.append)
+        self.assertEqual(failed, [channel.websocket])
+
+class TestConnectionManager(unittest.TestCase):
+    """
+    Fan-out to connected clients and the overflow policies.
+    """
+
+    def test_overflowing_client_is_disconnected(self):
+        async def scenario():
+            manager = ConnectionManager(max_queue=1, overflow_policy="disconnect", pubsub=InMemoryPubSub())
+            websocket = FakeWebSocket(hang=True)
+            await manager.connect(websocket)
+            for n in range(3):
+                manager.deliver(TOPIC, {"n": n})
+            await asyncio.sleep(0.01)
+            return manager, websocket
+
+        manager, websocket = asyncio.run(scenario())
+        self.assertEqual(manager.overflow_disconnects, 1)
+        self.assertEqual(manager.channels, {})
+        self.assertEqual(websocket.closed_with, 1008)
+
+    def test_batching_is_opt_in_per_client(self):
+        async def scenario():
+            manager = ConnectionManager(batch_size=8, pubsub=InMemoryPubSub())
+            plain, batching = FakeWebSocket(), FakeWebSocket()
+            await manager.connect(plain)
+            await manager.connect(batching, batch=True)
+            for n in range(3):
+                manager.deliver(TOPIC, {"n": n})
+            await asyncio.sleep(0.01)
+            for websocket in (plain, batching):
+                manager.disconnect(websocket)
+            return plain, batching
+
+        plain, batching = asyncio.run(scenario())
+        self.assertEqual([json.loads(frame) for frame in plain.frames], [{"n": 0}, {"n": 1}, {"n": 2}])
+        self.assertEqual([json.loads(frame) for frame in batching.frames], [[{"n": 0}, {"n": 1}, {"n": 2}]])
+
+class TestAlertsEndpoint(unittest.TestCase):
+    """
+    /ws/alerts clients are unregistered however the connection ends.
+    """
+
+    def test_client_is_disconnected_after_an_error(self):
+        from fastapi.testclient import TestClient
+        from ui import app as app_module
+        with mock.patch.object(app_module, "manager", ConnectionManager(pubsub=InMemoryPubSub())) as manager:
+            with self.assertRaises(KeyError):
+                with TestClient(app_module.app).websocket_connect("/ws/alerts") as websocket:
+                    self.assertEqual(len(manager.channels), 1)
+                    # receive_text() fails on a binary message
+                    websocket.send_bytes(b"ping")
+                    websocket.receive_text()
+        self.assertEqual(manager.channels, {})
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import asyncio
+import io
+import unittest
+import wave
+from unittest import mock
+import numpy as np
+from benchmarks.load_test import synthetic_wav
+from models.audio_processor import iter_audio_windows
+from pipeline import detection_pipeline
+from pipeline.detection_pipeline import SpoofSummary
+from pipeline.model_registry import ModelRegistry
+
+def decode_wav(audio_bytes):
+    with wave.open(io.BytesIO(audio_bytes)) as f:
+        return np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").astype(np.float32) / 32768
+
+def window(start, is_spoof, confidence):
+    return {"start_seconds": start, "spoof_analysis": {"is_spoof": is_spoof, "confidence": confidence}}
+
+class TestAudioWindows(unittest.TestCase):
+    """
+    Unit tests for overlapping audio windows and the running spoof verdict.
+    """
+
+    def test_windows_overlap_by_window_minus_hop(self):
+        clip = synthetic_wav(7.0)
+        windows = list(iter_audio_windows(clip, window_seconds=4.0, hop_seconds=2.0, target_sr=16000))
+        self.assertEqual([(start, len(samples)) for start, samples in windows],
+                         [(0.0, 64000), (2.0, 64000), (4.0, 48000)])
+        samples = decode_wav(clip)
+        for start, window_samples in windows:
+            offset = int(start * 16000)
+            np.testing.assert_allclose(window_samples, samples[offset:offset + len(window_samples)], atol=1e-6)
+
+    def test_tail_already_covered_is_not_repeated(self):
+        starts = [start for start, _ in iter_audio_windows(synthetic_wav(6.0), 4.0, 2.0, 16000)]
+        self.assertEqual(starts, [0.0, 2.0])
+
+    def test_short_clip_is_one_window(self):
+        windows = list(iter_audio_windows(synthetic_wav(1.0), 4.0, 2.0, 16000))
+        self.assertEqual([(start, len(samples)) for start, samples in windows], [(0.0, 16000)])
+
+    def test_windows_are_resampled(self):
+        windows = list(iter_audio_windows(synthetic_wav(5.0, sample_rate=8000), 4.0, 2.0, 16000))
+        self.assertEqual([(start, len(samples)) for start, samples in windows], [(0.0, 64000), (2.0, 48000)])
+
+    def test_summary_is_a_majority_vote(self):
+        summary = SpoofSummary()
+        for item in (window(0.0, False, 0.7), window(2.0, True, 0.9), window(4.0, True, 0.8)):
+            summary.add(item)
+        result = summary.result()
+        self.assertTrue(result["is_spoof"])
+        self.assertEqual(result["confidence"], 0.85)
+        self.assertEqual(result["explanation"]["windows"], 3)
+        self.assertEqual(result["explanation"]["spoofed_windows"], 2)
+        self.assertEqual(result["explanation"]["first_spoof_at_seconds"], 2.0)
+        self.assertEqual(result["explanation"]["max_spoof_confidence"], 0.9)
+
+    def test_summary_of_genuine_and_empty_calls(self):
+        summary = SpoofSummary()
+        self.assertEqual(summary.result()["confidence"], 0.0)
+        self.assertFalse(summary.result()["is_spoof"])
+        for item in (window(0.0, False, 0.6), window(2.0, False, 0.8), window(4.0, True, 0.95)):
+            summary.add(item)
+        summary.error = "decoding stopped early"
+        result = summary.result()
+        self.assertFalse(result["is_spoof"])
+        self.assertEqual(result["confidence"], 0.7)
+        self.assertEqual(result["explanation"]["indicators"], [])
+        self.assertEqual(result["explanation"]["error"], "decoding stopped early")
+
+class StubTextModel:
+    def cached_result(self, text):
+        return {"is_scam": False, "confidence": 0.1}
+
+class StubAudioProcessor:
+    model_path = "./stub-audio"
+
+    async def transcribe_audio(self, audio_bytes):
+        return "hello"
+
+    def predict_spoof_window(self, samples, sample_rate):
+        return {"is_spoof": False, "confidence": 0.9}
+
+class TestAudioPartials(unittest.TestCase):
+    """
+    Partial verdicts are pushed per window; failures to push them are not decode errors.
+    """
+
+    def analyze(self, audio_bytes, on_partial):
+        registry = ModelRegistry({"text": StubTextModel, "audio": StubAudioProcessor})
+        with mock.patch.object(detection_pipeline, "audio_blobs", None), \
+                mock.patch.object(detection_pipeline, "registry", registry):
+            return asyncio.run(detection_pipeline.process_audio_input(audio_bytes, "call.wav", on_partial=on_partial))
+
+    def test_undecodable_audio_is_reported(self):
+        partials = []
+
+        async def on_partial(partial):
+            partials.append(partial)
+
+        result = self.analyze(b"not really audio", on_partial)
+        self.assertTrue(result["spoof_analysis"]["explanation"]["error"].startswith("Could not decode audio"))
+        self.assertEqual([partial.get("transcribed_text") for partial in partials], ["hello"])
+
+    def test_failing_partial_callback_is_not_a_decode_error(self):
+        async def on_partial(partial):
+            if "window" in partial:
+                raise ConnectionError("upload socket closed")
+
+        with self.assertRaises(ConnectionError):
+            self.analyze(synthetic_wav(5.0), on_partial)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,27 @@
+import unittest
+from benchmarks.harness import compare, percentile, summarize
+
+class TestBenchmarkHarness(unittest.TestCase):
+    """
+    Unit tests for latency summaries and baseline comparison.
+    """
+
+    def test_summary_percentiles_and_throughput(self):
+        summary = summarize([i / 1000 for i in range(1, 101)], elapsed=2.0, errors=1)
+        self.assertAlmostEqual(summary["p50_ms"], 50.5)
+        self.assertAlmostEqual(summary["p99_ms"], 99.01)
+        self.assertEqual(summary["throughput_per_s"], 50.0)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_compare_flags_only_regressions_beyond_threshold(self):
+        baseline = {"results": {"a": {"p50_ms": 10.0, "throughput_per_s": 100.0},
+                                "b": {"p50_ms": 10.0, "throughput_per_s": 100.0}}}
+        current = {"a": {"p50_ms": 10.5, "throughput_per_s": 70.0},
+                   "b": {"p50_ms": 5.0, "throughput_per_s": 200.0},
+                   "new": {"p50_ms": 1.0}}
+        regressions = compare(current, baseline, threshold=0.1)
+        self.assertEqual([(name, metric) for name, metric, *_ in regressions], [("a", "throughput_per_s")])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pipeline import detection_pipeline
+from pipeline.model_registry import ModelRegistry
+from utils.blob_store import BlobStore, blob_digest
+
+class TestBlobStore(unittest.TestCase):
+    """
+    Unit tests for the content-addressed audio store.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_identical_payloads_are_stored_once_in_shards(self):
+        store = BlobStore(self.root)
+        digest = store.put(b"RIFF fake clip")
+        self.assertEqual(store.put(b"RIFF fake clip"), digest)
+        self.assertEqual(digest, blob_digest(b"RIFF fake clip"))
+        self.assertTrue(store.path_for(digest).endswith(os.path.join(digest[:2], digest[2:4], digest)))
+        self.assertEqual(store.get(digest), b"RIFF fake clip")
+        stats = store.stats()
+        self.assertEqual((stats["blobs"], stats["writes"], stats["deduplicated"]), (1, 1, 1))
+
+    def test_results_are_memoized_and_persist(self):
+        store = BlobStore(self.root)
+        digest = store.put(b"clip")
+        self.assertIsNone(store.get_result(digest, "transcription"))
+        store.set_result(digest, "transcription", "You are under digital arrest")
+        store.close()
+        reopened = BlobStore(self.root)
+        self.assertIn(digest, reopened)
+        self.assertEqual(reopened.get_result(digest, "transcription"), "You are under digital arrest")
+        self.assertEqual(reopened.stats()["bytes"], 4)
+
+    def test_least_recently_used_blobs_are_collected_over_quota(self):
+        store = BlobStore(self.root, max_bytes=25)
+        with mock.patch("utils.blob_store.time.time", side_effect=[1.0, 2.0, 3.0, 4.0, 5.0]):
+            first = store.put(b"a" * 10)
+            second = store.put(b"b" * 10)
+            store.set_result(first, "transcription", "kept")  # created_at only
+            store.get_result(first, "transcription")  # first is now the most recently used
+            third = store.put(b"c" * 10)
+        self.assertIn(first, store)
+        self.assertNotIn(second, store)
+        self.assertIn(third, store)
+        self.assertFalse(os.path.exists(store.path_for(second)))
+        self.assertEqual(store.stats()["bytes"], 20)
+
+
+class StubTextModel:
+    def cached_result(self, text):
+        return {"is_scam": True, "confidence": 0.9}
+
+
+class StubAudioProcessor:
+    model_path = "./stub-audio"
+
+    def __init__(self):
+        self.transcriptions = 0
+
+    async def transcribe_audio(self, audio_bytes):
+        self.transcriptions += 1
+        return "Your account is suspended"
+
+
+class TestMemoizedAudioAnalysis(unittest.TestCase):
+    """
+    A replayed clip reuses the memoized transcript instead of transcribing again.
+    """
+
+    def test_replayed_clip_is_not_transcribed_again(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        audio = StubAudioProcessor()
+        registry = ModelRegistry({"text": StubTextModel, "audio": lambda: audio})
+
+        async def analyze_twice():
+            first = await detection_pipeline.process_audio_input(b"not really audio", "a.wav")
+            # Let the background store and memo writes finish.
+            await asyncio.get_running_loop().run_in_executor(detection_pipeline.blob_executor, lambda: None)
+            second = await detection_pipeline.process_audio_input(b"not really audio", "b.wav")
+            return first, second
+
+        with mock.patch.object(detection_pipeline, "audio_blobs", BlobStore(root)), \
+                mock.patch.object(detection_pipeline, "registry", registry):
+            first, second = asyncio.run(analyze_twice())
+
+        self.assertEqual(audio.transcriptions, 1)
+        self.assertEqual(first["blob"]["memoized"], [])
+        self.assertEqual(second["blob"]["memoized"], ["transcription"])
+        self.assertEqual(second["transcribed_text"], "Your account is suspended")
+        self.assertTrue(second["text_analysis"]["is_scam"])
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pipeline import bulk_score
+from pipeline.bulk_score import detect_format, iter_csv_chunks, run_job
+
+# Read by the (forked) worker process: the row whose chunk fails
+CRASH_AT_ROW = None
+
+def fake_init_worker(model_path, token_dataset_path=None):
+    pass
+
+def fake_score_chunk(records):
+    if CRASH_AT_ROW is not None and any(record["row"] == CRASH_AT_ROW for record in records):
+        raise RuntimeError("worker crashed")
+    return [{"row": record["row"], "id": record["id"], "is_scam": record["label"] == "scam"} for record in records]
+
+class TestBulkScore(unittest.TestCase):
+    """
+    Unit tests for streaming, checkpointing and resuming bulk scoring jobs.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.input_path = self.write_csv("corpus.csv", "id,channel,text,label\n" + "".join(
+            f"m{i},sms,message {i},{'scam' if i % 3 == 0 else 'legit'}\n" for i in range(7)))
+
+    def tearDown(self):
+        global CRASH_AT_ROW
+        CRASH_AT_ROW = None
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write_csv(self, name, content, encoding="utf-8"):
+        path = os.path.join(self.root, name)
+        with open(path, "w", encoding=encoding, newline="") as f:
+            f.write(content)
+        return path
+
+    def run_stubbed(self, output_path, **kwargs):
+        with mock.patch.object(bulk_score, "_score_chunk", fake_score_chunk), \
+                mock.patch.object(bulk_score, "_init_worker", fake_init_worker):
+            return run_job(self.input_path, output_path, chunk_size=2, workers=1, **kwargs)
+
+    def test_format_is_detected_from_the_header(self):
+        self.assertEqual(detect_format(self.input_path), "scam_dataset")
+        self.assertEqual(detect_format(self.write_csv("spam.csv", "v1,v2,,,\nham,hello,,,\n", "latin-1")), "v1_v2")
+        self.assertEqual(detect_format(self.write_csv("email.csv", "\ufeffCategory,Message\nham,hi\n")),
+                         "category_message")
+        with self.assertRaises(ValueError):
+            detect_format(self.write_csv("other.csv", "sender,body\n"))
+
+    def test_chunks_skip_rows_already_done(self):
+        chunks = list(iter_csv_chunks(self.write_csv("email.csv", "Category,Message\n" + "".join(
+            f"ham,text {i}\n" for i in range(5))), "category_message", chunk_size=2, skip_rows=3))
+        self.assertEqual([[record["row"] for record in chunk] for chunk in chunks], [[3, 4]])
+        self.assertEqual(chunks[0][0], {"row": 3, "label": "ham", "text": "text 3", "id": 3})
+
+    def test_resumed_job_matches_an_uninterrupted_one(self):
+        global CRASH_AT_ROW
+        expected_path = os.path.join(self.root, "expected.jsonl")
+        self.run_stubbed(expected_path)
+
+        output_path = os.path.join(self.root, "results.jsonl")
+        CRASH_AT_ROW = 5
+        with self.assertRaises(RuntimeError):
+            self.run_stubbed(output_path)
+        with open(output_path + ".checkpoint.json") as f:
+            self.assertEqual(json.load(f)["rows_done"], 4)
+        # A chunk half written when the process died is dropped on resume
+        with open(output_path, "ab") as f:
+            f.write(b'{"row": 4, "id"')
+
+        CRASH_AT_ROW = None
+        state = self.run_stubbed(output_path, resume=True)
+        self.assertEqual((state["rows_done"], state["chunks_done"]), (7, 4))
+        with open(expected_path, "rb") as expected, open(output_path, "rb") as resumed:
+            self.assertEqual(resumed.read(), expected.read())
+
+    def test_checkpoint_of_another_input_is_rejected(self):
+        output_path = os.path.join(self.root, "results.jsonl")
+        self.run_stubbed(output_path)
+        self.input_path = self.write_csv("other.csv", "id,channel,text,label\nx,sms,hello,legit\n")
+        with self.assertRaises(ValueError):
+            self.run_stubbed(output_path, resume=True)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+from models.text_classifier import TextClassifier
+from pipeline import detection_pipeline
+from pipeline.campaign_index import CampaignIndex
+from pipeline.model_registry import ModelRegistry
+
+TEMPLATE = "Dear {name}, your parcel {ref} is held by customs. Pay the clearance fee of Rs {amount} at {link} within 24 hours"
+
+def variant(name, ref, amount, link):
+    return TEMPLATE.format(name=name, ref=ref, amount=amount, link=link)
+
+def scam_result(confidence=0.97, label="spam"):
+    return {"is_scam": label == "spam", "confidence": confidence, "explanation": {"model_label": label}}
+
+def add(index, text, result):
+    match = index.lookup(text)
+    return index.record(match, text, result)
+
+class TestCampaignIndex(unittest.TestCase):
+    """
+    Unit tests for near-duplicate campaign clustering.
+    """
+
+    def test_variants_join_one_campaign(self):
+        index = CampaignIndex(snapshot_path="")
+        first = add(index, variant("Ravi", "IN4418", "2,450", "http://bit.ly/x1"), scam_result())
+        second = add(index, variant("Priya", "IN9902", "3,100", "https://clear-customs.co/pay"), scam_result())
+        other = add(index, "Your OTP for the bank login is 4412, do not share it with anyone", scam_result(0.6, "ham"))
+        self.assertEqual(first["campaign_id"], second["campaign_id"])
+        self.assertNotEqual(first["campaign_id"], other["campaign_id"])
+        self.assertGreaterEqual(second["similarity"], 0.7)
+        self.assertEqual(second["size"], 2)
+        self.assertEqual(second["velocity"]["last_minute"], 2)
+        self.assertIsNone(index.lookup("ok see you"))
+        self.assertEqual([campaign["size"] for campaign in index.top()], [2])
+
+    def test_verdict_reuse_needs_confidence_and_agreement(self):
+        index = CampaignIndex(snapshot_path="")
+        add(index, variant("Ravi", "IN4418", "2,450", "http://bit.ly/x1"), scam_result(0.6))
+        match = index.lookup(variant("Priya", "IN9902", "3,100", "http://bit.ly/x2"))
+        self.assertIsNone(index.reusable_prediction(match))
+
+        index.record(match, variant("Priya", "IN9902", "3,100", "http://bit.ly/x2"), scam_result(0.97))
+        match = index.lookup(variant("Amit", "IN0001", "999", "http://bit.ly/x3"))
+        self.assertEqual(index.reusable_prediction(match), {"label": "spam", "score": 0.97})
+
+        # A model run that disagrees withdraws the verdict.
+        index.record(match, variant("Amit", "IN0001", "999", "http://bit.ly/x3"), scam_result(0.95, "ham"))
+        self.assertIsNone(index.reusable_prediction(index.lookup(variant("Neha", "IN7", "5", "http://bit.ly/x4"))))
+        self.assertEqual(index.stats()["verdict_conflicts"], 1)
+
+    def test_legitimate_verdicts_are_not_reused(self):
+        # The link is folded out of the signature, so swapping in a malicious
+        # one gives similarity 1.0; it must still reach the model.
+        index = CampaignIndex(snapshot_path="")
+        genuine = "Your India Post parcel is waiting for delivery, track it at https://www.indiapost.gov.in/track?id=11"
+        add(index, genuine, scam_result(0.97, "ham"))
+        swapped = genuine.replace("https://www.indiapost.gov.in/track?id=11", "http://indiapost-track.xyz/pay?id=11")
+        match = index.lookup(swapped)
+        self.assertEqual(match.similarity, 1.0)
+        self.assertIsNone(index.reusable_prediction(match))
+
+    def test_expiry_and_size_bounds(self):
+        index = CampaignIndex(window_seconds=60, max_campaigns=2, snapshot_path="")
+        texts = ["Your electricity connection will be cut tonight, call the officer now",
+                 "Congratulations, you have won a lucky draw prize, send your bank details",
+                 "This is the cyber crime police, a case is registered against your Aadhaar number"]
+        with mock.patch("pipeline.campaign_index.time.time", return_value=1000.0):
+            ids = [add(index, text, scam_result())["campaign_id"] for text in texts]
+            self.assertIsNone(index.campaign(ids[0]))
+            self.assertEqual(index.evictions, 1)
+            self.assertIsNone(index.lookup(texts[0]).campaign)
+        with mock.patch("pipeline.campaign_index.time.time", return_value=1100.0):
+            self.assertIsNone(index.campaign(ids[2]))
+            self.assertIsNone(index.lookup(texts[2]).campaign)
+
+    def test_snapshot_round_trip(self):
+        index = CampaignIndex(snapshot_path="")
+        for name in ("Ravi", "Priya", "Amit"):
+            summary = add(index, variant(name, "IN4418", "2,450", "http://bit.ly/x1"), scam_result())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "campaigns.json")
+            self.assertEqual(index.snapshot(path), 1)
+            restored = CampaignIndex(snapshot_path=path)
+            self.assertEqual(restored.restore(), 1)
+        self.assertEqual(restored.campaign(summary["campaign_id"]), index.campaign(summary["campaign_id"]))
+        match = restored.lookup(variant("Neha", "IN9", "10", "http://bit.ly/x9"))
+        self.assertEqual(match.campaign.campaign_id, summary["campaign_id"])
+
+
+class CountingClassify:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, text, use_cache=True):
+        self.calls += 1
+        return {"is_scam": True, "confidence": 0.97,
+                "explanation": {"model_label": "spam", "trigger_phrases": [], "trigger_spans": []}}
+
+
+class TestCampaignVerdictReuse(unittest.TestCase):
+    """
+    Near-duplicates of a confidently classified text skip the model.
+    """
+
+    def test_reused_verdict_skips_the_model(self):
+        classify = CountingClassify()
+        registry = ModelRegistry({"text": lambda: TextClassifier(model_path="./stub-text", cache=None)})
+
+        async def analyze():
+            first = await detection_pipeline.process_text_input(variant("Ravi", "IN4418", "2,450", "http://bit.ly/x1"))
+            second = await detection_pipeline.process_text_input(
+                variant("Priya", "IN9902", "3,100", "http://bit.ly/x2") + " urgent")
+            forced = await detection_pipeline.process_text_input(
+                variant("Amit", "IN0001", "999", "http://bit.ly/x3"), use_cache=False)
+            return first, second, forced
+
+        with mock.patch.object(detection_pipeline, "campaign_index", CampaignIndex(snapshot_path="")), \
+                mock.patch.object(detection_pipeline, "classify_text", classify), \
+                mock.patch.object(detection_pipeline, "registry", registry):
+            first, second, forced = asyncio.run(analyze())
+
+        self.assertEqual(classify.calls, 2)
+        self.assertFalse(first["campaign"]["verdict_reused"])
+        self.assertTrue(second["campaign"]["verdict_reused"])
+        self.assertEqual(second["campaign"]["campaign_id"], first["campaign"]["campaign_id"])
+        self.assertTrue(second["result"]["is_scam"])
+        # Trigger phrases come from the text itself, not the representative.
+        self.assertEqual(second["result"]["explanation"]["trigger_phrases"], ["urgent"])
+        self.assertFalse(forced["campaign"]["verdict_reused"])
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+from models.video_deepfake_detector import RAW_FRAME_HEADER, RAW_FRAME_MAGIC, FrameDecoder, pack_raw_frame
+
+class TestFrameDecoder(unittest.TestCase):
+    """
+    Unit tests for decoding raw and encoded video frame payloads.
+    """
+
+    def setUp(self):
+        self.frame = np.random.default_rng(0).integers(0, 256, (6, 8, 3), dtype=np.uint8)
+
+    def test_raw_bgr_frame_is_a_view_of_the_payload(self):
+        payload = pack_raw_frame(self.frame)
+        self.assertEqual(payload[:RAW_FRAME_HEADER.size], RAW_FRAME_HEADER.pack(RAW_FRAME_MAGIC, 8, 6, 1, 0))
+        decoded = FrameDecoder().decode(payload)
+        np.testing.assert_array_equal(decoded, self.frame)
+        self.assertFalse(decoded.flags.writeable)
+
+    def test_raw_formats_are_converted_to_bgr(self):
+        decoder = FrameDecoder()
+        rgb = decoder.decode(pack_raw_frame(np.ascontiguousarray(self.frame[..., ::-1]), "rgb"))
+        np.testing.assert_array_equal(rgb, self.frame)
+        # Converted frames of the same size share one buffer
+        self.assertIs(decoder.decode(pack_raw_frame(self.frame, "rgb")), rgb)
+        gray = decoder.decode(pack_raw_frame(self.frame[..., 0], "gray"))
+        np.testing.assert_array_equal(gray, np.repeat(self.frame[..., :1], 3, axis=2))
+
+    def test_malformed_payloads_are_rejected(self):
+        decoder = FrameDecoder()
+        payload = pack_raw_frame(self.frame)
+        with self.assertRaises(ValueError):
+            decoder.decode(payload[:-1])
+        with self.assertRaises(ValueError):
+            decoder.decode(RAW_FRAME_HEADER.pack(RAW_FRAME_MAGIC, 8, 6, 9, 0) + payload[RAW_FRAME_HEADER.size:])
+        # Without the magic the payload is treated as an encoded image, which it is not
+        self.assertIsNone(decoder.decode(b"XX" + payload[2:]))
+
+    def test_encoded_images_can_be_decoded_reduced(self):
+        ok, jpeg = cv2.imencode(".jpg", np.zeros((48, 64, 3), dtype=np.uint8))
+        self.assertTrue(ok)
+        self.assertEqual(FrameDecoder().decode(jpeg.tobytes()).shape, (48, 64, 3))
+        self.assertEqual(FrameDecoder(jpeg_reduce=2).decode(jpeg.tobytes()).shape, (24, 32, 3))
+        self.assertEqual(FrameDecoder(jpeg_reduce=8).decode(jpeg.tobytes()).shape, (6, 8, 3))
+        with self.assertRaises(ValueError):
+            FrameDecoder(jpeg_reduce=3)
+
+class StubVideoPool:
+    def acquire(self):
+        return 0
+
+    def submit(self, worker, fn, *args):
+        pass
+
+    def release(self, worker):
+        pass
+
+class TestVideoIngestNegotiation(unittest.TestCase):
+    """
+    Text messages on /ws/video configure ingestion only when they ask to.
+    """
+
+    def test_only_ingest_messages_change_the_stream(self):
+        from fastapi.testclient import TestClient
+        from ui import app as app_module
+        with mock.patch.object(app_module.registry, "is_enabled", return_value=True), \
+                mock.patch.object(app_module, "video_pool", StubVideoPool()):
+            with TestClient(app_module.app).websocket_connect("/ws/video") as websocket:
+                self.assertEqual(websocket.receive_json()["type"], "session")
+                replies = []
+                for message in ('{"jpeg_reduce": 2}', '[2]', '{"type": "ingest", "jpeg_reduce": [2]}',
+                                '{"type": "ingest", "jpeg_reduce": 2, "mode": "frame"}'):
+                    websocket.send_text(message)
+                    replies.append(websocket.receive_json())
+        self.assertTrue(all("error" in reply for reply in replies[:3]))
+        self.assertEqual(replies[3], {"type": "ingest_config", "raw_frames": True, "mode": "frame", "jpeg_reduce": 2})
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,155 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+from models import inference_backend
+
+class FakeExport:
+    """
+    Stands in for an optimum ORTModel: saving it writes an empty model.onnx.
+    """
+    exports = []
+
+    @classmethod
+    def from_pretrained(cls, model_path, export=False):
+        cls.exports.append((model_path, export))
+        return cls()
+
+    def save_pretrained(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        open(os.path.join(output_dir, "model.onnx"), "wb").close()
+
+class FakeQuantizer:
+    configs = []
+
+    @classmethod
+    def from_pretrained(cls, model_dir):
+        return cls()
+
+    def quantize(self, save_dir, quantization_config):
+        self.configs.append(quantization_config)
+        os.makedirs(save_dir, exist_ok=True)
+        open(os.path.join(save_dir, inference_backend.QUANTIZED_ONNX_FILE), "wb").close()
+
+class FakeQuantizationConfig:
+    @staticmethod
+    def avx2(is_static, per_channel):
+        return {"preset": "avx2", "is_static": is_static, "per_channel": per_channel}
+
+class FakePreprocessor:
+    def save_pretrained(self, output_dir):
+        open(os.path.join(output_dir, "tokenizer.json"), "w").close()
+
+def fake_optimum():
+    ort = types.ModuleType("optimum.onnxruntime")
+    ort.ORTModelForSequenceClassification = FakeExport
+    ort.ORTQuantizer = FakeQuantizer
+    configuration = types.ModuleType("optimum.onnxruntime.configuration")
+    configuration.AutoQuantizationConfig = FakeQuantizationConfig
+    ort.configuration = configuration
+    optimum = types.ModuleType("optimum")
+    optimum.onnxruntime = ort
+    return {"optimum": optimum, "optimum.onnxruntime": ort, "optimum.onnxruntime.configuration": configuration}
+
+def fake_pipeline(labels):
+    def classify(texts, batch_size, truncation):
+        return [{"label": label, "score": score} for label, score in labels[:len(texts)]]
+    return classify
+
+class TestInferenceBackend(unittest.TestCase):
+    """
+    Checks of backend selection that do not need the model frameworks.
+    """
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            inference_backend.build_pipeline("text-classification", "some-model", backend="tensorrt")
+
+    def test_export_dirs_are_separate_per_quantization(self):
+        plain = inference_backend.onnx_export_dir("./models/saved_models/scam_text_classifier/")
+        quantized = inference_backend.onnx_export_dir("./models/saved_models/scam_text_classifier", quantize=True)
+        self.assertTrue(os.path.basename(plain).startswith("scam_text_classifier-"))
+        self.assertTrue(quantized.endswith("-int8"))
+        self.assertNotEqual(quantized, plain)
+
+    def test_export_dirs_are_keyed_on_the_full_model_path(self):
+        with tempfile.TemporaryDirectory() as root:
+            first, second = os.path.join(root, "a", "model"), os.path.join(root, "b", "model")
+            for path in (first, second):
+                os.makedirs(path)
+            self.assertNotEqual(inference_backend.onnx_export_dir(first), inference_backend.onnx_export_dir(second))
+            relative = os.path.relpath(first)
+            self.assertEqual(inference_backend.onnx_export_dir(relative), inference_backend.onnx_export_dir(first + os.sep))
+        self.assertNotEqual(inference_backend.onnx_export_dir("model", task="audio-classification"),
+                            inference_backend.onnx_export_dir("model"))
+
+class TestOnnxExport(unittest.TestCase):
+    """
+    The export, parity and CLI paths, with optimum and transformers stubbed out.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        FakeExport.exports.clear()
+        FakeQuantizer.configs.clear()
+        patches = [
+            mock.patch.object(inference_backend, "ONNX_EXPORT_ROOT", self.root),
+            mock.patch.object(inference_backend, "_load_preprocessor", lambda task, path: FakePreprocessor()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_missing_optimum_is_explained(self):
+        with mock.patch.dict(sys.modules, {"optimum": None, "optimum.onnxruntime": None}):
+            with self.assertRaisesRegex(RuntimeError, "optimum"):
+                inference_backend.export_onnx("some-model")
+            with self.assertRaisesRegex(RuntimeError, "optimum"):
+                inference_backend.build_pipeline("text-classification", "some-model", backend="onnx-int8")
+
+    def test_export_is_quantized_once_and_reused(self):
+        with mock.patch.dict(sys.modules, fake_optimum()):
+            quantized = inference_backend.export_onnx("some-model", quantize=True)
+            self.assertEqual(inference_backend.export_onnx("some-model", quantize=True), quantized)
+            plain = inference_backend.export_onnx("some-model")
+        self.assertEqual(quantized, inference_backend.onnx_export_dir("some-model", quantize=True))
+        self.assertEqual(plain, inference_backend.onnx_export_dir("some-model"))
+        self.assertTrue(os.path.exists(os.path.join(quantized, inference_backend.QUANTIZED_ONNX_FILE)))
+        self.assertTrue(os.path.exists(os.path.join(quantized, "tokenizer.json")))
+        self.assertEqual(FakeExport.exports, [("some-model", True)])
+        self.assertEqual(FakeQuantizer.configs, [dict(inference_backend.QUANTIZATION_SETTINGS)])
+
+    def test_parity_compares_labels_and_scores(self):
+        runs = {
+            "pytorch": fake_pipeline([("scam", 0.9), ("ham", 0.8), ("scam", 0.7), ("ham", 0.6)]),
+            "onnx": fake_pipeline([("scam", 0.85), ("ham", 0.8), ("ham", 0.6), ("ham", 0.6)]),
+        }
+        with mock.patch.object(inference_backend, "build_pipeline",
+                               lambda task, model_path, backend, threads: runs[backend]):
+            report = inference_backend.check_parity("some-model", "onnx", ["a", "b", "c", "d"])
+            with self.assertRaises(SystemExit), mock.patch.object(inference_backend, "load_texts",
+                                                                  return_value=["a", "b", "c", "d"]):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    inference_backend.main(["parity", "--backend", "onnx"])
+        self.assertEqual(report["label_agreement"], 0.75)
+        self.assertEqual(report["mismatched_rows"], [2])
+        self.assertAlmostEqual(report["max_score_diff"], 0.1)
+        self.assertAlmostEqual(report["mean_score_diff"], 0.0375)
+        self.assertIn("onnx_seconds", report)
+
+    def test_export_command(self):
+        output = io.StringIO()
+        with mock.patch.dict(sys.modules, fake_optimum()), contextlib.redirect_stdout(output):
+            inference_backend.main(["export", "--model-path", "some-model", "--int8"])
+        self.assertIn(inference_backend.onnx_export_dir("some-model", quantize=True), output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
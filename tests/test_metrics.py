@@ -0,0 +1,91 @@
+import asyncio
+import marshal
+import threading
+import time
+import unittest
+from utils.metrics import MetricsRegistry
+from utils.profiling import ProfilerBusyError, _profile_lock, profile_loop, sample_stacks
+
+class TestMetricsRegistry(unittest.TestCase):
+    """
+    Unit tests for the Prometheus text rendering of utils/metrics.py.
+    """
+
+    def test_counter_and_labels_render(self):
+        registry = MetricsRegistry()
+        frames = registry.counter("frames_total", "Frames by outcome.", ["outcome"])
+        frames.labels("dropped").inc()
+        frames.labels("dropped").inc(2)
+        text = registry.render()
+        self.assertIn("# TYPE frames_total counter", text)
+        self.assertIn('frames_total{outcome="dropped"} 3', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        stage = registry.histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.01, 0.1))
+        for value in (0.005, 0.05, 0.5):
+            stage.labels("decode").observe(value)
+        text = registry.render()
+        self.assertIn('stage_seconds_bucket{stage="decode",le="0.01"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="decode",le="0.1"} 2', text)
+        self.assertIn('stage_seconds_bucket{stage="decode",le="+Inf"} 3', text)
+        self.assertIn('stage_seconds_count{stage="decode"} 3', text)
+
+    def test_timer_observes_elapsed_time(self):
+        registry = MetricsRegistry()
+        stage = registry.histogram("stage_seconds", "Stage time.", ["stage"])
+        with stage.time("sleep"):
+            time.sleep(0.01)
+        child = stage.labels("sleep")
+        self.assertEqual(child.count, 1)
+        self.assertGreaterEqual(child.sum, 0.01)
+
+    def test_collectors_are_rendered_and_failures_skipped(self):
+        registry = MetricsRegistry()
+        registry.add_collector(lambda: [("queue_depth", "gauge", "Queued items.", [({"queue": 'te"xt'}, 4)])])
+
+        def broken():
+            raise RuntimeError("stats unavailable")
+
+        registry.add_collector(broken)
+        self.assertIn('queue_depth{queue="te\\"xt"} 4', registry.render())
+
+    def test_reregistering_with_other_labels_fails(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests.", ["route"])
+        self.assertIs(registry.counter("requests_total", "Requests.", ["route"]),
+                      registry.counter("requests_total", "Requests.", ["route"]))
+        with self.assertRaises(ValueError):
+            registry.gauge("requests_total", "Requests.")
+
+
+class TestProfiling(unittest.TestCase):
+    """
+    Unit tests for the on-demand profilers.
+    """
+
+    def test_sample_stacks_returns_collapsed_stacks(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=stop.wait, name="busy-worker")
+        worker.start()
+        try:
+            stacks = sample_stacks(0.05, interval=0.005)
+        finally:
+            stop.set()
+            worker.join()
+        line = next(line for line in stacks.splitlines() if line.startswith("busy-worker;"))
+        stack, count = line.rsplit(" ", 1)
+        self.assertIn("wait (", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_profile_loop_returns_pstats_data(self):
+        stats = marshal.loads(asyncio.run(profile_loop(0.01)))
+        self.assertTrue(any(function == "sleep" for _, _, function in stats))
+
+    def test_only_one_profile_runs_at_a_time(self):
+        with _profile_lock:
+            with self.assertRaises(ProfilerBusyError):
+                sample_stacks(0.01)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from models.text_classifier import BatchStats, MicroBatcher
+
+class RecordingBatchFn:
+    def __init__(self, transform=lambda items: [item * 10 for item in items]):
+        self.batches = []
+        self.transform = transform
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return self.transform(items)
+
+class TestMicroBatcher(unittest.TestCase):
+    """
+    Unit tests for gathering concurrent requests into batches.
+    """
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def run_batcher(self, batcher, items, timeout=5.0):
+        async def scenario():
+            calls = [batcher.submit(item) for item in items]
+            return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), timeout)
+        return asyncio.run(scenario())
+
+    def test_concurrent_items_share_one_batch(self):
+        batch_fn = RecordingBatchFn()
+        batcher = MicroBatcher(batch_fn, max_batch_size=16, max_wait_ms=50, executor=self.executor)
+        self.assertEqual(self.run_batcher(batcher, [1, 2, 3]), [10, 20, 30])
+        self.assertEqual(batch_fn.batches, [[1, 2, 3]])
+
+    def test_batches_are_capped_at_max_size(self):
+        batch_fn = RecordingBatchFn()
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=50, executor=self.executor)
+        self.assertEqual(self.run_batcher(batcher, [1, 2, 3, 4, 5]), [10, 20, 30, 40, 50])
+        self.assertEqual([len(batch) for batch in batch_fn.batches], [2, 2, 1])
+        self.assertEqual(batcher.stats.snapshot()["batch_size_histogram"], {1: 1, 2: 2})
+
+    def test_errors_reach_every_caller_in_the_batch(self):
+        def fail(items):
+            raise ValueError("model crashed")
+
+        batcher = MicroBatcher(RecordingBatchFn(fail), max_wait_ms=50, executor=self.executor)
+        results = self.run_batcher(batcher, [1, 2])
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(batcher.stats.errors, 1)
+
+    def test_short_result_list_fails_instead_of_hanging(self):
+        batcher = MicroBatcher(RecordingBatchFn(lambda items: [0]), max_wait_ms=50, executor=self.executor)
+        results = self.run_batcher(batcher, [1, 2, 3])
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(batcher.stats.errors, 1)
+
+    def test_cancelled_callers_are_left_out_of_the_batch(self):
+        batch_fn = RecordingBatchFn()
+        batcher = MicroBatcher(batch_fn, max_wait_ms=50, executor=self.executor)
+
+        async def scenario():
+            cancelled = asyncio.create_task(batcher.submit(1))
+            kept = asyncio.create_task(batcher.submit(2))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            return await asyncio.wait_for(kept, 5.0)
+
+        self.assertEqual(asyncio.run(scenario()), 20)
+        self.assertEqual(batch_fn.batches, [[2]])
+
+class TestBatchStats(unittest.TestCase):
+    """
+    Unit tests for the micro-batcher's counters.
+    """
+
+    def test_snapshot_summarizes_batches(self):
+        stats = BatchStats(recent=1)
+        stats.record(2, 0.010)
+        stats.record(4, 0.030, failed=True)
+        snapshot = stats.snapshot()
+        self.assertEqual((snapshot["batches"], snapshot["items"], snapshot["errors"]), (2, 6, 1))
+        self.assertEqual(snapshot["avg_batch_size"], 3.0)
+        self.assertEqual(snapshot["avg_batch_latency_ms"], 20.0)
+        self.assertEqual(snapshot["max_batch_latency_ms"], 30.0)
+        self.assertEqual(snapshot["batch_size_histogram"], {2: 1, 4: 1})
+        self.assertEqual(snapshot["recent_batches"], [{"size": 4, "latency_ms": 30.0}])
+
+class TestAnalyzeTextEndpoint(unittest.TestCase):
+    """
+    /analyze/text request validation.
+    """
+
+    def test_missing_text_is_a_400(self):
+        from fastapi.testclient import TestClient
+        from ui import app as app_module
+        response = TestClient(app_module.app).post("/analyze/text", json={"text": ""})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "No text provided"})
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
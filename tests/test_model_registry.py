@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from pipeline.model_registry import ModelRegistry, ModalityNotServedError
+
+class TestModelRegistry(unittest.TestCase):
+    """
+    Unit tests for lazy, per-modality model loading.
+    """
+
+    def test_model_is_built_on_first_get_only(self):
+        built = []
+        registry = ModelRegistry({"text": lambda: built.append(1) or object()})
+        self.assertFalse(registry.is_loaded("text"))
+        first = registry.get("text")
+        self.assertIs(registry.get("text"), first)
+        self.assertEqual(len(built), 1)
+        self.assertIn("text", registry.load_seconds)
+
+    def test_concurrent_gets_build_once(self):
+        built = []
+
+        def slow_factory():
+            time.sleep(0.05)
+            built.append(1)
+            return object()
+
+        registry = ModelRegistry({"text": slow_factory})
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get("text"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(built), 1)
+        self.assertEqual(len(set(map(id, results))), 1)
+
+    def test_unserved_modality_is_refused(self):
+        registry = ModelRegistry({"text": object, "video": object}, modalities=["text"])
+        with self.assertRaises(ModalityNotServedError):
+            registry.get("video")
+        with self.assertRaises(ValueError):
+            ModelRegistry({"text": object}, modalities=["audio"])
+
+    def test_warm_up_and_metrics(self):
+        class Model:
+            warmed = False
+
+            def warm_up(self):
+                self.warmed = True
+
+        registry = ModelRegistry({"text": Model, "audio": Model}, modalities=["text", "audio"])
+        self.assertFalse(registry.metrics()["ready"])
+        registry.warm_up(["text"])
+        self.assertTrue(registry.get("text").warmed)
+        self.assertTrue(registry.metrics(["text"])["ready"])
+        self.assertFalse(registry.metrics()["ready"])
+        self.assertIsNotNone(registry.metrics(["text"])["time_to_ready_seconds"])
+
+    def test_pipeline_import_does_not_load_model_frameworks(self):
+        code = ("import sys, pipeline.detection_pipeline; "
+                "print(','.join(m for m in ('torch', 'transformers', 'deepface', 'tensorflow') if m in sys.modules))")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.stdout.strip(), "")
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
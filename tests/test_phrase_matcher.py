@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from utils.phrase_matcher import PhraseMatcher
+
+class TestPhraseMatcher(unittest.TestCase):
+    """
+    Unit tests for the shared Aho–Corasick phrase matcher.
+    """
+
+    def test_overlapping_matches_with_offsets(self):
+        matcher = PhraseMatcher(["he", "she", "hers"])
+        matches = [(m.phrase, m.start, m.end) for m in matcher.findall("uShers")]
+        self.assertEqual(matches, [("She", 1, 4), ("he", 2, 4), ("hers", 2, 6)])
+
+    def test_whole_words_matches_like_regex_boundary(self):
+        matcher = PhraseMatcher(["claim", "free"], whole_words=True)
+        self.assertEqual(matcher.payloads_in("Claim your FREE prize"), ["claim", "free"])
+        self.assertEqual(matcher.payloads_in("reclaimed freedom"), [])
+
+    def test_non_overlapping_prefers_leftmost_longest(self):
+        matcher = PhraseMatcher(["refund", "tax refund", "bank account", "account suspended"], whole_words=True)
+        found = [m.payload for m in matcher.finditer("Tax refund: bank account suspended", overlapping=False)]
+        self.assertEqual(found, ["tax refund", "bank account"])
+
+    def test_findall_batch_matches_findall(self):
+        matcher = PhraseMatcher(["tax refund", "bank account", "otp"], whole_words=True)
+        texts = ["Tax refund: share the OTP", "", "nothing here", "bank accounts", "your bank account"]
+        self.assertEqual([[m.payload for m in found] for found in matcher.findall_batch(texts, overlapping=False)],
+                         [[m.payload for m in matcher.findall(text, overlapping=False)] for text in texts])
+
+    def test_lexicon_file_with_categories(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+            f.write("# comment\ndigital arrest\tthreat\ncbi officer\tauthority\n\n")
+            path = f.name
+        try:
+            matcher = PhraseMatcher.from_lexicon(path)
+            self.assertEqual(matcher.payloads_in("CBI officer says: digital arrest"), ["authority", "threat"])
+            only_threats = PhraseMatcher.from_lexicon(path, category="threat")
+            self.assertEqual(only_threats.phrases, ["digital arrest"])
+        finally:
+            os.remove(path)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
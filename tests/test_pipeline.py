@@ -1,6 +1,7 @@
 import unittest
 import os
-from pipeline.detection_pipeline import DetectionPipeline
+import time
+from pipeline.detection_pipeline import DetectionPipeline, risk_level_for, score_signals
 
 class TestDetectionPipeline(unittest.TestCase):
     """
@@ -39,7 +40,14 @@ class TestDetectionPipeline(unittest.TestCase):
             "body": "Dear Customer, We detected an unusual sign-in. Click here: http://bit.ly/fake-login to confirm your details."
         }
         result = self.pipeline.run(phishing_email, 'email')
-        self.assertEqual(result['risk_level'], 'CRITICAL')
+        # The lookalike sender and shortened link alone make it HIGH; the text
+        # classifier (when its model is available) takes it to CRITICAL.
+        if result['analyzers']['text_classifier']['status'] == 'ok':
+            self.assertEqual(result['risk_level'], 'CRITICAL')
+        else:
+            self.assertEqual(result['risk_level'], 'HIGH')
+        codes = [finding['code'] for finding in result['findings']]
+        self.assertIn('reputation.impersonation_with_link', codes)
         
     def test_legitimate_email(self):
         """Test that a legitimate email has a low risk score."""
@@ -52,5 +60,40 @@ class TestDetectionPipeline(unittest.TestCase):
         self.assertEqual(result['risk_level'], 'LOW')
         self.assertEqual(result['risk_score'], 0)
 
+
+class SlowReputationAnalyzer:
+    def analyze_links(self, text):
+        time.sleep(0.5)
+        return {"urls": [], "shortened": [], "ip_hosts": [], "impersonating": []}
+
+
+class TestRiskAggregation(unittest.TestCase):
+    """
+    Risk scoring and deadlines, without the models.
+    """
+
+    def test_signals_are_scored_and_capped(self):
+        signals = {
+            "text_classifier": {"is_scam": True, "confidence": 0.9},
+            "sentiment": {"polarity": -0.6, "flagged_keywords": ["urgent", "verify", "account suspended"]},
+            "reputation": {"links": {"urls": ["http://bit.ly/x"], "shortened": ["http://bit.ly/x"], "ip_hosts": [],
+                                     "impersonating": []}},
+        }
+        findings = score_signals(signals)
+        self.assertEqual([f["score"] for f in findings], [54, 30, 10, 25])
+        self.assertEqual(score_signals({"sentiment": {"polarity": 0.0, "flagged_keywords": ["invoice"]}}), [])
+        self.assertEqual([risk_level_for(score) for score in (0, 25, 50, 80, 100)],
+                         ["LOW", "MEDIUM", "HIGH", "CRITICAL", "CRITICAL"])
+
+    def test_slow_analyzer_is_cut_off_at_its_deadline(self):
+        pipeline = DetectionPipeline(timeouts={"reputation": 0.1}, preload=False)
+        pipeline.reputation_analyzer = SlowReputationAnalyzer()
+        started = time.perf_counter()
+        result = pipeline.run({"sender_email": None, "subject": "", "body": ""}, "email")
+        self.assertLess(time.perf_counter() - started, 0.4)
+        self.assertTrue(result["partial"])
+        self.assertEqual(result["analyzers"]["reputation"]["status"], "timeout")
+        self.assertEqual(result["risk_level"], "LOW")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from alerts.pubsub import AlertFilter, InMemoryPubSub, UnixSocketPubSub, alert_topic
+
+SCAM_TEXT_ALERT = {"type": "text_analysis", "content": "...", "result": {"is_scam": True, "confidence": 0.93}}
+GENUINE_FACE_ALERT = {"type": "video_frame_analysis", "session_id": "abc",
+                      "result": {"face_detected": True, "is_real": True, "confidence": 0.9}}
+
+class TestAlertFilter(unittest.TestCase):
+    """
+    Unit tests for alert topics and subscription filters.
+    """
+
+    def test_topic_is_derived_from_the_alert(self):
+        self.assertEqual(alert_topic(SCAM_TEXT_ALERT), {"channel": "text", "risk_level": "HIGH", "session": None})
+        self.assertEqual(alert_topic(GENUINE_FACE_ALERT), {"channel": "video", "risk_level": "LOW", "session": "abc"})
+        cloned_voice = {"type": "audio_analysis", "text_analysis": {"is_scam": True, "confidence": 0.7},
+                        "spoof_analysis": {"is_spoof": True, "confidence": 0.9}}
+        self.assertEqual(alert_topic(cloned_voice)["risk_level"], "CRITICAL")
+
+    def test_filter_fields_combine(self):
+        alert_filter = AlertFilter.from_params({"channel": "text,audio", "min_risk": "high"})
+        self.assertTrue(alert_filter.matches(alert_topic(SCAM_TEXT_ALERT)))
+        self.assertFalse(alert_filter.matches(alert_topic(GENUINE_FACE_ALERT)))
+        self.assertTrue(AlertFilter(sessions=["abc"]).matches(alert_topic(GENUINE_FACE_ALERT)))
+        self.assertFalse(AlertFilter(sessions=["abc"]).matches(alert_topic(SCAM_TEXT_ALERT)))
+        self.assertTrue(AlertFilter().matches(alert_topic(SCAM_TEXT_ALERT)))
+
+    def test_unknown_risk_level_is_rejected(self):
+        with self.assertRaises(ValueError):
+            AlertFilter(min_risk="SEVERE")
+
+
+class TestPubSubTransports(unittest.TestCase):
+    """
+    Delivery through the in-memory and Unix socket transports.
+    """
+
+    def test_in_memory_passes_the_message_unserialized(self):
+        received = []
+        pubsub = InMemoryPubSub()
+        pubsub.subscribe(lambda topic, message=None, message_str=None: received.append((topic, message, message_str)))
+        asyncio.run(pubsub.publish(alert_topic(SCAM_TEXT_ALERT), SCAM_TEXT_ALERT))
+        self.assertEqual(received, [(alert_topic(SCAM_TEXT_ALERT), SCAM_TEXT_ALERT, None)])
+
+    def test_unix_broker_relays_between_instances(self):
+        async def scenario(path):
+            first, second = UnixSocketPubSub(path), UnixSocketPubSub(path)
+            received = {"first": [], "second": []}
+            first.subscribe(lambda topic, message=None, message_str=None: received["first"].append(message_str))
+            second.subscribe(lambda topic, message=None, message_str=None: received["second"].append(message_str))
+            await first.start()
+            await second.start()
+            for _ in range(50):
+                if first.connected and second.connected:
+                    break
+                await asyncio.sleep(0.05)
+            await first.publish(alert_topic(SCAM_TEXT_ALERT), SCAM_TEXT_ALERT)
+            await asyncio.sleep(0.2)
+            brokers = [first.is_broker, second.is_broker]
+            await first.close()
+            await second.close()
+            return received, brokers
+
+        with tempfile.TemporaryDirectory() as directory:
+            received, brokers = asyncio.run(scenario(os.path.join(directory, "alerts.sock")))
+        self.assertEqual(sorted(brokers), [False, True])
+        self.assertEqual([json.loads(message) for message in received["first"]], [SCAM_TEXT_ALERT])
+        self.assertEqual([json.loads(message) for message in received["second"]], [SCAM_TEXT_ALERT])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
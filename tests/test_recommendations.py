@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from alerts.recommendations import RecommendationEngine
+from pipeline.detection_pipeline import score_signals
+
+class TestRecommendationEngine(unittest.TestCase):
+    """
+    Unit tests for the compiled advice catalog.
+    """
+
+    def setUp(self):
+        self.engine = RecommendationEngine()
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write_catalog(self, catalog):
+        path = os.path.join(self.root, "catalog.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f)
+        return path
+
+    def test_builtin_catalog_output(self):
+        findings = [
+            {"model": "text_classifier", "finding": "Text classified as a scam (confidence 0.97)"},
+            {"model": "reputation", "finding": "Shortened link hides its destination, common in phishing"},
+        ]
+        self.assertEqual(self.engine.get_recommendations(findings), [
+            "Do not click on suspicious links.",
+            "Do not respond to suspicious messages.",
+            "Report the scam to relevant authorities.",
+            "Verify the sender's identity before sharing personal information.",
+        ])
+        self.assertEqual(self.engine.get_recommendations([]), ["Always be cautious with unsolicited communications."])
+        self.assertEqual(self.engine.get_recommendations([{"model": "reputation", "finding": "Sender uses a VOIP number"}]),
+                         ["Review the detected signals carefully and proceed with caution."])
+
+    def test_codes_give_the_same_advice_as_finding_texts(self):
+        signals = {
+            "text_classifier": {"is_scam": True, "confidence": 0.9},
+            "sentiment": {"flagged_keywords": ["winner", "prize"], "polarity": -0.8},
+            "reputation": {
+                "email": {"is_valid_syntax": True, "is_disposable": True, "domain": "mailinator.com",
+                          "impersonated_brand": "PayPal"},
+                "links": {"shortened": ["bit.ly"], "ip_hosts": [], "impersonating": []},
+            },
+            "video": {"face_detected": True, "is_real": False, "confidence": 0.8},
+        }
+        for finding in score_signals(signals):
+            uncoded = {"model": finding["model"], "finding": finding["finding"]}
+            self.assertEqual(self.engine.get_recommendations([finding]), self.engine.get_recommendations([uncoded]),
+                             finding["code"])
+
+    def test_catalog_file_with_shared_advice_ids(self):
+        path = self.write_catalog({
+            "default": "Soyez prudent.",
+            "advice": {"report": "Signalez l'arnaque.", "ignore": "Ne répondez pas."},
+            "rules": [
+                {"id": "scam", "codes": ["text_classifier.scam"], "advice": ["ignore", "report"]},
+                {"id": "deepfake", "codes": ["video.deepfake"], "advice": ["report"]},
+            ],
+        })
+        engine = RecommendationEngine(catalog_path=path)
+        findings = [{"model": "text_classifier", "code": "text_classifier.scam", "finding": "Text classified as a scam"},
+                    {"model": "video_detector", "code": "video.deepfake", "finding": "Video shows signs of a deepfake"}]
+        self.assertEqual(engine.get_recommendations(findings), ["Ne répondez pas.", "Signalez l'arnaque."])
+        self.assertEqual(engine.get_recommendations([]), ["Soyez prudent."])
+        self.assertEqual(engine.stats()["advice"], 2)
+
+    def test_catalog_is_reloaded_when_the_file_changes(self):
+        path = self.write_catalog({"rules": [{"codes": ["video.deepfake"], "advice": ["Old advice."]}]})
+        engine = RecommendationEngine(catalog_path=path, check_interval=0)
+        finding = [{"model": "video_detector", "code": "video.deepfake", "finding": "Video shows signs of a deepfake"}]
+        self.assertEqual(engine.get_recommendations(finding), ["Old advice."])
+
+        self.write_catalog({"rules": [{"codes": ["video.deepfake"], "advice": ["New advice."]}]})
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+        self.assertEqual(engine.get_recommendations(finding), ["New advice."])
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2_000_000_000))
+        # A broken file keeps the last good catalog.
+        self.assertEqual(engine.get_recommendations(finding), ["New advice."])
+        self.assertEqual(engine.reloads, 2)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
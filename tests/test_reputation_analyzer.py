@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from models.reputation_analyzer import ReputationAnalyzer
+from utils.domain_index import DomainSuffixIndex
+
+class TestDomainSuffixIndex(unittest.TestCase):
+    """
+    Unit tests for the disposable-domain index.
+    """
+
+    def test_subdomains_match_on_label_boundaries(self):
+        index = DomainSuffixIndex(["Mailinator.com.", "yopmail.com"])
+        self.assertEqual(index.match("mx.mailinator.com"), "mailinator.com")
+        self.assertIn("yopmail.com", index)
+        self.assertNotIn("notmailinator.com", index)
+        self.assertNotIn("com", index)
+
+    def test_reload_picks_up_file_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "domains.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# list\nfirst.example\n*.wild.example\n")
+            index = DomainSuffixIndex(path=path)
+            self.assertEqual(len(index), 2)
+            self.assertIn("a.wild.example", index)
+            self.assertFalse(index.reload())
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("second.example\n")
+            os.utime(path, ns=(0, 1))
+            self.assertTrue(index.reload())
+            self.assertNotIn("first.example", index)
+            self.assertIn("second.example", index)
+
+    def test_missing_file_falls_back_until_it_appears(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "domains.txt")
+            self.assertEqual(len(DomainSuffixIndex(path=path)), 0)
+            index = DomainSuffixIndex(["builtin.example"], path=path)
+            self.assertIn("builtin.example", index)
+            self.assertFalse(index.reload())
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("listed.example\n")
+            self.assertTrue(index.reload())
+            self.assertIn("listed.example", index)
+            self.assertNotIn("builtin.example", index)
+            os.remove(path)
+            with self.assertRaises(OSError):
+                index.reload()
+            self.assertFalse(index.refresh())
+            self.assertIn("listed.example", index)
+
+
+class TestReputationAnalyzer(unittest.TestCase):
+    """
+    Batch methods must agree with the per-item ones.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = ReputationAnalyzer(disposable_domains_path="")
+
+    def test_analyze_emails_matches_analyze_email(self):
+        addresses = ["test@gmail.com", "scammer@mx.mailinator.com", "not-an-email", "", "test@gmail.com"]
+        self.assertEqual(self.analyzer.analyze_emails(addresses),
+                         [self.analyzer.analyze_email(address) for address in addresses])
+        self.assertTrue(self.analyzer.analyze_emails(addresses)[1]["is_disposable"])
+
+    def test_screen_senders(self):
+        self.assertEqual(self.analyzer.screen_senders(["a@YOPMAIL.com", "b@gmail.com", "c@x.10minutemail.com", None]),
+                         [True, False, True, None])
+
+    def test_screen_senders_marks_entries_without_a_domain_invalid(self):
+        self.assertEqual(self.analyzer.screen_senders(["yopmail.com", "a@", "", "a@yopmail.com"]),
+                         [None, None, None, True])
+
+    def test_analyze_phone_numbers_matches_analyze_phone_number(self):
+        numbers = ["202-456-1111", "12345", "", "202-456-1111"]
+        self.assertEqual(self.analyzer.analyze_phone_numbers(numbers),
+                         [self.analyzer.analyze_phone_number(number) for number in numbers])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+from utils.result_cache import ResultCache
+
+def assert_spans_slice(test, text, found_spans):
+    test.assertTrue(found_spans)
+    for span in found_spans:
+        test.assertEqual(text[span["start"]:span["end"]].lower(), span["phrase"])
+
+class TestResultCache(unittest.TestCase):
+    """
+    Unit tests for the shared LRU+TTL result cache.
+    """
+
+    def test_hit_after_set_ignores_whitespace(self):
+        cache = ResultCache(max_entries=10, ttl_seconds=60)
+        cache.set("model-a", "URGENT: your account  is suspended", {"is_scam": True})
+        self.assertEqual(cache.get("model-a", " URGENT: your account is suspended\n"), {"is_scam": True})
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_namespaces_are_isolated(self):
+        cache = ResultCache(max_entries=10, ttl_seconds=60)
+        cache.set("model-a", "hello", {"label": "a"})
+        self.assertIsNone(cache.get("model-b", "hello"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResultCache(max_entries=2, ttl_seconds=60)
+        cache.set("m", "one", 1)
+        cache.set("m", "two", 2)
+        cache.get("m", "one")
+        cache.set("m", "three", 3)
+        self.assertIsNone(cache.get("m", "two"))
+        self.assertEqual(cache.get("m", "one"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResultCache(max_entries=10, ttl_seconds=5)
+        with mock.patch("utils.result_cache.time.monotonic", return_value=100.0):
+            cache.set("m", "text", {"x": 1})
+        with mock.patch("utils.result_cache.time.monotonic", return_value=106.0):
+            self.assertIsNone(cache.get("m", "text"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_cached_value_is_not_shared_with_callers(self):
+        cache = ResultCache(max_entries=10, ttl_seconds=60)
+        result = cache.get_or_compute("m", "text", lambda text: {"flags": []})
+        result["flags"].append("mutated")
+        self.assertEqual(cache.get("m", "text"), {"flags": []})
+
+    def test_opt_out_bypasses_cache(self):
+        cache = ResultCache(max_entries=10, ttl_seconds=60)
+        calls = []
+        compute = lambda text: calls.append(text) or len(calls)
+        cache.get_or_compute("m", "text", compute, use_cache=False)
+        cache.get_or_compute("m", "text", compute, use_cache=False)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_spans_are_recomputed_for_whitespace_variants(self):
+        from models.sentiment_analysis import SentimentAnalyzer
+        from models.text_classifier import TextClassifier
+
+        class StubClassifier(TextClassifier):
+            def _load_pipeline(self):
+                self.classifier = lambda texts, **kwargs: [{"label": "spam", "score": 0.9}] * (
+                    1 if isinstance(texts, str) else len(texts))
+
+        cache = ResultCache(max_entries=10, ttl_seconds=60)
+        classifier = StubClassifier(model_path="./tests/.missing-model", cache=cache)
+        analyzer = SentimentAnalyzer(cache=cache)
+        classifier.predict("urgent: verify your password")
+        analyzer.analyze("urgent: verify your password")
+        variant = "   urgent:   verify your password"
+
+        for result in (classifier.predict(variant), classifier.cached_result(variant),
+                       classifier.predict_batch([variant])[0]):
+            assert_spans_slice(self, variant, result["explanation"]["trigger_spans"])
+        assert_spans_slice(self, variant, analyzer.analyze(variant)["keyword_spans"])
+        self.assertEqual(cache.stats()["misses"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
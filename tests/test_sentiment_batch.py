@@ -0,0 +1,34 @@
+import unittest
+from models.sentiment_analysis import SentimentAnalyzer
+
+TEXTS = [
+    "Your account is blocked. Verify your KYC immediately!",
+    "This is not a very good offer :(",
+    "I am really happy with the service : )",
+    "Congratulations, you won a lottery ( ! ) claim now",
+    "The police officer said it is extremely urgent!!!",
+    "",
+    "ok",
+]
+
+class TestSentimentBatch(unittest.TestCase):
+    """
+    analyze_batch must agree exactly with analyze.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = SentimentAnalyzer(cache=None)
+
+    def test_batch_matches_per_item(self):
+        expected = [self.analyzer.analyze(text, use_cache=False) for text in TEXTS]
+        self.assertEqual(self.analyzer.analyze_batch(TEXTS), expected)
+
+    def test_columnar_output(self):
+        columns = self.analyzer.analyze_batch(TEXTS, as_columns=True)
+        self.assertEqual(len(columns["polarity"]), len(TEXTS))
+        self.assertEqual(list(columns["keyword_count"]), [len(k) for k in columns["flagged_keywords"]])
+        self.assertEqual(columns["flagged_keywords"][0], self.analyzer.analyze(TEXTS[0], use_cache=False)["flagged_keywords"])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,40 @@
+import os
+import unittest
+from unittest import mock
+from pipeline.model_registry import ModelRegistry
+from ui.serve import THREAD_ENV_VARS, configure_environment, worker_snapshot_path
+
+class TestServeConfiguration(unittest.TestCase):
+    """
+    Unit tests for the per-worker settings of the pre-fork server.
+    """
+
+    def test_threads_and_video_workers_are_split(self):
+        with mock.patch.dict(os.environ, {"VIDEO_WORKERS": "4", "OMP_NUM_THREADS": "8"}, clear=True):
+            configure_environment(workers=2, threads=3)
+            self.assertEqual(os.environ["OMP_NUM_THREADS"], "8")
+            self.assertEqual(os.environ["INFERENCE_THREADS"], "3")
+            self.assertEqual(os.environ["VIDEO_WORKERS"], "2")
+            self.assertEqual(os.environ["ALERT_PUBSUB"], "unix")
+
+    def test_explicit_threads_override_the_environment(self):
+        with mock.patch.dict(os.environ, {"OMP_NUM_THREADS": "8", "ALERT_PUBSUB": "memory"}, clear=True):
+            configure_environment(workers=1, threads=2, explicit_threads=True)
+            self.assertEqual({os.environ[name] for name in THREAD_ENV_VARS}, {"2"})
+            self.assertEqual(os.environ["ALERT_PUBSUB"], "memory")
+            self.assertEqual(os.environ["VIDEO_WORKERS"], str(max(1, (os.cpu_count() or 2) // 2)))
+
+    def test_workers_get_their_own_snapshot_files(self):
+        self.assertEqual(worker_snapshot_path("state/sessions.json", 2), "state/sessions.worker2.json")
+        self.assertEqual(worker_snapshot_path("state/campaigns", 0), "state/campaigns.worker0")
+        self.assertEqual(worker_snapshot_path("", 1), "")
+
+    def test_registered_models_count_as_ready(self):
+        registry = ModelRegistry({"text": object}, modalities=["text"])
+        registry.register("text", object())
+        metrics = registry.metrics()
+        self.assertTrue(metrics["ready"])
+        self.assertIsNotNone(metrics["time_to_ready_seconds"])
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
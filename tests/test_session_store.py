@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pipeline.session_store import SessionStore
+
+def text_alert(is_scam, confidence, triggers=()):
+    return {"type": "text_analysis", "channel": "sms",
+            "result": {"is_scam": is_scam, "confidence": confidence, "explanation": {"trigger_phrases": list(triggers)}}}
+
+SPOOFED_WINDOW = {"type": "audio_window", "window": {"spoof_analysis": {"is_spoof": True, "confidence": 0.9}}}
+
+class TestSessionStore(unittest.TestCase):
+    """
+    Unit tests for incremental session scoring.
+    """
+
+    def test_escalation_across_channels(self):
+        store = SessionStore(snapshot_path="")
+        first = store.observe("victim", text_alert(False, 0.9))
+        self.assertEqual(first["risk_level"], "LOW")
+        self.assertTrue(first["changed"])
+        self.assertFalse(store.observe("victim", text_alert(False, 0.8))["changed"])
+        store.observe("victim", text_alert(True, 0.6, ["digital arrest"]))
+        store.observe("victim", text_alert(True, 0.95, ["digital arrest", "immediate payment"]))
+        verdict = store.observe("victim", SPOOFED_WINDOW)
+        self.assertEqual(verdict["risk_level"], "CRITICAL")
+        self.assertIn("escalating", verdict["patterns"])
+        self.assertIn("cross_channel", verdict["patterns"])
+        self.assertEqual(verdict["items"], 5)
+        self.assertEqual(verdict["top_keywords"][0], "digital arrest")
+
+    def test_ttl_and_size_bounds(self):
+        store = SessionStore(ttl_seconds=60, max_sessions=2, snapshot_path="")
+        with mock.patch("pipeline.session_store.time.time", return_value=1000.0):
+            store.observe("a", text_alert(False, 0.9))
+            store.observe("b", text_alert(False, 0.9))
+            store.observe("c", text_alert(False, 0.9))
+        self.assertIsNone(store.verdict("a"))
+        self.assertEqual(store.evictions, 1)
+        with mock.patch("pipeline.session_store.time.time", return_value=1100.0):
+            self.assertIsNone(store.verdict("b"))
+            store.observe("d", text_alert(False, 0.9))
+        self.assertEqual(len(store), 1)
+
+    def test_snapshot_round_trip(self):
+        store = SessionStore(snapshot_path="")
+        store.observe("victim", text_alert(True, 0.9, ["urgent"]))
+        store.observe("victim", SPOOFED_WINDOW)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sessions.json")
+            self.assertEqual(store.snapshot(path), 1)
+            restored = SessionStore(snapshot_path=path)
+            self.assertEqual(restored.restore(), 1)
+        self.assertEqual(restored.verdict("victim"), store.verdict("victim"))
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from models.fast_text_scorer import FastTextScorer
+from models.text_classifier import MicroBatcher, TextClassifier
+from pipeline import detection_pipeline
+from pipeline.model_registry import ModelRegistry
+from pipeline.text_cascade import TextCascade
+
+SCAMS = ["URGENT! You have won a cash prize, call now to claim your reward",
+         "Your bank account is suspended, verify your password at this link",
+         "Congratulations, you are selected for a free holiday, reply WIN to claim",
+         "Final notice: pay the overdue tax refund fee today or face legal action"]
+LEGIT = ["Are we still meeting for lunch tomorrow?", "Ok, I will call you when I reach home",
+         "Can you pick up some milk on the way back", "Happy birthday! Have a great day"]
+
+class FixedScorer:
+    """
+    First-stage scorer with a given scam probability per text.
+    """
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+
+    def keyword_hits(self, texts):
+        return [[] for _ in texts]
+
+    def scam_probability(self, texts, keyword_hits=None):
+        return np.array([self.probabilities[text] for text in texts])
+
+class CountingPipeline:
+    """
+    Stands in for the transformer: everything is spam; remembers what it saw.
+    """
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts, truncation=True, **kwargs):
+        self.seen.extend(texts)
+        return [{"label": "spam", "score": 0.9} for _ in texts]
+
+def stub_classifier():
+    classifier = TextClassifier(model_path="./stub-text", cache=None)
+    classifier.classifier = CountingPipeline()
+    return classifier
+
+class TestTextCascade(unittest.TestCase):
+    """
+    Unit tests for the fast-scorer-then-transformer cascade.
+    """
+
+    def classify(self, cascade, texts):
+        classifier = stub_classifier()
+        registry = ModelRegistry({"text": lambda: classifier})
+        batcher = MicroBatcher(detection_pipeline._classify_text_batch)
+
+        async def run():
+            return [await detection_pipeline.classify_text(text) for text in texts]
+
+        with mock.patch.object(detection_pipeline, "text_cascade", cascade), \
+                mock.patch.object(detection_pipeline, "text_batcher", batcher), \
+                mock.patch.object(detection_pipeline, "registry", registry):
+            return asyncio.run(run()), classifier.classifier.seen
+
+    def test_only_uncertain_texts_reach_the_transformer(self):
+        probabilities = {"hello": 0.001, "win cash now": 0.999, "maybe": 0.4}
+        cascade = TextCascade(lambda: FixedScorer(probabilities), legit_below=0.02, scam_above=0.99, audit_rate=0)
+        results, seen = self.classify(cascade, ["hello", "win cash now", "maybe"])
+
+        self.assertEqual(seen, ["maybe"])
+        self.assertEqual([result["is_scam"] for result in results], [False, True, True])
+        self.assertEqual([result["explanation"]["cascade"]["stage"] for result in results],
+                         ["fast", "fast", "transformer"])
+        self.assertEqual(results[0]["confidence"], 1.0)
+        stats = cascade.stats()
+        self.assertEqual(stats["answered_fast"], {"legit": 1, "scam": 1})
+        self.assertEqual(stats["escalated"], 1)
+        self.assertAlmostEqual(stats["escalation_rate"], 0.3333)
+        # The scorer leaned legit (0.4) where the transformer said spam
+        self.assertEqual(stats["escalated_agreement"], 0.0)
+        self.assertIsNotNone(stats["transformer_ms_per_text"])
+
+    def test_audits_measure_agreement(self):
+        cascade = TextCascade(lambda: FixedScorer({"hello": 0.001, "prize": 0.999}), audit_rate=1.0, seed=0)
+        results, seen = self.classify(cascade, ["hello", "prize"])
+        self.assertEqual(seen, ["hello", "prize"])
+        self.assertTrue(all(result["explanation"]["cascade"]["audit"] for result in results))
+        stats = cascade.stats()
+        self.assertEqual((stats["audited"], stats["audit_agreed"], stats["escalation_rate"]), (2, 1, 1.0))
+
+    def test_unavailable_scorer_escalates_everything(self):
+        def broken():
+            raise ImportError("No module named 'sklearn'")
+        cascade = TextCascade(broken)
+        results, seen = self.classify(cascade, ["hello", "prize"])
+        self.assertEqual(seen, ["hello", "prize"])
+        self.assertTrue(all(result["is_scam"] for result in results))
+        self.assertFalse(cascade.stats()["available"])
+
+
+class TestFastTextScorer(unittest.TestCase):
+    """
+    The hashed n-gram scorer separates a small labelled set and round-trips through disk.
+    """
+
+    def test_train_save_and_load(self):
+        texts, labels = SCAMS + LEGIT, [1] * len(SCAMS) + [0] * len(LEGIT)
+        scorer = FastTextScorer().fit(texts, labels)
+        probabilities = scorer.scam_probability(["You won a prize, call now to claim it", "See you at lunch tomorrow"])
+        self.assertGreater(probabilities[0], 0.5)
+        self.assertLess(probabilities[1], 0.5)
+        self.assertEqual(scorer.keyword_hits(["Verify your password"]), [["verify", "password"]])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scorer.npz")
+            scorer.save(path)
+            loaded = FastTextScorer(scorer.keyword_matcher)
+            self.assertTrue(loaded.load(path))
+        np.testing.assert_allclose(loaded.scam_probability(texts), scorer.scam_probability(texts), rtol=1e-6)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
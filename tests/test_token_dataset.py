@@ -0,0 +1,117 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pipeline.token_dataset import TokenDataset, build_dataset, ensure_dataset, evaluate
+
+class StubTokenizer:
+    """
+    Word-level stand-in for a transformers fast tokenizer: [CLS] words [SEP].
+    """
+    name_or_path = "stub-tokenizer"
+    pad_token_id = 0
+    model_max_length = 8
+
+    def __init__(self):
+        self.calls = 0
+
+    def __len__(self):
+        return 1000
+
+    def get_vocab(self):
+        return {"[PAD]": 0, "[CLS]": 1, "[SEP]": 2}
+
+    def encode(self, text, max_length):
+        ids = [1] + [3 + sum(word.encode()) % 997 for word in text.lower().split()] + [2]
+        return ids[:max_length - 1] + [2] if len(ids) > max_length else ids
+
+    def __call__(self, texts, truncation=True, max_length=None, return_attention_mask=True):
+        self.calls += 1
+        return {"input_ids": [self.encode(text, max_length) for text in texts]}
+
+ROWS = [
+    ("sms", "Your parcel is held at customs pay the fee now or face legal action", "scam"),
+    ("sms", "See you at lunch", "legit"),
+    ("email", "Account suspended verify your identity", "scam"),
+    ("sms", "", ""),
+    ("sms", "ok", "legit"),
+]
+
+class StubClassifier:
+    def predict_token_batch(self, input_ids, attention_mask):
+        # Long messages are "spam"
+        return [{"label": "spam" if mask.sum() > 6 else "ham", "score": 0.9} for mask in attention_mask]
+
+class TestTokenDataset(unittest.TestCase):
+    """
+    Unit tests for the memory-mapped pre-tokenized datasets.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.root, "corpus.csv")
+        with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "channel", "text", "label"])
+            for index in range(60):
+                writer.writerow((index,) + ROWS[index % len(ROWS)])
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_round_trip(self):
+        tokenizer = StubTokenizer()
+        path = os.path.join(self.root, "dataset")
+        meta = build_dataset(self.csv_path, path, tokenizer, chunk_size=7)
+        dataset = TokenDataset(path)
+        self.assertEqual(len(dataset), 60)
+        self.assertEqual(meta["dtype"], "uint16")
+        self.assertEqual(meta["labels"], {"ham": 24, "spam": 24})
+        for row in (0, 3, 59):
+            expected = tokenizer.encode(ROWS[row % len(ROWS)][1], 8)
+            self.assertEqual(dataset.tokens(row).tolist(), expected)
+        self.assertEqual(dataset.labels[:5].tolist(), [1, 0, 1, -1, 0])
+
+    def test_batches_cover_every_row_once_with_little_padding(self):
+        path = os.path.join(self.root, "dataset")
+        build_dataset(self.csv_path, path, StubTokenizer())
+        dataset = TokenDataset(path)
+        for shuffle in (False, True):
+            seen = []
+            for batch in dataset.iter_batches(batch_size=4, shuffle=shuffle, window_batches=5):
+                lengths = batch["attention_mask"].sum(axis=1)
+                # Sorted by length within the window, so rows of a batch are close in length
+                self.assertLessEqual(lengths.max() - lengths.min(), 5)
+                self.assertEqual(batch["input_ids"].shape[1], lengths.max())
+                self.assertTrue((batch["input_ids"][batch["attention_mask"] == 0] == 0).all())
+                seen.extend(batch["rows"].tolist())
+            self.assertEqual(sorted(seen), list(range(60)))
+        subset = [batch["rows"].tolist() for batch in dataset.iter_batches(batch_size=8, rows=[5, 6, 7])]
+        self.assertEqual(sorted(sum(subset, [])), [5, 6, 7])
+
+    def test_repeat_runs_skip_tokenization(self):
+        tokenizer = StubTokenizer()
+        first = ensure_dataset(self.csv_path, "stub-model", tokenizer=tokenizer, root=self.root)
+        calls = tokenizer.calls
+        second = ensure_dataset(self.csv_path, "stub-model", tokenizer=tokenizer, root=self.root)
+        self.assertEqual(tokenizer.calls, calls)
+        self.assertEqual(first.path, second.path)
+
+        with open(self.csv_path, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow([60, "sms", "One more message arrived today", "legit"])
+        self.assertEqual(len(ensure_dataset(self.csv_path, "stub-model", tokenizer=tokenizer, root=self.root)), 61)
+        self.assertGreater(tokenizer.calls, calls)
+
+    def test_evaluate(self):
+        path = os.path.join(self.root, "dataset")
+        build_dataset(self.csv_path, path, StubTokenizer())
+        report = evaluate(TokenDataset(path), StubClassifier(), batch_size=8)
+        self.assertEqual(report["labelled"], 48)
+        self.assertEqual(report["unlabelled"], 12)
+        self.assertEqual(report["accuracy"], 1.0)
+        self.assertGreater(report["token_efficiency"], 0.8)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
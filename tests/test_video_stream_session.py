@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from models.video_deepfake_detector import VideoDeepfakeDetector, VideoStreamSession
+
+class ScriptedDetector:
+    """
+    Returns the scripted faces in turn and records the shape of every frame
+    it was asked about.
+    """
+    format_verdict = staticmethod(VideoDeepfakeDetector.format_verdict)
+
+    def __init__(self, faces):
+        self.faces = list(faces)
+        self.shapes = []
+
+    def detect_face(self, frame):
+        self.shapes.append(frame.shape[:2])
+        return self.faces.pop(0) if self.faces else {"is_real": True, "confidence": 0.9}
+
+def frame(value, size=64):
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+class TestVideoStreamSession(unittest.TestCase):
+    """
+    Unit tests for frame skipping and verdict smoothing in a video stream.
+    """
+
+    def test_near_duplicate_frames_are_skipped(self):
+        detector = ScriptedDetector([])
+        session = VideoStreamSession(detector, sample_every=1, window=1, diff_threshold=3.0)
+        session.process(frame(0))
+        self.assertIsNone(session.process(frame(1)))
+        session.process(frame(100))
+        self.assertEqual(len(detector.shapes), 2)
+        self.assertEqual((session.counters["duplicates_skipped"], session.counters["analyzed"]), (1, 2))
+
+    def test_still_scene_is_rechecked(self):
+        detector = ScriptedDetector([])
+        session = VideoStreamSession(detector, sample_every=1, window=1, refresh_every=3)
+        for _ in range(4):
+            session.process(frame(0))
+        self.assertEqual((session.counters["duplicates_skipped"], session.counters["analyzed"]), (2, 2))
+
+    def test_only_every_nth_changed_frame_is_analyzed(self):
+        session = VideoStreamSession(ScriptedDetector([]), sample_every=2, window=1)
+        for value in (0, 50, 100, 150, 200):
+            session.process(frame(value))
+        self.assertEqual((session.counters["sampling_skipped"], session.counters["analyzed"]), (2, 3))
+
+    def test_verdicts_are_smoothed_over_a_window(self):
+        faces = [{"is_real": is_real, "confidence": confidence}
+                 for is_real, confidence in [(True, 0.6), (False, 0.9), (False, 0.9), (True, 0.8), (True, 0.8), (True, 0.8)]]
+        session = VideoStreamSession(ScriptedDetector(faces), sample_every=1, window=3)
+        verdicts = [session.process(frame(value)) for value in range(0, 240, 40)]
+        self.assertEqual([verdict is not None for verdict in verdicts], [False, False, True, False, False, True])
+        first, second = verdicts[2], verdicts[5]
+        self.assertFalse(first["is_real"])
+        self.assertEqual((first["confidence"], first["window"]["real_ratio"]), (0.8, 0.33))
+        self.assertTrue(second["is_real"])
+        self.assertEqual(second["window"], {"faces": 3, "real_ratio": 1.0, "frames_seen": 6})
+        self.assertEqual(session.counters["verdicts"], 2)
+
+    def test_detection_is_cropped_around_the_last_face(self):
+        face = {"is_real": True, "confidence": 0.9, "facial_area": {"x": 40, "y": 40, "w": 20, "h": 20}}
+        detector = ScriptedDetector([face, face])
+        session = VideoStreamSession(detector, sample_every=1, window=5, crop_margin=0.3)
+        session.process(frame(0, size=100))
+        session.process(frame(100, size=100))
+        self.assertEqual(detector.shapes, [(100, 100), (32, 32)])
+        self.assertEqual(session.counters["crop_hits"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
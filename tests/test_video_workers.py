@@ -0,0 +1,88 @@
+import asyncio
+import os
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from pipeline.video_workers import VideoStream, VideoWorkerPool
+
+class GatedPool:
+    """
+    Stands in for VideoWorkerPool: one worker, and each frame is held until
+    the test releases it.
+    """
+    def __init__(self):
+        self.frames = []
+        self.gate = asyncio.Event()
+        self.released = []
+
+    def acquire(self):
+        return 0
+
+    def release(self, worker):
+        self.released.append(worker)
+
+    def submit(self, worker, fn, *args):
+        pass
+
+    async def run(self, worker, fn, stream_id, frame_bytes, options):
+        self.frames.append(frame_bytes)
+        await self.gate.wait()
+        self.gate.clear()
+        return {"type": "video_frame_analysis", "result": {"frame": frame_bytes},
+                "service_ms": 1.0, "decode_ms": 0.5, "session": {}}
+
+class TestVideoWorkers(unittest.TestCase):
+    """
+    Unit tests for the video worker pool and per-connection frame slot.
+    """
+
+    def test_newest_frame_replaces_one_the_worker_has_not_seen(self):
+        async def scenario():
+            pool = GatedPool()
+            stream = VideoStream(pool, mode="frame")
+            results = stream.results()
+            first = asyncio.create_task(results.__anext__())
+            stream.submit(b"1")
+            await asyncio.sleep(0.01)
+            stream.submit(b"2")
+            stream.submit(b"3")
+            pool.gate.set()
+            first_result = await first
+            second = asyncio.create_task(results.__anext__())
+            await asyncio.sleep(0.01)
+            pool.gate.set()
+            second_result = await second
+            stream.close()
+            return pool, stream, first_result, second_result
+
+        pool, stream, first, second = asyncio.run(scenario())
+        self.assertEqual(pool.frames, [b"1", b"3"])
+        self.assertEqual((first["result"]["frame"], second["result"]["frame"]), (b"1", b"3"))
+        self.assertEqual((stream.received, stream.processed, stream.dropped), (3, 2, 1))
+        self.assertEqual(second["stream_stats"]["dropped"], 1)
+        self.assertEqual(pool.released, [0])
+
+    def test_connections_go_to_the_least_busy_worker(self):
+        pool = VideoWorkerPool(workers=3, initializer=None)
+        try:
+            self.assertEqual(sorted(pool.acquire() for _ in range(3)), [0, 1, 2])
+            pool.release(1)
+            self.assertEqual(pool.acquire(), 1)
+            self.assertEqual(pool.connections, 3)
+        finally:
+            pool.shutdown()
+
+    def test_dead_worker_is_replaced(self):
+        async def scenario():
+            pool = VideoWorkerPool(workers=1, initializer=None)
+            worker = pool.acquire()
+            try:
+                with self.assertRaises(BrokenProcessPool):
+                    await pool.run(worker, os._exit, 1)
+                return await pool.run(worker, pow, 2, 3), pool.restarts
+            finally:
+                pool.shutdown()
+
+        self.assertEqual(asyncio.run(scenario()), (8, 1))
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -1,11 +1,34 @@
 # ui/app.py
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, UploadFile, File
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from alerts.alert_manager import ConnectionManager
-from pipeline.detection_pipeline import process_text_input, process_audio_input, process_video_frame
+from alerts.pubsub import AlertFilter
+from utils.result_cache import shared_cache
+from utils.metrics import metrics, http_request_seconds, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from utils.profiling import PROFILING_ENABLED, ProfilerBusyError, sample_stacks, profile_loop
+from pipeline.detection_pipeline import (process_text_input, process_audio_input, get_text_batching_stats, registry,
+                                         DetectionPipeline, PIPELINE_CHANNELS, session_store, audio_blobs,
+                                         campaign_index, text_cascade)
+from pipeline.model_registry import ModalityNotServedError
+from pipeline.admission import AdmissionController, SingleFlight, OverloadedError, ADMISSION_LIMITS
+from pipeline.video_workers import VideoStream, video_pool
+from typing import Optional
+import asyncio
+import hashlib
 import json
+import os
+import time
+import uuid
+
+# Set DETECTION_WARMUP=1 to load the served models right after startup
+# instead of on the first request.
+DETECTION_WARMUP = os.environ.get("DETECTION_WARMUP", "0") == "1"
+
+# Video models live in the worker processes (see pipeline/video_workers.py),
+# which load and warm them up on their own.
+IN_PROCESS_MODALITIES = [name for name in registry.modalities if name != "video"]
 
 app = FastAPI()
 
@@ -15,6 +38,98 @@ app.mount("/static", StaticFiles(directory="ui/static"), name="static")
 # Initialize the connection manager for alerts
 manager = ConnectionManager()
 
+# Combined text/sentiment/reputation analysis per channel; models still load
+# on first use (or at startup with DETECTION_WARMUP=1).
+detection_pipeline = DetectionPipeline(preload=False)
+
+# Per-endpoint concurrency limits and bounded queues (see pipeline/admission.py),
+# and coalescing of identical requests that are in flight together
+admission = {name: AdmissionController(name, **limits) for name, limits in ADMISSION_LIMITS.items()}
+request_flights = SingleFlight("requests")
+
+websocket_connections = metrics.gauge("detection_websocket_connections", "Open websocket connections.", ["endpoint"])
+_video_connections = websocket_connections.labels("video")
+_alert_connections = websocket_connections.labels("alerts")
+
+def collect_service_metrics():
+    """
+    Reads the counters the service already keeps (see /stats) at scrape time,
+    so none of them cost anything per request.
+    """
+    batching = get_text_batching_stats()
+    cache = shared_cache.stats()
+    alerts = manager.stats()
+    sessions = session_store.stats()
+    models = registry.metrics(IN_PROCESS_MODALITIES)
+    reputation = detection_pipeline.reputation_analyzer.stats()
+    yield "detection_text_queue_depth", "gauge", "Texts waiting for a classifier batch.", [({}, batching["queue_depth"])]
+    yield "detection_text_batches_total", "counter", "Classifier batches run.", [({}, batching["batches"])]
+    yield "detection_text_batch_errors_total", "counter", "Classifier batches that failed.", [({}, batching["errors"])]
+    yield "detection_cache_hits_total", "counter", "Cache hits by cache.", [
+        ({"cache": "result"}, cache["hits"]),
+        ({"cache": "reputation_email"}, reputation["email_cache"]["hits"]),
+        ({"cache": "reputation_phone"}, reputation["phone_cache"]["hits"]),
+    ]
+    yield "detection_cache_misses_total", "counter", "Cache misses by cache.", [
+        ({"cache": "result"}, cache["misses"]),
+        ({"cache": "reputation_email"}, reputation["email_cache"]["misses"]),
+        ({"cache": "reputation_phone"}, reputation["phone_cache"]["misses"]),
+    ]
+    yield "detection_cache_hit_ratio", "gauge", "Hits over lookups since startup.", [
+        ({"cache": name}, round(hits / (hits + misses), 4) if hits + misses else 0.0)
+        for name, hits, misses in (
+            ("result", cache["hits"], cache["misses"]),
+            ("reputation_email", reputation["email_cache"]["hits"], reputation["email_cache"]["misses"]),
+            ("reputation_phone", reputation["phone_cache"]["hits"], reputation["phone_cache"]["misses"]),
+        )
+    ]
+    yield "detection_cache_entries", "gauge", "Entries held in the result cache.", [({"cache": "result"}, cache["entries"])]
+    yield "detection_alert_clients", "gauge", "Alert subscribers in this process.", [({}, alerts["clients"])]
+    yield "detection_alert_queued", "gauge", "Alerts queued for subscribers.", [({}, alerts["queued"])]
+    yield "detection_alert_broadcasts_total", "counter", "Alerts published.", [({}, alerts["broadcasts"])]
+    yield "detection_alert_dropped_total", "counter", "Alerts dropped for slow subscribers (connected clients only).", [
+        ({}, alerts["dropped"])]
+    yield "detection_alert_overflow_disconnects_total", "counter", "Subscribers disconnected for falling behind.", [
+        ({}, alerts["overflow_disconnects"])]
+    yield "detection_video_worker_connections", "gauge", "Video streams assigned to worker processes.", [
+        ({}, video_pool.connections)]
+    yield "detection_sessions", "gauge", "Tracked sessions.", [({}, sessions["sessions"])]
+    yield "detection_session_memory_bytes", "gauge", "Approximate memory held by sessions.", [
+        ({}, int(sessions["approx_memory_mb"] * 1024 * 1024))]
+    yield "detection_session_evictions_total", "counter", "Sessions evicted for space.", [({}, sessions["evictions"])]
+    yield "detection_admission_active", "gauge", "Admitted requests running per endpoint.", [
+        ({"endpoint": name}, controller.active) for name, controller in admission.items()]
+    yield "detection_admission_waiting", "gauge", "Requests queued for admission per endpoint.", [
+        ({"endpoint": name}, controller.waiting) for name, controller in admission.items()]
+    if campaign_index is not None:
+        campaigns = campaign_index.stats()
+        yield "detection_campaigns", "gauge", "Live near-duplicate campaigns.", [({}, campaigns["campaigns"])]
+        yield "detection_campaign_messages_total", "counter", "Texts added to campaigns by outcome.", [
+            ({"outcome": "new"}, campaigns["observed"] - campaigns["matched"]),
+            ({"outcome": "matched"}, campaigns["matched"])]
+        yield "detection_campaign_verdicts_reused_total", "counter", "Texts answered with their campaign's verdict.", [
+            ({}, campaigns["verdicts_reused"])]
+    if text_cascade is not None:
+        cascade = text_cascade.stats()
+        yield "detection_text_cascade_texts_total", "counter", "Texts scored by the cascade by the stage that answered.", [
+            ({"stage": "fast_legit"}, cascade["answered_fast"]["legit"]),
+            ({"stage": "fast_scam"}, cascade["answered_fast"]["scam"]),
+            ({"stage": "transformer"}, cascade["escalated"]),
+            ({"stage": "audit"}, cascade["audited"])]
+        yield "detection_text_cascade_audit_agreements_total", "counter", \
+            "Audited fast answers the transformer agreed with.", [({}, cascade["audit_agreed"])]
+    if audio_blobs is not None:
+        blobs = audio_blobs.stats()
+        yield "detection_audio_blob_bytes", "gauge", "Bytes held in the audio blob store.", [({}, blobs["bytes"])]
+        yield "detection_audio_blob_results_total", "counter", "Memoized audio result lookups by outcome.", [
+            ({"outcome": "hit"}, blobs["result_hits"]), ({"outcome": "miss"}, blobs["result_misses"])]
+    yield "detection_model_loaded", "gauge", "1 once a modality's model is loaded.", [
+        ({"modality": name}, name in models["loaded"]) for name in IN_PROCESS_MODALITIES]
+    yield "detection_model_load_seconds", "gauge", "Time taken to load each model.", [
+        ({"modality": name}, seconds) for name, seconds in models["load_seconds"].items()]
+
+metrics.add_collector(collect_service_metrics)
+
 # --- HTML Frontend ---
 # Serve the main HTML page from a template file
 @app.get("/")
@@ -24,54 +139,304 @@ async def get():
 
 # --- API Endpoints ---
 
+# Paths whose admission is checked before the endpoint runs: FastAPI reads and
+# parses an upload before calling the endpoint, so a check there comes too late
+# to spare the server the body of a request that would be turned away.
+EARLY_ADMISSION_PATHS = {"/analyze/audio": "audio"}
+
+@app.middleware("http")
+async def reject_before_reading_body(request: Request, call_next):
+    endpoint = EARLY_ADMISSION_PATHS.get(request.url.path) if request.method == "POST" else None
+    if endpoint is not None:
+        try:
+            admission[endpoint].check()
+        except OverloadedError as e:
+            # Raised outside the routes, so the exception handlers do not see it
+            return await overloaded_handler(request, e)
+    return await call_next(request)
+
+# Added after reject_before_reading_body, so it wraps it and times rejections too
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # The route template keeps label values bounded (/sessions/{session_id}, not every id).
+    route = request.scope.get("route")
+    http_request_seconds.labels(request.method, route.path if route else "unmatched",
+                                response.status_code).observe(time.perf_counter() - started)
+    return response
+
+async def admitted(endpoint, key, compute, response):
+    """
+    Runs `compute()` under the endpoint's admission limits, unless an identical
+    request (same `key`) is already in flight, in which case its result is
+    shared. Queue and service time are reported in a Server-Timing header
+    and under "timing".
+
+    Raises:
+        OverloadedError: When the endpoint is saturated (answered with 429/503).
+    """
+    (result, timing), shared = await request_flights.run(key, lambda: admission[endpoint].run(compute))
+    timing = dict(timing, coalesced=shared)
+    response.headers["Server-Timing"] = f"queue;dur={timing['queue_ms']}, service;dur={timing['service_ms']}"
+    return result, timing
+
+async def publish_session_verdict(verdict):
+    # Session verdicts go out when the session's risk level changes, so
+    # subscribers can follow whole conversations with ?channel=session.
+    if verdict and verdict.get("changed"):
+        await manager.broadcast(dict(verdict, type="session_verdict", channel="session"))
+
 @app.post("/analyze/text")
-async def analyze_text_endpoint(data: dict):
+async def analyze_text_endpoint(data: dict, response: Response):
     text_content = data.get("text")
     if not text_content:
-        return {"error": "No text provided"}, 400
-    
-    result = await process_text_input(text_content)
-    await manager.broadcast(result)
-    return {"status": "Text analysis triggered", "details": result}
+        return JSONResponse(status_code=400, content={"error": "No text provided"})
+    use_cache = data.get("use_cache", True)
+    session_id = data.get("session_id")
+
+    async def analyze():
+        result = await process_text_input(text_content, use_cache=use_cache, session_id=session_id)
+        await manager.broadcast(result)
+        await publish_session_verdict(result.get("session"))
+        return result
+
+    # Coalesced duplicates get the first request's result and alert.
+    result, timing = await admitted("text", ("text", text_content, bool(use_cache), session_id), analyze, response)
+    return {"status": "Text analysis triggered", "details": result, "timing": timing}
 
 @app.post("/analyze/audio")
-async def analyze_audio_endpoint(file: UploadFile = File(...)):
+async def analyze_audio_endpoint(response: Response, file: UploadFile = File(...), session_id: Optional[str] = None):
+    # Uploads that could not even queue were turned away by reject_before_reading_body.
     audio_bytes = await file.read()
-    result = await process_audio_input(audio_bytes, file.filename)
-    await manager.broadcast(result)
-    return {"status": "Audio analysis triggered", "details": result}
+
+    async def publish(alert):
+        if session_id:
+            alert["session_id"] = session_id
+        await manager.broadcast(alert)
+        await publish_session_verdict(alert.get("session"))
+
+    async def analyze():
+        # Partial spoof/scam verdicts are pushed to alert subscribers as windows finish
+        result = await process_audio_input(audio_bytes, file.filename, on_partial=publish, session_id=session_id,
+                                           digest=digest)
+        await manager.broadcast(result)
+        return result
+
+    digest = hashlib.sha256(audio_bytes).hexdigest()
+    key = ("audio", digest, session_id)
+    result, timing = await admitted("audio", key, analyze, response)
+    return {"status": "Audio analysis triggered", "details": result, "timing": timing}
+
+@app.post("/analyze/message/{channel}")
+async def analyze_message_endpoint(channel: str, data: dict, response: Response):
+    # sms: {"text", "sender"}; email: {"sender_email", "subject", "body"};
+    # call/video: {"transcript", "caller_number"}
+    if channel not in PIPELINE_CHANNELS:
+        return JSONResponse(status_code=400, content={"error": f"Unknown channel '{channel}', expected one of {list(PIPELINE_CHANNELS)}"})
+
+    # Messages are grouped into sessions by conversation id, or else by sender.
+    session_id = data.get("session_id") or data.get("sender_email") or data.get("sender") or data.get("caller_number")
+
+    async def analyze():
+        result = await detection_pipeline.arun(data, channel, session_id=session_id)
+        await manager.broadcast(dict(result, type="message_analysis"))
+        await publish_session_verdict(result.get("session"))
+        return result
+
+    key = ("message", channel, json.dumps(data, sort_keys=True, default=str))
+    result, timing = await admitted("message", key, analyze, response)
+    return {"status": "Message analysis triggered", "details": result, "timing": timing}
+
+@app.exception_handler(ModalityNotServedError)
+async def modality_not_served_handler(request: Request, exc: ModalityNotServedError):
+    return JSONResponse(status_code=503, content={"error": str(exc)})
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    return JSONResponse(status_code=exc.status_code, headers={"Retry-After": str(exc.retry_after)},
+                        content={"error": str(exc), "reason": exc.reason, "retry_after_seconds": exc.retry_after})
+
+@app.on_event("startup")
+async def start_alert_pubsub():
+    await manager.start()
+
+@app.on_event("startup")
+async def restore_sessions():
+    session_store.restore()
+    if campaign_index is not None:
+        campaign_index.restore()
+
+@app.on_event("startup")
+async def warm_up_models():
+    if DETECTION_WARMUP:
+        # Runs in the background so the server accepts connections meanwhile; /ready reports progress.
+        asyncio.get_running_loop().run_in_executor(None, registry.warm_up, IN_PROCESS_MODALITIES)
+        if text_cascade is not None and registry.is_enabled("text"):
+            asyncio.get_running_loop().run_in_executor(None, text_cascade.warm_up)
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    video_pool.shutdown()
+    await manager.close()
+    session_store.snapshot()
+    if campaign_index is not None:
+        campaign_index.snapshot()
+
+@app.get("/ready")
+async def ready_endpoint():
+    metrics = registry.metrics(IN_PROCESS_MODALITIES)
+    return JSONResponse(status_code=200 if metrics["ready"] else 503, content=metrics)
+
+@app.get("/stats")
+async def stats_endpoint():
+    return {
+        "text_batching": get_text_batching_stats(),
+        "result_cache": shared_cache.stats(),
+        "models": registry.metrics(IN_PROCESS_MODALITIES),
+        "alerts": manager.stats(),
+        "sessions": session_store.stats(),
+        "admission": {name: controller.stats() for name, controller in admission.items()},
+        "coalescing": request_flights.stats(),
+        "campaigns": campaign_index.stats() if campaign_index is not None else None,
+        "text_cascade": text_cascade.stats() if text_cascade is not None else None,
+        "audio_blobs": audio_blobs.stats() if audio_blobs is not None else None
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/debug/profile")
+async def profile_endpoint(seconds: float = 10.0, mode: str = "sample", interval_ms: float = 5.0):
+    # mode=sample: collapsed stacks of every thread (flamegraph.pl, speedscope);
+    # mode=cprofile: pstats dump of the event loop thread (pstats, snakeviz).
+    if not PROFILING_ENABLED:
+        return JSONResponse(status_code=404, content={"error": "Profiling is disabled; set PROFILING_ENABLED=1"})
+    if mode not in ("sample", "cprofile"):
+        return JSONResponse(status_code=400, content={"error": "mode must be 'sample' or 'cprofile'"})
+    try:
+        if mode == "cprofile":
+            stats = await profile_loop(seconds)
+            return Response(stats, media_type="application/octet-stream",
+                            headers={"Content-Disposition": 'attachment; filename="detection.prof"'})
+        loop = asyncio.get_running_loop()
+        stacks = await loop.run_in_executor(None, sample_stacks, seconds, max(0.001, interval_ms / 1000))
+        return PlainTextResponse(stacks)
+    except ProfilerBusyError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+
+@app.get("/sessions/{session_id}")
+async def session_endpoint(session_id: str):
+    verdict = session_store.verdict(session_id)
+    if verdict is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown or expired session '{session_id}'"})
+    return verdict
+
+@app.get("/campaigns")
+async def campaigns_endpoint(limit: int = 20, min_size: int = 2):
+    # The busiest campaigns of near-duplicate texts, by messages in the last hour
+    if campaign_index is None:
+        return JSONResponse(status_code=404, content={"error": "Campaign clustering is disabled; set CAMPAIGN_INDEX=1"})
+    return {"campaigns": campaign_index.top(limit, min_size), "stats": campaign_index.stats()}
+
+@app.get("/campaigns/{campaign_id}")
+async def campaign_endpoint(campaign_id: str):
+    campaign = campaign_index.campaign(campaign_id) if campaign_index is not None else None
+    if campaign is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown or expired campaign '{campaign_id}'"})
+    return campaign
 
 # --- WebSocket Endpoint for Real-Time Video ---
 
 @app.websocket("/ws/video")
 async def websocket_video_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
-    try:
-        while True:
-            # Receive video frame as bytes from the client
-            frame_bytes = await websocket.receive_bytes()
-            
-            # Process the frame
-            result = process_video_frame(frame_bytes)
-            
-            # Broadcast the result to all clients
+    if not registry.is_enabled("video"):
+        # 1013: try again later (on a worker that serves video)
+        await websocket.close(code=1013)
+        return
+    # The streaming client only hears about its own session; /ws/alerts
+    # subscribers can follow it with ?session=<id>.
+    session_id = websocket.query_params.get("session") or uuid.uuid4().hex
+    await manager.connect(websocket, AlertFilter(sessions=[session_id]))
+    # Frames are analyzed in a worker process; only the newest waiting frame is kept.
+    stream = VideoStream(video_pool)
+
+    async def forward_results():
+        async for result in stream.results():
+            # Publish the result to the subscribed clients
             if result["result"]["face_detected"]:
+                result["session_id"] = session_id
+                result["session"] = session_store.observe(session_id, result)
                 await manager.broadcast(result)
+                await publish_session_verdict(result["session"])
+
+    forwarder = asyncio.create_task(forward_results())
+    _video_connections.inc()
+    try:
+        await websocket.send_json({"type": "session", "session_id": session_id})
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes") is not None:
+                # A video frame: JPEG, or raw pixels behind an 8-byte header
+                stream.submit(message["bytes"])
+            elif message.get("text"):
+                # Ingestion negotiation, e.g. {"type": "ingest", "jpeg_reduce": 2, "mode": "session"}
+                try:
+                    request = json.loads(message["text"])
+                    if not isinstance(request, dict) or request.get("type") != "ingest":
+                        raise ValueError('Text messages must be ingestion requests: {"type": "ingest", ...}')
+                    applied = stream.configure(jpeg_reduce=request.get("jpeg_reduce"), mode=request.get("mode"))
+                    await websocket.send_json({"type": "ingest_config", "raw_frames": True, **applied})
+                except (TypeError, ValueError) as e:
+                    await websocket.send_json({"type": "ingest_config", "error": str(e)})
 
     except WebSocketDisconnect:
+        print(f"Client disconnected from video stream. Stats: {stream.stats()}")
+    finally:
+        # Also on errors, or the client's alert queue and writer would stay registered.
         manager.disconnect(websocket)
-        print("Client disconnected from video stream.")
+        _video_connections.dec()
+        stream.close()
+        forwarder.cancel()
 
 # --- WebSocket Endpoint for General Alerts ---
 
 @app.websocket("/ws/alerts")
 async def websocket_alerts_endpoint(websocket: WebSocket):
-    # This endpoint is just for receiving broadcasted alerts from text/audio analysis
-    await manager.connect(websocket)
+    # Receives broadcasted alerts, optionally filtered, e.g.
+    # /ws/alerts?channel=text,audio&min_risk=HIGH&session=<id>
+    # With batch=1, alerts that queue up are sent together as a JSON array.
+    try:
+        alert_filter = AlertFilter.from_params(websocket.query_params)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    await manager.connect(websocket, alert_filter, batch=websocket.query_params.get("batch") in ("1", "true"))
+    _alert_connections.inc()
     try:
-        # Keep the connection alive
         while True:
-            await websocket.receive_text()
+            # {"type": "subscribe", "channel": ..., "risk": ..., "min_risk": ..., "session": ...}
+            # replaces the filter; anything else just keeps the connection alive.
+            message = await websocket.receive_text()
+            try:
+                request = json.loads(message)
+            except ValueError:
+                continue
+            if not isinstance(request, dict) or request.get("type") != "subscribe":
+                continue
+            try:
+                alert_filter = AlertFilter.from_params(request)
+            except ValueError as e:
+                await websocket.send_json({"type": "subscribed", "error": str(e)})
+                continue
+            manager.set_filter(websocket, alert_filter)
+            await websocket.send_json({"type": "subscribed", "filter": alert_filter.describe()})
     except WebSocketDisconnect:
+        print("Client disconnected from alerts.")
+    finally:
         manager.disconnect(websocket)
-        print("Client disconnected from alerts.")
\ No newline at end of file
+        _alert_connections.dec()
\ No newline at end of file
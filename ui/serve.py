@@ -0,0 +1,255 @@
+# ui/serve.py
+
+"""
+Pre-fork serving mode: one supervisor loads the models, N workers share them.
+
+`uvicorn --workers N` starts N independent processes that each load their own
+copy of the transformers and Whisper weights, so memory grows N-fold. Here the
+supervisor binds the socket, imports the app and loads the in-process models
+once, then forks the workers. Tensor storage is never written after loading
+(and reference counting only touches object headers, not the storage
+buffers), so the weight pages stay shared copy-on-write; gc.freeze() keeps
+the collector from touching the preloaded objects in the workers too. Each
+worker runs its own event loop on the shared socket and the kernel spreads
+connections between them. A worker that dies is restarted.
+
+Each worker gets `--threads` (default: cores // workers) intra-op threads for
+torch, OpenMP/BLAS and OpenCV, so N workers do not oversubscribe the cores.
+Models are warmed up (first inference, which starts the thread pools) in each
+worker after the fork, because thread pools do not survive fork.
+
+Video frames are analyzed in spawned processes (pipeline/video_workers.py),
+since TensorFlow/DeepFace cannot be used across a fork; VIDEO_WORKERS is split
+between the HTTP workers so the total number of detector copies stays the
+same as with one worker. With more than one worker, alerts go through the
+Unix-socket broker (ALERT_PUBSUB=unix) so subscribers on any worker get all of
+them.
+
+Everything else a request leaves behind stays in the worker that served it:
+the session store, the campaign index, the result cache and the admission
+limits (so the server admits up to `workers` times each ADMISSION_* limit).
+Connections are not routed by session, so with more than one worker a
+session's audio uploads and GET /session/{id} can land on workers that never
+saw its earlier items; a /ws/video stream stays on one worker and is not
+affected. Put a proxy with session affinity in front (e.g. hashing the
+session_id) or run one worker where those verdicts matter. Each worker
+snapshots and restores its own files, SESSION_SNAPSHOT_PATH and
+CAMPAIGN_SNAPSHOT_PATH with ".worker<index>" before the extension, so workers
+do not overwrite each other's state; a restarted worker reads back its own.
+
+Usage:
+    python -m ui.serve --workers 4 --port 8000
+    python -m ui.serve --workers 4 --threads 2 --no-preload   # per-worker loading, like uvicorn --workers
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", str(os.cpu_count() or 1)))
+SERVE_HOST = os.environ.get("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.environ.get("SERVE_PORT", "8000"))
+
+# Read by torch (OpenMP), MKL, OpenBLAS, numexpr, TensorFlow and
+# models/inference_backend.py when they are first imported
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+                   "TF_NUM_INTRAOP_THREADS", "INFERENCE_THREADS", "VIDEO_WORKER_THREADS")
+
+# A worker that exits sooner than this after starting is restarted with a growing delay
+MIN_WORKER_UPTIME_SECONDS = 10.0
+MAX_RESTART_DELAY_SECONDS = 30.0
+
+def configure_environment(workers: int, threads: int, explicit_threads=False):
+    """
+    Sets the thread and transport settings read at import time. Must run
+    before the app (and with it torch, cv2 or TensorFlow) is imported.
+    Variables already set are kept unless `explicit_threads`.
+    """
+    for name in THREAD_ENV_VARS:
+        if explicit_threads:
+            os.environ[name] = str(threads)
+        else:
+            os.environ.setdefault(name, str(threads))
+    total_video_workers = int(os.environ.get("VIDEO_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    os.environ["VIDEO_WORKERS"] = str(max(1, total_video_workers // workers))
+    if workers > 1:
+        os.environ.setdefault("ALERT_PUBSUB", "unix")
+    # Models are already loaded in the workers, so warming up is one inference.
+    os.environ.setdefault("DETECTION_WARMUP", "1")
+
+def limit_threads(threads: int):
+    """
+    Applies the per-worker thread count to libraries that are already loaded.
+    """
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+def worker_snapshot_path(path: str, index: int) -> str:
+    """
+    Worker `index`'s own copy of a snapshot path ("" stays "").
+    """
+    if not path:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.worker{index}{extension}"
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """
+    Forks `workers` children running `target(index)` and keeps them running
+    until SIGINT/SIGTERM, which is passed on to every child.
+    """
+    def __init__(self, target, workers):
+        self.target = target
+        self.workers = workers
+        self.children = {}          # pid -> (index, started_at)
+        self.restart_delays = {}    # index -> seconds
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                self.target(index)
+                code = 0
+            finally:
+                os._exit(code)
+        self.children[pid] = (index, time.monotonic())
+        return pid
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+        print(f"Supervisor {os.getpid()} started {self.workers} workers: {sorted(self.children)}")
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index, started_at = self.children.pop(pid, (None, 0.0))
+            if index is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - started_at < MIN_WORKER_UPTIME_SECONDS:
+                delay = min(MAX_RESTART_DELAY_SECONDS, max(1.0, 2 * self.restart_delays.get(index, 0.5)))
+            else:
+                delay = 0.0
+            self.restart_delays[index] = delay
+            print(f"Worker {index} (pid {pid}) exited with code {code}; restarting in {delay:.0f}s.")
+            time.sleep(delay)
+            if not self.stopping:
+                self.spawn(index)
+
+
+def serve(workers=SERVE_WORKERS, host=SERVE_HOST, port=SERVE_PORT, threads=None, preload=True, log_level="info",
+          before_fork=None):
+    """
+    Runs the app in `workers` forked processes until interrupted.
+
+    Args:
+        workers (int): Worker processes.
+        host (str): Listen address.
+        port (int): Listen port.
+        threads (int): Intra-op threads per worker; default cores // workers.
+        preload (bool): Load the models in the supervisor so workers share them.
+            False loads them in every worker, as `uvicorn --workers` does.
+        log_level (str): uvicorn log level.
+        before_fork (callable): Called with the app module after preloading,
+            e.g. to register stub models in benchmarks.
+    """
+    workers = max(1, int(workers))
+    explicit_threads = threads is not None
+    threads = max(1, int(threads)) if explicit_threads else max(1, (os.cpu_count() or 1) // workers)
+    configure_environment(workers, threads, explicit_threads)
+
+    import uvicorn
+    from ui import app as app_module
+
+    sock = bind_socket(host, port)
+    if before_fork is not None:
+        before_fork(app_module)
+    if preload:
+        started = time.perf_counter()
+        for name in app_module.IN_PROCESS_MODALITIES:
+            model = app_module.registry.get(name)
+            # Models that load lazily (TextClassifier without a saved model) are
+            # loaded now, but not run: inference would start thread pools.
+            if callable(getattr(model, "load", None)):
+                model.load()
+        if app_module.text_cascade is not None and app_module.registry.is_enabled("text"):
+            app_module.text_cascade.warm_up()
+        print(f"Loaded {app_module.IN_PROCESS_MODALITIES} in {time.perf_counter() - started:.1f}s; "
+              f"forking {workers} workers with {threads} threads each.")
+    limit_threads(threads)
+    # Preloaded objects move to a generation the collector never scans, so the
+    # workers do not write to (and thereby copy) their pages.
+    gc.collect()
+    gc.freeze()
+
+    if workers > 1:
+        print("Sessions, campaigns, the result cache and admission limits are kept per worker; "
+              "route clients by session_id if they span requests.")
+
+    def run_worker(index):
+        limit_threads(threads)
+        os.environ["SERVE_WORKER_INDEX"] = str(index)
+        if workers > 1:
+            # Restored and written at the worker's startup and shutdown (ui/app.py)
+            app_module.session_store.snapshot_path = worker_snapshot_path(app_module.session_store.snapshot_path, index)
+            if app_module.campaign_index is not None:
+                app_module.campaign_index.snapshot_path = worker_snapshot_path(app_module.campaign_index.snapshot_path,
+                                                                               index)
+        server = uvicorn.Server(uvicorn.Config(app_module.app, log_level=log_level))
+        server.run(sockets=[sock])
+
+    try:
+        Supervisor(run_worker, workers).run()
+    finally:
+        sock.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="Worker processes (default: CPU count).")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads per worker (default: cores // workers).")
+    parser.add_argument("--no-preload", action="store_true", help="Load the models in each worker instead of sharing them.")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    serve(workers=args.workers, host=args.host, port=args.port, threads=args.threads, preload=not args.no_preload,
+          log_level=args.log_level)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,211 @@
+# utils/blob_store.py
+
+"""
+A content-addressed store for uploaded audio.
+
+Each payload is stored once under its SHA-256 digest, in a two-level sharded
+directory (ab/cd/abcd...), written to a temporary file and renamed into place
+so readers never see a partial blob and concurrent uploads of the same clip
+cannot clobber each other. A small SQLite index next to the blobs records
+sizes and last use, for LRU garbage collection under a byte quota, and
+memoizes analysis results per blob, so a clip replayed by a whole campaign
+is analyzed once.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+AUDIO_BLOB_STORE = os.environ.get("AUDIO_BLOB_STORE", "1") == "1"
+AUDIO_BLOB_DIR = os.environ.get("AUDIO_BLOB_DIR", "data/audio/blobs")
+AUDIO_BLOB_MAX_MB = float(os.environ.get("AUDIO_BLOB_MAX_MB", "2048"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used);
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (digest, kind)
+);
+"""
+
+def blob_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """
+    Blobs on disk plus an SQLite index of blobs and memoized results.
+
+    All methods are synchronous and thread-safe; callers on the event loop run
+    them in an executor. Results are keyed by (digest, kind), where kind names
+    the analysis and should change whenever its model does.
+    """
+    def __init__(self, root=AUDIO_BLOB_DIR, max_bytes=int(AUDIO_BLOB_MAX_MB * 1024 * 1024)):
+        """
+        Args:
+            root (str): Directory holding the shards and index.sqlite3.
+            max_bytes (int): Quota for blob contents; least recently used blobs
+                (and their results) are deleted past it.
+        """
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._db = None
+        self.total_bytes = 0
+        self.writes = 0
+        self.deduplicated = 0
+        self.result_hits = 0
+        self.result_misses = 0
+        self.collected = 0
+
+    def _connect(self):
+        # Opened on first use, so importing the pipeline creates no files.
+        if self._db is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), check_same_thread=False,
+                                       isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+            self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        return self._db
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def __contains__(self, digest):
+        with self._lock:
+            return self._connect().execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def put(self, data: bytes, digest=None) -> str:
+        """
+        Stores `data` unless a blob with the same digest exists, and marks it used.
+
+        Returns:
+            str: The SHA-256 hex digest.
+        """
+        digest = digest or blob_digest(data)
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            path = self.path_for(digest)
+            if db.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (now, digest)).rowcount and \
+                    os.path.exists(path):
+                self.deduplicated += 1
+                return digest
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".incoming-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            previous = db.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            db.execute("INSERT OR REPLACE INTO blobs (digest, size, created_at, last_used) VALUES (?, ?, ?, ?)",
+                       (digest, len(data), now, now))
+            self.total_bytes += len(data) - (previous[0] if previous else 0)
+            self.writes += 1
+            if self.total_bytes > self.max_bytes:
+                self._collect(keep=digest)
+        return digest
+
+    def get(self, digest: str):
+        """
+        Returns the blob's bytes, or None if it is not stored.
+        """
+        try:
+            with open(self.path_for(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get_result(self, digest: str, kind: str):
+        """
+        Returns the memoized `kind` result for a blob, or None. A hit counts as
+        a use of the blob for garbage collection.
+        """
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT value FROM results WHERE digest = ? AND kind = ?", (digest, kind)).fetchone()
+            if row is None:
+                self.result_misses += 1
+                return None
+            self.result_hits += 1
+            db.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (time.time(), digest))
+        return json.loads(row[0])
+
+    def set_result(self, digest: str, kind: str, value):
+        """
+        Memoizes a JSON-serializable result for a stored blob.
+        """
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO results (digest, kind, value, created_at) VALUES (?, ?, ?, ?)",
+                (digest, kind, json.dumps(value), time.time()))
+
+    def _collect(self, keep=None):
+        # Oldest first until under quota; `keep` (the blob just written) is spared.
+        db = self._db
+        for digest, size in db.execute("SELECT digest, size FROM blobs ORDER BY last_used").fetchall():
+            if self.total_bytes <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.unlink(self.path_for(digest))
+            except FileNotFoundError:
+                pass
+            db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            db.execute("DELETE FROM results WHERE digest = ?", (digest,))
+            self.total_bytes -= size
+            self.collected += 1
+
+    def collect(self) -> int:
+        """
+        Deletes least recently used blobs until the store fits its quota.
+
+        Returns:
+            int: Blobs deleted.
+        """
+        with self._lock:
+            self._connect()
+            before = self.collected
+            self._collect()
+            return self.collected - before
+
+    def stats(self) -> dict:
+        with self._lock:
+            blobs = self._connect().execute("SELECT COUNT(*) FROM blobs").fetchone()[0] if self._db else 0
+            lookups = self.result_hits + self.result_misses
+            return {
+                "root": self.root,
+                "blobs": blobs,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "writes": self.writes,
+                "deduplicated": self.deduplicated,
+                "result_hits": self.result_hits,
+                "result_misses": self.result_misses,
+                "result_hit_ratio": round(self.result_hits / lookups, 4) if lookups else 0.0,
+                "collected": self.collected,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
\ No newline at end of file
@@ -0,0 +1,164 @@
+# utils/domain_index.py
+
+import os
+import threading
+import time
+
+def normalize_domain(domain: str) -> str:
+    """
+    Lowercases a domain and drops surrounding whitespace and a trailing dot.
+    Non-ASCII domains are converted to their IDNA (punycode) form, the form
+    published blocklists use.
+    """
+    domain = domain.strip().lower().rstrip(".")
+    if not domain.isascii():
+        try:
+            domain = domain.encode("idna").decode("ascii")
+        except UnicodeError:
+            pass
+    return domain
+
+def load_domain_list(path):
+    """
+    Reads a domain list: one domain per line. Blank lines and lines starting
+    with '#' are ignored, and "*." / "." prefixes are stripped (the entry
+    covers its subdomains either way).
+
+    Returns:
+        set: The normalized domains.
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    domains = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+        if line.isascii():
+            domain = line.lower().lstrip("*.").rstrip(".")
+        else:
+            domain = normalize_domain(line.lstrip("*."))
+        if domain:
+            domains.add(domain)
+    return domains
+
+
+class DomainSuffixIndex:
+    """
+    A set of domains matched on label boundaries: listing "mailinator.com"
+    also matches "mx.mailinator.com", but not "notmailinator.com".
+
+    The domains are held in one frozenset, so a lookup is a few hash probes
+    (one per label of the queried domain) whatever the size of the list.
+    A list loaded from a file can be reloaded while the index is in use; the
+    new set is built aside and swapped in, so concurrent lookups see either
+    the old list or the new one. Until the file exists, the index holds the
+    `domains` it was given (by default none).
+    """
+    def __init__(self, domains=(), path=None, check_interval=60.0):
+        """
+        Args:
+            domains (iterable): Domains to index when no `path` is given, or
+                while the file at `path` does not exist yet.
+            path (str): A domain list file (see `load_domain_list`).
+            check_interval (float): Seconds between checks of the file for changes
+                in `refresh`. 0 checks on every call.
+        """
+        self.path = path
+        self.check_interval = float(check_interval)
+        self._domains = frozenset()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.load_seconds = 0.0
+        self.reloads = 0
+        self.replace(domains)
+        self._fallback = self._domains
+        if path:
+            self.reload(force=True)
+
+    def __len__(self):
+        return len(self._domains)
+
+    def __contains__(self, domain):
+        return self.match(domain) is not None
+
+    def replace(self, domains):
+        """
+        Swaps in a new set of domains.
+        """
+        self._domains = frozenset(filter(None, map(normalize_domain, domains)))
+        self.loaded_at = time.time()
+
+    def reload(self, force=False) -> bool:
+        """
+        Re-reads `path` if it changed since the last load (or always, with `force`).
+        A missing file that was never loaded leaves the fallback `domains` in
+        place; one that disappears after loading raises and keeps the last list.
+
+        Returns:
+            bool: True if the list was reloaded.
+        """
+        if not self.path:
+            return False
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                if self._mtime is not None:
+                    raise
+                if force:
+                    print(f"Warning: domain list {self.path} not found; "
+                          f"using {len(self._fallback)} built-in domains until it appears.")
+                self._domains = self._fallback
+                return False
+            if not force and mtime == self._mtime:
+                return False
+            started = time.perf_counter()
+            domains = frozenset(load_domain_list(self.path))
+            self._domains = domains
+            self._mtime = mtime
+            self.loaded_at = time.time()
+            self.load_seconds = time.perf_counter() - started
+            self.reloads += 1
+        print(f"Loaded {len(domains)} domains from {self.path} in {self.load_seconds * 1000:.0f} ms.")
+        return True
+
+    def refresh(self) -> bool:
+        """
+        `reload()`, at most once per `check_interval`. Cheap enough to call per request.
+        """
+        if not self.path or time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        try:
+            return self.reload()
+        except OSError as e:
+            print(f"Could not reload domain list {self.path}: {e!r}")
+            return False
+
+    def match(self, domain: str):
+        """
+        Returns the listed domain that `domain` equals or is a subdomain of,
+        or None. `domain` is expected to be normalized (see `normalize_domain`).
+        """
+        domains = self._domains
+        if domain in domains:
+            return domain
+        dot = domain.find(".")
+        while dot != -1:
+            suffix = domain[dot + 1:]
+            if suffix in domains:
+                return suffix
+            dot = domain.find(".", dot + 1)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "domains": len(self._domains),
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_ms": round(self.load_seconds * 1000, 1),
+            "reloads": self.reloads,
+        }
\ No newline at end of file
@@ -2,6 +2,25 @@
 
 from huggingface_hub import hf_hub_download
 import os
+import requests
+
+# Community-maintained blocklist of disposable email domains, one per line
+DISPOSABLE_DOMAINS_URL = "https://raw.githubusercontent.com/disposable-email-domains/disposable-email-domains/main/disposable_email_blocklist.conf"
+
+def download_disposable_domains(path="data/reputation/disposable_domains.txt", url=DISPOSABLE_DOMAINS_URL):
+    """
+    Downloads a disposable-domain list for ReputationAnalyzer (point
+    DISPOSABLE_DOMAINS_PATH at it). The file is replaced atomically, so a
+    running analyzer reloading it never reads a partial list.
+    """
+    print(f"Downloading disposable domain list from {url}...")
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(response.text)
+    os.replace(path + ".tmp", path)
+    print(f"Saved {len(response.text.splitlines())} lines to {path}.")
 
 def download_all_models():
     """
@@ -26,6 +45,9 @@ def download_all_models():
     hf_hub_download(repo_id=audio_model_name, filename="preprocessor_config.json")
     print(f"Successfully downloaded {audio_model_name}.")
     
+    print()
+    download_disposable_domains()
+
     print("\n--- All assets downloaded successfully! ---")
     print("Note: The 'deepface' library will download its models on first use.")
 
@@ -0,0 +1,260 @@
+# utils/phrase_matcher.py
+
+import hashlib
+import re
+from collections import deque, namedtuple
+
+# One phrase occurrence; `start`/`end` are offsets into the original text.
+PhraseMatch = namedtuple("PhraseMatch", ["start", "end", "phrase", "payload"])
+
+def _fold(text: str) -> str:
+    """
+    Lowercases `text` without changing its length, so offsets found in the
+    folded copy are valid in the original.
+    """
+    folded = text.lower()
+    if len(folded) != len(text):
+        # A few characters (e.g. 'İ') expand when lowercased; keep one char each.
+        folded = "".join(ch.lower()[0] for ch in text)
+    return folded
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+# Runs of word characters; for str patterns `\w` is exactly `_is_word_char`.
+_WORDS = re.compile(r"\w+")
+
+def load_lexicon(path):
+    """
+    Reads a lexicon file: one phrase per line, optionally followed by a tab and
+    a category. Blank lines and lines starting with '#' are ignored.
+
+    Returns:
+        list: (phrase, category) tuples; category is None when not given.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            phrase, _, category = line.partition("\t")
+            entries.append((phrase.strip(), category.strip() or None))
+    return entries
+
+
+class PhraseMatcher:
+    """
+    Case-insensitive multi-phrase matcher built on an Aho–Corasick automaton.
+
+    All phrases are compiled into a single trie with failure links, so a text
+    is scanned in one left-to-right pass whose cost depends on the text length
+    and the number of matches, not on how many phrases are loaded. Each match
+    carries its character offsets so callers can highlight it.
+    """
+    def __init__(self, phrases=(), whole_words=False):
+        """
+        Args:
+            phrases (iterable): Phrases, or (phrase, payload) tuples, to compile.
+            whole_words (bool): Only report matches bounded by non-word characters,
+                like the regex `\\b` anchor.
+        """
+        self.whole_words = whole_words
+        self._phrases = []
+        self._payloads = []
+        self._index = {}
+        self._built = False
+        for item in phrases:
+            if isinstance(item, tuple):
+                self.add(*item)
+            else:
+                self.add(item)
+        self.build()
+
+    @classmethod
+    def from_lexicon(cls, path, whole_words=False, category=None):
+        """
+        Builds a matcher from a lexicon file (see `load_lexicon`). The category of
+        each line becomes the payload of its phrase. If `category` is given, only
+        lines of that category are loaded.
+        """
+        entries = load_lexicon(path)
+        if category is not None:
+            entries = [entry for entry in entries if entry[1] == category]
+        return cls(entries, whole_words=whole_words)
+
+    def add(self, phrase: str, payload=None):
+        """
+        Adds a phrase; `payload` defaults to the phrase itself. Call `build()`
+        afterwards (the constructor and `extend` do this for you).
+        """
+        phrase = _fold(phrase.strip())
+        if not phrase:
+            return
+        if payload is None:
+            payload = phrase
+        if phrase in self._index:
+            self._payloads[self._index[phrase]] = payload
+            return
+        self._index[phrase] = len(self._phrases)
+        self._phrases.append(phrase)
+        self._payloads.append(payload)
+        self._built = False
+
+    def extend(self, phrases):
+        for item in phrases:
+            if isinstance(item, tuple):
+                self.add(*item)
+            else:
+                self.add(item)
+        self.build()
+
+    def build(self):
+        """
+        Compiles the trie and its failure/output links.
+        """
+        goto = [{}]
+        outputs = [[]]
+        for phrase_id, phrase in enumerate(self._phrases):
+            state = 0
+            for ch in phrase:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(phrase_id)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(ch, 0)
+                # Inherit the phrases that end at the fallback state (shorter suffixes).
+                outputs[next_state].extend(outputs[fail[next_state]])
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+        self._lengths = [len(phrase) for phrase in self._phrases]
+        self._alphabet = frozenset(ch for node in goto for ch in node)
+        # With whole-word matching, a text can only contain a phrase if it has the
+        # phrase's first word as a whole word. None when that does not hold.
+        first_words = [_WORDS.match(phrase) for phrase in self._phrases]
+        self._first_words = None
+        if self.whole_words and all(first_words):
+            self._first_words = frozenset(match.group() for match in first_words)
+        self._built = True
+
+    @property
+    def phrases(self) -> list:
+        return list(self._phrases)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        A short hash of the compiled phrase set, for use in cache keys.
+        """
+        digest = hashlib.sha1("\n".join(sorted(self._phrases)).encode("utf-8")).hexdigest()
+        return digest[:12]
+
+    def __len__(self):
+        return len(self._phrases)
+
+    def finditer(self, text: str, overlapping=True):
+        """
+        Yields every phrase occurrence in `text` as a `PhraseMatch`, ordered by end offset.
+
+        Args:
+            text (str): The text to scan.
+            overlapping (bool): If False, keep only the leftmost-longest
+                non-overlapping matches (the way a regex alternation scans).
+        """
+        if not self._built:
+            self.build()
+        if not text or not self._phrases:
+            return iter(())
+        matches = self._scan(text)
+        if not overlapping:
+            matches = self._leftmost_longest(matches)
+        return iter(matches)
+
+    def findall(self, text: str, overlapping=True) -> list:
+        return list(self.finditer(text, overlapping))
+
+    def findall_batch(self, texts, overlapping=True) -> list:
+        """
+        Returns `findall(text, overlapping)` for each text.
+
+        For whole-word matchers, texts that do not contain the first word of
+        any phrase are ruled out with a set check and never scanned.
+        """
+        if not self._built:
+            self.build()
+        if self._first_words is None:
+            return [self.findall(text, overlapping) for text in texts]
+        first_words = self._first_words
+        return [
+            self.findall(text, overlapping) if text and not first_words.isdisjoint(_WORDS.findall(_fold(text))) else []
+            for text in texts
+        ]
+
+    def payloads_in(self, text: str) -> list:
+        """
+        Returns the unique payloads of all phrases found in `text`, in order of first occurrence.
+        """
+        return list(dict.fromkeys(match.payload for match in self.finditer(text)))
+
+    def _scan(self, text):
+        folded = _fold(text)
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        alphabet = self._alphabet
+        lengths = self._lengths
+        whole_words = self.whole_words
+        size = len(folded)
+        matches = []
+        state = 0
+        for position, ch in enumerate(folded):
+            if ch not in alphabet:
+                state = 0
+                continue
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            end = position + 1
+            for phrase_id in outputs[state]:
+                start = end - lengths[phrase_id]
+                if whole_words and (
+                    (start > 0 and _is_word_char(folded[start - 1]) and _is_word_char(folded[start]))
+                    or (end < size and _is_word_char(folded[end]) and _is_word_char(folded[end - 1]))
+                ):
+                    continue
+                matches.append(PhraseMatch(start, end, text[start:end], self._payloads[phrase_id]))
+        return matches
+
+    @staticmethod
+    def _leftmost_longest(matches):
+        selected = []
+        last_end = -1
+        for match in sorted(matches, key=lambda m: (m.start, m.start - m.end)):
+            if match.start >= last_end:
+                selected.append(match)
+                last_end = match.end
+        return selected
+
+def spans(matches) -> list:
+    """
+    Converts matches into JSON-friendly dicts for result payloads and the UI.
+    """
+    return [{"phrase": match.payload, "start": match.start, "end": match.end} for match in matches]
\ No newline at end of file
@@ -0,0 +1,95 @@
+# utils/profiling.py
+
+"""
+On-demand profiles of a running server; nothing here runs until asked.
+
+    sample_stacks   samples every thread's Python stack at a fixed interval and
+                    returns collapsed stacks ("frame;frame;frame count" lines),
+                    the format py-spy --format raw, flamegraph.pl and
+                    speedscope read.
+    profile_loop    runs cProfile on the event loop thread for a while and
+                    returns the marshalled stats, the file format of
+                    cProfile's dump_stats (open it with pstats or snakeviz).
+"""
+
+import asyncio
+import collections
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+
+# Profiling endpoints are off unless PROFILING_ENABLED=1; profiles expose
+# source paths and can slow the process while they run.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "60"))
+
+# One profile at a time per process
+_profile_lock = threading.Lock()
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    Samples the Python stack of every other thread for `seconds`.
+
+    Args:
+        seconds (float): How long to sample, capped at PROFILE_MAX_SECONDS.
+        interval (float): Seconds between samples.
+
+    Returns:
+        str: Collapsed stacks, root first and prefixed with the thread name,
+             one "stack count" line per distinct stack.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        own_thread = threading.get_ident()
+        stacks = collections.Counter()
+        deadline = time.perf_counter() + min(seconds, PROFILE_MAX_SECONDS)
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+async def profile_loop(seconds: float) -> bytes:
+    """
+    Profiles the calling event loop's thread (every coroutine and callback it
+    runs) with cProfile for `seconds`. Work handed to executor threads or
+    worker processes is not included; `sample_stacks` covers threads.
+
+    Returns:
+        bytes: Marshalled pstats data, as written by `cProfile.Profile.dump_stats`.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(min(seconds, PROFILE_MAX_SECONDS))
+        finally:
+            profiler.disable()
+    finally:
+        _profile_lock.release()
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
\ No newline at end of file
@@ -0,0 +1,135 @@
+# utils/result_cache.py
+
+import copy
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes a text before hashing so trivially different copies of the same
+    message (extra spaces, line breaks, full-width characters) share a cache key.
+    Case is kept because a fine-tuned model may be case sensitive.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class ResultCache:
+    """
+    A bounded, thread-safe result cache with LRU and TTL eviction.
+
+    Keys are a hash of the normalized text together with a namespace that
+    identifies the model producing the result (e.g. its `model_path`), so two
+    models never share entries. Values are copied on the way in and out, so a
+    caller mutating its result cannot corrupt the cached one.
+    """
+    def __init__(self, max_entries=50000, ttl_seconds=3600.0):
+        """
+        Args:
+            max_entries (int): Largest number of results kept; the least recently used go first.
+            ttl_seconds (float): Age after which an entry is treated as missing. 0 disables expiry.
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{namespace}:{digest}"
+
+    def _is_expired(self, stored_at, now):
+        return self.ttl_seconds > 0 and now - stored_at > self.ttl_seconds
+
+    def get(self, namespace: str, text: str):
+        """
+        Returns a copy of the cached result, or None on a miss.
+        """
+        key = self.make_key(namespace, text)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def set(self, namespace: str, text: str, value):
+        key = self.make_key(namespace, text)
+        value = copy.deepcopy(value)
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            # Entries at the front are the least recently used; drop them while
+            # they are stale, then until the size bound holds.
+            while self._entries:
+                oldest_key, (stored_at, _) = next(iter(self._entries.items()))
+                if oldest_key == key or not self._is_expired(stored_at, now):
+                    break
+                del self._entries[oldest_key]
+                self.expirations += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, namespace: str, text: str, compute, use_cache=True):
+        """
+        Returns the cached result for `text`, computing and storing it on a miss.
+
+        Args:
+            namespace (str): Identity of the producer, typically the model name/path.
+            text (str): The input text.
+            compute (callable): Called with `text` on a miss.
+            use_cache (bool): Set to False to bypass the cache for this call.
+        """
+        if not use_cache:
+            return compute(text)
+        result = self.get(namespace, text)
+        if result is None:
+            result = compute(text)
+            self.set(namespace, text, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# One cache shared by every text path (classifier, sentiment, audio transcripts)
+shared_cache = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "50000")),
+    ttl_seconds=float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "3600"))
+)
\ No newline at end of file